@@ -3,7 +3,7 @@ import asyncio
 from datetime import datetime, timezone
 from typing import List, Dict, Optional, Any
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import UpdateOne
+from pymongo import UpdateMany, UpdateOne
 from models import BackendModelInfo, BackendInfo, ModelType, ModelSyncStatus
 
 
@@ -213,7 +213,64 @@ class ActiveModelsService:
         except Exception as e:
             print(f"Error syncing model {model_id} with Civitai: {e}")
             return False
-    
+
+    async def sync_models_with_civitai(self, links: List[Dict[str, Any]]) -> bool:
+        """
+        Batch form of sync_model_with_civitai: one bulk write per collection
+
+        Args:
+            links: Dicts with model_id, civitai_info and match_quality
+
+        Returns:
+            True if successful
+        """
+        if not links:
+            return True
+        now = datetime.now(timezone.utc)
+        active_operations = []
+        status_operations = []
+        for link in links:
+            civitai_info = link["civitai_info"]
+            active_operations.append(
+                UpdateMany(
+                    {"model_id": link["model_id"]},
+                    {
+                        "$set": {
+                            "civitai_model_id": civitai_info.get("modelId"),
+                            "civitai_model_name": civitai_info.get("name"),
+                            "civitai_match_quality": link["match_quality"]
+                        }
+                    }
+                )
+            )
+            status_operations.append(
+                UpdateOne(
+                    {"model_id": link["model_id"]},
+                    {
+                        "$set": {
+                            "civitai_model_id": civitai_info.get("modelId"),
+                            "sync_status": "synced",
+                            "last_sync_success": now,
+                            "sync_error": None
+                        },
+                        "$setOnInsert": {
+                            "model_id": link["model_id"],
+                            "last_sync_attempt": now
+                        }
+                    },
+                    upsert=True
+                )
+            )
+        try:
+            await asyncio.gather(
+                self.active_models_collection.bulk_write(active_operations, ordered=False),
+                self.sync_status_collection.bulk_write(status_operations, ordered=False),
+            )
+            return True
+        except Exception as e:
+            print(f"Error syncing {len(links)} models with Civitai: {e}")
+            return False
+
     async def get_models_for_sync(self, limit: int = 100) -> List[str]:
         """
         Get models that need to be synced with Civitai
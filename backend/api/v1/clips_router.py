@@ -1,8 +1,9 @@
 """Clip management router for API v1."""
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request
+from typing import List, Optional
 
-from .dependencies import get_project_service
+from .dependencies import get_project_service, get_project_revisions
+from services.project_revisions import ProjectRevisions
 from services.project_service import ProjectService
 from dtos import (
     ClipCreateDTO,
@@ -36,19 +37,34 @@ async def list_clips_by_scene(
 @router.get("/{clip_id}", response_model=ClipResponseDTO)
 async def get_clip(
     clip_id: str,
-    service: ProjectService = Depends(get_project_service)
+    request: Request,
+    service: ProjectService = Depends(get_project_service),
+    revisions: ProjectRevisions = Depends(get_project_revisions)
 ):
     """Get a specific clip"""
-    return await service.get_clip(clip_id)
+    return await revisions.respond(
+        request,
+        await revisions.project_for_clip(clip_id),
+        lambda: service.get_clip(clip_id),
+    )
 
 
 @router.get("/{clip_id}/gallery", response_model=ClipGalleryResponseDTO)
 async def get_clip_gallery(
     clip_id: str,
-    service: ProjectService = Depends(get_project_service)
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    image_cursor: Optional[str] = None,
+    video_cursor: Optional[str] = None,
+    service: ProjectService = Depends(get_project_service),
+    revisions: ProjectRevisions = Depends(get_project_revisions)
 ):
-    """Get clip gallery with all generated content"""
-    return await service.get_clip_gallery(clip_id)
+    """Get one page of a clip's generated content, newest first"""
+    return await revisions.respond(
+        request,
+        await revisions.project_for_clip(clip_id),
+        lambda: service.get_clip_gallery(clip_id, limit, image_cursor, video_cursor),
+    )
 
 
 @router.put("/{clip_id}", response_model=ClipResponseDTO)
@@ -8,12 +8,14 @@ from database import get_database
 from active_models_service import ActiveModelsService
 from repositories.clip_repository import ClipRepository
 from repositories.comfyui_repository import ComfyUIRepository
+from repositories.gallery_repository import GalleryRepository
 from repositories.project_repository import ProjectRepository
 from repositories.scene_repository import SceneRepository
 from repositories.user_repository import UserRepository
 from services.comfyui_service import ComfyUIService
 from services.generation_service import GenerationService
 from services.media_service import MediaService
+from services.project_revisions import ProjectRevisions, project_revisions
 from services.project_service import ProjectService
 from services.auth_service import AuthService
 
@@ -60,7 +62,12 @@ async def get_project_service(
     project_repo = ProjectRepository(db.projects)
     scene_repo = SceneRepository(db.scenes)
     clip_repo = ClipRepository(db.clips)
-    return ProjectService(project_repo, scene_repo, clip_repo)
+    gallery_repo = GalleryRepository(db.gallery_items)
+    return ProjectService(project_repo, scene_repo, clip_repo, gallery_repo)
+
+
+def get_project_revisions() -> ProjectRevisions:
+    return project_revisions
 
 
 async def get_comfyui_service(
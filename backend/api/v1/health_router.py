@@ -1,6 +1,9 @@
 from fastapi import APIRouter
 
 from database import db_manager
+from services.completion_watcher import completion_watchers
+from services.server_health import server_health_monitor
+from utils.http_pool import http_pool
 
 router = APIRouter(tags=["health"])
 
@@ -25,8 +28,17 @@ async def health_check():
                 "status": "up" if db_healthy else "down",
                 "database": db_manager.db_name,
                 "url": redacted_url,
-            }
+            },
+            "comfyui_servers": server_health_monitor.snapshot(),
         },
     }
 
-    return status
\ No newline at end of file
+    return status
+
+
+@router.get("/health/http", summary="Outbound HTTP pool metrics")
+async def http_pool_metrics():
+    """Return request counts, connection reuse and latency for ComfyUI backends."""
+    metrics = http_pool.get_metrics()
+    metrics["completion_watchers"] = completion_watchers.get_metrics()
+    return metrics
@@ -1,8 +1,9 @@
 """Project management router for API v1."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from typing import List, Optional
 
-from .dependencies import get_project_service, get_current_user_optional
+from .dependencies import get_project_service, get_project_revisions, get_current_user_optional
+from services.project_revisions import ProjectRevisions
 from services.project_service import ProjectService
 from dtos import (
     ProjectCreateDTO,
@@ -37,21 +38,27 @@ async def list_projects(
 @router.get("/{project_id}", response_model=ProjectResponseDTO)
 async def get_project(
     project_id: str,
+    request: Request,
     service: ProjectService = Depends(get_project_service),
+    revisions: ProjectRevisions = Depends(get_project_revisions),
     current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
     """Get a specific project"""
-    return await service.get_project(project_id)
+    return await revisions.respond(request, project_id, lambda: service.get_project(project_id))
 
 
 @router.get("/{project_id}/with-scenes", response_model=ProjectWithScenesDTO)
 async def get_project_with_scenes(
     project_id: str,
+    request: Request,
     service: ProjectService = Depends(get_project_service),
+    revisions: ProjectRevisions = Depends(get_project_revisions),
     current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
     """Get a project with all its scenes"""
-    return await service.get_project_with_scenes(project_id)
+    return await revisions.respond(
+        request, project_id, lambda: service.get_project_with_scenes(project_id)
+    )
 
 
 @router.put("/{project_id}", response_model=ProjectResponseDTO)
@@ -68,11 +75,15 @@ async def update_project(
 @router.get("/{project_id}/clips")
 async def get_project_clips(
     project_id: str,
+    request: Request,
     service: ProjectService = Depends(get_project_service),
+    revisions: ProjectRevisions = Depends(get_project_revisions),
     current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
     """Get all clips for a project"""
-    return await service.list_clips_by_project(project_id)
+    return await revisions.respond(
+        request, project_id, lambda: service.list_clips_by_project(project_id)
+    )
 
 
 @router.delete("/{project_id}")
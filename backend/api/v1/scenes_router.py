@@ -1,10 +1,12 @@
 """Scene management router for API v1."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from typing import List
 
-from .dependencies import get_project_service
+from .dependencies import get_project_service, get_project_revisions
+from services.project_revisions import ProjectRevisions
 from services.project_service import ProjectService
 from dtos import (
+    ClipTimelineBulkUpdateDTO,
     SceneCreateDTO,
     SceneUpdateDTO,
     SceneResponseDTO,
@@ -35,10 +37,16 @@ async def list_scenes_by_project(
 @router.get("/{scene_id}", response_model=SceneResponseDTO)
 async def get_scene(
     scene_id: str,
-    service: ProjectService = Depends(get_project_service)
+    request: Request,
+    service: ProjectService = Depends(get_project_service),
+    revisions: ProjectRevisions = Depends(get_project_revisions)
 ):
     """Get a specific scene"""
-    return await service.get_scene(scene_id)
+    return await revisions.respond(
+        request,
+        await revisions.project_for_scene(scene_id),
+        lambda: service.get_scene(scene_id),
+    )
 
 
 @router.put("/{scene_id}", response_model=SceneResponseDTO)
@@ -70,3 +78,16 @@ async def analyze_scene_timeline(
     Analyze timeline for a scene - detect overlaps, gaps, and provide suggestions
     """
     return await service.analyze_timeline(scene_id)
+
+
+@router.put("/{scene_id}/timeline")
+async def bulk_update_scene_timeline(
+    scene_id: str,
+    payload: ClipTimelineBulkUpdateDTO,
+    service: ProjectService = Depends(get_project_service)
+):
+    """
+    Reposition many clips at once: a ripple shift (every clip from a time
+    onwards moves by a delta) and/or explicit moves, validated as a whole
+    """
+    return await service.bulk_update_timeline(scene_id, payload)
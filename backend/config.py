@@ -26,6 +26,63 @@ class Config:
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
     OPENAI_DEFAULT_VIDEO_MODEL = os.environ.get("OPENAI_DEFAULT_VIDEO_MODEL", "sora-2")
 
+    # Queue persistence (write-behind journal)
+    QUEUE_JOURNAL_FLUSH_INTERVAL = float(os.environ.get("QUEUE_JOURNAL_FLUSH_INTERVAL", "0.5"))
+    QUEUE_JOURNAL_BATCH_SIZE = int(os.environ.get("QUEUE_JOURNAL_BATCH_SIZE", "500"))
+
+    # Queue dispatch: "local" (single process) or "lease" (shared queue_jobs, multi-worker)
+    QUEUE_DISPATCH_MODE = os.environ.get("QUEUE_DISPATCH_MODE", "local").lower()
+    QUEUE_LEASE_SECONDS = float(os.environ.get("QUEUE_LEASE_SECONDS", "60"))
+    QUEUE_LEASE_HEARTBEAT_INTERVAL = float(os.environ.get("QUEUE_LEASE_HEARTBEAT_INTERVAL", "15"))
+
+    # Batch ownership: a worker resumes an interrupted batch only once its owner's lease lapses
+    BATCH_LEASE_SECONDS = float(os.environ.get("BATCH_LEASE_SECONDS", "120"))
+
+    # Pooled HTTP sessions for ComfyUI / RunPod backends
+    COMFYUI_HTTP_LIMIT_PER_HOST = int(os.environ.get("COMFYUI_HTTP_LIMIT_PER_HOST", "8"))
+    COMFYUI_HTTP_DNS_CACHE_TTL = int(os.environ.get("COMFYUI_HTTP_DNS_CACHE_TTL", "300"))
+    COMFYUI_HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("COMFYUI_HTTP_KEEPALIVE_TIMEOUT", "30"))
+    COMFYUI_HTTP_TOTAL_TIMEOUT = float(os.environ.get("COMFYUI_HTTP_TOTAL_TIMEOUT", "60"))
+    COMFYUI_HTTP_CONNECT_TIMEOUT = float(os.environ.get("COMFYUI_HTTP_CONNECT_TIMEOUT", "10"))
+
+    # Background health checks and circuit breaker for ComfyUI backends
+    COMFYUI_HEALTH_INTERVAL = float(os.environ.get("COMFYUI_HEALTH_INTERVAL", "15"))
+    COMFYUI_HEALTH_TTL = float(os.environ.get("COMFYUI_HEALTH_TTL", "45"))
+    COMFYUI_BREAKER_COOLDOWN = float(os.environ.get("COMFYUI_BREAKER_COOLDOWN", "10"))
+    COMFYUI_BREAKER_MAX_COOLDOWN = float(os.environ.get("COMFYUI_BREAKER_MAX_COOLDOWN", "120"))
+    COMFYUI_DEGRADED_LATENCY = float(os.environ.get("COMFYUI_DEGRADED_LATENCY", "2.0"))
+
+    # Background model sync across all ComfyUI backends
+    MODEL_SYNC_INTERVAL = float(os.environ.get("MODEL_SYNC_INTERVAL", "300"))
+    MODEL_SYNC_CONCURRENCY = int(os.environ.get("MODEL_SYNC_CONCURRENCY", "4"))
+
+    # Clip documents embed only the newest variants (plus the selected one);
+    # the full gallery is paged from the gallery_items collection
+    GALLERY_SUMMARY_SIZE = int(os.environ.get("GALLERY_SUMMARY_SIZE", "12"))
+    GALLERY_PAGE_SIZE = int(os.environ.get("GALLERY_PAGE_SIZE", "50"))
+    GALLERY_MAX_PAGE_SIZE = int(os.environ.get("GALLERY_MAX_PAGE_SIZE", "200"))
+
+    # Per-scene timeline indexes cached for placement checks
+    TIMELINE_INDEX_MAX_SCENES = int(os.environ.get("TIMELINE_INDEX_MAX_SCENES", "256"))
+    TIMELINE_INDEX_TTL = float(os.environ.get("TIMELINE_INDEX_TTL", "60"))
+
+    # Project timeline pagination
+    TIMELINE_SCENE_PAGE_SIZE = int(os.environ.get("TIMELINE_SCENE_PAGE_SIZE", "200"))
+    TIMELINE_MAX_SCENE_PAGE_SIZE = int(os.environ.get("TIMELINE_MAX_SCENE_PAGE_SIZE", "1000"))
+    TIMELINE_CLIPS_PER_SCENE = int(os.environ.get("TIMELINE_CLIPS_PER_SCENE", "500"))
+
+    # Serialized project/scene/clip read responses kept per project revision
+    RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+
+    # Rendered export artifacts
+    EXPORT_CACHE_DIR = os.environ.get("EXPORT_CACHE_DIR", "uploads/exports")
+    EXPORT_SETTLE_SECONDS = float(os.environ.get("EXPORT_SETTLE_SECONDS", "30"))
+    EXPORT_RETAIN_SECONDS = float(os.environ.get("EXPORT_RETAIN_SECONDS", "300"))
+
+    # Civitai model matching
+    CIVITAI_MATCH_CANDIDATES = int(os.environ.get("CIVITAI_MATCH_CANDIDATES", "25"))
+    CIVITAI_INDEX_REFRESH_SECONDS = float(os.environ.get("CIVITAI_INDEX_REFRESH_SECONDS", "60"))
+
     # JWT Authentication
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "development-secret-change-in-production")
     JWT_ALGORITHM = "HS256"
@@ -18,6 +18,7 @@ REQUIRED_COLLECTIONS = [
     "style_templates",
     "comfyui_servers",
     "generation_batches",
+    "queue_jobs",
     "facefusion_jobs",
     "facefusion_presets",
     "database_models",
@@ -202,6 +203,11 @@ class DatabaseManager:
                 await col.create_index([("project_id", ASCENDING), ("created_at", DESCENDING)])
                 await col.create_index([("status", ASCENDING)])
             
+            elif collection_name == "queue_jobs":
+                await col.create_index([("id", ASCENDING)], unique=True)
+                await col.create_index([("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)])
+                await col.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+            
             # FaceFusion Collections
             elif collection_name == "facefusion_jobs":
                 await col.create_index([("id", ASCENDING)], unique=True)
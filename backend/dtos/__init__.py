@@ -24,6 +24,9 @@ from .clip_dtos import (
     ClipUpdateDTO,
     ClipResponseDTO,
     ClipTimelineUpdateDTO,
+    ClipTimelineMoveDTO,
+    ClipTimelineRippleDTO,
+    ClipTimelineBulkUpdateDTO,
     ClipGalleryResponseDTO,
     GeneratedContentDTO,
     ClipVersionDTO,
@@ -88,6 +91,9 @@ __all__ = [
     "ClipUpdateDTO",
     "ClipResponseDTO",
     "ClipTimelineUpdateDTO",
+    "ClipTimelineMoveDTO",
+    "ClipTimelineRippleDTO",
+    "ClipTimelineBulkUpdateDTO",
     "ClipGalleryResponseDTO",
     "GeneratedContentDTO",
     "ClipVersionDTO",
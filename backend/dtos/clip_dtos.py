@@ -112,6 +112,9 @@ class ClipResponseDTO(BaseModel):
     video_prompt: Optional[str] = ""
     generated_images: List[GeneratedContentDTO] = Field(default_factory=list)
     generated_videos: List[GeneratedContentDTO] = Field(default_factory=list)
+    # Embedded galleries are a bounded summary; totals count every variant
+    total_images: int = 0
+    total_videos: int = 0
     selected_image_id: Optional[str] = None
     selected_video_id: Optional[str] = None
     character_id: Optional[str] = None
@@ -120,6 +123,15 @@ class ClipResponseDTO(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    # Clips written before totals were tracked only have the embedded list
+    @validator("total_images", always=True)
+    def count_embedded_images(cls, value: int, values: Dict[str, Any]) -> int:
+        return max(value, len(values.get("generated_images") or []))
+
+    @validator("total_videos", always=True)
+    def count_embedded_videos(cls, value: int, values: Dict[str, Any]) -> int:
+        return max(value, len(values.get("generated_videos") or []))
+
 
 class ClipTimelineUpdateDTO(BaseModel):
     position: float = Field(..., ge=0, le=10000)
@@ -129,8 +141,33 @@ class ClipTimelineUpdateDTO(BaseModel):
         return round(value, 2)
 
 
+class ClipTimelineMoveDTO(BaseModel):
+    clip_id: str
+    position: float = Field(..., ge=0, le=10000)
+
+    @validator("position")
+    def normalize_position(cls, value: float) -> float:
+        return round(value, 2)
+
+
+class ClipTimelineRippleDTO(BaseModel):
+    """Shift every clip starting at or after ``after`` by ``delta`` seconds"""
+    after: float = Field(..., ge=0, le=10000)
+    delta: float = Field(..., ge=-10000, le=10000)
+
+
+class ClipTimelineBulkUpdateDTO(BaseModel):
+    moves: List[ClipTimelineMoveDTO] = Field(default_factory=list)
+    ripple: Optional[ClipTimelineRippleDTO] = None
+    check_overlap: bool = True
+
+
 class ClipGalleryResponseDTO(BaseModel):
     images: List[GeneratedContentDTO]
     videos: List[GeneratedContentDTO]
     selected_image_id: Optional[str]
-    selected_video_id: Optional[str]
\ No newline at end of file
+    selected_video_id: Optional[str]
+    total_images: int = 0
+    total_videos: int = 0
+    next_image_cursor: Optional[str] = None
+    next_video_cursor: Optional[str] = None
\ No newline at end of file
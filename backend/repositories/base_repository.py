@@ -64,4 +64,9 @@ class BaseRepository:
 
     async def delete_many(self, query: Dict[str, Any]) -> int:
         result = await self._collection.delete_many(query)
-        return result.deleted_count
\ No newline at end of file
+        return result.deleted_count
+
+    async def bulk_write(self, operations: List[Any], *, ordered: bool = False) -> Any:
+        if not operations:
+            return None
+        return await self._collection.bulk_write(operations, ordered=ordered)
\ No newline at end of file
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorCollection
-from pymongo import DESCENDING
+from pymongo import DESCENDING, ReturnDocument
 
 from .base_repository import BaseRepository
 
@@ -38,19 +39,50 @@ class BatchRepository(BaseRepository):
         self,
         batch_id: str,
         completed: int = 0,
-        failed: int = 0
+        failed: int = 0,
+        result: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
-        result = await self._collection.find_one_and_update(
+        update: Dict[str, Any] = {
+            "$inc": {
+                "completed": completed,
+                "failed": failed
+            },
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        }
+        if result is not None:
+            update["$push"] = {"results": result}
+        return await self._collection.find_one_and_update(
             {"id": batch_id},
+            update,
+            projection={"results": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def claim_batch(
+        self,
+        batch_id: str,
+        owner: str,
+        now: datetime,
+        lease_expires_at: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """Take over a processing batch that has no owner or whose owner's lease lapsed."""
+        return await self._collection.find_one_and_update(
             {
-                "$inc": {
-                    "completed": completed,
-                    "failed": failed
-                }
+                "id": batch_id,
+                "status": "processing",
+                "$or": [{"owner": None}, {"lease_expires_at": {"$lt": now}}],
             },
-            return_document=True
+            {"$set": {"owner": owner, "lease_expires_at": lease_expires_at, "updated_at": now}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def renew_lease(self, batch_id: str, owner: str, lease_expires_at: datetime) -> bool:
+        result = await self._collection.update_one(
+            {"id": batch_id, "status": "processing", "owner": owner},
+            {"$set": {"lease_expires_at": lease_expires_at}},
         )
-        return result
+        return result.matched_count == 1
 
     async def delete_completed_batches(self) -> int:
         return await self.delete_many({"status": {"$in": ["completed", "failed"]}})
@@ -4,15 +4,25 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
 
+from services.project_revisions import ProjectRevisions, project_revisions
 from .base_repository import BaseRepository
 
 
 class ClipRepository(BaseRepository):
-    """Repository for clip persistence operations."""
+    """Repository for clip persistence operations.
 
-    def __init__(self, collection: AsyncIOMotorCollection):
+    Clip writes made here bump the owning project's revision.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        revisions: Optional[ProjectRevisions] = None,
+    ):
         super().__init__(collection)
+        self._revisions = revisions or project_revisions
 
     async def list_by_scene(self, scene_id: str) -> List[Dict[str, Any]]:
         return await self.find_many(
@@ -26,6 +36,14 @@ class ClipRepository(BaseRepository):
             sort=[("order", 1)],
         )
 
+    async def list_timeline_spans(self, scene_id: str) -> List[Dict[str, Any]]:
+        """Just the fields needed to place clips on a scene's timeline"""
+        cursor = self._collection.find(
+            {"scene_id": scene_id},
+            {"_id": 0, "id": 1, "name": 1, "timeline_position": 1, "length": 1},
+        )
+        return await cursor.to_list(length=None)
+
     async def update_gallery(
         self,
         clip_id: str,
@@ -45,7 +63,9 @@ class ClipRepository(BaseRepository):
         if selected_video_id is not None:
             updates["selected_video_id"] = selected_video_id
 
-        return await self.update_by_id(clip_id, updates)
+        clip = await self.update_by_id(clip_id, updates)
+        await self._revisions.bump_for_clip_document(clip)
+        return clip
 
     async def update_prompts(
         self,
@@ -58,7 +78,9 @@ class ClipRepository(BaseRepository):
             "video_prompt": video_prompt,
             "updated_at": datetime.now(timezone.utc),
         }
-        return await self.update_by_id(clip_id, updates)
+        clip = await self.update_by_id(clip_id, updates)
+        await self._revisions.bump_for_clip_document(clip)
+        return clip
 
     async def update_timeline_position(
         self,
@@ -69,7 +91,27 @@ class ClipRepository(BaseRepository):
             "timeline_position": timeline_position,
             "updated_at": datetime.now(timezone.utc),
         }
-        return await self.update_by_id(clip_id, updates)
+        clip = await self.update_by_id(clip_id, updates)
+        await self._revisions.bump_for_clip_document(clip)
+        return clip
+
+    async def bulk_update_timeline_positions(
+        self,
+        scene_id: str,
+        positions: Dict[str, float],
+    ) -> int:
+        """Write many clip positions of one scene in a single unordered bulk write"""
+        now = datetime.now(timezone.utc)
+        result = await self.bulk_write([
+            UpdateOne(
+                {"id": clip_id, "scene_id": scene_id},
+                {"$set": {"timeline_position": position, "updated_at": now}},
+            )
+            for clip_id, position in positions.items()
+        ])
+        if result and result.modified_count:
+            await self._revisions.bump_for_scene(scene_id)
+        return result.modified_count if result else 0
 
     async def find_by_scene_id(self, scene_id: str) -> List[Dict[str, Any]]:
         """Find all clips for a scene"""
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .base_repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+# Models discovered on a server always carry their server_source; imported
+# Civitai catalogue entries do not, and may repeat names
+SERVER_MODEL_FILTER = {"server_source": {"$type": "string"}}
+
+DUPLICATE_KEY = 11000
+
+
+class DatabaseModelRepository(BaseRepository):
+    """Repository for the model catalogue in database_models."""
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        super().__init__(collection)
+
+    async def create_indexes(self) -> None:
+        await self._collection.create_index(
+            [("name", ASCENDING), ("type", ASCENDING)],
+            unique=True,
+            partialFilterExpression=SERVER_MODEL_FILTER,
+        )
+
+    async def upsert_by_name_and_type(
+        self,
+        documents: List[Dict[str, Any]],
+        updates: Dict[str, Any],
+    ) -> Dict[str, int]:
+        """
+        Upsert many server models keyed on (name, type) in one unordered bulk
+        write, each upsert an index lookup on the unique (name, type) index.
+
+        Existing models get ``updates``; missing ones are inserted from their
+        document with ``updates`` applied, which must set a server_source. A duplicate-key error means a
+        concurrent sync inserted the same model first, which is what this
+        write wanted anyway, so those are not treated as failures.
+        """
+        operations = []
+        seen = set()
+        for document in documents:
+            key = (document["name"], document["type"])
+            if key in seen:
+                continue
+            seen.add(key)
+            operations.append(
+                UpdateOne(
+                    {"name": document["name"], "type": document["type"], **SERVER_MODEL_FILTER},
+                    {
+                        "$set": updates,
+                        "$setOnInsert": {
+                            k: v for k, v in document.items()
+                            if k not in updates and k not in ("name", "type")
+                        },
+                    },
+                    upsert=True,
+                )
+            )
+
+        if not operations:
+            return {"inserted": 0, "matched": 0}
+        try:
+            result = await self.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as exc:
+            details = exc.details
+            failures = [e for e in details.get("writeErrors", []) if e.get("code") != DUPLICATE_KEY]
+            if failures:
+                raise
+            logger.info(
+                f"{len(details['writeErrors'])} models were inserted concurrently by another sync"
+            )
+        return {"inserted": details.get("nUpserted", 0), "matched": details.get("nMatched", 0)}
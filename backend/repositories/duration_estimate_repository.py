@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from .base_repository import BaseRepository
+
+
+class DurationEstimateRepository(BaseRepository):
+    """Repository for learned job duration estimates."""
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        super().__init__(collection)
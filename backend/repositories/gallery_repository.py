@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorCollection
-from pymongo import DESCENDING
+from pymongo import ASCENDING, DESCENDING, UpdateMany, UpdateOne
 
 from .base_repository import BaseRepository
 
@@ -14,6 +17,61 @@ class GalleryRepository(BaseRepository):
     def __init__(self, collection: AsyncIOMotorCollection):
         super().__init__(collection)
 
+    async def create_indexes(self) -> None:
+        await self._collection.create_index([("id", ASCENDING)], unique=True)
+        await self._collection.create_index(
+            [("clip_id", ASCENDING), ("content_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]
+        )
+
+    @staticmethod
+    def encode_cursor(item: Dict[str, Any]) -> str:
+        created_at = item["created_at"]
+        if isinstance(created_at, datetime):
+            created_at = created_at.isoformat()
+        payload = json.dumps({"created_at": created_at, "id": item["id"]})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Raises ValueError for a malformed cursor"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(payload["created_at"]), str(payload["id"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid gallery cursor: {cursor}") from exc
+
+    async def find_page(
+        self,
+        clip_id: str,
+        content_type: str,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a clip's gallery, newest first.
+
+        Returns the items and the cursor for the next page (None on the last
+        page). Ties on created_at are broken by id so pages never overlap.
+        """
+        query: Dict[str, Any] = {"clip_id": clip_id, "content_type": content_type}
+        if cursor:
+            created_at, item_id = self.decode_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "id": {"$lt": item_id}},
+            ]
+
+        items = await self._collection.find(query, {"_id": 0}).sort(
+            [("created_at", DESCENDING), ("id", DESCENDING)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.encode_cursor(items[-1])
+        return items, next_cursor
+
     async def find_by_clip_id(self, clip_id: str) -> List[Dict[str, Any]]:
         return await self.find_many({"clip_id": clip_id}, sort=[("created_at", DESCENDING)])
 
@@ -34,6 +92,9 @@ class GalleryRepository(BaseRepository):
             sort=[("created_at", DESCENDING)]
         )
 
+    async def count_by_clip_and_type(self, clip_id: str, content_type: str) -> int:
+        return await self._collection.count_documents({"clip_id": clip_id, "content_type": content_type})
+
     async def find_selected_content(self, clip_id: str, content_type: str) -> Optional[Dict[str, Any]]:
         return await self.find_one({"clip_id": clip_id, "content_type": content_type, "is_selected": True})
 
@@ -47,5 +108,15 @@ class GalleryRepository(BaseRepository):
         )
         return result.modified_count
 
+    async def select_item(self, clip_id: str, content_type: str, content_id: str) -> Any:
+        """Make content_id the only selected item of its type for the clip, in one bulk write"""
+        return await self.bulk_write([
+            UpdateMany(
+                {"clip_id": clip_id, "content_type": content_type, "is_selected": True, "id": {"$ne": content_id}},
+                {"$set": {"is_selected": False}},
+            ),
+            UpdateOne({"id": content_id, "clip_id": clip_id}, {"$set": {"is_selected": True}}),
+        ])
+
     async def delete_by_clip_id(self, clip_id: str) -> int:
         return await self.delete_many({"clip_id": clip_id})
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorCollection
-from pymongo import DESCENDING
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
 
 from .base_repository import BaseRepository
 
@@ -41,6 +42,28 @@ class QueueRepository(BaseRepository):
             updates.update(additional_fields)
         return await self.update_by_id(job_id, updates)
 
+    async def find_active_by_project_id(self, project_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many(
+            {"project_id": project_id, "status": {"$in": ["queued", "processing"]}},
+            sort=[("priority", DESCENDING), ("created_at", 1)],
+        )
+
+    async def status_totals(self) -> Dict[str, Dict[str, float]]:
+        """Job count and summed estimated_duration per status, in one aggregation."""
+        rows = await self._collection.aggregate([
+            {
+                "$group": {
+                    "_id": "$status",
+                    "count": {"$sum": 1},
+                    "estimated_seconds": {"$sum": {"$ifNull": ["$estimated_duration", 0]}},
+                }
+            }
+        ]).to_list(length=None)
+        return {
+            row["_id"]: {"count": row["count"], "estimated_seconds": row["estimated_seconds"]}
+            for row in rows
+        }
+
     async def delete_by_status(self, status: str) -> int:
         return await self.delete_many({"status": status})
 
@@ -48,3 +71,108 @@ class QueueRepository(BaseRepository):
         if sort_by is None:
             sort_by = [("created_at", DESCENDING)]
         return await self.find_many({}, sort=sort_by)
+
+    async def create_indexes(self) -> None:
+        await self._collection.create_index([("id", ASCENDING)], unique=True)
+        await self._collection.create_index(
+            [("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)]
+        )
+        await self._collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+
+    async def claim_next_job(
+        self,
+        server_id: str,
+        worker_id: str,
+        lease_expires_at: datetime,
+    ) -> Optional[Dict[str, Any]]:
+        """Atomically move the best queued job for a server to processing under a lease."""
+        return await self._collection.find_one_and_update(
+            {"status": "queued", "server_id": {"$in": [None, server_id]}},
+            {
+                "$set": {
+                    "status": "processing",
+                    "server_id": server_id,
+                    "worker_id": worker_id,
+                    "lease_expires_at": lease_expires_at,
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                }
+            },
+            sort=[("priority", DESCENDING), ("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renew_lease(self, job_id: str, worker_id: str, lease_expires_at: datetime) -> bool:
+        result = await self._collection.update_one(
+            {"id": job_id, "status": "processing", "worker_id": worker_id},
+            {"$set": {"lease_expires_at": lease_expires_at}},
+        )
+        return result.matched_count == 1
+
+    async def release_job(self, job_id: str, worker_id: str, updates: Dict[str, Any]) -> bool:
+        """Write the outcome of a leased job, only if the lease is still held."""
+        result = await self._collection.update_one(
+            {"id": job_id, "status": "processing", "worker_id": worker_id},
+            {"$set": updates},
+        )
+        return result.matched_count == 1
+
+    async def reclaim_expired_leases(self, now: datetime) -> int:
+        """Requeue processing jobs whose worker stopped renewing, failing those out of retries."""
+        expired = {"status": "processing", "lease_expires_at": {"$lt": now}}
+        out_of_retries = {
+            "$expr": {"$gte": [{"$add": ["$retry_count", 1]}, {"$ifNull": ["$max_retries", 3]}]}
+        }
+        released = {"worker_id": None, "lease_expires_at": None}
+
+        failed = await self._collection.update_many(
+            {**expired, **out_of_retries},
+            {
+                "$set": {
+                    **released,
+                    "status": "failed",
+                    "error": "Worker lease expired",
+                    "completed_at": now.isoformat(),
+                },
+                "$inc": {"retry_count": 1},
+            },
+        )
+        requeued = await self._collection.update_many(
+            expired,
+            {
+                "$set": {**released, "status": "queued", "server_id": None, "started_at": None},
+                "$inc": {"retry_count": 1},
+            },
+        )
+        return failed.modified_count + requeued.modified_count
+
+    async def requeue_job(self, job_id: str) -> bool:
+        result = await self._collection.update_one(
+            {"id": job_id, "status": {"$in": ["failed", "cancelled"]}},
+            {
+                "$set": {
+                    "status": "queued",
+                    "error": None,
+                    "started_at": None,
+                    "completed_at": None,
+                    "server_id": None,
+                    "worker_id": None,
+                    "lease_expires_at": None,
+                },
+                "$inc": {"retry_count": 1},
+            },
+        )
+        return result.modified_count == 1
+
+    async def cancel_job(self, job_id: str) -> bool:
+        result = await self._collection.update_one(
+            {"id": job_id, "status": {"$in": ["queued", "processing"]}},
+            {
+                "$set": {
+                    "status": "cancelled",
+                    "completed_at": datetime.now(timezone.utc).isoformat(),
+                    "worker_id": None,
+                    "lease_expires_at": None,
+                }
+            },
+        )
+        return result.modified_count == 1
@@ -1,11 +1,58 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 from .base_repository import BaseRepository
 
+# Full galleries live in gallery_items; timelines only need placement fields
+TIMELINE_CLIP_PROJECTION = {"_id": 0, "generated_images": 0, "generated_videos": 0}
+
+
+def timeline_pipeline(
+    project_id: str,
+    *,
+    clips_collection: str = "clips",
+    offset: int = 0,
+    limit: Optional[int] = 200,
+    clip_limit: Optional[int] = 500,
+) -> List[Dict[str, Any]]:
+    """
+    A project's scenes, each joined with its clips in order. ``limit`` and
+    ``clip_limit`` of None return every scene and every clip.
+    """
+    clip_stages: List[Dict[str, Any]] = [
+        {"$match": {"$expr": {"$eq": ["$scene_id", "$$scene_id"]}}},
+        {"$sort": {"order": 1}},
+    ]
+    if clip_limit is not None:
+        # One extra clip tells us whether the scene was cut short
+        clip_stages.append({"$limit": clip_limit + 1})
+    clip_stages.append({"$project": TIMELINE_CLIP_PROJECTION})
+
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": {"project_id": project_id}},
+        {"$sort": {"order": 1, "id": 1}},
+    ]
+    if offset:
+        pipeline.append({"$skip": offset})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline.extend([
+        {"$project": {"_id": 0}},
+        {
+            "$lookup": {
+                "from": clips_collection,
+                "let": {"scene_id": "$id"},
+                "pipeline": clip_stages,
+                "as": "clips",
+            }
+        },
+    ])
+    return pipeline
+
 
 class SceneRepository(BaseRepository):
     """Repository for scene persistence operations."""
@@ -40,6 +87,59 @@ class SceneRepository(BaseRepository):
 
         return scenes
 
+    async def list_timeline(
+        self,
+        project_id: str,
+        *,
+        clips_collection: str = "clips",
+        offset: int = 0,
+        limit: int = 200,
+        clip_limit: int = 500,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        A page of scenes with their clips from a single aggregation, plus the
+        project's total scene count. Scenes holding more than ``clip_limit``
+        clips are returned with ``clips_truncated`` set.
+        """
+        pipeline = timeline_pipeline(
+            project_id,
+            clips_collection=clips_collection,
+            offset=offset,
+            limit=limit,
+            clip_limit=clip_limit,
+        )
+        scenes, total = await asyncio.gather(
+            self._collection.aggregate(pipeline).to_list(length=None),
+            self._collection.count_documents({"project_id": project_id}),
+        )
+
+        for scene in scenes:
+            clips = scene.get("clips", [])
+            scene["clips_truncated"] = len(clips) > clip_limit
+            del clips[clip_limit:]
+
+        return scenes, total
+
+    async def iter_timeline(
+        self,
+        project_id: str,
+        *,
+        clips_collection: str = "clips",
+        batch_size: int = 20,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Every scene of a project with its clips, read lazily from one
+        aggregation cursor so only ``batch_size`` scenes are held at a time
+        """
+        pipeline = timeline_pipeline(
+            project_id,
+            clips_collection=clips_collection,
+            limit=None,
+            clip_limit=None,
+        )
+        async for scene in self._collection.aggregate(pipeline, batchSize=batch_size):
+            yield scene
+
     async def update_scene(
         self,
         scene_id: str,
@@ -0,0 +1,65 @@
+"""
+Benchmark batch throughput as servers are added.
+
+Runs a batch through BatchExecutor against simulated servers that take a fixed
+time per generation (with jitter), for 1, 2, 4, ... servers, and reports
+clips/second and the speedup over a single server.
+
+Usage:
+    python scripts/benchmark_batch_fanout.py [--clips 200] [--max-servers 8] [--slots 2] [--seconds 0.05]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from services.batch_executor import BatchExecutor, ServerLane
+
+
+async def run_batch(clip_count: int, server_count: int, slots: int, seconds: float):
+    lanes = [
+        ServerLane(server_id=f"server-{i}", semaphore=asyncio.Semaphore(slots), slots=slots)
+        for i in range(server_count)
+    ]
+    executor = BatchExecutor(lanes)
+
+    async def generate(lane, clip):
+        await asyncio.sleep(seconds * random.uniform(0.5, 1.5))
+        return clip
+
+    start = time.perf_counter()
+    await executor.run(list(range(clip_count)), generate)
+    elapsed = time.perf_counter() - start
+    stolen = sum(lane.stolen for lane in lanes)
+    return elapsed, stolen
+
+
+async def run(clip_count: int, max_servers: int, slots: int, seconds: float):
+    print(f"{clip_count} clips, {slots} slot(s)/server, ~{seconds * 1000:.0f}ms per generation")
+    baseline = None
+    server_count = 1
+    while server_count <= max_servers:
+        elapsed, stolen = await run_batch(clip_count, server_count, slots, seconds)
+        throughput = clip_count / elapsed
+        baseline = baseline or throughput
+        print(
+            f"servers={server_count:<3} {throughput:8.1f} clips/s  "
+            f"speedup={throughput / baseline:5.2f}x  steals={stolen}"
+        )
+        server_count *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clips", type=int, default=200)
+    parser.add_argument("--max-servers", type=int, default=8)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(run(args.clips, args.max_servers, args.slots, args.seconds))
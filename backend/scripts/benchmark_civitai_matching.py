@@ -0,0 +1,94 @@
+"""
+Benchmark matching server checkpoint filenames against Civitai models.
+
+Builds a synthetic Civitai catalogue and compares the previous linear scan
+(clean_model_name plus SequenceMatcher against every entry per lookup) with
+the trigram-indexed CivitaiMatcher, over server filenames derived from
+catalogue entries with the usual version suffixes and extensions.
+
+Usage:
+    python scripts/benchmark_civitai_matching.py [--catalog 5000] [--lookups 400]
+"""
+import argparse
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from services.civitai_matcher import CivitaiMatcher, clean_model_name
+
+WORDS = [
+    "juggernaut", "realvis", "dream", "shaper", "pony", "diffusion", "anima", "copax",
+    "timeless", "zavy", "chroma", "proto", "vision", "night", "vision", "crystal",
+    "clear", "photon", "epic", "realism", "turbo", "lightning", "hyper", "albedo",
+    "base", "wild", "cardos", "anime", "nova", "unstable", "helloworld", "starlight",
+]
+
+
+def make_catalog(size: int, rng: random.Random) -> list:
+    catalog = []
+    for i in range(size):
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3))).title() + f" XL {i}"
+        filename = name.replace(" ", "") + f"_v{rng.randint(1, 9)}0.safetensors"
+        catalog.append({"name": name, "modelVersions": [{"files": [{"name": filename}]}]})
+    return catalog
+
+
+def make_lookups(catalog: list, count: int, rng: random.Random) -> list:
+    lookups = []
+    for model in rng.sample(catalog, count):
+        name = model["name"].replace(" ", "_").lower()
+        lookups.append(rng.choice([f"{name}.safetensors", f"sdxl_{name}_v2-1.ckpt", name]))
+    return lookups
+
+
+def linear_scan(server_model_name: str, catalog: list):
+    """The previous per-lookup scan: clean and SequenceMatcher every entry"""
+    server_name_clean = clean_model_name(server_model_name)
+    best, best_score = None, 0.0
+    for model in catalog:
+        similarity = SequenceMatcher(None, server_name_clean, clean_model_name(model["name"])).ratio()
+        if similarity > best_score:
+            best, best_score = model, similarity
+    return best
+
+
+def run(catalog_size: int, lookup_count: int):
+    rng = random.Random(7)
+    catalog = make_catalog(catalog_size, rng)
+    lookups = make_lookups(catalog, lookup_count, rng)
+
+    start = time.perf_counter()
+    matcher = CivitaiMatcher.from_models(catalog)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    indexed = [matcher.best_match(name, fallback=True) for name in lookups]
+    indexed_ms = (time.perf_counter() - start) * 1000 / lookup_count
+
+    linear_lookups = lookups[: max(1, lookup_count // 20)]
+    start = time.perf_counter()
+    for name in linear_lookups:
+        linear_scan(name, catalog)
+    linear_ms = (time.perf_counter() - start) * 1000 / len(linear_lookups)
+
+    found = sum(1 for match in indexed if match)
+    print(f"{catalog_size} Civitai models, {lookup_count} lookups")
+    print(f"index build {build_ms:.0f} ms")
+    print(f"{'':>8} {'ms/lookup':>10}")
+    print(f"{'linear':>8} {linear_ms:>10.2f}")
+    print(f"{'index':>8} {indexed_ms:>10.3f}")
+    print(f"speedup {linear_ms / indexed_ms:.0f}x, {found}/{lookup_count} matched")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--catalog", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=400)
+    args = parser.parse_args()
+    run(args.catalog, args.lookups)
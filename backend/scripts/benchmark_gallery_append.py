@@ -0,0 +1,98 @@
+"""
+Benchmark appending one generated variant to a large clip gallery.
+
+Compares the previous approach (load the clip, rehydrate it through
+ClipResponseDTO, rewrite the whole gallery array with $set) against the
+current single $push, reporting the BSON size of the update sent to MongoDB
+and the Python time spent building it.
+
+Usage:
+    python scripts/benchmark_gallery_append.py [--sizes 100 500 1000 2000] [--rounds 20]
+"""
+import argparse
+import sys
+import time
+from typing import Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import bson
+
+from dtos.clip_dtos import ClipResponseDTO
+from services.gallery_manager import GalleryManager
+
+
+def make_content(index: int) -> dict:
+    return GalleryManager.create_generated_content(
+        content_type="image",
+        url=f"/uploads/generated/image-{index}.png",
+        prompt="a lighthouse on a cliff at dusk, volumetric light, film grain " * 3,
+        negative_prompt="blurry, low quality",
+        server_id="server-001",
+        server_name="Benchmark Server",
+        model_name="sdxl_base_1.0.safetensors",
+        model_type="sdxl",
+        generation_params={"steps": 30, "cfg": 7.0, "width": 1024, "height": 1024, "seed": index},
+    ).model_dump()
+
+
+def make_clip(gallery_size: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "id": "clip-001",
+        "scene_id": "scene-001",
+        "name": "Clip",
+        "lyrics": "",
+        "length": 5.0,
+        "timeline_position": 0.0,
+        "order": 0,
+        "image_prompt": "",
+        "video_prompt": "",
+        "generated_images": [make_content(i) for i in range(gallery_size)],
+        "generated_videos": [],
+        "selected_image_id": None,
+        "selected_video_id": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def full_array_update(clip_data: dict, new_content: dict) -> dict:
+    """What add_generated_content used to send"""
+    clip = ClipResponseDTO(**clip_data)
+    images = [item.model_dump() for item in clip.generated_images]
+    images.append(new_content)
+    return {"$set": {"generated_images": images, "updated_at": datetime.now(timezone.utc)}}
+
+
+def push_update(new_content: dict) -> dict:
+    return {"$push": {"generated_images": new_content}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+
+
+def timed(fn, rounds: int) -> Tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        payload = bson.encode(fn())
+    return (time.perf_counter() - start) / rounds * 1000, len(payload)
+
+
+def run(sizes, rounds: int):
+    new_content = make_content(-1)
+    print(f"{'variants':>9} {'old bytes':>11} {'new bytes':>10} {'old ms':>9} {'new ms':>8}")
+    for size in sizes:
+        clip_data = make_clip(size)
+        old_ms, old_bytes = timed(lambda: full_array_update(clip_data, new_content), rounds)
+        new_ms, new_bytes = timed(lambda: push_update(new_content), rounds)
+        print(f"{size:>9} {old_bytes:>11,} {new_bytes:>10,} {old_ms:>9.2f} {new_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.rounds)
@@ -0,0 +1,172 @@
+"""
+Benchmark loading a project timeline from MongoDB.
+
+Seeds a throwaway database with one project of N scenes, each holding clips
+with embedded gallery summaries, then compares the previous per-scene loop
+(one find for scenes plus one find per scene for clips, full documents)
+against SceneRepository.list_timeline (one $lookup aggregation with gallery
+arrays projected out). The database is dropped afterwards.
+
+With --stream it also compares time to first byte and peak Python memory of
+serializing the whole timeline up front against the NDJSON stream.
+
+Usage:
+    python scripts/benchmark_project_timeline.py [--scenes 200] [--clips 8] [--gallery 12] [--rounds 5] [--stream]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from repositories.scene_repository import SceneRepository
+from server import timeline_ndjson
+from utils.response_cache import serialize
+
+
+def make_gallery(clip_id: str, size: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": f"{clip_id}-image-{i}",
+            "content_type": "image",
+            "url": f"/uploads/generated/{clip_id}-{i}.png",
+            "prompt": "a lighthouse on a cliff at dusk, volumetric light, film grain " * 3,
+            "server_id": "server-001",
+            "model_name": "sdxl_base_1.0.safetensors",
+            "generation_params": {"steps": 30, "cfg": 7.0, "width": 1024, "height": 1024, "seed": i},
+            "is_selected": i == 0,
+            "created_at": now,
+        }
+        for i in range(size)
+    ]
+
+
+async def seed(db, scene_count: int, clips_per_scene: int, gallery_size: int) -> str:
+    project_id = str(uuid.uuid4())
+    await db.projects.insert_one({"id": project_id, "name": "Benchmark"})
+    await db.scenes.create_index([("project_id", 1), ("order", 1)])
+    await db.clips.create_index([("scene_id", 1), ("order", 1)])
+
+    scenes, clips = [], []
+    for s in range(scene_count):
+        scene_id = str(uuid.uuid4())
+        scenes.append({"id": scene_id, "project_id": project_id, "name": f"Scene {s}", "order": s})
+        for c in range(clips_per_scene):
+            clip_id = str(uuid.uuid4())
+            clips.append({
+                "id": clip_id,
+                "scene_id": scene_id,
+                "name": f"Clip {c}",
+                "order": c,
+                "length": 5.0,
+                "timeline_position": c * 5.0,
+                "generated_images": make_gallery(clip_id, gallery_size),
+                "generated_videos": [],
+            })
+    await db.scenes.insert_many(scenes)
+    await db.clips.insert_many(clips)
+    return project_id
+
+
+async def per_scene_queries(db, project_id: str) -> list:
+    """What get_project_timeline used to do"""
+    scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(None)
+    for scene in scenes:
+        scene.pop("_id", None)
+        clips = await db.clips.find({"scene_id": scene["id"]}).sort("order").to_list(None)
+        for clip in clips:
+            clip.pop("_id", None)
+        scene["clips"] = clips
+    return scenes
+
+
+async def aggregated(db, project_id: str, scene_count: int) -> list:
+    scenes, _ = await SceneRepository(db.scenes).list_timeline(
+        project_id, clips_collection=db.clips.name, limit=scene_count
+    )
+    return scenes
+
+
+async def timed(fn, rounds: int):
+    scenes = await fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        scenes = await fn()
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    return elapsed, len(bson.encode({"scenes": scenes}))
+
+
+async def first_byte_and_peak(chunks) -> tuple:
+    """Milliseconds until the first chunk, and peak traced memory while draining all of them"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    async for _ in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first * 1000, peak
+
+
+async def buffered(db, project_id: str, scene_count: int):
+    scenes = await aggregated(db, project_id, scene_count)
+    yield serialize({"project": {"id": project_id}, "scenes": scenes})
+
+
+async def compare_stream(db, project_id: str, scene_count: int):
+    repository = SceneRepository(db.scenes)
+    buffered_ttfb, buffered_peak = await first_byte_and_peak(buffered(db, project_id, scene_count))
+    stream_ttfb, stream_peak = await first_byte_and_peak(
+        timeline_ndjson({"id": project_id}, repository.iter_timeline(project_id, clips_collection=db.clips.name))
+    )
+    print(f"{'':>12} {'TTFB ms':>9} {'peak KiB':>10}")
+    print(f"{'buffered':>12} {buffered_ttfb:>9.1f} {buffered_peak / 1024:>10,.0f}")
+    print(f"{'ndjson':>12} {stream_ttfb:>9.1f} {stream_peak / 1024:>10,.0f}")
+
+
+async def run(scene_count: int, clips_per_scene: int, gallery_size: int, rounds: int, stream: bool = False):
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[f"timeline_benchmark_{uuid.uuid4().hex[:8]}"]
+    try:
+        project_id = await seed(db, scene_count, clips_per_scene, gallery_size)
+        print(f"{scene_count} scenes x {clips_per_scene} clips, {gallery_size} embedded images per clip")
+
+        old_ms, old_bytes = await timed(lambda: per_scene_queries(db, project_id), rounds)
+        new_ms, new_bytes = await timed(lambda: aggregated(db, project_id, scene_count), rounds)
+
+        print(f"{'':>12} {'ms':>9} {'bytes':>12} {'queries':>8}")
+        print(f"{'per-scene':>12} {old_ms:>9.1f} {old_bytes:>12,} {scene_count + 1:>8}")
+        print(f"{'$lookup':>12} {new_ms:>9.1f} {new_bytes:>12,} {2:>8}")
+        print(f"speedup {old_ms / new_ms:.1f}x, payload {old_bytes / new_bytes:.1f}x smaller")
+
+        if stream:
+            print()
+            await compare_stream(db, project_id, scene_count)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=200)
+    parser.add_argument("--clips", type=int, default=8)
+    parser.add_argument("--gallery", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--stream", action="store_true", help="Also compare buffered vs NDJSON streaming")
+    args = parser.parse_args()
+    asyncio.run(run(args.scenes, args.clips, args.gallery, args.rounds, args.stream))
@@ -0,0 +1,83 @@
+"""
+Benchmark QueueManager dispatch latency with a large backlog of queued jobs.
+
+Fills an in-memory QueueManager (no repository) with N jobs of mixed priority,
+then measures add_job, get_next_job, get_job_status and cancel_job latency.
+
+Usage:
+    python scripts/benchmark_queue_dispatch.py [--jobs 100000] [--samples 1000]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from services.queue_manager import QueueManager
+
+
+def _report(name: str, samples_ms):
+    samples_ms = sorted(samples_ms)
+    p50 = statistics.median(samples_ms)
+    p99 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.99))]
+    print(f"{name:<16} p50={p50 * 1000:8.1f}us  p99={p99 * 1000:8.1f}us  max={samples_ms[-1] * 1000:8.1f}us")
+
+
+async def run(job_count: int, sample_count: int):
+    logging.disable(logging.INFO)
+    manager = QueueManager()
+    await manager.register_server("server-001", "Bench Server", True, max_concurrent=sample_count)
+
+    print(f"Enqueueing {job_count} jobs...")
+    enqueue_ms = []
+    for i in range(job_count):
+        start = time.perf_counter()
+        await manager.add_job(
+            job_id=f"job-{i}",
+            clip_id=f"clip-{i}",
+            project_id="bench",
+            generation_type="image",
+            prompt="benchmark",
+            priority=random.randint(0, 10),
+        )
+        enqueue_ms.append((time.perf_counter() - start) * 1000)
+
+    lookup_ms = []
+    for job_id in random.sample(range(job_count), sample_count):
+        start = time.perf_counter()
+        manager.get_job_status(f"job-{job_id}")
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+
+    cancel_ms = []
+    for job_id in random.sample(range(job_count), sample_count):
+        start = time.perf_counter()
+        await manager.cancel_job(f"job-{job_id}")
+        cancel_ms.append((time.perf_counter() - start) * 1000)
+
+    dispatch_ms = []
+    for _ in range(sample_count):
+        start = time.perf_counter()
+        job = await manager.get_next_job("server-001")
+        dispatch_ms.append((time.perf_counter() - start) * 1000)
+        assert job is not None
+
+    print(f"Queue depth after run: {len(manager.queue)}")
+    _report("add_job", enqueue_ms)
+    _report("get_job_status", lookup_ms)
+    _report("cancel_job", cancel_ms)
+    _report("get_next_job", dispatch_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.jobs, args.samples))
@@ -0,0 +1,124 @@
+"""
+Benchmark scene timeline analysis.
+
+Compares the previous pairwise check_overlap double loop against the
+sweep-line TimelineValidator.analyze_timeline on synthetic music-video scenes
+(mostly back-to-back shots, with a share of overlapping and gapped ones),
+then times drag-and-drop moves: the previous linear overlap check plus full
+summary rebuild versus a cached TimelineIndex.
+
+Usage:
+    python scripts/benchmark_timeline_analysis.py [--clips 1000 5000 10000] [--overlap-rate 0.05]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from utils.timeline_index import TimelineIndex, TimelineSpan
+from utils.timeline_validator import TimelineValidator
+
+
+def make_scene(clip_count: int, overlap_rate: float, seed: int = 1):
+    rng = random.Random(seed)
+    clips = []
+    position = 0.0
+    for index in range(clip_count):
+        length = round(rng.uniform(0.5, 4.0), 2)
+        clips.append(SimpleNamespace(
+            id=f"clip-{index}", name=f"Shot {index}", timeline_position=position, length=length
+        ))
+        roll = rng.random()
+        if roll < overlap_rate:
+            position += length * 0.5  # Next shot overlaps this one
+        elif roll < overlap_rate * 2:
+            position += length + 1.0  # Leave a gap
+        else:
+            position += length
+    rng.shuffle(clips)  # Clips come back from Mongo in arbitrary order
+    return clips
+
+
+def pairwise_analysis(clips):
+    """The previous analyze_scene_timeline loop"""
+    overlaps = []
+    for i, clip1 in enumerate(clips):
+        for clip2 in clips[i + 1:]:
+            is_valid, error_msg = TimelineValidator.check_overlap(
+                clip_id=clip1.id,
+                new_position=clip1.timeline_position,
+                clip_length=clip1.length,
+                other_clips=[clip2],
+            )
+            if not is_valid:
+                overlaps.append({"clip1_id": clip1.id, "clip2_id": clip2.id, "error": error_msg})
+    return overlaps
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(clip_counts, overlap_rate: float, skip_pairwise_over: int):
+    print(f"{'clips':>7} {'pairwise s':>11} {'sweep ms':>9} {'speedup':>9} {'overlaps':>9}")
+    for count in clip_counts:
+        clips = make_scene(count, overlap_rate)
+        sweep_seconds, analysis = timed(lambda: TimelineValidator.analyze_timeline(clips))
+
+        if count <= skip_pairwise_over:
+            pairwise_seconds, overlaps = timed(lambda: pairwise_analysis(clips))
+            assert len(overlaps) == len(analysis["overlaps"])
+            pairwise = f"{pairwise_seconds:11.2f}"
+            speedup = f"{pairwise_seconds / sweep_seconds:8.0f}x"
+        else:
+            pairwise, speedup = f"{'skipped':>11}", f"{'-':>9}"
+
+        print(f"{count:>7} {pairwise} {sweep_seconds * 1000:9.1f} {speedup} {len(analysis['overlaps']):>9}")
+
+
+def run_moves(clip_counts, overlap_rate: float, moves: int):
+    print(f"\n{'clips':>7} {'linear ms/move':>15} {'index ms/move':>14}")
+    for count in clip_counts:
+        clips = make_scene(count, overlap_rate)
+        rng = random.Random(2)
+        timeline_end = max(c.timeline_position + c.length for c in clips)
+        targets = [(rng.choice(clips), rng.uniform(0, timeline_end)) for _ in range(moves)]
+
+        def linear():
+            for clip, position in targets:
+                TimelineValidator.check_overlap(clip.id, position, clip.length, clips)
+                TimelineValidator.get_timeline_summary(clips)
+
+        index = TimelineIndex(
+            TimelineSpan(c.id, c.name, c.timeline_position, c.length) for c in clips
+        )
+
+        def indexed():
+            for clip, position in targets:
+                if index.find_overlap(position, position + clip.length, exclude=clip.id) is None:
+                    index.move(clip.id, position)
+                index.summary()
+
+        linear_seconds, _ = timed(linear)
+        index_seconds, _ = timed(indexed)
+        print(f"{count:>7} {linear_seconds / moves * 1000:15.2f} {index_seconds / moves * 1000:14.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clips", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--overlap-rate", type=float, default=0.05)
+    parser.add_argument("--skip-pairwise-over", type=int, default=10000,
+                        help="Don't time the quadratic loop above this many clips")
+    parser.add_argument("--moves", type=int, default=200)
+    args = parser.parse_args()
+    run(args.clips, args.overlap_rate, args.skip_pairwise_over)
+    run_moves(args.clips, args.overlap_rate, args.moves)
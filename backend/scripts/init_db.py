@@ -128,6 +128,12 @@ async def ensure_indexes(db) -> None:
     await ensure("database_models", [("id", ASCENDING)], unique=True)
     await ensure("database_models", [("is_active", ASCENDING), ("type", ASCENDING)])
     await ensure("database_models", [("base_model", ASCENDING), ("is_active", ASCENDING)])
+    await ensure(
+        "database_models",
+        [("name", ASCENDING), ("type", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"server_source": {"$type": "string"}},
+    )
 
     logger.info("Inference configurations...")
     await ensure("inference_configurations", [("model_id", ASCENDING), ("preset_type", ASCENDING)], unique=True)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Migration script to move embedded clip galleries into gallery_items.
+
+For every clip that still embeds generated_images / generated_videos, this
+script:
+- upserts each embedded item into gallery_items (keyed by item id, so it is
+  safe to re-run and never overwrites items already written there)
+- sets total_images / total_videos from the gallery_items counts
+- trims the embedded arrays to the bounded summary (newest items plus the
+  selected one) served with clips and timelines
+
+Usage:
+    python migrate_gallery_items.py [--dry-run] [--batch-size 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from repositories.gallery_repository import GalleryRepository
+from services.gallery_manager import GalleryManager
+
+
+logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+logger = logging.getLogger("migrate_gallery_items")
+
+GALLERY_FIELDS = {
+    "image": ("generated_images", "total_images"),
+    "video": ("generated_videos", "total_videos"),
+}
+
+
+def load_env_from_file(env_path: Path) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    try:
+        if env_path.exists():
+            for line in env_path.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                k, v = line.split("=", 1)
+                values[k.strip()] = v.strip()
+    except Exception as exc:
+        logger.warning("Failed to read .env at %s: %s", env_path, exc)
+    return values
+
+
+def backfill_query(summary_size: int) -> Dict[str, Any]:
+    """Clips without tracked totals, or whose embedded gallery exceeds the summary"""
+    conditions: List[Dict[str, Any]] = []
+    for field_name, count_field in GALLERY_FIELDS.values():
+        conditions.append({count_field: {"$exists": False}})
+        conditions.append({f"{field_name}.{summary_size}": {"$exists": True}})
+    return {"$or": conditions}
+
+
+async def migrate_clip(db, manager: GalleryManager, clip: Dict[str, Any]) -> int:
+    """Backfill one clip; returns the number of embedded items found"""
+    moved = 0
+    summaries: Dict[str, Any] = {}
+
+    for content_type, (field_name, _) in GALLERY_FIELDS.items():
+        items = clip.get(field_name) or []
+        moved += len(items)
+        await manager.backfill_clip(db, clip["id"], content_type, items)
+        summaries[field_name] = manager.summarize(items)
+
+    await db.clips.update_one({"id": clip["id"]}, {"$set": summaries})
+    return moved
+
+
+async def migrate_galleries(db, dry_run: bool = False, batch_size: int = 200) -> None:
+    """Move embedded galleries of every clip into gallery_items"""
+
+    repository = GalleryRepository(db.gallery_items)
+    manager = GalleryManager(repository)
+    query = backfill_query(manager.summary_size)
+
+    try:
+        count = await db.clips.count_documents(query)
+        if count == 0:
+            logger.info("No clips need migration")
+            return
+
+        logger.info(f"Found {count} clip(s) to backfill{' (dry run)' if dry_run else ''}")
+        if dry_run:
+            return
+
+        await repository.create_indexes()
+
+        clips_done = 0
+        items_moved = 0
+        cursor = db.clips.find(
+            query,
+            {"_id": 0, "id": 1, "generated_images": 1, "generated_videos": 1},
+            batch_size=batch_size,
+        )
+        async for clip in cursor:
+            items_moved += await migrate_clip(db, manager, clip)
+            clips_done += 1
+            if clips_done % batch_size == 0:
+                logger.info(f"  {clips_done}/{count} clips, {items_moved} gallery items")
+
+        logger.info(f"✓ Backfilled {clips_done} clip(s), {items_moved} embedded gallery item(s)")
+
+    except PyMongoError as exc:
+        logger.error(f"Migration failed: {exc}")
+        raise
+
+
+async def verify_galleries(db) -> None:
+    """Report clips that still need backfilling"""
+
+    manager = GalleryManager()
+    try:
+        remaining = await db.clips.count_documents(backfill_query(manager.summary_size))
+        total_items = await db.gallery_items.count_documents({})
+
+        logger.info("")
+        logger.info("Migration Verification:")
+        logger.info(f"  gallery_items documents: {total_items}")
+        logger.info(f"  Clips still needing backfill: {remaining}")
+        if remaining:
+            logger.warning("  ⚠ Some clips still embed their full gallery")
+        else:
+            logger.info("  ✓ All clip galleries are bounded and tracked")
+
+    except PyMongoError as exc:
+        logger.error(f"Verification failed: {exc}")
+
+
+async def main(dry_run: bool, batch_size: int) -> None:
+    repo_root = Path(__file__).resolve().parents[2]
+    backend_env = load_env_from_file(repo_root / "backend" / ".env")
+
+    mongo_url = os.environ.get("MONGO_URL") or backend_env.get("MONGO_URL") or "mongodb://192.168.1.10:27017"
+    db_name = os.environ.get("DB_NAME") or backend_env.get("DB_NAME") or "storyboard"
+
+    logger.info("=" * 60)
+    logger.info("Clip Gallery Migration")
+    logger.info("=" * 60)
+    logger.info(f"MongoDB URL: {mongo_url}")
+    logger.info(f"Database: {db_name}")
+    logger.info("")
+
+    client = AsyncIOMotorClient(mongo_url)
+    try:
+        await client.admin.command("ping")
+        logger.info("✓ MongoDB connection successful")
+    except Exception as exc:
+        logger.critical(f"✗ Cannot connect to MongoDB at {mongo_url}: {exc}")
+        raise SystemExit(2)
+
+    db = client[db_name]
+
+    logger.info("")
+    logger.info("Starting migration...")
+    await migrate_galleries(db, dry_run=dry_run, batch_size=batch_size)
+
+    if not dry_run:
+        await verify_galleries(db)
+
+    logger.info("")
+    logger.info("=" * 60)
+    logger.info("✓ Migration complete")
+    logger.info("=" * 60)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move embedded clip galleries into gallery_items")
+    parser.add_argument("--dry-run", action="store_true", help="Count clips and items without writing")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.batch_size))
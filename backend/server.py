@@ -6,9 +6,10 @@ from fastapi import (
     File,
     Form,
     Depends,
+    Query,
     Request,
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -16,12 +17,13 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone
 import aiohttp
 import json
 import asyncio
+import time
 from fastapi.staticfiles import StaticFiles
 import shutil
 import warnings
@@ -61,6 +63,11 @@ from utils.errors import (
     GenerationError,
     ConflictError,
 )
+from utils.http_pool import RUNPOD_API_BASE, http_pool
+from services.completion_watcher import completion_watchers
+from services.server_health import server_health_monitor
+from utils.timeline_index import timeline_index_cache
+from services.project_revisions import project_revisions
 
 # For backward compatibility - global db reference
 db = None  # Will be initialized during startup
@@ -732,6 +739,13 @@ class CivitaiSearchRequest(BaseModel):
     search_query: Optional[str] = None
 
 
+class CivitaiBatchMatchRequest(BaseModel):
+    server_id: Optional[str] = None  # Match every model discovered on this server
+    model_ids: Optional[List[str]] = None
+    include_low_confidence: bool = True
+    overwrite_manual: bool = False  # Replace links made with link-civitai
+
+
 class ComfyUIServerInfo(BaseModel):
     server: ComfyUIServer
     models: List[Model] = []
@@ -879,6 +893,9 @@ class Clip(BaseModel):
     # Gallery system
     generated_images: List[GeneratedContent] = []
     generated_videos: List[GeneratedContent] = []
+    # Embedded galleries are a bounded summary; totals count every variant
+    total_images: int = 0
+    total_videos: int = 0
     selected_image_id: Optional[str] = None
     selected_video_id: Optional[str] = None
     # Character reference
@@ -1617,7 +1634,7 @@ class ComfyUIClient:
             return False
 
     async def _check_standard_connection(self) -> bool:
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(self.base_url) as session:
             async with session.get(
                 f"{self.base_url}/system_stats", timeout=5
             ) as response:
@@ -1639,7 +1656,7 @@ class ComfyUIClient:
         }
 
         # Try multiple methods to verify endpoint
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(RUNPOD_API_BASE) as session:
             # Method 1: Check endpoint status
             try:
                 status_url = f"https://api.runpod.ai/v2/{self.endpoint_id}/status"
@@ -1699,7 +1716,7 @@ class ComfyUIClient:
         return {"checkpoints": [], "loras": [], "vaes": []}
 
     async def _get_standard_models(self) -> Dict[str, List[str]]:
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(self.base_url) as session:
             async with session.get(f"{self.base_url}/object_info") as response:
                 if response.status == 200:
                     data = await response.json()
@@ -1805,7 +1822,7 @@ class ComfyUIClient:
 
         request_data = {"input": runpod_input}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(RUNPOD_API_BASE) as session:
             # Submit job to RunPod
             async with session.post(
                 f"https://api.runpod.ai/v2/{self.endpoint_id}/run",
@@ -1938,33 +1955,17 @@ class ComfyUIClient:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                # Queue the prompt
-                async with session.post(
-                    f"{self.base_url}/prompt", json={"prompt": workflow}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        prompt_id = result.get("prompt_id")
-
-                        if prompt_id:
-                            # Poll for completion
-                            for _ in range(60):  # 60 seconds timeout
-                                await asyncio.sleep(1)
-                                async with session.get(
-                                    f"{self.base_url}/history/{prompt_id}"
-                                ) as hist_response:
-                                    if hist_response.status == 200:
-                                        history = await hist_response.json()
-                                        if prompt_id in history:
-                                            outputs = history[prompt_id].get(
-                                                "outputs", {}
-                                            )
-                                            for node_id, output in outputs.items():
-                                                if "images" in output:
-                                                    image_info = output["images"][0]
-                                                    filename = image_info["filename"]
-                                                    return f"{self.base_url}/view?filename={filename}"
+            prompt_id = await self._queue_prompt(workflow)
+            if prompt_id:
+                # Wait for completion events (falls back to polling /history)
+                outputs = await completion_watchers.get(self.base_url).wait_for(
+                    prompt_id, timeout=60
+                )
+                for node_id, output in (outputs or {}).items():
+                    if "images" in output:
+                        image_info = output["images"][0]
+                        filename = image_info["filename"]
+                        return f"{self.base_url}/view?filename={filename}"
         except Exception as e:
             logging.error(f"Error generating image: {e}")
         return None
@@ -2030,7 +2031,7 @@ class ComfyUIClient:
 
         request_data = {"input": runpod_input}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(RUNPOD_API_BASE) as session:
             # Submit job to RunPod
             async with session.post(
                 f"https://api.runpod.ai/v2/{self.endpoint_id}/run",
@@ -2110,48 +2111,39 @@ class ComfyUIClient:
             )
 
         try:
-            async with aiohttp.ClientSession() as session:
-                # Queue the prompt
-                async with session.post(
-                    f"{self.base_url}/prompt", json={"prompt": workflow}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        prompt_id = result.get("prompt_id")
-
-                        if prompt_id:
-                            # Poll for completion - videos take longer
-                            for _ in range(300):  # 5 minutes timeout
-                                await asyncio.sleep(2)
-                                async with session.get(
-                                    f"{self.base_url}/history/{prompt_id}"
-                                ) as hist_response:
-                                    if hist_response.status == 200:
-                                        history = await hist_response.json()
-                                        if prompt_id in history:
-                                            outputs = history[prompt_id].get(
-                                                "outputs", {}
-                                            )
-                                            for node_id, output in outputs.items():
-                                                if (
-                                                    "gifs" in output
-                                                    or "videos" in output
-                                                ):
-                                                    # Look for video output
-                                                    video_files = output.get(
-                                                        "gifs", output.get("videos", [])
-                                                    )
-                                                    if video_files:
-                                                        video_info = video_files[0]
-                                                        filename = video_info.get(
-                                                            "filename"
-                                                        )
-                                                        if filename:
-                                                            return f"{self.base_url}/view?filename={filename}"
+            prompt_id = await self._queue_prompt(workflow)
+            if prompt_id:
+                # Wait for completion events - videos take longer
+                outputs = await completion_watchers.get(self.base_url).wait_for(
+                    prompt_id, timeout=600
+                )
+                for node_id, output in (outputs or {}).items():
+                    if "gifs" in output or "videos" in output:
+                        # Look for video output
+                        video_files = output.get("gifs", output.get("videos", []))
+                        if video_files:
+                            filename = video_files[0].get("filename")
+                            if filename:
+                                return f"{self.base_url}/view?filename={filename}"
         except Exception as e:
             logging.error(f"Error generating video: {e}")
         return None
 
+    async def _queue_prompt(self, workflow: Dict[str, Any]) -> Optional[str]:
+        """Submit a workflow with the server's watcher client id; returns the prompt id"""
+        watcher = completion_watchers.get(self.base_url)
+        await watcher.ensure_connected()
+
+        async with http_pool.session(self.base_url) as session:
+            async with session.post(
+                f"{self.base_url}/prompt",
+                json={"prompt": workflow, "client_id": watcher.client_id},
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return result.get("prompt_id")
+        return None
+
     async def _create_wan_video_workflow(
         self, prompt: str, negative_prompt: str, model: str, params: Dict, loras: List
     ) -> Dict:
@@ -2471,7 +2463,7 @@ class ComfyUIClient:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session(self.base_url) as session:
                 # Queue the prompt
                 async with session.post(
                     f"{self.base_url}/prompt", json={"prompt": workflow}
@@ -2567,7 +2559,7 @@ class ComfyUIClient:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session(self.base_url) as session:
                 # Queue the prompt
                 async with session.post(
                     f"{self.base_url}/prompt", json={"prompt": workflow}
@@ -2777,7 +2769,7 @@ class ComfyUIClient:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session(self.base_url) as session:
                 async with session.post(
                     f"{self.base_url}/prompt", json={"prompt": workflow}
                 ) as response:
@@ -2888,7 +2880,7 @@ class ComfyUIClient:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session(self.base_url) as session:
                 async with session.post(
                     f"{self.base_url}/prompt", json={"prompt": workflow}
                 ) as response:
@@ -3112,6 +3104,110 @@ async def delete_model(model_id: str, db_conn=Depends(get_database)):
     return {"message": "Model deleted successfully"}
 
 
+@api_router.post("/models/match-civitai")
+async def match_models_civitai(
+    request: CivitaiBatchMatchRequest, db_conn=Depends(get_database)
+):
+    """
+    Link many models to Civitai in one pass: every distinct name is matched
+    against the Civitai index once and all links are written with one
+    bulk write. Reports how the match scores are distributed.
+    """
+    from pymongo import UpdateOne
+    from services.civitai_matcher import civitai_matcher, score_distribution
+
+    if not request.server_id and not request.model_ids:
+        raise HTTPException(
+            status_code=400, detail="Provide a server_id or a list of model_ids"
+        )
+    if request.server_id and not await db_conn.comfyui_servers.find_one(
+        {"id": request.server_id}, {"_id": 0, "id": 1}
+    ):
+        raise ServerNotFoundError(request.server_id)
+
+    started = time.perf_counter()
+    query: Dict[str, Any] = {"source": {"$ne": "civitai_sdxl"}}
+    if request.server_id:
+        query["server_source"] = request.server_id
+    if request.model_ids:
+        query["id"] = {"$in": request.model_ids}
+    models = await db_conn.database_models.find(
+        query, {"_id": 0, "id": 1, "name": 1, "civitai_match_quality": 1}
+    ).to_list(length=None)
+
+    skipped_manual = 0
+    if not request.overwrite_manual:
+        candidates = [m for m in models if m.get("civitai_match_quality") != "manual"]
+        skipped_manual = len(models) - len(candidates)
+        models = candidates
+
+    await civitai_matcher.refresh(db_conn)
+    results = civitai_matcher.match_many(
+        [model["name"] for model in models], fallback=request.include_low_confidence
+    )
+
+    winners = {match.key for match, _ in results.values() if match}
+    civitai_docs = await db_conn.database_models.find(
+        {"id": {"$in": list(winners)}}, {"_id": 0, "id": 1, "civitai_info": 1}
+    ).to_list(length=None)
+    civitai_by_key = {doc["id"]: doc.get("civitai_info") for doc in civitai_docs}
+
+    now = datetime.now(timezone.utc)
+    operations = []
+    links = []
+    unmatched = []
+    scores = []
+    qualities: Dict[str, int] = {"high_confidence": 0, "low_confidence": 0, "unmatched": 0}
+    reasons: Dict[str, int] = {}
+    for model in models:
+        match, quality = results[model["name"]]
+        civitai_info = civitai_by_key.get(match.key) if match else None
+        if not civitai_info:
+            qualities["unmatched"] += 1
+            unmatched.append(model["name"])
+            continue
+
+        civitai_info = CivitaiModelInfo(**civitai_info).dict()
+        qualities[quality] += 1
+        reasons[match.reason] = reasons.get(match.reason, 0) + 1
+        scores.append(match.score)
+        operations.append(
+            UpdateOne(
+                {"id": model["id"]},
+                {
+                    "$set": {
+                        "civitai_info": civitai_info,
+                        "civitai_match_quality": quality,
+                        "civitai_match_score": round(match.score, 3),
+                        "updated_at": now,
+                    }
+                },
+            )
+        )
+        links.append(
+            {"model_id": model["id"], "civitai_info": civitai_info, "match_quality": quality}
+        )
+
+    modified = 0
+    if operations:
+        result = await db_conn.database_models.bulk_write(operations, ordered=False)
+        modified = result.modified_count
+        if active_models_service:
+            await active_models_service.sync_models_with_civitai(links)
+
+    return {
+        "requested": len(models) + skipped_manual,
+        "matched": len(operations),
+        "modified": modified,
+        "skipped_manual": skipped_manual,
+        "match_quality": qualities,
+        "reasons": reasons,
+        "scores": score_distribution(scores),
+        "unmatched": unmatched,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
 @api_router.post("/models/{model_id}/sync-civitai")
 async def sync_model_civitai(model_id: str, db_conn=Depends(get_database)):
     """Sync model with Civitai database and get available profiles"""
@@ -3663,75 +3759,79 @@ async def sync_server_models(server_id: str, db_conn=Depends(get_database)):
         raise HTTPException(status_code=400, detail="Server is offline")
 
     models_data = await client.get_models()
+    catalogue = await catalogue_server_models(
+        db_conn, server_id, server.name, server.url, models_data
+    )
+
+    return {
+        "message": f"Synced {catalogue['models']} models from server",
+        "new_models": catalogue["inserted"],
+    }
+
 
+async def catalogue_server_models(
+    db_conn, server_id: str, server_name: str, server_url: str, models_data: dict
+) -> Dict[str, int]:
+    """Record a server's checkpoints and LoRAs in the catalogue and active-model tracking"""
     # Update active models tracking
     all_models = []
+    for model_type, folder, names in (
+        ("checkpoint", "checkpoints", models_data.get("checkpoints", [])),
+        ("lora", "loras", models_data.get("loras", [])),
+    ):
+        for model_name in names:
+            all_models.append(
+                {
+                    "id": f"{server_id}_{model_name}",
+                    "name": model_name,
+                    "path": f"{folder}/{model_name}",
+                    "type": model_type,
+                    "size": None,  # Could be fetched if needed
+                    "metadata": {"server_id": server_id, "model_type": model_type},
+                }
+            )
 
-    # Prepare checkpoint models
-    for checkpoint_name in models_data.get("checkpoints", []):
-        all_models.append(
-            {
-                "id": f"{server_id}_{checkpoint_name}",
-                "name": checkpoint_name,
-                "path": f"checkpoints/{checkpoint_name}",
-                "type": "checkpoint",
-                "size": None,  # Could be fetched if needed
-                "metadata": {"server_id": server_id, "model_type": "checkpoint"},
-            }
-        )
-        await sync_single_model(checkpoint_name, "checkpoint", server_id, db_conn)
+    # Catalogue every model in one unordered bulk upsert keyed on (name, type)
+    from repositories.database_model_repository import DatabaseModelRepository
 
-    # Prepare LoRA models
-    for lora_name in models_data.get("loras", []):
-        all_models.append(
-            {
-                "id": f"{server_id}_{lora_name}",
-                "name": lora_name,
-                "path": f"loras/{lora_name}",
-                "type": "lora",
-                "size": None,
-                "metadata": {"server_id": server_id, "model_type": "lora"},
-            }
-        )
-        await sync_single_model(lora_name, "lora", server_id, db_conn)
+    now = datetime.now(timezone.utc)
+    catalogue = await DatabaseModelRepository(db_conn.database_models).upsert_by_name_and_type(
+        [DatabaseModel(name=model["name"], type=model["type"]).dict() for model in all_models],
+        {"server_source": server_id, "last_synced_at": now},
+    )
 
     # Update active models in the tracking system
     if active_models_service:
         await active_models_service.update_backend_models(
             backend_id=server_id,
-            backend_name=server.name,
-            backend_url=server.url,
+            backend_name=server_name,
+            backend_url=server_url,
             models_data=all_models,
         )
-        print(f"Tracked {len(all_models)} active models for backend {server.name}")
+        print(f"Tracked {len(all_models)} active models for backend {server_name}")
 
-    return {"message": f"Synced {len(all_models)} models from server"}
+    from services.queue_manager import queue_manager
 
+    queue_manager.set_server_models(server_id, [model["name"] for model in all_models])
 
-async def sync_single_model(name: str, type: str, server_id: str, db_conn):
-    """Sync a single model to the database"""
-    existing = await db_conn.database_models.find_one({"name": name, "type": type})
+    return {"models": len(all_models), **catalogue}
+
+
+@api_router.get("/servers/model-sync")
+async def get_model_sync_status():
+    """Outcome of the last background model sync of each server"""
+    from services.model_sync import model_sync_scheduler
+
+    return model_sync_scheduler.snapshot()
 
-    if existing:
-        # Update server source and sync time
-        await db_conn.database_models.update_one(
-            {"id": existing["id"]},
-            {
-                "$set": {
-                    "server_source": server_id,
-                    "last_synced_at": datetime.now(timezone.utc),
-                }
-            },
-        )
-    else:
-        # Create new model entry
-        model = DatabaseModel(
-            name=name,
-            type=type,
-            server_source=server_id,
-            last_synced_at=datetime.now(timezone.utc),
-        )
-        await db_conn.database_models.insert_one(model.dict())
+
+@api_router.post("/servers/model-sync")
+async def sync_all_server_models():
+    """Sync models from every active server now, returning per-server diffs"""
+    from services.model_sync import model_sync_scheduler
+
+    diffs = await model_sync_scheduler.sync_all()
+    return [diff.to_dict() for diff in diffs]
 
 
 async def find_best_civitai_match_db(
@@ -3971,6 +4071,7 @@ async def upload_music(project_id: str, file: UploadFile = File(...)):
             }
         },
     )
+    await project_revisions.bump(project_id)
 
     return {"message": "Music uploaded successfully", "file_path": str(file_path)}
 
@@ -4104,8 +4205,8 @@ async def generate_character_profiles(
     server = ComfyUIServer(**server_data)
     client = ComfyUIClient(server)
 
-    # Check if server is online
-    if not await client.check_connection():
+    # Check if server is online (cached by the health monitor)
+    if not await server_health_monitor.is_available(server_data):
         raise ServiceUnavailableError("ComfyUI", "Server is offline")
 
     # Generate profiles based on type
@@ -4262,51 +4363,62 @@ async def create_scene(scene_data: SceneCreate):
     scene_dict = scene_data.dict()
     scene = Scene(**scene_dict)
     await db.scenes.insert_one(scene.dict())
+    await project_revisions.bump(scene.project_id)
     return scene
 
 
 @api_router.get("/projects/{project_id}/timeline")
-async def get_project_timeline(project_id: str):
-    """Get complete project timeline with all scenes and clips for the storyboard."""
-    try:
-        # Get project
-        project_data = await db.projects.find_one({"id": project_id})
+async def get_project_timeline(
+    project_id: str,
+    request: Request,
+    scene_offset: int = Query(0, ge=0),
+    scene_limit: Optional[int] = Query(None, ge=1),
+    clip_limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    Get the project timeline with its scenes and clips for the storyboard.
+
+    Scenes are paged with scene_offset/scene_limit and joined with their clips
+    in one aggregation. Clips come without their embedded galleries (use
+    /clips/{clip_id}/gallery), and scenes with more than clip_limit clips are
+    flagged with clips_truncated. Responses carry the project revision as
+    ETag and answer If-None-Match with 304.
+    """
+    from config import config
+    from repositories.scene_repository import SceneRepository
+
+    scene_limit = min(scene_limit or config.TIMELINE_SCENE_PAGE_SIZE, config.TIMELINE_MAX_SCENE_PAGE_SIZE)
+    clip_limit = clip_limit or config.TIMELINE_CLIPS_PER_SCENE
+
+    async def build():
+        project_data = await db.projects.find_one({"id": project_id}, {"_id": 0})
         if not project_data:
             raise HTTPException(
                 status_code=404, detail=f"Project {project_id} not found"
             )
 
-        # Remove MongoDB _id field
-        if "_id" in project_data:
-            del project_data["_id"]
-
-        # Get all scenes for this project
-        scenes = (
-            await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
+        scenes, total_scenes = await SceneRepository(db.scenes).list_timeline(
+            project_id,
+            clips_collection=db.clips.name,
+            offset=scene_offset,
+            limit=scene_limit,
+            clip_limit=clip_limit,
         )
 
-        # For each scene, get its clips
-        timeline_scenes = []
-        for scene in scenes:
-            # Remove MongoDB _id field
-            if "_id" in scene:
-                del scene["_id"]
-
-            clips = (
-                await db.clips.find({"scene_id": scene["id"]})
-                .sort("order")
-                .to_list(100)
-            )
-
-            # Remove MongoDB _id field from clips
-            for clip in clips:
-                if "_id" in clip:
-                    del clip["_id"]
-
-            scene["clips"] = clips
-            timeline_scenes.append(scene)
+        return {
+            "project": project_data,
+            "scenes": scenes,
+            "pagination": {
+                "scene_offset": scene_offset,
+                "scene_limit": scene_limit,
+                "clip_limit": clip_limit,
+                "total_scenes": total_scenes,
+                "has_more": scene_offset + len(scenes) < total_scenes,
+            },
+        }
 
-        return {"project": project_data, "scenes": timeline_scenes}
+    try:
+        return await project_revisions.respond(request, project_id, build)
     except HTTPException:
         raise
     except Exception as e:
@@ -4314,18 +4426,70 @@ async def get_project_timeline(project_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def timeline_ndjson(project: Dict[str, Any], scenes) -> AsyncIterator[bytes]:
+    """
+    NDJSON lines for a project timeline: the project, then each scene followed
+    by its clips, then a closing line with the counts. One chunk is yielded per
+    scene so memory is bounded by the largest scene, not the project.
+    """
+    from utils.response_cache import serialize
+
+    yield serialize({"type": "project", "data": project}) + b"\n"
+    scene_count = clip_count = 0
+    async for scene in scenes:
+        clips = scene.pop("clips", [])
+        lines = [serialize({"type": "scene", "data": scene})]
+        lines.extend(serialize({"type": "clip", "data": clip}) for clip in clips)
+        scene_count += 1
+        clip_count += len(clips)
+        yield b"\n".join(lines) + b"\n"
+    yield serialize({"type": "end", "scenes": scene_count, "clips": clip_count}) + b"\n"
+
+
+@api_router.get("/projects/{project_id}/timeline/stream")
+async def stream_project_timeline(project_id: str, request: Request):
+    """
+    The full project timeline as NDJSON (application/x-ndjson), streamed from
+    a single aggregation cursor. Every line is {"type": ..., "data": ...} with
+    type project, scene or clip; clips follow their scene and a final "end"
+    line carries the totals. Clips come without their embedded galleries.
+    """
+    from repositories.scene_repository import SceneRepository
+
+    not_modified, headers = await project_revisions.check_not_modified(request, project_id)
+    if not_modified:
+        return not_modified
+
+    project_data = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    if not project_data:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+
+    scenes = SceneRepository(db.scenes).iter_timeline(project_id, clips_collection=db.clips.name)
+    return StreamingResponse(
+        timeline_ndjson(project_data, scenes),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
 @api_router.get("/projects/{project_id}/scenes", response_model=List[Scene])
-async def get_project_scenes(project_id: str):
-    scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
-    return [Scene(**scene) for scene in scenes]
+async def get_project_scenes(project_id: str, request: Request):
+    async def build():
+        scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
+        return [Scene(**scene) for scene in scenes]
+
+    return await project_revisions.respond(request, project_id, build)
 
 
 @api_router.get("/projects/{project_id}/clips", response_model=List[Clip])
-async def get_project_clips(project_id: str, db_conn=Depends(get_database)):
-    clips = (
-        await db_conn.clips.find({"project_id": project_id}).sort("order").to_list(100)
-    )
-    return [Clip(**clip) for clip in clips]
+async def get_project_clips(project_id: str, request: Request, db_conn=Depends(get_database)):
+    async def build():
+        clips = (
+            await db_conn.clips.find({"project_id": project_id}).sort("order").to_list(100)
+        )
+        return [Clip(**clip) for clip in clips]
+
+    return await project_revisions.respond(request, project_id, build)
 
 
 @api_router.get("/scenes/{scene_id}", response_model=Scene)
@@ -4345,6 +4509,7 @@ async def update_scene(scene_id: str, scene_update: SceneUpdate):
 
     if result.matched_count == 0:
         raise SceneNotFoundError(scene_id)
+    await project_revisions.bump_for_scene(scene_id)
 
     return {"message": "Scene updated successfully"}
 
@@ -4397,6 +4562,7 @@ async def create_scene_alternate(scene_id: str):
 
     new_scene = Scene(**new_scene_dict)
     await db.scenes.insert_one(new_scene.dict())
+    await project_revisions.bump(new_scene.project_id)
 
     return new_scene
 
@@ -4407,6 +4573,8 @@ async def create_clip(clip_data: ClipCreate):
     clip_dict = clip_data.dict()
     clip = Clip(**clip_dict)
     await db.clips.insert_one(clip.dict())
+    timeline_index_cache.invalidate(clip.scene_id)
+    await project_revisions.bump_for_scene(clip.scene_id)
     return clip
 
 
@@ -4451,6 +4619,11 @@ async def update_clip(clip_id: str, clip_update: ClipUpdate):
 
     # Return updated clip
     updated_clip_data = await db.clips.find_one({"id": clip_id})
+    timeline_index_cache.invalidate(clip_data.get("scene_id"))
+    timeline_index_cache.invalidate(updated_clip_data.get("scene_id"))
+    if updated_clip_data.get("scene_id") != clip_data.get("scene_id"):
+        await project_revisions.bump_for_scene(clip_data.get("scene_id"))
+    await project_revisions.bump_for_clip_document(updated_clip_data)
     return Clip(**updated_clip_data)
 
 
@@ -4471,25 +4644,33 @@ async def update_clip_timeline_position(
     clip = Clip(**clip_data)
     new_position = update_data.position
 
-    # Get all clips in the same scene
-    all_clips_data = await db.clips.find({"scene_id": clip.scene_id}).to_list(1000)
-    all_clips = [Clip(**c) for c in all_clips_data]
+    # Cached interval index of the scene instead of reloading every clip
+    def load_scene_spans():
+        return db.clips.find(
+            {"scene_id": clip.scene_id},
+            {"_id": 0, "id": 1, "name": 1, "timeline_position": 1, "length": 1},
+        ).to_list(None)
+
+    index = await timeline_index_cache.get(clip.scene_id, load_scene_spans)
+    if clip_id not in index:
+        # Stale index: rebuild it before checking overlaps against it
+        timeline_index_cache.invalidate(clip.scene_id)
+        index = await timeline_index_cache.get(clip.scene_id, load_scene_spans)
 
     # Check for overlaps if enabled
     if check_overlap:
-        is_valid, error_msg = timeline_validator.check_overlap(
-            clip_id=clip_id,
-            new_position=new_position,
-            clip_length=clip.length,
-            other_clips=all_clips,
-        )
+        conflict = index.find_overlap(new_position, new_position + clip.length, exclude=clip_id)
+        if conflict:
+            _, error_msg = timeline_validator.check_overlap(
+                clip_id=clip_id,
+                new_position=new_position,
+                clip_length=clip.length,
+                other_clips=[conflict],
+            )
 
-        if not is_valid:
             # Suggest alternative position
-            suggested_pos = timeline_validator.find_next_available_position(
-                clip_length=clip.length,
-                other_clips=[c for c in all_clips if c.id != clip_id],
-                preferred_position=new_position,
+            suggested_pos = index.next_available_position(
+                clip.length, preferred_position=new_position, exclude=clip_id
             )
 
             raise HTTPException(
@@ -4513,16 +4694,18 @@ async def update_clip_timeline_position(
         },
     )
 
-    # Get timeline summary
-    updated_clips_data = await db.clips.find({"scene_id": clip.scene_id}).to_list(1000)
-    updated_clips = [Clip(**c) for c in updated_clips_data]
-    summary = timeline_validator.get_timeline_summary(updated_clips)
+    if clip_id in index:
+        index.move(clip_id, new_position)
+    else:
+        timeline_index_cache.invalidate(clip.scene_id)
+        index = await timeline_index_cache.get(clip.scene_id, load_scene_spans)
+    await project_revisions.bump_for_clip_document(clip_data)
 
     return {
         "message": "Timeline position updated",
         "clip_id": clip_id,
         "new_position": new_position,
-        "timeline_summary": summary,
+        "timeline_summary": index.summary(),
     }
 
 
@@ -4582,6 +4765,8 @@ async def create_clip_alternate(clip_id: str):
 
     new_clip = Clip(**new_clip_dict)
     await db.clips.insert_one(new_clip.dict())
+    timeline_index_cache.invalidate(new_clip.scene_id)
+    await project_revisions.bump_for_scene(new_clip.scene_id)
 
     return new_clip
 
@@ -4602,57 +4787,15 @@ async def analyze_scene_timeline(scene_id: str):
     clips_data = await db.clips.find({"scene_id": scene_id}).to_list(1000)
     clips = [Clip(**c) for c in clips_data]
 
-    # Get timeline summary
-    summary = timeline_validator.get_timeline_summary(clips)
-
-    # Detect all overlaps
-    overlaps = []
-    for i, clip1 in enumerate(clips):
-        for clip2 in clips[i + 1 :]:
-            is_valid, error_msg = timeline_validator.check_overlap(
-                clip_id=clip1.id,
-                new_position=clip1.timeline_position,
-                clip_length=clip1.length,
-                other_clips=[clip2],
-            )
-            if not is_valid:
-                overlaps.append(
-                    {
-                        "clip1_id": clip1.id,
-                        "clip1_name": clip1.name,
-                        "clip2_id": clip2.id,
-                        "clip2_name": clip2.name,
-                        "error": error_msg,
-                    }
-                )
-
-    # Detect gaps
-    gaps = []
-    sorted_clips = sorted(clips, key=lambda c: c.timeline_position)
-    for i in range(len(sorted_clips) - 1):
-        current_end = sorted_clips[i].timeline_position + sorted_clips[i].length
-        next_start = sorted_clips[i + 1].timeline_position
-        gap_size = next_start - current_end
-
-        if gap_size > 0.1:  # Gap larger than 100ms
-            gaps.append(
-                {
-                    "after_clip_id": sorted_clips[i].id,
-                    "after_clip_name": sorted_clips[i].name,
-                    "before_clip_id": sorted_clips[i + 1].id,
-                    "before_clip_name": sorted_clips[i + 1].name,
-                    "gap_start": current_end,
-                    "gap_end": next_start,
-                    "gap_duration": gap_size,
-                }
-            )
+    # Overlaps, gaps and summary in one sweep
+    analysis = timeline_validator.analyze_timeline(clips)
 
     return {
         "scene_id": scene_id,
-        "summary": summary,
-        "overlaps": overlaps,
-        "gaps": gaps,
-        "has_issues": len(overlaps) > 0,
+        "summary": analysis["summary"],
+        "overlaps": analysis["overlaps"],
+        "gaps": analysis["gaps"],
+        "has_issues": len(analysis["overlaps"]) > 0,
         "total_clips": len(clips),
     }
 
@@ -4673,53 +4816,40 @@ async def update_clip_prompts(
     )
     if result.matched_count == 0:
         raise ClipNotFoundError(clip_id)
+    await project_revisions.bump_for_clip(clip_id)
     return {"message": "Prompts updated successfully"}
 
 
 @api_router.get("/clips/{clip_id}/gallery")
-async def get_clip_gallery(clip_id: str):
-    clip_data = await db.clips.find_one({"id": clip_id})
-    if not clip_data:
-        raise ClipNotFoundError(clip_id)
-
-    clip = Clip(**clip_data)
-    return {
-        "images": clip.generated_images,
-        "videos": clip.generated_videos,
-        "selected_image_id": clip.selected_image_id,
-        "selected_video_id": clip.selected_video_id,
-    }
+async def get_clip_gallery(
+    clip_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    image_cursor: Optional[str] = None,
+    video_cursor: Optional[str] = None,
+):
+    from repositories.clip_repository import ClipRepository
+    from repositories.gallery_repository import GalleryRepository
+    from repositories.project_repository import ProjectRepository
+    from repositories.scene_repository import SceneRepository
+    from services.project_service import ProjectService
+
+    service = ProjectService(
+        ProjectRepository(db.projects),
+        SceneRepository(db.scenes),
+        ClipRepository(db.clips),
+        GalleryRepository(db.gallery_items),
+    )
+    return await service.get_clip_gallery(clip_id, limit, image_cursor, video_cursor)
 
 
 @api_router.put("/clips/{clip_id}/select-content")
 async def select_clip_content(clip_id: str, content_id: str, content_type: str):
+    from services.gallery_manager import gallery_manager
+
     if content_type not in ["image", "video"]:
         raise ValidationError("Invalid content type")
 
-    # Update the selected content
-    update_field = (
-        "selected_image_id" if content_type == "image" else "selected_video_id"
-    )
-
-    result = await db.clips.update_one(
-        {"id": clip_id},
-        {"$set": {update_field: content_id, "updated_at": datetime.now(timezone.utc)}},
-    )
-
-    if result.matched_count == 0:
-        raise ClipNotFoundError(clip_id)
-
-    # Also update the is_selected flag for all content of this type
-    field_name = "generated_images" if content_type == "image" else "generated_videos"
-    clip_data = await db.clips.find_one({"id": clip_id})
-    if clip_data:
-        content_list = clip_data.get(field_name, [])
-        for content in content_list:
-            content["is_selected"] = content["id"] == content_id
-
-        await db.clips.update_one({"id": clip_id}, {"$set": {field_name: content_list}})
-
-    return {"message": f"Selected {content_type} updated successfully"}
+    return await gallery_manager.select_content(db, clip_id, content_id, content_type)
 
 
 # Generation Pool Management
@@ -4802,6 +4932,8 @@ async def delete_pool_item(item_id: str):
 @api_router.post("/pool/item/{item_id}/apply-to-clip/{clip_id}")
 async def apply_pool_item_to_clip(item_id: str, clip_id: str):
     """Apply a pool item's media to a clip"""
+    from services.gallery_manager import gallery_manager
+
     # Get pool item
     pool_data = await db.generation_pool.find_one({"id": item_id})
     if not pool_data:
@@ -4809,67 +4941,37 @@ async def apply_pool_item_to_clip(item_id: str, clip_id: str):
 
     pool_item = GenerationPool(**pool_data)
 
-    # Get clip
-    clip_data = await db.clips.find_one({"id": clip_id})
-    if not clip_data:
-        raise ClipNotFoundError(clip_id)
-
-    # Add the pool item's media to the clip's generated content
-    if pool_item.content_type == "image":
-        # Add to generated_images
-        new_image = {
-            "id": str(uuid.uuid4()),
-            "url": pool_item.media_url,
-            "thumbnail_url": pool_item.thumbnail_url or pool_item.media_url,
-            "prompt": pool_item.generation_params.get("prompt", "")
-            if pool_item.generation_params
-            else "",
-            "seed": pool_item.generation_params.get("seed")
-            if pool_item.generation_params
-            else None,
-            "model": pool_item.generation_params.get("model", "unknown")
-            if pool_item.generation_params
-            else "unknown",
-            "is_selected": False,
-            "created_at": datetime.now(timezone.utc),
-        }
-
-        result = await db.clips.update_one(
-            {"id": clip_id}, {"$push": {"generated_images": new_image}}
-        )
-    elif pool_item.content_type == "video":
-        # Add to generated_videos
-        new_video = {
-            "id": str(uuid.uuid4()),
-            "url": pool_item.media_url,
-            "thumbnail_url": pool_item.thumbnail_url or pool_item.media_url,
-            "prompt": pool_item.generation_params.get("prompt", "")
-            if pool_item.generation_params
-            else "",
-            "seed": pool_item.generation_params.get("seed")
-            if pool_item.generation_params
-            else None,
-            "model": pool_item.generation_params.get("model", "unknown")
-            if pool_item.generation_params
-            else "unknown",
-            "is_selected": False,
-            "created_at": datetime.now(timezone.utc),
-        }
-
-        result = await db.clips.update_one(
-            {"id": clip_id}, {"$push": {"generated_videos": new_video}}
-        )
-    else:
+    if pool_item.content_type not in ("image", "video"):
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported content type: {pool_item.content_type}",
         )
 
+    # Goes through the gallery like any generation: gallery_items gets the
+    # item and legacy clips are backfilled before their summary is trimmed
+    params = pool_item.generation_params or {}
+    model_name = params.get("model", "unknown")
+    new_content = gallery_manager.create_generated_content(
+        content_type=pool_item.content_type,
+        url=pool_item.media_url,
+        prompt=params.get("prompt", ""),
+        negative_prompt=params.get("negative_prompt", ""),
+        server_id=params.get("server_id", ""),
+        server_name="Generation Pool",
+        model_name=model_name,
+        model_type=detect_model_type(model_name),
+        generation_params=params,
+    )
+    await gallery_manager.add_generated_content(
+        db=db,
+        clip_id=clip_id,
+        new_content=new_content,
+        content_type=pool_item.content_type,
+    )
+
     return {
         "message": f"Pool item applied to clip successfully",
-        "content_id": new_image["id"]
-        if pool_item.content_type == "image"
-        else new_video["id"],
+        "content_id": new_content.id,
     }
 
 
@@ -4894,7 +4996,7 @@ async def get_server_workflows(server_id: str, db_conn=Depends(get_database)):
     # For standard ComfyUI servers, try to get workflows from the /workflows endpoint
     if server.server_type == "standard":
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session(server.url) as session:
                 async with session.get(f"{server.url}/workflows") as response:
                     if response.status == 200:
                         workflows = await response.json()
@@ -5018,8 +5120,8 @@ async def generate_content(request: GenerationRequest):
         logging.error(f"Error in generate_content setup: {str(e)}")
         raise ServerError(f"Setup error: {str(e)}")
 
-    # Check if server is online
-    if not await client.check_connection():
+    # Check if server is online (cached by the health monitor)
+    if not await server_health_monitor.is_available(server_data):
         raise ServiceUnavailableError("ComfyUI", "Server is offline")
 
     try:
@@ -5162,7 +5264,7 @@ async def get_batch_status(batch_id: str):
     """Get status of a batch generation job"""
     from services.batch_generator import batch_generator
 
-    batch_status = batch_generator.get_batch_status(batch_id)
+    batch_status = await batch_generator.get_batch_status(batch_id)
     if "error" in batch_status and batch_status["error"] == "Batch not found":
         raise ResourceNotFoundError("Batch", batch_id)
 
@@ -5174,7 +5276,7 @@ async def list_batches():
     """List all batch generation jobs"""
     from services.batch_generator import batch_generator
 
-    return {"batches": batch_generator.list_batches()}
+    return {"batches": await batch_generator.list_batches()}
 
 
 # Style Templates
@@ -5250,77 +5352,51 @@ async def use_style_template(template_id: str):
 
 
 # Export Endpoints
-@api_router.get("/projects/{project_id}/export/fcpxml")
-async def export_final_cut_pro(project_id: str):
-    """Export project to Final Cut Pro XML format"""
-    from services.export_service import export_service
-    from fastapi.responses import Response
+async def _cached_export(project_id: str, export_format: str, media_type: str, filename: str):
+    """
+    Serve an export from the on-disk artifact cache, rendering it first when
+    the project changed since it was last written
+    """
+    from services.export_service import export_cache
 
     try:
-        xml_content = await export_service.export_final_cut_pro(db, project_id)
-        return Response(
-            content=xml_content,
-            media_type="application/xml",
-            headers={
-                "Content-Disposition": f"attachment; filename=project_{project_id}.fcpxml"
-            },
-        )
-    except ValueError as e:
+        path = await export_cache.get(db, project_id, export_format)
+    except ValueError:
         # Export service raises ValueError for "Project not found"
         raise ProjectNotFoundError(project_id)
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+
+@api_router.get("/projects/{project_id}/export/fcpxml")
+async def export_final_cut_pro(project_id: str):
+    """Export project to Final Cut Pro XML format"""
+    return await _cached_export(
+        project_id, "fcpxml", "application/xml", f"project_{project_id}.fcpxml"
+    )
 
 
 @api_router.get("/projects/{project_id}/export/edl")
 async def export_premiere_edl(project_id: str):
     """Export project to Adobe Premiere EDL format"""
-    from services.export_service import export_service
-    from fastapi.responses import Response
-
-    try:
-        edl_content = await export_service.export_premiere_edl(db, project_id)
-        return Response(
-            content=edl_content,
-            media_type="text/plain",
-            headers={
-                "Content-Disposition": f"attachment; filename=project_{project_id}.edl"
-            },
-        )
-    except ValueError as e:
-        # Export service raises ValueError for "Project not found"
-        raise ProjectNotFoundError(project_id)
+    return await _cached_export(
+        project_id, "edl", "text/plain", f"project_{project_id}.edl"
+    )
 
 
 @api_router.get("/projects/{project_id}/export/resolve")
 async def export_davinci_resolve(project_id: str):
     """Export project to DaVinci Resolve format"""
-    from services.export_service import export_service
-    from fastapi.responses import Response
-
-    try:
-        xml_content = await export_service.export_davinci_resolve(db, project_id)
-        return Response(
-            content=xml_content,
-            media_type="application/xml",
-            headers={
-                "Content-Disposition": f"attachment; filename=project_{project_id}_resolve.xml"
-            },
-        )
-    except ValueError as e:
-        # Export service raises ValueError for "Project not found"
-        raise ProjectNotFoundError(project_id)
+    return await _cached_export(
+        project_id, "resolve", "application/xml", f"project_{project_id}_resolve.xml"
+    )
 
 
 @api_router.get("/projects/{project_id}/export/json")
 async def export_json(project_id: str):
     """Export complete project data to JSON"""
-    from services.export_service import export_service
-
-    try:
-        json_data = await export_service.export_json(db, project_id)
-        return json_data
-    except ValueError as e:
-        # Export service raises ValueError for "Project not found"
-        raise ProjectNotFoundError(project_id)
+    return await _cached_export(
+        project_id, "json", "application/json", f"project_{project_id}.json"
+    )
 
 
 # Character Manager Endpoints
@@ -5415,6 +5491,8 @@ async def apply_character_to_clip(character_id: str, clip_id: str):
         },
     )
 
+    await project_revisions.bump_for_clip(clip_id)
+
     logger.info(f"Applied character {character_id} to clip {clip_id}")
     return {
         "message": "Character applied to clip",
@@ -5454,8 +5532,8 @@ async def generate_character_samples(
     server = ComfyUIServer(**server_data)
     client = ComfyUIClient(server)
 
-    # Check if server is online
-    if not await client.check_connection():
+    # Check if server is online (cached by the health monitor)
+    if not await server_health_monitor.is_available(server_data):
         raise ServiceUnavailableError("ComfyUI", "Server is offline")
 
     # Build character prompt
@@ -5915,7 +5993,7 @@ async def get_queue_status():
     """Get overall queue status"""
     from services.queue_manager import queue_manager
 
-    return queue_manager.get_queue_status()
+    return await queue_manager.fetch_queue_status()
 
 
 @api_router.get("/queue/jobs")
@@ -5924,9 +6002,9 @@ async def get_all_queue_jobs(status: Optional[str] = None):
     from services.queue_manager import queue_manager
 
     if status:
-        jobs = queue_manager.get_jobs_by_status(status)
+        jobs = await queue_manager.fetch_jobs_by_status(status)
     else:
-        jobs = queue_manager.get_all_jobs()
+        jobs = await queue_manager.fetch_all_jobs()
     return jobs
 
 
@@ -5935,7 +6013,7 @@ async def get_job_status(job_id: str):
     """Get status of a specific job"""
     from services.queue_manager import queue_manager
 
-    job_status = queue_manager.get_job_status(job_id)
+    job_status = await queue_manager.fetch_job_status(job_id)
     if not job_status:
         raise ResourceNotFoundError("Job", job_id)
     return job_status
@@ -5946,7 +6024,7 @@ async def get_project_queue(project_id: str):
     """Get all queued jobs for a project"""
     from services.queue_manager import queue_manager
 
-    jobs = queue_manager.get_project_jobs(project_id)
+    jobs = await queue_manager.fetch_project_jobs(project_id)
     return {"jobs": jobs}
 
 
@@ -6037,6 +6115,9 @@ async def find_best_civitai_match_mongodb(
     """
     Find best matching Civitai model from MongoDB database.
 
+    Candidates come from the in-memory trigram index over the Civitai models
+    in ``database_models``; only the winner's ``civitai_info`` is read back.
+
     Args:
         server_model_name: Name of the model from the ComfyUI server
         db_conn: Database connection
@@ -6045,112 +6126,25 @@ async def find_best_civitai_match_mongodb(
     Returns:
         Best matching dict or None if no match found
     """
-    import re
-    from difflib import SequenceMatcher
-
-    def clean_model_name(name: str) -> str:
-        """Clean model name by removing extensions and common prefixes"""
-        name = re.sub(r"\.(safetensors|ckpt|pth|pt)$", "", name, flags=re.IGNORECASE)
-        name = re.sub(
-            r"^(sd|stable-diffusion|sd-|sdxl|sd_xl)_?", "", name, flags=re.IGNORECASE
-        )
-        name = re.sub(
-            r"_v\d+(-\d+)?(_lightning)?(_bakedvae)?", "", name, flags=re.IGNORECASE
-        )
-        name = re.sub(r"(-\d+)+$", "", name)
-        name = re.sub(r"[-_]+", " ", name)
-        name = re.sub(r"\s+", " ", name)
-        return name.strip().lower()
+    from services.civitai_matcher import civitai_matcher
 
-    server_name_clean = clean_model_name(server_model_name)
-    server_name_original = server_model_name.lower().strip()
+    await civitai_matcher.refresh(db_conn)
+    match = civitai_matcher.best_match(server_model_name, fallback=fallback)
+    if not match:
+        print(f"No Civitai match found for '{server_model_name}'")  # Debug
+        return None
 
     print(
-        f"Searching MongoDB for: '{server_name_clean}' (original: '{server_model_name}')"
+        f"Best match: '{match.name}' with score {match.score:.3f} ({match.reason})"
     )  # Debug
-
-    # Strategy 1: Exact name match
-    exact_match = await db_conn.database_models.find_one(
-        {
-            "source": "civitai_sdxl",
-            "name": {"$regex": f"^{re.escape(server_model_name)}$", "$options": "i"},
-        }
-    )
-
-    if exact_match:
-        print(f"Found exact match in MongoDB: '{exact_match['name']}'")  # Debug
-        return exact_match["civitai_info"]
-
-    # Strategy 2: Search for cleaned name match
-    cleaned_match = await db_conn.database_models.find_one(
-        {
-            "source": "civitai_sdxl",
-            "name": {"$regex": server_name_clean, "$options": "i"},
-        }
+    doc = await db_conn.database_models.find_one(
+        {"id": match.key}, {"_id": 0, "civitai_info": 1}
     )
+    return doc["civitai_info"] if doc else None
 
-    if cleaned_match:
-        print(f"Found cleaned match in MongoDB: '{cleaned_match['name']}'")  # Debug
-        return cleaned_match["civitai_info"]
-
-    # Strategy 3: Fuzzy search with multiple candidates
-    candidates = await db_conn.database_models.find(
-        {
-            "source": "civitai_sdxl",
-            "$or": [
-                {"name": {"$regex": server_name_clean, "$options": "i"}},
-                {
-                    "civitai_info.description": {
-                        "$regex": server_name_clean,
-                        "$options": "i",
-                    }
-                },
-                {"civitai_info.tags": {"$in": [server_name_clean]}},
-            ],
-        }
-    ).to_list(length=20)
-
-    best_match = None
-    best_score = 0.0
-
-    # Define thresholds based on fallback mode
-    high_threshold = 0.85 if not fallback else 0.7
-    medium_threshold = 0.7 if not fallback else 0.5
-
-    for doc in candidates:
-        civitai_info = doc["civitai_info"]
-        model_name = civitai_info.get("name", "")
-        model_name_clean = clean_model_name(model_name)
 
-        # Calculate similarity score
-        similarity = SequenceMatcher(None, server_name_clean, model_name_clean).ratio()
-
-        # Check for substring matches
-        if server_name_clean in model_name_clean:
-            similarity = max(similarity, 0.9)
-        elif model_name_clean in server_name_clean:
-            similarity = max(similarity, 0.8)
-
-        # Update best match
-        if similarity > best_score:
-            best_score = similarity
-            best_match = civitai_info
-
-    # Apply minimum threshold
-    min_threshold = medium_threshold if not fallback else 0.3
-    if best_score < min_threshold:
-        print(
-            f"No match found above threshold {min_threshold}. Best score was {best_score}"
-        )  # Debug
-        return None
-
-    if best_match:
-        print(
-            f"Best match: '{best_match.get('name')}' with score {best_score:.3f}"
-        )  # Debug
-        return best_match
-
-    return None
+# Index of the last local Civitai list matched against: (list, length, matcher)
+_local_civitai_index = None
 
 
 def find_best_civitai_match_local(
@@ -6159,6 +6153,9 @@ def find_best_civitai_match_local(
     """
     Find best matching Civitai model from local JSON database.
 
+    The list is indexed once and the index reused while the same list (of
+    the same length) is passed in.
+
     Args:
         server_model_name: Name of the model from the ComfyUI server
         civitai_database: List of models from the local JSON file
@@ -6167,131 +6164,23 @@ def find_best_civitai_match_local(
     Returns:
         Best matching dict or None if no match found
     """
-    import re
-    from difflib import SequenceMatcher
+    global _local_civitai_index
+    from services.civitai_matcher import CivitaiMatcher
 
-    def clean_model_name(name: str) -> str:
-        """Clean model name by removing extensions and common prefixes"""
-        name = re.sub(r"\.(safetensors|ckpt|pth|pt)$", "", name, flags=re.IGNORECASE)
-        name = re.sub(
-            r"^(sd|stable-diffusion|sd-|sdxl|sd_xl)_?", "", name, flags=re.IGNORECASE
-        )
-        name = re.sub(
-            r"_v\d+(-\d+)?(_lightning)?(_bakedvae)?", "", name, flags=re.IGNORECASE
-        )
-        name = re.sub(r"(-\d+)+$", "", name)
-        name = re.sub(r"[-_]+", " ", name)
-        name = re.sub(r"\s+", " ", name)
-        return name.strip().lower()
+    cached = _local_civitai_index
+    if cached is None or cached[0] is not civitai_database or cached[1] != len(civitai_database):
+        cached = (civitai_database, len(civitai_database), CivitaiMatcher.from_models(civitai_database))
+        _local_civitai_index = cached
 
-    server_name_clean = clean_model_name(server_model_name)
-    server_name_original = server_model_name.lower().strip()
+    match = cached[2].best_match(server_model_name, fallback=fallback)
+    if not match:
+        print(f"No local Civitai match found for '{server_model_name}'")  # Debug
+        return None
 
     print(
-        f"Searching local database for: '{server_name_clean}' (original: '{server_model_name}')"
+        f"Best match: '{match.name}' with score {match.score:.3f} ({match.reason})"
     )  # Debug
-
-    best_match = None
-    best_score = 0.0
-    match_details = []
-
-    # Define thresholds based on fallback mode
-    exact_threshold = 1.0
-    high_threshold = 0.85 if not fallback else 0.7
-    medium_threshold = 0.7 if not fallback else 0.5
-    low_threshold = 0.5 if not fallback else 0.3
-
-    for model in civitai_database:
-        model_name = model.get("name", "")
-        model_name_clean = clean_model_name(model_name)
-        model_name_lower = model_name.lower()
-
-        score = 0.0
-        reason = ""
-
-        # Strategy 1: Exact name match (highest priority)
-        if (
-            server_name_clean == model_name_clean
-            or server_name_original == model_name_lower
-        ):
-            score = 1.0
-            reason = "exact_name_match"
-            print(f"Found exact match: '{model_name}'")  # Debug
-
-        # Strategy 2: Check if model names are substrings
-        elif server_name_clean in model_name_clean:
-            score = 0.9
-            reason = "server_name_in_model_name"
-        elif model_name_clean in server_name_clean:
-            score = 0.8
-            reason = "model_name_in_server_name"
-
-        # Strategy 3: Check for filename matches in model versions
-        if score < 0.8 and "modelVersions" in model:
-            for version in model["modelVersions"]:
-                if "files" in version:
-                    for file_info in version["files"]:
-                        filename = file_info.get("name", "")
-                        filename_clean = clean_model_name(filename)
-
-                        if (
-                            server_name_clean == filename_clean
-                            or server_name_original == filename.lower()
-                        ):
-                            score = max(score, 0.95)
-                            reason = "filename_exact_match"
-                        elif server_name_clean in filename_clean:
-                            score = max(score, 0.85)
-                            reason = "server_name_in_filename"
-                        elif filename_clean in server_name_clean:
-                            score = max(score, 0.75)
-                            reason = "filename_in_server_name"
-
-        # Strategy 4: Fuzzy matching using SequenceMatcher
-        if score < 0.7:
-            similarity = SequenceMatcher(
-                None, server_name_clean, model_name_clean
-            ).ratio()
-            if similarity > high_threshold:
-                score = similarity
-                reason = "fuzzy_high"
-            elif similarity > medium_threshold:
-                score = similarity
-                reason = "fuzzy_medium"
-
-        # Strategy 5: Contains matching (lower priority)
-        if score < 0.5:
-            if any(
-                word in model_name_lower
-                for word in server_name_clean.split()
-                if len(word) > 2
-            ):
-                score = 0.4
-                reason = "contains_match"
-
-        # Update best match if this score is better
-        if score > best_score:
-            best_score = score
-            best_match = model
-            match_details = [reason]
-        elif score == best_score and score > 0:
-            match_details.append(reason)
-
-    # Apply minimum threshold
-    min_threshold = low_threshold if fallback else medium_threshold
-    if best_score < min_threshold:
-        print(
-            f"No match found above threshold {min_threshold}. Best score was {best_score}"
-        )  # Debug
-        return None
-
-    if best_match:
-        print(
-            f"Best match: '{best_match.get('name')}' with score {best_score:.3f} ({match_details[0] if match_details else 'unknown'})"
-        )  # Debug
-        return best_match
-
-    return None
+    return civitai_database[match.key]
 
 
 # Middleware to log all incoming requests
@@ -6327,6 +6216,10 @@ async def startup_db_client():
         # raise RuntimeError("Database connection failed")
     else:
         db = db_manager.db
+        project_revisions.set_database(db)
+        from services.export_service import export_cache
+        export_cache.set_database(db)
+        project_revisions.add_listener(export_cache.on_revision)
         # Initialize active models service
         active_models_service = ActiveModelsService(
             db_manager.client, db_manager.db_name
@@ -6337,6 +6230,8 @@ async def startup_db_client():
         from repositories.queue_repository import QueueRepository
         from repositories.gallery_repository import GalleryRepository
         from repositories.batch_repository import BatchRepository
+        from repositories.comfyui_repository import ComfyUIRepository
+        from repositories.duration_estimate_repository import DurationEstimateRepository
         from services.queue_manager import queue_manager
         from services.gallery_manager import gallery_manager
         from services.batch_generator import batch_generator
@@ -6345,9 +6240,61 @@ async def startup_db_client():
         gallery_repository = GalleryRepository(db.gallery_items)
         batch_repository = BatchRepository(db.batch_jobs)
 
-        queue_manager._repository = queue_repository
+        try:
+            await queue_repository.create_indexes()
+        except Exception as e:
+            logger.warning(f"Failed to ensure queue_jobs indexes: {e}")
+
+        try:
+            await gallery_repository.create_indexes()
+        except Exception as e:
+            logger.warning(f"Failed to ensure gallery_items indexes: {e}")
+
+        try:
+            from repositories.database_model_repository import DatabaseModelRepository
+
+            await DatabaseModelRepository(db.database_models).create_indexes()
+        except Exception as e:
+            logger.warning(f"Failed to ensure database_models indexes: {e}")
+
+        queue_manager.set_repository(queue_repository)
+        queue_manager.estimator.set_repository(
+            DurationEstimateRepository(db.job_duration_estimates)
+        )
+        await queue_manager.estimator.load()
+        queue_manager.start()
+        await queue_manager.refresh_server_models(active_models_service)
+
+        # Open pooled HTTP sessions for registered backends up front
+        servers = await db.comfyui_servers.find({}, {"_id": 0, "url": 1}).to_list(None)
+        for server in servers:
+            if server.get("url"):
+                http_pool.get(server["url"])
+
+        # Background health checks feed the cached state read by generate paths
+        server_health_monitor.set_repository(ComfyUIRepository(db.comfyui_servers))
+        server_health_monitor.start()
+
+        # Background model sync of every server, writing only what changed
+        from services.model_sync import model_sync_scheduler
+
+        async def apply_synced_models(server_data, models_data):
+            await catalogue_server_models(
+                db,
+                server_data["id"],
+                server_data.get("name", server_data["id"]),
+                server_data["url"],
+                models_data,
+            )
+
+        model_sync_scheduler.set_repository(ComfyUIRepository(db.comfyui_servers))
+        model_sync_scheduler.set_handler(apply_synced_models)
+        model_sync_scheduler.start()
+
         gallery_manager._repository = gallery_repository
         batch_generator._repository = batch_repository
+        await batch_generator.resume_batches(db)
+        batch_generator.start(db)
 
         logger.info("Repositories initialized for queue, gallery, and batch services")
         logger.info("Application started successfully")
@@ -6367,5 +6314,16 @@ async def startup_db_client():
 async def shutdown_db_client():
     """Close database connection on shutdown"""
     logger.info("Shutting down application...")
+
+    from services.queue_manager import queue_manager
+    from services.model_sync import model_sync_scheduler
+    from services.batch_generator import batch_generator
+
+    await queue_manager.stop()
+    await batch_generator.stop()
+    await server_health_monitor.stop()
+    await model_sync_scheduler.stop()
+    await completion_watchers.close()
+    await http_pool.close()
     await db_manager.disconnect()
     logger.info("Application shut down complete")
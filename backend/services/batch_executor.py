@@ -0,0 +1,87 @@
+"""Bounded-concurrency fan-out of batch items across ComfyUI servers"""
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ServerLane:
+    """One server's share of a batch"""
+    server_id: str
+    semaphore: asyncio.Semaphore  # Shared by every batch running on the server
+    slots: int
+    context: Any = None  # Whatever the handler needs for this server (client, DTO, ...)
+    pending: Deque[int] = field(default_factory=deque)
+    processed: int = 0
+    stolen: int = 0
+
+
+class BatchExecutor:
+    """
+    Runs batch items over several servers with work-stealing.
+
+    Items are pre-assigned to per-server deques in proportion to each server's
+    slot count. Each server runs ``slots`` workers, and every item holds the
+    server's semaphore while it runs, so concurrent batches together never
+    exceed the server's ``max_concurrent``. A worker whose deque is empty
+    steals from the tail of the longest remaining deque, so a fast server keeps
+    pulling work instead of idling while a slow one has a backlog.
+    """
+
+    def __init__(self, lanes: List[ServerLane]):
+        if not lanes:
+            raise ValueError("BatchExecutor needs at least one server lane")
+        self.lanes = lanes
+
+    def _partition(self, count: int):
+        rotation = [lane for lane in self.lanes for _ in range(max(1, lane.slots))]
+        for index in range(count):
+            rotation[index % len(rotation)].pending.append(index)
+
+    def _next_index(self, lane: ServerLane) -> Optional[int]:
+        if lane.pending:
+            return lane.pending.popleft()
+
+        victim = max(self.lanes, key=lambda other: len(other.pending))
+        if not victim.pending:
+            return None
+        lane.stolen += 1
+        return victim.pending.pop()
+
+    async def run(
+        self,
+        items: Sequence[Any],
+        handler: Callable[[ServerLane, Any], Awaitable[Any]],
+    ) -> List[Any]:
+        """Process every item; results (or raised exceptions) are in item order"""
+        results: List[Any] = [None] * len(items)
+        self._partition(len(items))
+
+        async def worker(lane: ServerLane):
+            while True:
+                async with lane.semaphore:
+                    index = self._next_index(lane)
+                    if index is None:
+                        return
+                    try:
+                        results[index] = await handler(lane, items[index])
+                    except Exception as e:
+                        results[index] = e
+                    lane.processed += 1
+
+        await asyncio.gather(*(
+            worker(lane)
+            for lane in self.lanes
+            for _ in range(max(1, lane.slots))
+        ))
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            lane.server_id: {"processed": lane.processed, "stolen": lane.stolen, "slots": lane.slots}
+            for lane in self.lanes
+        }
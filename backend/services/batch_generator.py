@@ -1,19 +1,54 @@
 """Batch generation service for processing multiple clips"""
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+import os
+import socket
+import uuid
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
 import logging
 
+from config import config
+from services.batch_executor import BatchExecutor, ServerLane
+from services.queue_manager import queue_manager
+from services.server_health import server_health_monitor
+
 logger = logging.getLogger(__name__)
 
 
 class BatchGenerator:
     """Manages batch generation of multiple clips"""
 
-    def __init__(self, batch_repository=None):
+    def __init__(
+        self,
+        batch_repository=None,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = config.BATCH_LEASE_SECONDS,
+    ):
         self.active_batches: Dict[str, Dict[str, Any]] = {}
         self._repository = batch_repository
         self._initialized = False
+        self._semaphores: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+        self._resume_tasks: Set[asyncio.Task] = set()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self._resume_loop_task: Optional[asyncio.Task] = None
+
+    def start(self, db):
+        """Periodically pick up batches whose owner stopped renewing its lease"""
+        if not self._resume_loop_task or self._resume_loop_task.done():
+            self._resume_loop_task = asyncio.create_task(self._resume_loop(db))
+
+    async def stop(self):
+        if self._resume_loop_task:
+            self._resume_loop_task.cancel()
+            try:
+                await self._resume_loop_task
+            except asyncio.CancelledError:
+                pass
+            self._resume_loop_task = None
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
 
     async def _load_from_db(self):
         """Load active batches from database"""
@@ -58,22 +93,19 @@ class BatchGenerator:
         Args:
             db: Database instance
             clip_ids: List of clip IDs to generate
-            server_id: ComfyUI server ID
+            server_id: ComfyUI server ID; the batch also spreads over other
+                online servers hosting the requested model
             generation_type: "image" or "video"
             params: Generation parameters
 
         Returns:
             Batch job info with status
         """
-        import uuid
-        from server import ComfyUIServer, ComfyUIClient
-        from services.gallery_manager import gallery_manager
-
         await self._load_from_db()
         
         batch_id = str(uuid.uuid4())
 
-        # Initialize batch tracking
+        # Initialize batch tracking; request fields are kept so the batch can resume
         batch = {
             "id": batch_id,
             "status": "processing",
@@ -81,6 +113,12 @@ class BatchGenerator:
             "completed": 0,
             "failed": 0,
             "results": [],
+            "clip_ids": list(clip_ids),
+            "server_id": server_id,
+            "generation_type": generation_type,
+            "params": params,
+            "owner": self.worker_id,
+            "lease_expires_at": self._lease_expiry(),
             "started_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc)
         }
@@ -89,8 +127,18 @@ class BatchGenerator:
 
         logger.info(f"Starting batch generation {batch_id} for {len(clip_ids)} clips")
 
+        return await self._run_batch(db, batch, clip_ids)
+
+    async def _run_batch(self, db, batch: Dict[str, Any], clip_ids: List[str]) -> Dict[str, Any]:
+        """Generate the given clips of a batch, recording each result as it lands"""
+        from server import ComfyUIServer, ComfyUIClient
+
+        batch_id = batch["id"]
+        generation_type = batch["generation_type"]
+        params = batch["params"]
+
         # Get server
-        server_data = await db.comfyui_servers.find_one({"id": server_id})
+        server_data = await db.comfyui_servers.find_one({"id": batch["server_id"]})
         if not server_data:
             batch["status"] = "failed"
             batch["error"] = "Server not found"
@@ -98,36 +146,52 @@ class BatchGenerator:
             await self._persist_batch(batch)
             return batch
 
-        server = ComfyUIServer(**server_data)
-        client = ComfyUIClient(server)
-
-        # Check server connection
-        if not await client.check_connection():
+        # Requested server plus every other online server hosting the model
+        servers = await self._select_servers(db, server_data, params)
+        if not servers:
             batch["status"] = "failed"
             batch["error"] = "Server offline"
             batch["updated_at"] = datetime.now(timezone.utc)
             await self._persist_batch(batch)
             return batch
 
-        # Process clips
-        tasks = []
-        for clip_id in clip_ids:
-            task = self._generate_single(
-                db, clip_id, client, server, generation_type, params, batch_id
-            )
-            tasks.append(task)
+        lanes = []
+        for data in servers:
+            server = ComfyUIServer(**data)
+            slots = self._server_slots(server.id)
+            lanes.append(ServerLane(
+                server_id=server.id,
+                semaphore=self._server_semaphore(server.id, slots),
+                slots=slots,
+                context=(ComfyUIClient(server), server),
+            ))
+        executor = BatchExecutor(lanes)
+        batch["servers"] = [lane.server_id for lane in lanes]
+
+        async def run_clip(lane: ServerLane, clip_id: str) -> Dict[str, Any]:
+            client, server = lane.context
+            try:
+                result = await self._generate_single(
+                    db, clip_id, client, server, generation_type, params, batch_id
+                )
+            except Exception as e:
+                result = {"clip_id": clip_id, "status": "failed", "error": str(e)}
+            await self._record_result(batch, result)
+            return result
 
-        # Run all generations concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        lease_task = asyncio.create_task(self._keep_lease(batch))
+        try:
+            await executor.run(clip_ids, run_clip)
+        finally:
+            lease_task.cancel()
 
-        # Update batch status
+        # Update batch status; results are reported in request order
+        order = {clip_id: index for index, clip_id in enumerate(batch.get("clip_ids", clip_ids))}
+        batch["results"].sort(key=lambda r: order.get(r.get("clip_id"), len(order)))
         batch["status"] = "completed"
-        batch["completed"] = sum(1 for r in results if not isinstance(r, Exception))
-        batch["failed"] = sum(1 for r in results if isinstance(r, Exception))
-        batch["results"] = [
-            r if not isinstance(r, Exception) else {"error": str(r)}
-            for r in results
-        ]
+        batch["owner"] = None
+        batch["lease_expires_at"] = None
+        batch["server_stats"] = executor.stats()
         batch["updated_at"] = datetime.now(timezone.utc)
         await self._persist_batch(batch)
 
@@ -135,6 +199,145 @@ class BatchGenerator:
 
         return batch
 
+    async def _record_result(self, batch: Dict[str, Any], result: Dict[str, Any]):
+        """Count one finished clip in memory and with an atomic $inc in the database"""
+        succeeded = result.get("status") == "success"
+        batch["completed" if succeeded else "failed"] += 1
+        batch["results"].append(result)
+        batch["updated_at"] = datetime.now(timezone.utc)
+
+        if not self._repository:
+            return
+        try:
+            await self._repository.increment_counters(
+                batch["id"],
+                completed=1 if succeeded else 0,
+                failed=0 if succeeded else 1,
+                result=result,
+            )
+        except Exception as e:
+            logger.error(f"Failed to record progress for batch {batch['id']}: {e}")
+
+    async def _keep_lease(self, batch: Dict[str, Any]):
+        """Renew this worker's lease on a running batch until cancelled"""
+        if not self._repository:
+            return
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            expiry = self._lease_expiry()
+            try:
+                if await self._repository.renew_lease(batch["id"], self.worker_id, expiry):
+                    batch["lease_expires_at"] = expiry
+                else:
+                    logger.warning(f"Worker {self.worker_id} lost the lease on batch {batch['id']}")
+            except Exception as e:
+                logger.error(f"Failed to renew lease on batch {batch['id']}: {e}")
+
+    async def resume_batches(self, db) -> int:
+        """
+        Restart batches left in 'processing' by a process that went away.
+
+        Each batch is claimed atomically first, so with several workers only
+        one resumes it, and a batch whose owner still renews its lease is left
+        alone. Only clips without a recorded result are generated again.
+        Returns the number of batches resumed.
+        """
+        if not self._repository:
+            return 0
+
+        try:
+            candidates = await self._repository.find_by_status("processing")
+        except Exception as e:
+            logger.error(f"Failed to load interrupted batches: {e}")
+            return 0
+
+        resumed = 0
+        for candidate in candidates:
+            if candidate.get("owner") == self.worker_id:
+                continue
+            now = datetime.now(timezone.utc)
+            try:
+                batch = await self._repository.claim_batch(
+                    candidate["id"], self.worker_id, now, self._lease_expiry()
+                )
+            except Exception as e:
+                logger.error(f"Failed to claim batch {candidate['id']}: {e}")
+                continue
+            if not batch:
+                continue
+
+            batch.pop("_id", None)
+            self.active_batches[batch["id"]] = batch
+
+            if not batch.get("clip_ids") or not batch.get("server_id"):
+                batch["status"] = "failed"
+                batch["error"] = "Interrupted before it could be resumed"
+                batch["updated_at"] = datetime.now(timezone.utc)
+                await self._persist_batch(batch)
+                continue
+
+            done = {result.get("clip_id") for result in batch.get("results", [])}
+            remaining = [clip_id for clip_id in batch["clip_ids"] if clip_id not in done]
+            logger.info(f"Resuming batch {batch['id']}: {len(remaining)} of {batch['total']} clips remaining")
+
+            task = asyncio.create_task(self._run_batch(db, batch, remaining))
+            self._resume_tasks.add(task)
+            task.add_done_callback(self._resume_tasks.discard)
+            resumed += 1
+
+        return resumed
+
+    async def _resume_loop(self, db):
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                await self.resume_batches(db)
+            except Exception as e:
+                logger.error(f"Batch resume check failed: {e}")
+
+    async def _select_servers(
+        self,
+        db,
+        server_data: Dict[str, Any],
+        params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Online servers to spread a batch over: the requested server, plus any
+        other active server known to host the requested model and LoRAs
+        """
+        candidates = [server_data]
+        try:
+            others = await db.comfyui_servers.find(
+                {"id": {"$ne": server_data["id"]}, "is_active": {"$ne": False}}, {"_id": 0}
+            ).to_list(None)
+        except Exception as e:
+            logger.warning(f"Could not list servers for batch fan-out: {e}")
+            others = []
+
+        model = params.get("model")
+        loras = params.get("loras") or []
+        candidates.extend(
+            other for other in others
+            if queue_manager.hosts_models(other["id"], model, loras)
+        )
+
+        available = await asyncio.gather(
+            *(server_health_monitor.is_available(candidate) for candidate in candidates)
+        )
+        return [candidate for candidate, ok in zip(candidates, available) if ok]
+
+    def _server_slots(self, server_id: str) -> int:
+        load = queue_manager.server_loads.get(server_id)
+        return max(1, load.max_concurrent) if load else 1
+
+    def _server_semaphore(self, server_id: str, slots: int) -> asyncio.Semaphore:
+        """Per-server semaphore shared by all batches, resized when max_concurrent changes"""
+        semaphore, size = self._semaphores.get(server_id, (None, 0))
+        if semaphore is None or size != slots:
+            semaphore = asyncio.Semaphore(slots)
+            self._semaphores[server_id] = (semaphore, slots)
+        return semaphore
+
     async def _generate_single(
         self,
         db,
@@ -0,0 +1,388 @@
+"""Trigram index for matching server model filenames against Civitai entries"""
+import asyncio
+import heapq
+import logging
+import re
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+CIVITAI_SOURCE = "civitai_sdxl"
+
+
+def clean_model_name(name: str) -> str:
+    """Clean model name by removing extensions and common prefixes"""
+    name = re.sub(r"\.(safetensors|ckpt|pth|pt)$", "", name, flags=re.IGNORECASE)
+    name = re.sub(
+        r"^(sd|stable-diffusion|sd-|sdxl|sd_xl)_?", "", name, flags=re.IGNORECASE
+    )
+    name = re.sub(
+        r"_v\d+(-\d+)?(_lightning)?(_bakedvae)?", "", name, flags=re.IGNORECASE
+    )
+    name = re.sub(r"(-\d+)+$", "", name)
+    name = re.sub(r"[-_]+", " ", name)
+    name = re.sub(r"\s+", " ", name)
+    return name.strip().lower()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of ``text``; strings shorter than three characters are their own gram"""
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class CivitaiEntry:
+    """One Civitai model, with the name forms the matcher compares against"""
+    key: Any
+    name: str
+    name_lower: str
+    name_clean: str
+    # (lowercased, cleaned) name of every file of every version
+    filenames: List[Tuple[str, str]] = field(default_factory=list)
+    grams: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def build(cls, key: Any, name: str, filenames: Iterable[str] = ()) -> "CivitaiEntry":
+        name = name or ""
+        entry = cls(
+            key=key,
+            name=name,
+            name_lower=name.lower(),
+            name_clean=clean_model_name(name),
+            filenames=[(f.lower(), clean_model_name(f)) for f in filenames if f],
+        )
+        entry.grams = trigrams(entry.name_clean)
+        for _, filename_clean in entry.filenames:
+            entry.grams |= trigrams(filename_clean)
+        return entry
+
+
+@dataclass
+class CivitaiMatch:
+    key: Any
+    name: str
+    score: float
+    reason: str
+
+
+def _filenames(model: Dict[str, Any]) -> List[str]:
+    return [
+        file_info.get("name", "")
+        for version in model.get("modelVersions") or []
+        for file_info in version.get("files") or []
+    ]
+
+
+class CivitaiMatcher:
+    """
+    Civitai entries indexed by the trigrams of their cleaned name and filenames.
+
+    Every name is cleaned once when the entry is added. A lookup counts shared
+    trigrams through the inverted index, skipping grams common to more than
+    ``common_gram_share`` of the catalogue, keeps the ``candidates`` entries
+    with the highest overlap (how much of the query they cover plus how much
+    of themselves the query covers), and runs the exact, substring, filename
+    and SequenceMatcher scoring only on those. Exact name hits are
+    always scored, whatever their overlap rank.
+
+    Entries are added, replaced and removed individually, so newly imported
+    Civitai data is picked up without rebuilding the index.
+    """
+
+    def __init__(
+        self,
+        candidates: int = 25,
+        refresh_seconds: float = 60.0,
+        common_gram_share: float = 0.05,
+    ):
+        self.candidates = candidates
+        self.common_gram_share = common_gram_share
+        self.refresh_seconds = refresh_seconds
+        self._entries: Dict[int, CivitaiEntry] = {}
+        self._sizes: Dict[int, int] = {}
+        self._slots: Dict[Any, int] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._exact: Dict[str, Set[int]] = {}
+        self._next_slot = 0
+        # Incremental refresh state for the database_models collection
+        self._synced_until: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._slots
+
+    @classmethod
+    def from_models(cls, models: List[Dict[str, Any]], **kwargs) -> "CivitaiMatcher":
+        """Index a list of raw Civitai models, keyed by their position in the list"""
+        matcher = cls(**kwargs)
+        for position, model in enumerate(models):
+            matcher.add(position, model.get("name", ""), _filenames(model))
+        return matcher
+
+    # -------------------------------------------------------------------------
+    # Index maintenance
+    # -------------------------------------------------------------------------
+    def add(self, key: Any, name: str, filenames: Iterable[str] = ()):
+        """Add an entry, replacing any previous entry with the same key"""
+        self.remove(key)
+        entry = CivitaiEntry.build(key, name, filenames)
+        slot = self._next_slot
+        self._next_slot += 1
+        self._entries[slot] = entry
+        self._sizes[slot] = len(entry.grams)
+        self._slots[key] = slot
+        for gram in entry.grams:
+            self._postings.setdefault(gram, set()).add(slot)
+        for form in {entry.name_lower, entry.name_clean}:
+            self._exact.setdefault(form, set()).add(slot)
+
+    def remove(self, key: Any):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        entry = self._entries.pop(slot)
+        del self._sizes[slot]
+        for gram in entry.grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self._postings[gram]
+        for form in {entry.name_lower, entry.name_clean}:
+            slots = self._exact.get(form)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._exact[form]
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._slots.clear()
+        self._postings.clear()
+        self._exact.clear()
+        self._synced_until = None
+        self._refreshed_at = None
+
+    def invalidate(self):
+        """Make the next refresh check the database straight away"""
+        self._refreshed_at = None
+
+    async def refresh(self, db, force: bool = False):
+        """
+        Pick up Civitai models imported into ``database_models`` since the last
+        refresh. Only documents updated since then are read; when the indexed
+        count no longer matches the collection (models were deleted) the index
+        is rebuilt from scratch. Checks are spaced ``refresh_seconds`` apart.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._refreshed_at is not None
+            and now - self._refreshed_at < self.refresh_seconds
+        ):
+            return
+
+        async with self._refresh_lock:
+            if not force and self._refreshed_at is not None and self._refreshed_at >= now:
+                return
+            total = await db.database_models.count_documents({"source": CIVITAI_SOURCE})
+            if total < len(self):
+                self.clear()
+            incremental = self._synced_until is not None
+            added = await self._load(db, since=self._synced_until)
+            if incremental and len(self) != total:
+                self.clear()
+                added = await self._load(db, since=None)
+            self._refreshed_at = time.monotonic()
+            if added:
+                logger.info(f"Civitai index: {added} models indexed, {len(self)} total")
+
+    async def _load(self, db, since: Optional[datetime]) -> int:
+        query: Dict[str, Any] = {"source": CIVITAI_SOURCE}
+        if since is not None:
+            # $gte: documents written in the same instant as the watermark may have landed after it
+            query["updated_at"] = {"$gte": since}
+        projection = {
+            "_id": 0,
+            "id": 1,
+            "name": 1,
+            "updated_at": 1,
+            "civitai_info.modelVersions.files.name": 1,
+        }
+        count = 0
+        async for doc in db.database_models.find(query, projection):
+            self.add(doc["id"], doc.get("name", ""), _filenames(doc.get("civitai_info") or {}))
+            updated_at = doc.get("updated_at")
+            if updated_at and (self._synced_until is None or updated_at > self._synced_until):
+                self._synced_until = updated_at
+            count += 1
+        return count
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+    def best_match(self, server_model_name: str, fallback: bool = False) -> Optional[CivitaiMatch]:
+        """
+        Best scoring entry for a server model name, or None when nothing clears
+        the threshold (0.7, or 0.3 in fallback mode)
+        """
+        server_name_clean = clean_model_name(server_model_name)
+        server_name_original = server_model_name.lower().strip()
+
+        best: Optional[CivitaiMatch] = None
+        for slot in self._candidates(server_name_clean, server_name_original):
+            entry = self._entries[slot]
+            score, reason = self._score(server_name_clean, server_name_original, entry, fallback)
+            if best is None or score > best.score:
+                best = CivitaiMatch(entry.key, entry.name, score, reason)
+                if score >= 1.0:
+                    break
+
+        min_threshold = 0.3 if fallback else 0.7
+        if best is None or best.score < min_threshold:
+            return None
+        return best
+
+    def _candidates(self, server_name_clean: str, server_name_original: str) -> List[int]:
+        postings = [self._postings[gram] for gram in trigrams(server_name_clean) if gram in self._postings]
+        # Grams shared by a large share of the catalogue ("xl ", " v1") say little
+        # about which entry is meant; counting them would touch most entries
+        limit = max(len(self._entries) * self.common_gram_share, self.candidates)
+        selective = [posting for posting in postings if len(posting) <= limit] or postings
+
+        shared: Counter = Counter()
+        for posting in selective:
+            shared.update(posting)
+
+        query_size = len(selective)
+        sizes = self._sizes
+
+        def overlap(item: Tuple[int, int]) -> float:
+            slot, count = item
+            return count / query_size + count / sizes[slot]
+
+        ranked = [slot for slot, _ in heapq.nlargest(self.candidates, shared.items(), key=overlap)]
+        exact = self._exact.get(server_name_clean, set()) | self._exact.get(server_name_original, set())
+        return sorted(exact) + [slot for slot in ranked if slot not in exact]
+
+    def match_many(self, names: Iterable[str], fallback: bool = True) -> Dict[str, Tuple[Optional[CivitaiMatch], str]]:
+        """
+        Match every distinct name once, as the single-model sync does: the
+        normal threshold first, then (with ``fallback``) the lower one.
+        Returns name -> (match or None, "high_confidence" | "low_confidence" | "unmatched").
+        """
+        results: Dict[str, Tuple[Optional[CivitaiMatch], str]] = {}
+        for name in names:
+            if name in results:
+                continue
+            match = self.best_match(name)
+            if match:
+                results[name] = (match, "high_confidence")
+                continue
+            match = self.best_match(name, fallback=True) if fallback else None
+            results[name] = (match, "low_confidence" if match else "unmatched")
+        return results
+
+    @staticmethod
+    def _score(
+        server_name_clean: str,
+        server_name_original: str,
+        entry: CivitaiEntry,
+        fallback: bool,
+    ) -> Tuple[float, str]:
+        high_threshold = 0.85 if not fallback else 0.7
+        medium_threshold = 0.7 if not fallback else 0.5
+
+        score = 0.0
+        reason = ""
+
+        # Exact name match (highest priority)
+        if server_name_clean == entry.name_clean or server_name_original == entry.name_lower:
+            return 1.0, "exact_name_match"
+
+        # Model names as substrings of each other
+        if server_name_clean in entry.name_clean:
+            score, reason = 0.9, "server_name_in_model_name"
+        elif entry.name_clean in server_name_clean:
+            score, reason = 0.8, "model_name_in_server_name"
+
+        # Filenames of the model versions
+        if score < 0.8:
+            for filename_lower, filename_clean in entry.filenames:
+                if server_name_clean == filename_clean or server_name_original == filename_lower:
+                    score, reason = max(score, 0.95), "filename_exact_match"
+                elif server_name_clean in filename_clean:
+                    score, reason = max(score, 0.85), "server_name_in_filename"
+                elif filename_clean in server_name_clean:
+                    score, reason = max(score, 0.75), "filename_in_server_name"
+
+        # Fuzzy matching; the cheap upper bounds rule most candidates out before ratio()
+        if score < 0.7:
+            matcher = SequenceMatcher(None, server_name_clean, entry.name_clean)
+            similarity = 0.0
+            if matcher.real_quick_ratio() > medium_threshold and matcher.quick_ratio() > medium_threshold:
+                similarity = matcher.ratio()
+            if similarity > high_threshold:
+                score, reason = similarity, "fuzzy_high"
+            elif similarity > medium_threshold:
+                score, reason = similarity, "fuzzy_medium"
+
+        # Any longer word of the query in the model name
+        if score < 0.5:
+            if any(word in entry.name_lower for word in server_name_clean.split() if len(word) > 2):
+                score, reason = 0.4, "contains_match"
+
+        return score, reason
+
+
+# Lower bound and label of each reported score bucket, highest first
+SCORE_BUCKETS = [
+    (1.0, "1.0"),
+    (0.85, "0.85-1.0"),
+    (0.7, "0.7-0.85"),
+    (0.5, "0.5-0.7"),
+    (0.3, "0.3-0.5"),
+]
+
+
+def score_distribution(scores: List[float]) -> Dict[str, Any]:
+    """Bucket counts and summary statistics of match scores"""
+    buckets = {label: 0 for _, label in SCORE_BUCKETS}
+    for score in scores:
+        for lower, label in SCORE_BUCKETS:
+            if score >= lower:
+                buckets[label] += 1
+                break
+
+    ordered = sorted(scores)
+    count = len(ordered)
+    return {
+        "count": count,
+        "buckets": buckets,
+        "min": round(ordered[0], 3) if count else None,
+        "median": round(statistics.median(ordered), 3) if count else None,
+        "mean": round(sum(ordered) / count, 3) if count else None,
+        "max": round(ordered[-1], 3) if count else None,
+    }
+
+
+# Global instance, kept in step with the Civitai models in database_models
+civitai_matcher = CivitaiMatcher(
+    candidates=config.CIVITAI_MATCH_CANDIDATES,
+    refresh_seconds=config.CIVITAI_INDEX_REFRESH_SECONDS,
+)
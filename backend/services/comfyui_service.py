@@ -3,7 +3,7 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
 
@@ -16,12 +16,47 @@ from dtos.comfyui_dtos import (
 )
 from repositories.comfyui_repository import ComfyUIRepository
 from active_models_service import ActiveModelsService
+from services.completion_watcher import completion_watchers
 from services.model_config import MODEL_DEFAULTS, detect_model_type
+from services.queue_manager import queue_manager
 from utils.errors import DuplicateResourceError, ServerNotFoundError
+from utils.http_pool import RUNPOD_API_BASE, http_pool
 
 logger = logging.getLogger(__name__)
 
 
+def models_from_object_info(data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Checkpoint, LoRA and VAE names offered by the loader nodes of an ``/object_info`` payload"""
+    models: Dict[str, List[str]] = {
+        "checkpoints": [],
+        "loras": [],
+        "vaes": [],
+    }
+
+    for node_info in data.values():
+        if "input" not in node_info or "required" not in node_info["input"]:
+            continue
+
+        required_inputs = node_info["input"]["required"]
+        for input_name, input_info in required_inputs.items():
+            if not isinstance(input_info, list) or not input_info:
+                continue
+
+            value = input_info[0]
+            if not isinstance(value, list):
+                continue
+
+            lowered = input_name.lower()
+            if "ckpt_name" in lowered or "checkpoint" in lowered:
+                models["checkpoints"].extend(value)
+            elif "lora" in lowered:
+                models["loras"].extend(value)
+            elif "vae" in lowered:
+                models["vaes"].extend(value)
+
+    return {key: sorted(set(values)) for key, values in models.items()}
+
+
 class ComfyUIClient:
     """Client wrapper for interacting with a ComfyUI server instance."""
 
@@ -49,7 +84,7 @@ class ComfyUIClient:
             return False
 
     async def _check_standard_connection(self) -> bool:
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(self.base_url) as session:
             async with session.get(
                 f"{self.base_url}/system_stats", timeout=5
             ) as response:
@@ -71,7 +106,7 @@ class ComfyUIClient:
             "Content-Type": "application/json",
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(RUNPOD_API_BASE) as session:
             status_url = f"https://api.runpod.ai/v2/{self.endpoint_id}/status"
             try:
                 async with session.get(
@@ -115,40 +150,25 @@ class ComfyUIClient:
             return {"checkpoints": [], "loras": [], "vaes": []}
 
     async def _get_standard_models(self) -> Dict[str, List[str]]:
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(self.base_url) as session:
             async with session.get(f"{self.base_url}/object_info") as response:
                 if response.status != 200:
                     return {"checkpoints": [], "loras": [], "vaes": []}
 
-                data = await response.json()
-                models: Dict[str, List[str]] = {
-                    "checkpoints": [],
-                    "loras": [],
-                    "vaes": [],
-                }
-
-                for node_info in data.values():
-                    if "input" not in node_info or "required" not in node_info["input"]:
-                        continue
-
-                    required_inputs = node_info["input"]["required"]
-                    for input_name, input_info in required_inputs.items():
-                        if not isinstance(input_info, list) or not input_info:
-                            continue
-
-                        value = input_info[0]
-                        if not isinstance(value, list):
-                            continue
-
-                        lowered = input_name.lower()
-                        if "ckpt_name" in lowered or "checkpoint" in lowered:
-                            models["checkpoints"].extend(value)
-                        elif "lora" in lowered:
-                            models["loras"].extend(value)
-                        elif "vae" in lowered:
-                            models["vaes"].extend(value)
-
-                return {key: sorted(set(values)) for key, values in models.items()}
+                return models_from_object_info(await response.json())
+
+    async def fetch_object_info(
+        self, etag: Optional[str] = None
+    ) -> Tuple[int, Optional[str], Optional[bytes]]:
+        """
+        Raw ``/object_info`` body as (status, ETag, body). With ``etag`` the
+        request is conditional, and a 304 comes back without a body.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        async with http_pool.session(self.base_url) as session:
+            async with session.get(f"{self.base_url}/object_info", headers=headers) as response:
+                body = await response.read() if response.status == 200 else None
+                return response.status, response.headers.get("ETag"), body
 
     async def _get_runpod_models(self) -> Dict[str, List[str]]:
         return {
@@ -222,7 +242,7 @@ class ComfyUIClient:
 
         request_data = {"input": runpod_input}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(RUNPOD_API_BASE) as session:
             async with session.post(
                 f"https://api.runpod.ai/v2/{self.endpoint_id}/run",
                 headers=headers,
@@ -354,36 +374,18 @@ class ComfyUIClient:
             },
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/prompt", json={"prompt": workflow}
-            ) as response:
-                if response.status != 200:
-                    return None
-
-                result = await response.json()
-                prompt_id = result.get("prompt_id")
-                if not prompt_id:
-                    return None
-
-                for _ in range(60):
-                    await asyncio.sleep(1)
-                    async with session.get(
-                        f"{self.base_url}/history/{prompt_id}"
-                    ) as hist_response:
-                        if hist_response.status != 200:
-                            continue
-
-                        history = await hist_response.json()
-                        if prompt_id not in history:
-                            continue
+        prompt_id = await self._queue_prompt(workflow)
+        if not prompt_id:
+            return None
 
-                        outputs = history[prompt_id].get("outputs", {})
-                        for output in outputs.values():
-                            if "images" in output:
-                                image_info = output["images"][0]
-                                filename = image_info["filename"]
-                                return f"{self.base_url}/view?filename={filename}"
+        outputs = await completion_watchers.get(self.base_url).wait_for(
+            prompt_id, timeout=60
+        )
+        for output in (outputs or {}).values():
+            if "images" in output:
+                image_info = output["images"][0]
+                filename = image_info["filename"]
+                return f"{self.base_url}/view?filename={filename}"
         return None
 
     async def generate_video(
@@ -446,7 +448,7 @@ class ComfyUIClient:
 
         request_data = {"input": runpod_input}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(RUNPOD_API_BASE) as session:
             async with session.post(
                 f"https://api.runpod.ai/v2/{self.endpoint_id}/run",
                 headers=headers,
@@ -516,41 +518,37 @@ class ComfyUIClient:
                 prompt, negative_prompt, model, params, loras
             )
 
-        async with aiohttp.ClientSession() as session:
+        prompt_id = await self._queue_prompt(workflow)
+        if not prompt_id:
+            return None
+
+        outputs = await completion_watchers.get(self.base_url).wait_for(
+            prompt_id, timeout=600
+        )
+        for output in (outputs or {}).values():
+            if "gifs" in output or "videos" in output:
+                media = output.get("gifs") or output.get("videos") or []
+                if media:
+                    filename = media[0].get("filename")
+                    if filename:
+                        return f"{self.base_url}/view?filename={filename}"
+        return None
+
+    async def _queue_prompt(self, workflow: Dict[str, Any]) -> Optional[str]:
+        """Submit a workflow with the server's watcher client id; returns the prompt id"""
+        watcher = completion_watchers.get(self.base_url)
+        await watcher.ensure_connected()
+
+        async with http_pool.session(self.base_url) as session:
             async with session.post(
-                f"{self.base_url}/prompt", json={"prompt": workflow}
+                f"{self.base_url}/prompt",
+                json={"prompt": workflow, "client_id": watcher.client_id},
             ) as response:
                 if response.status != 200:
                     return None
 
                 result = await response.json()
-                prompt_id = result.get("prompt_id")
-                if not prompt_id:
-                    return None
-
-                for _ in range(300):
-                    await asyncio.sleep(2)
-                    async with session.get(
-                        f"{self.base_url}/history/{prompt_id}"
-                    ) as hist_response:
-                        if hist_response.status != 200:
-                            continue
-
-                        history = await hist_response.json()
-                        if prompt_id not in history:
-                            continue
-
-                        outputs = history[prompt_id].get("outputs", {})
-                        for output in outputs.values():
-                            if "gifs" in output or "videos" in output:
-                                media = output.get("gifs") or output.get("videos") or []
-                                if media:
-                                    filename = media[0].get("filename")
-                                    if filename:
-                                        return (
-                                            f"{self.base_url}/view?filename={filename}"
-                                        )
-        return None
+                return result.get("prompt_id")
 
     async def _create_wan_video_workflow(
         self,
@@ -889,6 +887,9 @@ class ComfyUIService:
                 logger.info(
                     f"Stored {len(all_models)} models from backend {server.name}"
                 )
+                queue_manager.set_server_models(
+                    server.id, [model["name"] for model in all_models]
+                )
 
             except Exception as e:
                 logger.error(f"Failed to store models from backend {server.name}: {e}")
@@ -922,7 +923,7 @@ class ComfyUIService:
         if server.server_type != "standard":
             return {"workflows": []}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session(server.url) as session:
             try:
                 async with session.get(f"{server.url}/workflows") as response:
                     if response.status == 200:
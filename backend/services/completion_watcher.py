@@ -0,0 +1,285 @@
+"""Prompt completion tracking over ComfyUI's /ws event stream"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from utils.http_pool import http_pool
+
+logger = logging.getLogger(__name__)
+
+# Prompt outputs keyed by node id, as in /history/<prompt_id>["outputs"]
+PromptOutputs = Dict[str, Dict[str, Any]]
+
+
+class CompletionWatcher:
+    """
+    Waits for ComfyUI prompts to finish on one server.
+
+    A single ``/ws?clientId=`` socket is shared by every in-flight prompt on the
+    server. ``executed`` events collect each output node's result and the
+    prompt's future is resolved once ComfyUI reports the prompt finished
+    (``execution_success``, or ``executing`` with no node). Prompts submitted
+    with :attr:`client_id` get their events on this socket.
+
+    While the socket is down, waiters fall back to polling ``/history`` with
+    an adaptive backoff, and pending prompts are re-checked against history
+    after every reconnect so events missed during an outage are not lost.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool=http_pool,
+        connect_timeout: float = 2.0,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 5.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        completed_cache_size: int = 256,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = uuid.uuid4().hex
+        self.pool = pool
+        self.connect_timeout = connect_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.completed_cache_size = completed_cache_size
+
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._outputs: Dict[str, PromptOutputs] = {}
+        # Prompts that finished before anyone waited on them (submit/ack race)
+        self._completed: "OrderedDict[str, Optional[PromptOutputs]]" = OrderedDict()
+        self._connected = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.resolved_by_socket = 0
+        self.resolved_by_polling = 0
+        self.history_requests = 0
+        self.reconnects = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    @property
+    def ws_url(self) -> str:
+        scheme, _, rest = self.base_url.partition("://")
+        ws_scheme = "wss" if scheme == "https" else "ws"
+        return f"{ws_scheme}://{rest}/ws?clientId={self.client_id}"
+
+    async def ensure_connected(self) -> bool:
+        """
+        Start the socket task if needed.
+
+        Only a freshly started task is waited on (up to ``connect_timeout``), so
+        a server without a reachable socket doesn't delay every submission.
+        """
+        if self._task and not self._task.done():
+            return self.connected
+
+        self._closing.clear()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=self.connect_timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def wait_for(self, prompt_id: str, timeout: float) -> Optional[PromptOutputs]:
+        """
+        Wait for a prompt to finish and return its outputs.
+
+        Returns None if the prompt failed or did not finish within ``timeout``.
+        """
+        if prompt_id in self._completed:
+            return self._completed.pop(prompt_id)
+
+        future = self._futures.get(prompt_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[prompt_id] = future
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        interval = self.poll_interval
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning(f"Timed out waiting for prompt {prompt_id} on {self.base_url}")
+                    return None
+
+                # With a live socket, just wait for the event (reconnects re-check
+                # history); otherwise poll with backoff.
+                wait = min(self.max_poll_interval if self.connected else interval, remaining)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+                if not self.connected:
+                    if await self._check_history(prompt_id):
+                        self.resolved_by_polling += 1
+                        return future.result()
+                    interval = min(interval * 1.5, self.max_poll_interval)
+        finally:
+            if self._futures.get(prompt_id) is future:
+                del self._futures[prompt_id]
+            self._outputs.pop(prompt_id, None)
+
+    async def close(self):
+        """Stop the socket task and fail any remaining waiters"""
+        self._closing.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self._connected.clear()
+        for future in self._futures.values():
+            if not future.done():
+                future.set_result(None)
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while not self._closing.is_set():
+            try:
+                session = self.pool.get(self.base_url)
+                async with session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                    self._connected.set()
+                    delay = self.reconnect_delay
+                    logger.info(f"Completion watcher connected to {self.base_url}")
+                    await self._recheck_pending()
+
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            self._handle_event(json.loads(message.data))
+                        elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Completion watcher socket for {self.base_url} unavailable: {e}")
+            finally:
+                self._connected.clear()
+
+            self.reconnects += 1
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _handle_event(self, event: Dict[str, Any]):
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        if event_type == "executed":
+            output = data.get("output")
+            if output is not None:
+                self._outputs.setdefault(prompt_id, {})[str(data.get("node"))] = output
+        elif event_type == "execution_success" or (event_type == "executing" and data.get("node") is None):
+            if self._resolve(prompt_id, self._outputs.pop(prompt_id, {})):
+                self.resolved_by_socket += 1
+        elif event_type in ("execution_error", "execution_interrupted"):
+            logger.error(f"Prompt {prompt_id} failed on {self.base_url}: {event_type}")
+            self._outputs.pop(prompt_id, None)
+            self._resolve(prompt_id, None)
+
+    def _resolve(self, prompt_id: str, outputs: Optional[PromptOutputs]) -> bool:
+        future = self._futures.get(prompt_id)
+        if future is None:
+            # ComfyUI may report completion twice (execution_success, then
+            # executing with no node); keep the first result.
+            self._completed.setdefault(prompt_id, outputs)
+            while len(self._completed) > self.completed_cache_size:
+                self._completed.popitem(last=False)
+            return False
+        if future.done():
+            return False
+        future.set_result(outputs)
+        return True
+
+    async def _recheck_pending(self):
+        for prompt_id in list(self._futures):
+            await self._check_history(prompt_id)
+
+    async def _check_history(self, prompt_id: str) -> bool:
+        """Resolve a prompt from /history; returns True if it has finished"""
+        self.history_requests += 1
+        try:
+            session = self.pool.get(self.base_url)
+            async with session.get(f"{self.base_url}/history/{prompt_id}") as response:
+                if response.status != 200:
+                    return False
+                history = await response.json()
+        except Exception as e:
+            logger.debug(f"History check for prompt {prompt_id} failed: {e}")
+            return False
+
+        entry = history.get(prompt_id)
+        if not entry:
+            return False
+        status = entry.get("status") or {}
+        outputs = None if status.get("status_str") == "error" else entry.get("outputs", {})
+        self._resolve(prompt_id, outputs)
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "in_flight": len(self._futures),
+            "resolved_by_socket": self.resolved_by_socket,
+            "resolved_by_polling": self.resolved_by_polling,
+            "history_requests": self.history_requests,
+            "reconnects": self.reconnects,
+        }
+
+
+class CompletionWatcherRegistry:
+    """One CompletionWatcher per ComfyUI base URL"""
+
+    def __init__(self, **watcher_options):
+        self._watcher_options = watcher_options
+        self._watchers: Dict[str, CompletionWatcher] = {}
+        self._loops: Dict[str, asyncio.AbstractEventLoop] = {}
+
+    def get(self, base_url: str) -> CompletionWatcher:
+        key = base_url.rstrip("/")
+        loop = asyncio.get_running_loop()
+        watcher = self._watchers.get(key)
+        if watcher is None or self._loops.get(key) is not loop:
+            watcher = CompletionWatcher(key, **self._watcher_options)
+            self._watchers[key] = watcher
+            self._loops[key] = loop
+        return watcher
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        watchers = [
+            watcher for key, watcher in self._watchers.items()
+            if self._loops.get(key) is loop
+        ]
+        self._watchers.clear()
+        self._loops.clear()
+        for watcher in watchers:
+            await watcher.close()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {base_url: watcher.get_metrics() for base_url, watcher in self._watchers.items()}
+
+
+completion_watchers = CompletionWatcherRegistry()
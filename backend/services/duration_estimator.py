@@ -0,0 +1,155 @@
+"""Learned job duration estimates for queue scheduling and ETAs"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from services.model_config import detect_model_type
+from services.queue_journal import QueueJournal
+
+logger = logging.getLogger(__name__)
+
+ANY_SERVER = "*"
+
+# (generation_type, model_type, resolution_bucket, steps, frames)
+JobFeatures = Tuple[str, str, float, int, int]
+
+
+@dataclass
+class DurationStats:
+    """Exponentially weighted moving average of observed durations"""
+    mean: float
+    count: int = 0
+    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class DurationEstimator:
+    """
+    Online job duration estimator.
+
+    Keeps an EWMA of completed job durations keyed by (server_id, generation
+    type, model type, resolution bucket, steps, frames), plus the same key
+    across all servers and a coarse (generation type, model type) key used as
+    fallbacks. Estimates are persisted through a write-behind journal and
+    reloaded on startup.
+    """
+
+    DEFAULT_SECONDS = {"video": 120.0, "image": 30.0}
+
+    def __init__(self, repository=None, alpha: float = 0.2, flush_interval: float = 5.0):
+        self.alpha = alpha
+        self._repository = repository
+        self._journal = QueueJournal(repository, flush_interval=flush_interval, name="duration estimate")
+        self._stats: Dict[Tuple, DurationStats] = {}
+
+    def set_repository(self, repository):
+        self._repository = repository
+        self._journal.repository = repository
+
+    @staticmethod
+    def features(generation_type: str, model: Optional[str], params: Optional[Dict[str, Any]]) -> JobFeatures:
+        """Bucket a job into the features its duration depends on"""
+        params = params or {}
+        model_type = detect_model_type(model) if model else "default"
+        width = params.get("width") or 0
+        height = params.get("height") or 0
+        # Quarter-megapixel buckets: 512x512 -> 0.25, 1024x1024 -> 1.0
+        resolution_bucket = round(width * height / 1_000_000 * 4) / 4
+        steps = int(params.get("steps") or 0)
+        frames = int(params.get("video_frames") or 0) if generation_type == "video" else 0
+        return (generation_type, model_type, resolution_bucket, steps, frames)
+
+    @staticmethod
+    def _keys(server_id: Optional[str], features: JobFeatures):
+        """Lookup keys from most to least specific"""
+        keys = []
+        if server_id:
+            keys.append((server_id, *features))
+        keys.append((ANY_SERVER, *features))
+        keys.append((ANY_SERVER, features[0], features[1]))
+        return keys
+
+    def estimate(
+        self,
+        server_id: Optional[str],
+        generation_type: str,
+        model: Optional[str],
+        params: Optional[Dict[str, Any]],
+    ) -> float:
+        """Expected duration in seconds, falling back to type defaults when unseen"""
+        features = self.features(generation_type, model, params)
+        for key in self._keys(server_id, features):
+            stats = self._stats.get(key)
+            if stats:
+                return stats.mean
+        return self.DEFAULT_SECONDS.get(generation_type, self.DEFAULT_SECONDS["image"])
+
+    def observe(
+        self,
+        server_id: Optional[str],
+        generation_type: str,
+        model: Optional[str],
+        params: Optional[Dict[str, Any]],
+        seconds: float,
+    ):
+        """Fold a completed job's duration into every key it belongs to"""
+        if seconds <= 0:
+            return
+
+        features = self.features(generation_type, model, params)
+        now = datetime.now(timezone.utc)
+        for key in self._keys(server_id, features):
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = DurationStats(mean=seconds)
+                self._stats[key] = stats
+            else:
+                stats.mean = stats.mean * (1 - self.alpha) + seconds * self.alpha
+            stats.count += 1
+            stats.updated_at = now
+            self._journal.record_upsert(self._key_id(key), self._to_document(key, stats))
+
+    @staticmethod
+    def _key_id(key: Tuple) -> str:
+        return "|".join(str(part) for part in key)
+
+    def _to_document(self, key: Tuple, stats: DurationStats) -> Dict[str, Any]:
+        return {
+            "id": self._key_id(key),
+            "key": list(key),
+            "mean": stats.mean,
+            "count": stats.count,
+            "updated_at": stats.updated_at,
+        }
+
+    async def load(self):
+        """Restore persisted estimates"""
+        if not self._repository:
+            return
+        try:
+            documents = await self._repository.find_many({})
+        except Exception as e:
+            logger.error(f"Failed to load job duration estimates: {e}")
+            return
+
+        for document in documents:
+            self._stats[tuple(document["key"])] = DurationStats(
+                mean=document["mean"],
+                count=document.get("count", 0),
+                updated_at=document.get("updated_at") or datetime.now(timezone.utc),
+            )
+        logger.info(f"Loaded {len(documents)} job duration estimate(s)")
+
+    def start(self):
+        self._journal.start()
+
+    async def stop(self):
+        await self._journal.stop()
+
+    def snapshot(self, server_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Current estimates, optionally limited to one server"""
+        return {
+            self._key_id(key): {"mean": stats.mean, "count": stats.count}
+            for key, stats in self._stats.items()
+            if server_id is None or key[0] == server_id
+        }
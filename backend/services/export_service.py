@@ -1,16 +1,82 @@
 """Export service for timeline data to various formats"""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional, Set, TextIO, Tuple
+from dataclasses import asdict, dataclass
 from datetime import datetime
-import xml.etree.ElementTree as ET
-import xml.dom.minidom as minidom
+from io import StringIO
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
 import logging
 
+from config import config
+from services.project_revisions import project_revisions
+
 logger = logging.getLogger(__name__)
 
+# Spine elements of an FCPXML export are spooled here until the resources are written
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Bump when the writers change output, so artifacts rendered by older code are not reused
+ARTIFACT_VERSION = 1
+
+
+@dataclass
+class ExportClip:
+    """One clip of the export timeline, with its selected video resolved"""
+    clip_id: str
+    scene_id: str
+    name: str
+    start: float
+    length: float
+    source: str
+    prompt: str = ""
+    model_name: str = ""
+
+
+class _XMLWriter:
+    """Indenting XML writer that emits each element as soon as it is produced"""
+
+    def __init__(self, out: TextIO, indent: str = "  ", depth: int = 0):
+        self._out = out
+        self._indent = indent
+        self._depth = depth
+
+    def declaration(self):
+        self._out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    def start(self, tag: str, attrs: Optional[Dict[str, Any]] = None):
+        self._out.write(f"{self._indent * self._depth}<{tag}{self._attrs(attrs)}>\n")
+        self._depth += 1
+
+    def end(self, tag: str):
+        self._depth -= 1
+        self._out.write(f"{self._indent * self._depth}</{tag}>\n")
+
+    def element(self, tag: str, attrs: Optional[Dict[str, Any]] = None, text: Optional[str] = None):
+        pad = self._indent * self._depth
+        if text:
+            self._out.write(f"{pad}<{tag}{self._attrs(attrs)}>{escape(str(text))}</{tag}>\n")
+        else:
+            self._out.write(f"{pad}<{tag}{self._attrs(attrs)}/>\n")
+
+    @staticmethod
+    def _attrs(attrs: Optional[Dict[str, Any]]) -> str:
+        if not attrs:
+            return ""
+        return "".join(f" {key}={quoteattr(str(value))}" for key, value in attrs.items())
+
 
 class ExportService:
     """Handles export of timeline data to various professional formats"""
 
+    FORMATS = ("fcpxml", "edl", "resolve")
+
     @staticmethod
     async def export_final_cut_pro(db, project_id: str) -> str:
         """
@@ -23,61 +89,7 @@ class ExportService:
         Returns:
             XML string in FCPXML format
         """
-        # Get project
-        project_data = await db.projects.find_one({"id": project_id})
-        if not project_data:
-            raise ValueError("Project not found")
-
-        # Get all scenes and clips
-        scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
-
-        # Create FCPXML root
-        fcpxml = ET.Element('fcpxml', version='1.9')
-        resources = ET.SubElement(fcpxml, 'resources')
-        library = ET.SubElement(fcpxml, 'library')
-        event = ET.SubElement(library, 'event', name=project_data['name'])
-        project_elem = ET.SubElement(event, 'project', name=project_data['name'])
-        sequence = ET.SubElement(project_elem, 'sequence', {
-            'format': 'r1',
-            'duration': f"{project_data.get('music_duration', 0)}s"
-        })
-        spine = ET.SubElement(sequence, 'spine')
-
-        # Add clips to spine
-        for scene in scenes:
-            clips = await db.clips.find({"scene_id": scene['id']}).sort("timeline_position").to_list(100)
-
-            for clip in clips:
-                # Get selected content
-                selected_video_id = clip.get('selected_video_id')
-                selected_video = None
-
-                if selected_video_id:
-                    for video in clip.get('generated_videos', []):
-                        if video['id'] == selected_video_id:
-                            selected_video = video
-                            break
-
-                if selected_video:
-                    clip_elem = ET.SubElement(spine, 'video', {
-                        'name': clip['name'],
-                        'offset': f"{clip['timeline_position']}s",
-                        'duration': f"{clip['length']}s",
-                        'ref': f"r{len(resources)}"
-                    })
-
-                    # Add resource
-                    asset = ET.SubElement(resources, 'asset', {
-                        'id': f"r{len(resources)}",
-                        'name': clip['name'],
-                        'src': selected_video['url'],
-                        'duration': f"{clip['length']}s"
-                    })
-
-        # Convert to pretty XML string
-        rough_string = ET.tostring(fcpxml, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
+        return await ExportService._export_string(db, project_id, "fcpxml")
 
     @staticmethod
     async def export_premiere_edl(db, project_id: str) -> str:
@@ -91,50 +103,7 @@ class ExportService:
         Returns:
             EDL string
         """
-        # Get project
-        project_data = await db.projects.find_one({"id": project_id})
-        if not project_data:
-            raise ValueError("Project not found")
-
-        # Get all scenes and clips
-        scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
-
-        # Build EDL
-        edl_lines = [
-            f"TITLE: {project_data['name']}",
-            f"FCM: NON-DROP FRAME",
-            "",
-        ]
-
-        clip_number = 1
-        for scene in scenes:
-            clips = await db.clips.find({"scene_id": scene['id']}).sort("timeline_position").to_list(100)
-
-            for clip in clips:
-                # Get selected content
-                selected_video_id = clip.get('selected_video_id')
-                if not selected_video_id:
-                    continue
-
-                selected_video = None
-                for video in clip.get('generated_videos', []):
-                    if video['id'] == selected_video_id:
-                        selected_video = video
-                        break
-
-                if selected_video:
-                    start_tc = ExportService._seconds_to_timecode(clip['timeline_position'])
-                    end_tc = ExportService._seconds_to_timecode(clip['timeline_position'] + clip['length'])
-
-                    edl_lines.extend([
-                        f"{clip_number:03d}  {clip['name']} V     C        {start_tc} {end_tc} {start_tc} {end_tc}",
-                        f"* FROM CLIP NAME: {clip['name']}",
-                        f"* SOURCE FILE: {selected_video['url']}",
-                        ""
-                    ])
-                    clip_number += 1
-
-        return "\n".join(edl_lines)
+        return await ExportService._export_string(db, project_id, "edl")
 
     @staticmethod
     async def export_davinci_resolve(db, project_id: str) -> str:
@@ -148,57 +117,216 @@ class ExportService:
         Returns:
             XML string compatible with DaVinci Resolve
         """
-        # Get project
-        project_data = await db.projects.find({"id": project_id})
-        if not project_data:
-            raise ValueError("Project not found")
+        return await ExportService._export_string(db, project_id, "resolve")
 
-        # For DaVinci Resolve, we'll use a simplified XML format
-        # In production, you'd want to use proper AAF library
-        root = ET.Element('resolve_timeline', name=project_data['name'])
-        tracks = ET.SubElement(root, 'tracks')
-        video_track = ET.SubElement(tracks, 'track', type='video', number='1')
+    @staticmethod
+    async def export_to(db, project_id: str, export_format: str, out: TextIO) -> int:
+        """
+        Write an export straight into ``out`` in one pass over the timeline.
 
-        # Get all scenes and clips
-        scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
+        Clips are read scene by scene from a single aggregation, so memory is
+        bounded by the largest scene rather than the project. Returns the
+        number of clips written.
 
-        for scene in scenes:
-            clips = await db.clips.find({"scene_id": scene['id']}).sort("timeline_position").to_list(100)
+        Raises:
+            ValueError: unknown format, or the project does not exist
+        """
+        if export_format not in ExportService.FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
 
-            for clip in clips:
-                selected_video_id = clip.get('selected_video_id')
-                if not selected_video_id:
-                    continue
+        project_data = await ExportService._load_project(db, project_id)
+        clips = ExportService.iter_clips(db, project_id)
+        return await ExportService.write(project_data, clips, export_format, out)
 
-                selected_video = None
-                for video in clip.get('generated_videos', []):
-                    if video['id'] == selected_video_id:
-                        selected_video = video
-                        break
+    @staticmethod
+    async def write(
+        project_data: Dict[str, Any],
+        clips: AsyncIterator[ExportClip],
+        export_format: str,
+        out: TextIO
+    ) -> int:
+        """Run the writer of a timeline format over an already opened clip stream"""
+        writers = {
+            "fcpxml": ExportService.write_final_cut_pro,
+            "edl": ExportService.write_premiere_edl,
+            "resolve": ExportService.write_davinci_resolve,
+        }
+        return await writers[export_format](project_data, clips, out)
 
-                if selected_video:
-                    clip_elem = ET.SubElement(video_track, 'clip', {
-                        'name': clip['name'],
-                        'start': str(clip['timeline_position']),
-                        'duration': str(clip['length']),
-                        'source': selected_video['url']
-                    })
+    @staticmethod
+    async def iter_clips(db, project_id: str) -> AsyncIterator[ExportClip]:
+        """
+        Clips with a selected video, in scene order then timeline position.
+
+        Scenes and clips come from one $lookup aggregation; the selected video
+        is picked out of the embedded summary by the database, so neither the
+        gallery nor unselected clips are transferred.
+        """
+        pipeline = [
+            {"$match": {"project_id": project_id}},
+            {"$sort": {"order": 1, "id": 1}},
+            {"$project": {"_id": 0, "id": 1}},
+            {
+                "$lookup": {
+                    "from": db.clips.name,
+                    "let": {"scene_id": "$id"},
+                    "pipeline": [
+                        {"$match": {
+                            "$expr": {"$eq": ["$scene_id", "$$scene_id"]},
+                            "selected_video_id": {"$nin": [None, ""]},
+                        }},
+                        {"$sort": {"timeline_position": 1}},
+                        {"$project": {
+                            "_id": 0,
+                            "id": 1,
+                            "name": 1,
+                            "timeline_position": 1,
+                            "length": 1,
+                            "selected_video": {"$arrayElemAt": [
+                                {"$filter": {
+                                    "input": {"$ifNull": ["$generated_videos", []]},
+                                    "cond": {"$eq": ["$$this.id", "$selected_video_id"]},
+                                }},
+                                0,
+                            ]},
+                        }},
+                    ],
+                    "as": "clips",
+                }
+            },
+        ]
+        async for scene in db.scenes.aggregate(pipeline, batchSize=20):
+            for clip in scene.get("clips", []):
+                video = clip.get("selected_video")
+                if not video:
+                    continue
+                yield ExportClip(
+                    clip_id=clip.get("id", ""),
+                    scene_id=scene["id"],
+                    name=clip["name"],
+                    start=clip["timeline_position"],
+                    length=clip["length"],
+                    source=video["url"],
+                    prompt=video.get("prompt") or "",
+                    model_name=video.get("model_name") or "",
+                )
 
-                    # Add metadata
-                    metadata = ET.SubElement(clip_elem, 'metadata')
-                    ET.SubElement(metadata, 'prompt').text = selected_video.get('prompt', '')
-                    ET.SubElement(metadata, 'model').text = selected_video.get('model_name', '')
+    @staticmethod
+    async def write_final_cut_pro(
+        project_data: Dict[str, Any],
+        clips: AsyncIterator[ExportClip],
+        out: TextIO
+    ) -> int:
+        """Stream FCPXML; spine entries are spooled while their assets are written"""
+        xml = _XMLWriter(out)
+        xml.declaration()
+        xml.start("fcpxml", {"version": "1.9"})
+        xml.start("resources")
+
+        count = 0
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, mode="w+", encoding="utf-8") as spine_buffer:
+            spine = _XMLWriter(spine_buffer, depth=6)
+            async for clip in clips:
+                ref = f"r{count}"
+                spine.element("video", {
+                    "name": clip.name,
+                    "offset": f"{clip.start}s",
+                    "duration": f"{clip.length}s",
+                    "ref": ref
+                })
+                xml.element("asset", {
+                    "id": ref,
+                    "name": clip.name,
+                    "src": clip.source,
+                    "duration": f"{clip.length}s"
+                })
+                count += 1
+
+            xml.end("resources")
+            xml.start("library")
+            xml.start("event", {"name": project_data["name"]})
+            xml.start("project", {"name": project_data["name"]})
+            xml.start("sequence", {
+                "format": "r1",
+                "duration": f"{project_data.get('music_duration') or 0}s"
+            })
+            xml.start("spine")
+            spine_buffer.seek(0)
+            shutil.copyfileobj(spine_buffer, out)
+            xml.end("spine")
+
+        xml.end("sequence")
+        xml.end("project")
+        xml.end("event")
+        xml.end("library")
+        xml.end("fcpxml")
+        return count
 
-        # Convert to pretty XML
-        rough_string = ET.tostring(root, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
+    @staticmethod
+    async def write_premiere_edl(
+        project_data: Dict[str, Any],
+        clips: AsyncIterator[ExportClip],
+        out: TextIO
+    ) -> int:
+        """Stream a CMX-style EDL, one event per clip"""
+        out.write(f"TITLE: {project_data['name']}\n")
+        out.write("FCM: NON-DROP FRAME\n")
+
+        count = 0
+        async for clip in clips:
+            count += 1
+            start_tc = ExportService._seconds_to_timecode(clip.start)
+            end_tc = ExportService._seconds_to_timecode(clip.start + clip.length)
+            out.write(
+                f"\n{count:03d}  {clip.name} V     C        {start_tc} {end_tc} {start_tc} {end_tc}\n"
+                f"* FROM CLIP NAME: {clip.name}\n"
+                f"* SOURCE FILE: {clip.source}\n"
+            )
+        return count
+
+    @staticmethod
+    async def write_davinci_resolve(
+        project_data: Dict[str, Any],
+        clips: AsyncIterator[ExportClip],
+        out: TextIO
+    ) -> int:
+        """Stream the simplified Resolve timeline XML"""
+        # For DaVinci Resolve, we'll use a simplified XML format
+        # In production, you'd want to use proper AAF library
+        xml = _XMLWriter(out)
+        xml.declaration()
+        xml.start("resolve_timeline", {"name": project_data["name"]})
+        xml.start("tracks")
+        xml.start("track", {"type": "video", "number": "1"})
+
+        count = 0
+        async for clip in clips:
+            xml.start("clip", {
+                "name": clip.name,
+                "start": clip.start,
+                "duration": clip.length,
+                "source": clip.source
+            })
+            xml.start("metadata")
+            xml.element("prompt", text=clip.prompt)
+            xml.element("model", text=clip.model_name)
+            xml.end("metadata")
+            xml.end("clip")
+            count += 1
+
+        xml.end("track")
+        xml.end("tracks")
+        xml.end("resolve_timeline")
+        return count
 
     @staticmethod
     async def export_json(db, project_id: str) -> Dict[str, Any]:
         """
         Export complete project data to JSON
 
+        Clip galleries are exported in full from gallery_items rather than as
+        the bounded summary embedded in clip documents.
+
         Args:
             db: Database instance
             project_id: Project ID
@@ -206,20 +334,30 @@ class ExportService:
         Returns:
             Dictionary with complete project data
         """
-        import json
-
-        # Get project
-        project_data = await db.projects.find_one({"id": project_id})
-        if not project_data:
-            raise ValueError("Project not found")
-
-        # Get all scenes
-        scenes = await db.scenes.find({"project_id": project_id}).sort("order").to_list(100)
-
-        # Get all clips for each scene
-        for scene in scenes:
-            clips = await db.clips.find({"scene_id": scene['id']}).sort("timeline_position").to_list(100)
-            scene['clips'] = clips
+        project_data = await ExportService._load_project(db, project_id)
+
+        # Scenes with all their clips, from one aggregation
+        pipeline = [
+            {"$match": {"project_id": project_id}},
+            {"$sort": {"order": 1, "id": 1}},
+            {"$project": {"_id": 0}},
+            {
+                "$lookup": {
+                    "from": db.clips.name,
+                    "let": {"scene_id": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$scene_id", "$$scene_id"]}}},
+                        {"$sort": {"timeline_position": 1}},
+                        {"$project": {"_id": 0}},
+                    ],
+                    "as": "clips",
+                }
+            },
+        ]
+        scenes = []
+        async for scene in db.scenes.aggregate(pipeline):
+            await ExportService._load_full_galleries(db, scene.get("clips", []))
+            scenes.append(scene)
 
         # Build export data
         export_data = {
@@ -237,6 +375,47 @@ class ExportService:
 
         return json.loads(json.dumps(export_data, default=serialize_dates))
 
+    @staticmethod
+    async def _load_full_galleries(db, clips: List[Dict[str, Any]]):
+        """
+        Replace the bounded gallery summaries of a scene's clips with their
+        full history from gallery_items, oldest first, in one streamed query.
+        Clips without a total still embed their whole gallery and are left as is.
+        """
+        fields = {"image": ("generated_images", "total_images"), "video": ("generated_videos", "total_videos")}
+        tracked = {
+            clip["id"]: clip for clip in clips
+            if any(count_field in clip for _, count_field in fields.values())
+        }
+        if not tracked:
+            return
+
+        galleries: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        cursor = db.gallery_items.find({"clip_id": {"$in": list(tracked)}}, {"_id": 0}).sort(
+            [("clip_id", 1), ("content_type", 1), ("created_at", 1)]
+        )
+        async for item in cursor:
+            key = (item.pop("clip_id"), item.get("content_type"))
+            galleries.setdefault(key, []).append(item)
+
+        for clip_id, clip in tracked.items():
+            for content_type, (field_name, count_field) in fields.items():
+                if count_field in clip:
+                    clip[field_name] = galleries.get((clip_id, content_type), [])
+
+    @staticmethod
+    async def _load_project(db, project_id: str) -> Dict[str, Any]:
+        project_data = await db.projects.find_one({"id": project_id}, {"_id": 0})
+        if not project_data:
+            raise ValueError("Project not found")
+        return project_data
+
+    @staticmethod
+    async def _export_string(db, project_id: str, export_format: str) -> str:
+        out = StringIO()
+        await ExportService.export_to(db, project_id, export_format, out)
+        return out.getvalue()
+
     @staticmethod
     def _seconds_to_timecode(seconds: float, fps: int = 30) -> str:
         """Convert seconds to timecode format HH:MM:SS:FF"""
@@ -247,5 +426,180 @@ class ExportService:
         return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
 
 
-# Global instance
+class ExportCache:
+    """
+    Rendered exports kept on disk, one file per (project, content, format).
+
+    Artifacts live at ``<root>/<project_id>/<digest>.<ext>`` where the digest
+    hashes exactly what the export is made of: the project fields the writers
+    read plus every exported clip for the timeline formats, or the whole
+    export document for JSON. A request first compares the project revision
+    with the one the artifact was last checked at; only when it moved is the
+    export streamed again, hashed as it is written to a temp file, and the
+    file is kept only when no artifact with that digest exists yet.
+
+    Once a format has been exported, later edits schedule a background
+    re-render that waits until the project has been quiet for
+    ``settle_seconds``, so the next download is already on disk.
+    """
+
+    EXTENSIONS = {"fcpxml": "fcpxml", "edl": "edl", "resolve": "xml", "json": "json"}
+
+    def __init__(
+        self,
+        root: str,
+        db=None,
+        revisions=None,
+        settle_seconds: float = 30.0,
+        retain_seconds: float = 300.0,
+    ):
+        self.root = Path(root)
+        self._db = db
+        self._revisions = revisions or project_revisions
+        self.settle_seconds = settle_seconds
+        self.retain_seconds = retain_seconds
+        # (project_id, format) -> (revision the artifact was checked at, path)
+        self._checked: Dict[Tuple[str, str], Tuple[int, Path]] = {}
+        self._formats: Dict[str, Set[str]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def set_database(self, db):
+        self._db = db
+
+    async def get(self, db, project_id: str, export_format: str) -> Path:
+        """
+        Path of an up-to-date artifact, rendering it if needed
+
+        Raises:
+            ValueError: unknown format, or the project does not exist
+        """
+        if export_format not in self.EXTENSIONS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        revision = await self._revisions.current(project_id)
+        checked = self._checked.get((project_id, export_format))
+        if revision is not None and checked and checked[0] == revision and checked[1].exists():
+            return checked[1]
+
+        path = await self._render(db, project_id, export_format)
+        if revision is not None:
+            self._checked[(project_id, export_format)] = (revision, path)
+        self._formats.setdefault(project_id, set()).add(export_format)
+        return path
+
+    def on_revision(self, project_id: str):
+        """Revision listener: re-render exported formats once edits settle"""
+        if project_id not in self._formats or self._db is None:
+            return
+        pending = self._pending.get(project_id)
+        if pending and not pending.done():
+            pending.cancel()
+        try:
+            self._pending[project_id] = asyncio.get_running_loop().create_task(
+                self._rerender_when_settled(project_id)
+            )
+        except RuntimeError:
+            # No running loop; the next download renders on demand
+            pass
+
+    def discard(self, project_id: str):
+        """Drop every artifact of a project"""
+        pending = self._pending.pop(project_id, None)
+        if pending and not pending.done():
+            pending.cancel()
+        self._formats.pop(project_id, None)
+        for key in [key for key in self._checked if key[0] == project_id]:
+            del self._checked[key]
+        shutil.rmtree(self.root / project_id, ignore_errors=True)
+
+    # -------------------------------------------------------------------------
+    # Internal
+    # -------------------------------------------------------------------------
+    async def _rerender_when_settled(self, project_id: str):
+        try:
+            await asyncio.sleep(self.settle_seconds)
+            for export_format in sorted(self._formats.get(project_id, ())):
+                await self.get(self._db, project_id, export_format)
+        except asyncio.CancelledError:
+            raise
+        except ValueError:
+            logger.info(f"Project {project_id} is gone, dropping its exports")
+            self.discard(project_id)
+        except Exception as e:
+            logger.error(f"Background export render failed for project {project_id}: {e}")
+        finally:
+            if self._pending.get(project_id) is asyncio.current_task():
+                del self._pending[project_id]
+
+    async def _render(self, db, project_id: str, export_format: str) -> Path:
+        """
+        Render into a temp file while hashing the content in the same pass,
+        then name the file by the digest (or drop it if that artifact exists)
+        """
+        if export_format == "json":
+            document = await ExportService.export_json(db, project_id)
+            document.pop("exported_at", None)
+            content = self._content_hash(document)
+
+            async def write(out: TextIO):
+                json.dump({**document, "exported_at": datetime.utcnow().isoformat()}, out)
+        else:
+            project_data = await ExportService._load_project(db, project_id)
+            content = self._content_hash(
+                {"name": project_data.get("name"), "music_duration": project_data.get("music_duration")}
+            )
+
+            async def hashed_clips() -> AsyncIterator[ExportClip]:
+                async for clip in ExportService.iter_clips(db, project_id):
+                    content.update(json.dumps(asdict(clip), sort_keys=True, default=str).encode())
+                    yield clip
+
+            async def write(out: TextIO):
+                await ExportService.write(project_data, hashed_clips(), export_format, out)
+
+        directory = self.root / project_id
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as out:
+                await write(out)
+            path = directory / f"{content.hexdigest()[:32]}.{self.EXTENSIONS[export_format]}"
+            if path.exists():
+                # Same content as an artifact on disk; reused ones count as fresh for pruning
+                os.unlink(tmp_name)
+                os.utime(path)
+                return path
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        logger.info(f"Rendered {export_format} export of project {project_id} to {path}")
+        self._prune(directory, path)
+        return path
+
+    def _prune(self, directory: Path, keep: Path):
+        """Remove superseded artifacts of the same format once no download can still be opening them"""
+        cutoff = time.time() - self.retain_seconds
+        for stale in directory.glob(f"*{keep.suffix}"):
+            try:
+                if stale != keep and stale.stat().st_mtime < cutoff:
+                    stale.unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _content_hash(*parts: Any) -> Any:
+        content = hashlib.sha256(str(ARTIFACT_VERSION).encode())
+        for part in parts:
+            content.update(json.dumps(part, sort_keys=True, default=str).encode())
+        return content
+
+
+# Global instances
 export_service = ExportService()
+export_cache = ExportCache(
+    config.EXPORT_CACHE_DIR,
+    settle_seconds=config.EXPORT_SETTLE_SECONDS,
+    retain_seconds=config.EXPORT_RETAIN_SECONDS,
+)
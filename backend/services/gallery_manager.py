@@ -1,19 +1,42 @@
 """Gallery management service for handling generated content"""
-from typing import Dict, Any, Optional, List
+import asyncio
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timezone
 import logging
 
-from dtos.clip_dtos import ClipResponseDTO, GeneratedContentDTO
+from pymongo import ReturnDocument, UpdateOne
+
+from config import config
+from dtos.clip_dtos import GeneratedContentDTO
+from services.project_revisions import project_revisions
 from utils.errors import ClipNotFoundError
 
 logger = logging.getLogger(__name__)
 
 
+def _created_at(item: Dict[str, Any]) -> datetime:
+    """Comparable created_at for stored items (naive from Mongo, aware from DTOs, or ISO strings)"""
+    value = item.get("created_at")
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
 class GalleryManager:
     """Manages gallery operations for clips"""
 
-    def __init__(self, gallery_repository=None):
+    def __init__(
+        self,
+        gallery_repository=None,
+        summary_size: int = config.GALLERY_SUMMARY_SIZE,
+        revisions=None
+    ):
         self._repository = gallery_repository
+        self._revisions = revisions or project_revisions
+        # Never fewer than the two newest items
+        self.summary_size = max(2, summary_size)
 
     @staticmethod
     def initialize_clip_fields(clip_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -29,6 +52,8 @@ class GalleryManager:
         clip_data = dict(clip_data)
         clip_data.setdefault("generated_images", [])
         clip_data.setdefault("generated_videos", [])
+        clip_data.setdefault("total_images", len(clip_data["generated_images"]))
+        clip_data.setdefault("total_videos", len(clip_data["generated_videos"]))
         clip_data.setdefault("selected_image_id", None)
         clip_data.setdefault("selected_video_id", None)
         clip_data.setdefault("image_prompt", "")
@@ -55,69 +80,170 @@ class GalleryManager:
         Returns:
             Response dict with message and content info
         """
-        clip_data = await db.clips.find_one({"id": clip_id})
-        if not clip_data:
-            raise ClipNotFoundError(clip_id)
+        field_name, selected_field, count_field = GalleryManager._gallery_fields(content_type)
+        content_dict = new_content.model_dump()
+
+        before = await self._append(db, clip_id, content_type, content_dict)
+        if before is None:
+            # Clips predating gallery_items keep their whole history embedded;
+            # copy it over before the trimmed append can drop anything
+            legacy = await db.clips.find_one({"id": clip_id}, {"_id": 0, field_name: 1})
+            if legacy is None:
+                raise ClipNotFoundError(clip_id)
+            await self.backfill_clip(db, clip_id, content_type, legacy.get(field_name) or [])
+            before = await self._append(db, clip_id, content_type, content_dict)
+            if before is None:
+                raise ClipNotFoundError(clip_id)
+
+        if before.get(count_field, 0) >= self.summary_size:
+            # The push may have aged the selected item out of the summary
+            await self.keep_selected(db, clip_id, content_type, before.get(field_name) or [])
+
+        if not before.get(selected_field):
+            # Only the first writer wins if several generations land at once
+            result = await db.clips.update_one(
+                {"id": clip_id, selected_field: None},
+                {"$set": {
+                    selected_field: new_content.id,
+                    f"{field_name}.$[item].is_selected": True
+                }},
+                array_filters=[{"item.id": new_content.id}]
+            )
+            if result.modified_count:
+                new_content.is_selected = True
+                content_dict["is_selected"] = True
 
-        logger.info("Found clip: %s", clip_data.get("id"))
+        if self._repository:
+            content_dict["clip_id"] = clip_id
+            await self._repository.create(content_dict)
 
-        clip_data = GalleryManager.initialize_clip_fields(clip_data)
-        clip = ClipResponseDTO(**clip_data)
+        await self._revisions.bump_for_clip_document(before)
 
-        if content_type == "image":
-            clip.generated_images.append(new_content)
+        return {
+            "message": f"{content_type.capitalize()} generated successfully",
+            "content": new_content.model_dump(),
+            count_field: before.get(count_field, 0) + 1
+        }
 
-            if len(clip.generated_images) == 1:
-                clip.selected_image_id = new_content.id
-                new_content.is_selected = True
+    async def _append(
+        self,
+        db,
+        clip_id: str,
+        content_type: str,
+        content_dict: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Push onto the clip's bounded summary without reading the gallery.
 
-            await db.clips.update_one(
-                {"id": clip_id},
-                {"$set": {
-                    "generated_images": [img.model_dump() for img in clip.generated_images],
-                    "selected_image_id": clip.selected_image_id,
-                    "updated_at": datetime.now(timezone.utc)
-                }}
-            )
+        Only matches clips that already track a total (i.e. whose history is in
+        gallery_items). Returns the previous selection, selected item and
+        total, or None.
+        """
+        field_name, selected_field, count_field = GalleryManager._gallery_fields(content_type)
+        return await db.clips.find_one_and_update(
+            {"id": clip_id, count_field: {"$exists": True}},
+            {
+                "$push": {field_name: self.summary_push(content_dict)},
+                "$inc": {count_field: 1},
+                "$set": {"updated_at": datetime.now(timezone.utc)}
+            },
+            projection={
+                "_id": 0, "id": 1, "scene_id": 1, "project_id": 1,
+                selected_field: 1, count_field: 1,
+                field_name: {"$elemMatch": {"is_selected": True}}
+            },
+            return_document=ReturnDocument.BEFORE
+        )
 
-            if self._repository:
-                content_dict = new_content.model_dump()
-                content_dict["clip_id"] = clip_id
-                await self._repository.create(content_dict)
+    async def backfill_clip(
+        self,
+        db,
+        clip_id: str,
+        content_type: str,
+        items: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Copy a clip's embedded gallery into gallery_items and start tracking
+        its total. Safe to repeat; returns the total.
+        """
+        _, _, count_field = GalleryManager._gallery_fields(content_type)
 
-            return {
-                "message": "Image generated successfully",
-                "content": new_content.model_dump(),
-                "total_images": len(clip.generated_images)
-            }
+        total = len(items)
+        if self._repository:
+            operations = []
+            for item in items:
+                if not item.get("id"):
+                    continue
+                document = {k: v for k, v in item.items() if k != "_id"}
+                document.setdefault("content_type", content_type)
+                document["clip_id"] = clip_id
+                operations.append(UpdateOne({"id": item["id"]}, {"$setOnInsert": document}, upsert=True))
+            await self._repository.bulk_write(operations)
+            total = await self._repository.count_by_clip_and_type(clip_id, content_type)
 
-        if content_type == "video":
-            clip.generated_videos.append(new_content)
+        await db.clips.update_one(
+            {"id": clip_id, count_field: {"$exists": False}},
+            {"$set": {count_field: total}}
+        )
+        return total
 
-            if len(clip.generated_videos) == 1:
-                clip.selected_video_id = new_content.id
-                new_content.is_selected = True
+    def summary_push(self, *items: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        $push modifier that keeps an embedded gallery to the newest
+        ``summary_size`` items, oldest first. The selected item is put back
+        by keep_selected if it ages out.
+        """
+        return {
+            "$each": list(items),
+            "$sort": {"created_at": 1},
+            "$slice": -self.summary_size
+        }
 
-            await db.clips.update_one(
-                {"id": clip_id},
-                {"$set": {
-                    "generated_videos": [vid.model_dump() for vid in clip.generated_videos],
-                    "selected_video_id": clip.selected_video_id,
-                    "updated_at": datetime.now(timezone.utc)
-                }}
-            )
+    @staticmethod
+    def summary_insert(*items: Dict[str, Any]) -> Dict[str, Any]:
+        """$push modifier that adds items in created_at order without trimming"""
+        return {"$each": list(items), "$sort": {"created_at": 1}}
+
+    def summarize(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Same trimming as summary_push plus keep_selected, applied to an in-memory list"""
+        ordered = sorted(items, key=_created_at)
+        summary = ordered[-self.summary_size:]
+        selected = next(
+            (item for item in ordered[:-self.summary_size] if item.get("is_selected")), None
+        )
+        if selected:
+            # Older than everything kept, so it goes first
+            summary.insert(0, selected)
+        return summary
 
-            if self._repository:
-                content_dict = new_content.model_dump()
-                content_dict["clip_id"] = clip_id
-                await self._repository.create(content_dict)
+    async def keep_selected(
+        self,
+        db,
+        clip_id: str,
+        content_type: str,
+        items: List[Dict[str, Any]]
+    ):
+        """
+        Push the selected item among ``items`` back into the clip's summary
+        after a trimmed push. No-op if it is still there or no longer selected.
+        """
+        field_name, selected_field, _ = GalleryManager._gallery_fields(content_type)
+        selected = next((item for item in items if item.get("is_selected")), None)
+        if not selected or not selected.get("id"):
+            return
 
-            return {
-                "message": "Video generated successfully",
-                "content": new_content.model_dump(),
-                "total_videos": len(clip.generated_videos)
-            }
+        await db.clips.update_one(
+            {"id": clip_id, selected_field: selected["id"], f"{field_name}.id": {"$ne": selected["id"]}},
+            {"$push": {field_name: self.summary_insert(selected)}}
+        )
 
+    @staticmethod
+    def _gallery_fields(content_type: str) -> Tuple[str, str, str]:
+        """Embedded array, selected-id and total-count field names for a content type"""
+        if content_type == "image":
+            return "generated_images", "selected_image_id", "total_images"
+        if content_type == "video":
+            return "generated_videos", "selected_video_id", "total_videos"
         raise ValueError(f"Invalid content type: {content_type}")
 
     async def select_content(
@@ -139,32 +265,66 @@ class GalleryManager:
         Returns:
             Success message
         """
-        field_name = "generated_images" if content_type == "image" else "generated_videos"
-        selected_field = "selected_image_id" if content_type == "image" else "selected_video_id"
-
-        clip_data = await db.clips.find_one({"id": clip_id})
-        if not clip_data:
-            raise ClipNotFoundError(clip_id)
-
-        content_list: List[Dict[str, Any]] = clip_data.get(field_name, [])
-        for content in content_list:
-            content["is_selected"] = (content["id"] == content_id)
+        field_name, selected_field, _ = GalleryManager._gallery_fields(content_type)
 
-        await db.clips.update_one(
-            {"id": clip_id},
+        # Flip the flags in place on the embedded summary; gallery_items is
+        # updated alongside in one bulk write
+        clip_update = db.clips.update_one(
+            {"id": clip_id, f"{field_name}.id": content_id},
             {"$set": {
-                field_name: content_list,
+                f"{field_name}.$[chosen].is_selected": True,
+                f"{field_name}.$[other].is_selected": False,
                 selected_field: content_id,
                 "updated_at": datetime.now(timezone.utc)
-            }}
+            }},
+            array_filters=[
+                {"chosen.id": content_id},
+                {"other.id": {"$ne": content_id}, "other.is_selected": True}
+            ]
         )
-
         if self._repository:
-            await self._repository.unmark_selected(clip_id, content_type)
-            await self._repository.mark_as_selected(content_id)
+            result, _ = await asyncio.gather(
+                clip_update,
+                self._repository.select_item(clip_id, content_type, content_id)
+            )
+        else:
+            result = await clip_update
+
+        if result.matched_count == 0:
+            # Not in the summary (aged out, or the clip does not exist)
+            await self._restore_selected(db, clip_id, content_id, content_type)
+
+        await self._revisions.bump_for_clip(clip_id)
 
         return {"message": f"Selected {content_type} updated successfully"}
 
+    async def _restore_selected(self, db, clip_id: str, content_id: str, content_type: str):
+        """Select an item missing from the embedded summary, pushing it back in from gallery_items"""
+        field_name, selected_field, count_field = GalleryManager._gallery_fields(content_type)
+
+        clip_data = await db.clips.find_one({"id": clip_id}, {"_id": 0, field_name: 1, count_field: 1})
+        if not clip_data:
+            raise ClipNotFoundError(clip_id)
+
+        content_list: List[Dict[str, Any]] = clip_data.get(field_name) or []
+        if count_field not in clip_data:
+            # The trimmed push below would otherwise drop history that is only embedded
+            await self.backfill_clip(db, clip_id, content_type, content_list)
+
+        updates: Dict[str, Any] = {selected_field: content_id, "updated_at": datetime.now(timezone.utc)}
+        if content_list:
+            updates[f"{field_name}.$[].is_selected"] = False
+        await db.clips.update_one({"id": clip_id}, {"$set": updates})
+
+        item = await self._repository.find_by_id(content_id) if self._repository else None
+        if item and item.get("clip_id") == clip_id:
+            item = {k: v for k, v in item.items() if k not in ("_id", "clip_id")}
+            item["is_selected"] = True
+            await db.clips.update_one(
+                {"id": clip_id},
+                {"$push": {field_name: self.summary_insert(item)}}
+            )
+
     @staticmethod
     def create_generated_content(
         content_type: str,
@@ -18,6 +18,7 @@ from services.comfyui_service import ComfyUIClient
 from services.model_config import detect_model_type, get_model_defaults
 from services.project_service import ProjectService
 from services.queue_manager import queue_manager
+from services.server_health import server_health_monitor
 from services.gallery_manager import gallery_manager
 from services.batch_generator import batch_generator
 from services.openai_video_service import openai_video_service
@@ -104,7 +105,7 @@ class GenerationService:
 
         client = ComfyUIClient(server)
 
-        if not await client.check_connection():
+        if not await server_health_monitor.is_available(server_data):
             raise ServiceUnavailableError("ComfyUI", "Server is offline")
 
         result_url = None
@@ -268,7 +269,7 @@ class GenerationService:
         """Get overall queue status"""
         from services.queue_manager import queue_manager
 
-        status = await queue_manager.get_queue_status()
+        status = await queue_manager.fetch_queue_status()
         return {
             "total_jobs": status.get("total_jobs", 0),
             "pending_jobs": status.get("pending_jobs", 0),
@@ -303,7 +304,7 @@ class GenerationService:
         """Get all queued jobs with optional status filter"""
         from services.queue_manager import queue_manager
         
-        all_jobs = queue_manager.get_all_jobs()
+        all_jobs = await queue_manager.fetch_all_jobs()
         
         if status and status != 'all':
             all_jobs = [j for j in all_jobs if j.status == status]
@@ -344,7 +345,7 @@ class GenerationService:
         clip_ids = [c["id"] for c in clips]
 
         # Get jobs for those clips
-        all_jobs = await queue_manager.get_all_jobs()
+        all_jobs = await queue_manager.fetch_all_jobs()
         project_jobs = [j for j in all_jobs if j.clip_id in clip_ids]
 
         return {
@@ -11,6 +11,7 @@ from fastapi import UploadFile
 from config import config as app_config
 from dtos.media_dtos import UploadFaceImageResponseDTO, UploadMusicResponseDTO
 from repositories.project_repository import ProjectRepository
+from services.project_revisions import project_revisions
 from utils.errors import InsufficientStorageError, ProjectNotFoundError
 from utils.file_validator import file_validator
 
@@ -51,6 +52,7 @@ class MediaService:
             "updated_at": datetime.now(timezone.utc),
         }
         await self._projects.update_project(project_id, updates)
+        await project_revisions.bump(project_id)
 
         return UploadMusicResponseDTO(file_path=str(file_path))
 
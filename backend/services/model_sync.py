@@ -0,0 +1,290 @@
+"""Background model sync for every ComfyUI backend, skipping servers whose models did not change"""
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import config
+from services.server_health import server_health_monitor
+
+logger = logging.getLogger(__name__)
+
+ModelLists = Dict[str, List[str]]
+
+
+@dataclass
+class ModelSyncDiff:
+    """Outcome of syncing one server, with the models it gained and lost"""
+    server_id: str
+    server_name: str
+    # changed | unchanged | not_modified | offline | skipped | failed
+    status: str
+    synced_at: datetime
+    added: ModelLists = field(default_factory=dict)
+    removed: ModelLists = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "changed"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "server_id": self.server_id,
+            "server_name": self.server_name,
+            "status": self.status,
+            "synced_at": self.synced_at.isoformat(),
+            "added": self.added,
+            "removed": self.removed,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _ServerModels:
+    """What was last applied for a server, and how to recognise it again"""
+    etag: Optional[str]
+    body_hash: str
+    models_hash: str
+    models: ModelLists
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _parse_models(body: bytes) -> Tuple[ModelLists, str]:
+    from services.comfyui_service import models_from_object_info
+
+    models = models_from_object_info(json.loads(body))
+    return models, _digest(json.dumps(models, sort_keys=True).encode())
+
+
+def _diff(previous: ModelLists, current: ModelLists) -> Tuple[ModelLists, ModelLists]:
+    added: ModelLists = {}
+    removed: ModelLists = {}
+    for kind in sorted(set(previous) | set(current)):
+        before, after = set(previous.get(kind, [])), set(current.get(kind, []))
+        if after - before:
+            added[kind] = sorted(after - before)
+        if before - after:
+            removed[kind] = sorted(before - after)
+    return added, removed
+
+
+async def _fetch_object_info(
+    server_data: Dict[str, Any], etag: Optional[str]
+) -> Tuple[int, Optional[str], Optional[bytes]]:
+    from dtos.comfyui_dtos import ComfyUIServerDTO
+    from services.comfyui_service import ComfyUIClient
+
+    return await ComfyUIClient(ComfyUIServerDTO(**server_data)).fetch_object_info(etag)
+
+
+def _is_runpod(server_data: Dict[str, Any]) -> bool:
+    return server_data.get("server_type") == "runpod" or "runpod.ai" in (server_data.get("url") or "")
+
+
+class ModelSyncScheduler:
+    """
+    Periodic model sync across all active ComfyUI servers.
+
+    Every ``interval`` seconds each server's ``/object_info`` is fetched,
+    at most ``concurrency`` at a time, conditionally on its last ETag when
+    the server sends one. An identical body (by hash) is not parsed again,
+    and a body whose checkpoint/LoRA/VAE lists hash the same as last time
+    is not written anywhere. Only servers whose models changed are passed
+    to the ``apply`` handler (the same catalogue and active-model writes as
+    ``/servers/{id}/sync-models``), and each produces a ModelSyncDiff of the
+    models added and removed, delivered to listeners and kept for
+    :meth:`snapshot`.
+
+    RunPod serverless endpoints expose no ``/object_info`` and are skipped.
+    Servers whose health breaker is open are skipped until they recover.
+    """
+
+    def __init__(
+        self,
+        repository=None,
+        apply: Optional[Callable[[Dict[str, Any], ModelLists], Awaitable[Any]]] = None,
+        fetch: Callable[
+            [Dict[str, Any], Optional[str]], Awaitable[Tuple[int, Optional[str], Optional[bytes]]]
+        ] = _fetch_object_info,
+        interval: float = 300.0,
+        concurrency: int = 4,
+    ):
+        self._repository = repository
+        self._apply = apply
+        self._fetch = fetch
+        self.interval = interval
+        self.concurrency = concurrency
+
+        self._states: Dict[str, _ServerModels] = {}
+        self._last: Dict[str, ModelSyncDiff] = {}
+        self._listeners: List[Callable[[ModelSyncDiff], None]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    def set_repository(self, repository):
+        self._repository = repository
+
+    def set_handler(self, apply: Callable[[Dict[str, Any], ModelLists], Awaitable[Any]]):
+        self._apply = apply
+
+    def add_listener(self, listener: Callable[[ModelSyncDiff], None]):
+        """Call ``listener(diff)`` for every server whose models changed"""
+        self._listeners.append(listener)
+
+    def forget(self, server_id: str):
+        """Drop what is known about a server so its next sync applies in full"""
+        self._states.pop(server_id, None)
+        self._last.pop(server_id, None)
+
+    async def sync_all(self) -> List[ModelSyncDiff]:
+        """Sync every active server concurrently, bounded by ``concurrency``"""
+        if not self._repository:
+            return []
+        try:
+            servers = await self._repository.find_many({"is_active": {"$ne": False}})
+        except Exception as e:
+            logger.error(f"Failed to load servers for model sync: {e}")
+            return []
+
+        known = {server["id"] for server in servers}
+        for server_id in list(self._states) + list(self._last):
+            if server_id not in known:
+                self.forget(server_id)
+
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def bounded(server_data: Dict[str, Any]) -> ModelSyncDiff:
+            async with semaphore:
+                return await self.sync_server(server_data)
+
+        diffs = list(await asyncio.gather(*(bounded(server) for server in servers)))
+        changed = [diff for diff in diffs if diff.changed]
+        if changed:
+            logger.info(
+                f"Model sync: {len(changed)} of {len(diffs)} servers changed "
+                f"({', '.join(diff.server_name for diff in changed)})"
+            )
+        return diffs
+
+    async def sync_server(self, server_data: Dict[str, Any]) -> ModelSyncDiff:
+        """Sync one server now; concurrent callers share one sync"""
+        server_id = server_data["id"]
+        pending = self._inflight.get(server_id)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[server_id] = future
+        try:
+            diff = await self._sync(server_data)
+            future.set_result(diff)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[server_id]
+
+        self._last[server_id] = diff
+        if diff.changed:
+            for listener in self._listeners:
+                try:
+                    listener(diff)
+                except Exception as e:
+                    logger.error(f"Model sync listener failed for server {server_id}: {e}")
+        return diff
+
+    async def _sync(self, server_data: Dict[str, Any]) -> ModelSyncDiff:
+        server_id = server_data["id"]
+        name = server_data.get("name", server_id)
+
+        def outcome(status: str, **kwargs) -> ModelSyncDiff:
+            return ModelSyncDiff(server_id, name, status, datetime.now(timezone.utc), **kwargs)
+
+        if _is_runpod(server_data):
+            return outcome("skipped")
+        health = server_health_monitor.get(server_id)
+        if health and not health.is_available:
+            return outcome("offline")
+
+        state = self._states.get(server_id)
+        try:
+            status, etag, body = await self._fetch(server_data, state.etag if state else None)
+        except Exception as e:
+            return outcome("failed", error=f"Failed to fetch object_info: {e}")
+
+        if status == 304 and state:
+            return outcome("not_modified")
+        if status != 200 or body is None:
+            return outcome("failed", error=f"object_info returned HTTP {status}")
+
+        body_hash = await asyncio.to_thread(_digest, body)
+        if state and body_hash == state.body_hash:
+            state.etag = etag
+            return outcome("unchanged")
+
+        try:
+            models, models_hash = await asyncio.to_thread(_parse_models, body)
+        except ValueError as e:
+            return outcome("failed", error=f"Invalid object_info: {e}")
+
+        if state and models_hash == state.models_hash:
+            # Nodes changed, models did not: remember the new body, write nothing
+            state.etag, state.body_hash = etag, body_hash
+            return outcome("unchanged")
+
+        if self._apply:
+            try:
+                await self._apply(server_data, models)
+            except Exception as e:
+                logger.error(f"Failed to apply model sync for server {name}: {e}")
+                return outcome("failed", error=str(e))
+
+        added, removed = _diff(state.models if state else {}, models)
+        self._states[server_id] = _ServerModels(etag, body_hash, models_hash, models)
+        return outcome("changed", added=added, removed=removed)
+
+    def start(self):
+        """Start periodic syncs; an interval of zero or less disables them"""
+        if self.interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Model sync scheduler started (interval={self.interval}s, concurrency={self.concurrency})"
+        )
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while self._running:
+            await self.sync_all()
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {server_id: diff.to_dict() for server_id, diff in self._last.items()}
+
+
+model_sync_scheduler = ModelSyncScheduler(
+    interval=config.MODEL_SYNC_INTERVAL,
+    concurrency=config.MODEL_SYNC_CONCURRENCY,
+)
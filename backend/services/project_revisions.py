@@ -0,0 +1,183 @@
+"""Per-project revision counters backing ETags and cached read responses"""
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from config import config
+from utils.response_cache import ResponseCache, etag_matches, make_etag, serialize
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectRevisions:
+    """
+    Monotonic write counter per project, stored as ``revision`` on the project
+    document.
+
+    Every write to a project, its scenes or its clips bumps the counter once
+    the write has landed, so (project_id, revision) names one state of the
+    project. Read endpoints use it as their ETag and as the key of the
+    in-process response cache; checking it costs one indexed point read
+    instead of the full query and serialization.
+    """
+
+    def __init__(self, db=None, max_responses: int = 512, max_mappings: int = 10000):
+        self._db = db
+        self.responses = ResponseCache(max_responses)
+        self.max_mappings = max_mappings
+        self._scene_projects: "OrderedDict[str, str]" = OrderedDict()
+        self._clip_projects: "OrderedDict[str, str]" = OrderedDict()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def set_database(self, db):
+        self._db = db
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """Call ``listener(project_id)`` after each revision bump"""
+        self._listeners.append(listener)
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+    async def bump(self, *project_ids: Optional[str]):
+        """Advance the revision of each given project"""
+        if self._db is None:
+            return
+        for project_id in dict.fromkeys(pid for pid in project_ids if pid):
+            try:
+                await self._db.projects.update_one({"id": project_id}, {"$inc": {"revision": 1}})
+            except Exception as e:
+                logger.error(f"Failed to bump revision of project {project_id}: {e}")
+            self.responses.discard(project_id)
+            for listener in self._listeners:
+                try:
+                    listener(project_id)
+                except Exception as e:
+                    logger.error(f"Revision listener failed for project {project_id}: {e}")
+
+    async def bump_for_scene(self, scene_id: Optional[str]):
+        await self.bump(await self.project_for_scene(scene_id))
+
+    async def bump_for_clip(self, clip_id: Optional[str]):
+        await self.bump(await self.project_for_clip(clip_id))
+
+    async def bump_for_clip_document(self, clip: Optional[Dict[str, Any]]):
+        """Bump the project owning a clip document, without re-reading the clip"""
+        if not clip:
+            return
+        project_id = clip.get("project_id") or await self.project_for_scene(clip.get("scene_id"))
+        if project_id and clip.get("id"):
+            self._remember(self._clip_projects, clip["id"], project_id)
+        await self.bump(project_id)
+
+    def forget_project(self, project_id: str):
+        self.responses.discard(project_id)
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+    async def current(self, project_id: Optional[str]) -> Optional[int]:
+        """Current revision of a project, or None when it cannot be determined"""
+        if self._db is None or not project_id:
+            return None
+        project = await self._db.projects.find_one({"id": project_id}, {"_id": 0, "revision": 1})
+        if project is None:
+            return None
+        return project.get("revision", 0)
+
+    async def project_for_scene(self, scene_id: Optional[str]) -> Optional[str]:
+        if self._db is None or not scene_id:
+            return None
+        project_id = self._recall(self._scene_projects, scene_id)
+        if project_id is None:
+            scene = await self._db.scenes.find_one({"id": scene_id}, {"_id": 0, "project_id": 1})
+            project_id = scene.get("project_id") if scene else None
+            if project_id:
+                self._remember(self._scene_projects, scene_id, project_id)
+        return project_id
+
+    async def project_for_clip(self, clip_id: Optional[str]) -> Optional[str]:
+        if self._db is None or not clip_id:
+            return None
+        project_id = self._recall(self._clip_projects, clip_id)
+        if project_id is None:
+            clip = await self._db.clips.find_one(
+                {"id": clip_id}, {"_id": 0, "project_id": 1, "scene_id": 1}
+            )
+            if clip:
+                project_id = clip.get("project_id") or await self.project_for_scene(clip.get("scene_id"))
+            if project_id:
+                self._remember(self._clip_projects, clip_id, project_id)
+        return project_id
+
+    async def respond(
+        self,
+        request: Request,
+        project_id: Optional[str],
+        build: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """
+        JSON response for a read of ``project_id``, validated by its revision.
+
+        Answers 304 when If-None-Match carries the current ETag and serves the
+        cached body when the same URL was already built at the current
+        revision. ``build`` runs only on a miss; it is expected to raise the
+        usual not-found errors, so unknown projects fall through to it.
+        """
+        key = f"{request.url.path}?{request.url.query}"
+        revision = await self.current(project_id)
+        if revision is None:
+            return Response(serialize(await build()), media_type="application/json")
+
+        headers = self.validator_headers(revision, project_id, key)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        body = self.responses.get(project_id, revision, key)
+        if body is None:
+            body = serialize(await build())
+            self.responses.put(project_id, revision, key, body)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def check_not_modified(
+        self,
+        request: Request,
+        project_id: Optional[str],
+    ) -> Tuple[Optional[Response], Dict[str, str]]:
+        """
+        Validator headers for a response that is not cached in memory (such as
+        a stream), plus a ready 304 response when If-None-Match matches them
+        """
+        revision = await self.current(project_id)
+        if revision is None:
+            return None, {}
+        key = f"{request.url.path}?{request.url.query}"
+        headers = self.validator_headers(revision, project_id, key)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers), headers
+        return None, headers
+
+    @staticmethod
+    def validator_headers(revision: int, project_id: str, key: str) -> Dict[str, str]:
+        return {"ETag": make_etag(revision, (project_id, key)), "Cache-Control": "no-cache"}
+
+    # -------------------------------------------------------------------------
+    # Internal
+    # -------------------------------------------------------------------------
+    def _recall(self, mapping: "OrderedDict[str, str]", key: str) -> Optional[str]:
+        value = mapping.get(key)
+        if value is not None:
+            mapping.move_to_end(key)
+        return value
+
+    def _remember(self, mapping: "OrderedDict[str, str]", key: str, value: str):
+        mapping[key] = value
+        mapping.move_to_end(key)
+        while len(mapping) > self.max_mappings:
+            mapping.popitem(last=False)
+
+
+# Global instance
+project_revisions = ProjectRevisions(max_responses=config.RESPONSE_CACHE_SIZE)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from uuid import uuid4
@@ -8,6 +9,7 @@ from dtos.clip_dtos import (
     ClipCreateDTO,
     ClipGalleryResponseDTO,
     ClipResponseDTO,
+    ClipTimelineBulkUpdateDTO,
     ClipTimelineUpdateDTO,
     ClipUpdateDTO,
     GeneratedContentDTO,
@@ -25,15 +27,20 @@ from dtos.scene_dtos import (
     SceneResponseDTO,
     SceneUpdateDTO,
 )
+from config import config
 from repositories.clip_repository import ClipRepository
+from repositories.gallery_repository import GalleryRepository
 from repositories.project_repository import ProjectRepository
 from repositories.scene_repository import SceneRepository
+from services.export_service import ExportCache, export_cache
+from services.project_revisions import ProjectRevisions, project_revisions
 from utils.errors import (
     ClipNotFoundError,
     ProjectNotFoundError,
     SceneNotFoundError,
     ValidationError,
 )
+from utils.timeline_index import TimelineIndex, TimelineIndexCache, TimelineSpan, timeline_index_cache
 from utils.timeline_validator import timeline_validator
 
 
@@ -52,10 +59,18 @@ class ProjectService:
         project_repository: ProjectRepository,
         scene_repository: SceneRepository,
         clip_repository: ClipRepository,
+        gallery_repository: Optional[GalleryRepository] = None,
+        timeline_indexes: Optional[TimelineIndexCache] = None,
+        revisions: Optional[ProjectRevisions] = None,
+        exports: Optional[ExportCache] = None,
     ):
         self._projects = project_repository
         self._scenes = scene_repository
         self._clips = clip_repository
+        self._gallery = gallery_repository
+        self._timeline_indexes = timeline_indexes or timeline_index_cache
+        self._revisions = revisions or project_revisions
+        self._exports = exports or export_cache
 
     # -------------------------------------------------------------------------
     # Project operations
@@ -123,6 +138,7 @@ class ProjectService:
             updated_at=datetime.now(timezone.utc),
         )
         await self._scenes.create(dto.model_dump())
+        await self._revisions.bump(payload.project_id)
         return dto
 
     async def list_project_scenes(self, project_id: str, include_clips: bool = False) -> SceneListResponseDTO:
@@ -173,6 +189,7 @@ class ProjectService:
         updated = _cleanup_document(updated)
         if not updated:
             raise SceneNotFoundError(scene_id)
+        await self._revisions.bump(updated.get("project_id"))
         return SceneResponseDTO(**updated)
 
     # -------------------------------------------------------------------------
@@ -205,6 +222,8 @@ class ProjectService:
             clip_dict["project_id"] = project_id
         
         await self._clips.create(clip_dict)
+        self._timeline_indexes.invalidate(payload.scene_id)
+        await self._revisions.bump(project_id)
         return dto
 
     async def list_scene_clips(self, scene_id: str) -> List[ClipResponseDTO]:
@@ -243,6 +262,11 @@ class ProjectService:
         updated = _cleanup_document(updated)
         if not updated:
             raise ClipNotFoundError(clip_id)
+        self._timeline_indexes.invalidate(clip.get("scene_id"))
+        self._timeline_indexes.invalidate(updated.get("scene_id"))
+        if updated.get("scene_id") != clip.get("scene_id"):
+            await self._revisions.bump_for_scene(clip.get("scene_id"))
+        await self._revisions.bump_for_clip_document(updated)
         return ClipResponseDTO(**updated)
 
     async def update_clip_prompts(
@@ -275,25 +299,23 @@ class ProjectService:
 
         clip = ClipResponseDTO(**clip_data)
         new_position = payload.position
+        index = await self._timeline_index(clip.scene_id)
+        if clip_id not in index:
+            # Stale index: rebuild it before checking overlaps against it
+            self._timeline_indexes.invalidate(clip.scene_id)
+            index = await self._timeline_index(clip.scene_id)
 
         if check_overlap:
-            all_clips_data = await self._clips.find_many({"scene_id": clip.scene_id})
-            all_clips = [
-                ClipResponseDTO(**(_cleanup_document(item) or {}))
-                for item in all_clips_data
-            ]
-
-            is_valid, error_msg = timeline_validator.check_overlap(
-                clip_id=clip_id,
-                new_position=new_position,
-                clip_length=clip.length,
-                other_clips=all_clips,
-            )
-            if not is_valid:
-                suggested = timeline_validator.find_next_available_position(
+            conflict = index.find_overlap(new_position, new_position + clip.length, exclude=clip_id)
+            if conflict:
+                _, error_msg = timeline_validator.check_overlap(
+                    clip_id=clip_id,
+                    new_position=new_position,
                     clip_length=clip.length,
-                    other_clips=[c for c in all_clips if c.id != clip_id],
-                    preferred_position=new_position,
+                    other_clips=[conflict],
+                )
+                suggested = index.next_available_position(
+                    clip.length, preferred_position=new_position, exclude=clip_id
                 )
                 raise ValidationError(
                     f"Timeline conflict: {error_msg}. Suggested position: {suggested}"
@@ -304,18 +326,86 @@ class ProjectService:
         if not updated:
             raise ClipNotFoundError(clip_id)
 
-        updated_clips_data = await self._clips.find_many({"scene_id": clip.scene_id})
-        updated_clips = [
-            ClipResponseDTO(**(_cleanup_document(item) or {}))
-            for item in updated_clips_data
-        ]
-        summary = timeline_validator.get_timeline_summary(updated_clips)
+        if clip_id in index:
+            index.move(clip_id, new_position)
+        else:
+            self._timeline_indexes.invalidate(clip.scene_id)
+            index = await self._timeline_index(clip.scene_id)
 
         return {
             "message": "Timeline position updated",
             "clip_id": clip_id,
             "new_position": new_position,
-            "timeline_summary": summary,
+            "timeline_summary": index.summary(),
+        }
+
+    async def bulk_update_timeline(
+        self,
+        scene_id: str,
+        payload: ClipTimelineBulkUpdateDTO,
+    ) -> Dict:
+        """
+        Apply a ripple shift and/or explicit moves to a scene in one request.
+
+        The ripple shifts every clip starting at or after ``ripple.after``;
+        explicit moves are applied on top of it. The final layout is checked
+        once, then every changed position is written in a single bulk write.
+        """
+        await self._ensure_scene_exists(scene_id)
+        # Absolute positions are written back, so plan from fresh spans rather
+        # than a cached index other workers may have moved clips under
+        self._timeline_indexes.invalidate(scene_id)
+        index = await self._timeline_index(scene_id)
+
+        unknown = [move.clip_id for move in payload.moves if move.clip_id not in index]
+        if unknown:
+            raise ValidationError(
+                "Clips not found in scene", details={"scene_id": scene_id, "clip_ids": unknown}
+            )
+
+        positions: Dict[str, float] = {}
+        if payload.ripple and payload.ripple.delta:
+            for span in index.starting_from(payload.ripple.after):
+                positions[span.id] = round(span.timeline_position + payload.ripple.delta, 2)
+        for move in payload.moves:
+            positions[move.clip_id] = move.position
+
+        positions = {
+            clip_id: position for clip_id, position in positions.items()
+            if position != index.get(clip_id).timeline_position
+        }
+        out_of_range = {clip_id: p for clip_id, p in positions.items() if not 0 <= p <= 10000}
+        if out_of_range:
+            raise ValidationError(
+                "Timeline positions must be between 0 and 10000 seconds",
+                details={"positions": out_of_range},
+            )
+
+        if payload.check_overlap and positions:
+            layout: List[TimelineSpan] = [
+                replace(span, timeline_position=positions.get(span.id, span.timeline_position))
+                for span in index.spans()
+            ]
+            overlaps = [
+                overlap for overlap in timeline_validator.analyze_timeline(layout)["overlaps"]
+                if overlap["clip1_id"] in positions or overlap["clip2_id"] in positions
+            ]
+            if overlaps:
+                raise ValidationError(
+                    f"Timeline conflict: {len(overlaps)} overlap(s) in the resulting layout",
+                    details={"overlaps": overlaps},
+                )
+
+        updated = await self._clips.bulk_update_timeline_positions(scene_id, positions) if positions else 0
+        for clip_id, position in positions.items():
+            index.move(clip_id, position)
+
+        return {
+            "message": "Timeline positions updated",
+            "scene_id": scene_id,
+            "updated": updated,
+            "positions": positions,
+            "timeline_summary": index.summary(),
         }
 
     async def analyze_scene_timeline(self, scene_id: str) -> Dict:
@@ -326,79 +416,63 @@ class ProjectService:
             for item in clips_data
         ]
 
-        summary = timeline_validator.get_timeline_summary(clips)
-
-        overlaps = []
-        for i, clip1 in enumerate(clips):
-            for clip2 in clips[i + 1:]:
-                is_valid, error_msg = timeline_validator.check_overlap(
-                    clip_id=clip1.id,
-                    new_position=clip1.timeline_position,
-                    clip_length=clip1.length,
-                    other_clips=[clip2],
-                )
-                if not is_valid:
-                    overlaps.append(
-                        {
-                            "clip1_id": clip1.id,
-                            "clip1_name": clip1.name,
-                            "clip2_id": clip2.id,
-                            "clip2_name": clip2.name,
-                            "error": error_msg,
-                        }
-                    )
-
-        gaps = []
-        sorted_clips = sorted(clips, key=lambda c: c.timeline_position)
-        for i in range(len(sorted_clips) - 1):
-            current_end = sorted_clips[i].timeline_position + sorted_clips[i].length
-            next_start = sorted_clips[i + 1].timeline_position
-            gap_size = next_start - current_end
-            if gap_size > 0.1:
-                gaps.append(
-                    {
-                        "after_clip_id": sorted_clips[i].id,
-                        "after_clip_name": sorted_clips[i].name,
-                        "before_clip_id": sorted_clips[i + 1].id,
-                        "before_clip_name": sorted_clips[i + 1].name,
-                        "gap_start": current_end,
-                        "gap_end": next_start,
-                        "gap_duration": gap_size,
-                    }
-                )
+        analysis = timeline_validator.analyze_timeline(clips)
 
         return {
             "scene_id": scene_id,
-            "summary": summary,
-            "overlaps": overlaps,
-            "gaps": gaps,
-            "has_issues": len(overlaps) > 0,
+            "summary": analysis["summary"],
+            "overlaps": analysis["overlaps"],
+            "gaps": analysis["gaps"],
+            "has_issues": len(analysis["overlaps"]) > 0,
             "total_clips": len(clips),
         }
 
-    async def get_clip_gallery(self, clip_id: str) -> ClipGalleryResponseDTO:
+    async def get_clip_gallery(
+        self,
+        clip_id: str,
+        limit: Optional[int] = None,
+        image_cursor: Optional[str] = None,
+        video_cursor: Optional[str] = None,
+    ) -> ClipGalleryResponseDTO:
         clip = await self._clips.find_by_id(clip_id)
         clip = _cleanup_document(clip)
         if not clip:
             raise ClipNotFoundError(clip_id)
 
-        images = [
-            GeneratedContentDTO(**image)
-            for image in clip.get("generated_images", [])
-        ]
-        videos = [
-            GeneratedContentDTO(**video)
-            for video in clip.get("generated_videos", [])
-        ]
-        
-        images.sort(key=lambda x: x.created_at, reverse=True)
-        videos.sort(key=lambda x: x.created_at, reverse=True)
+        summary = ClipResponseDTO(**clip)
+        if self._gallery is None:
+            # No gallery_items store configured: serve the embedded summary
+            images = sorted(summary.generated_images, key=lambda x: x.created_at, reverse=True)
+            videos = sorted(summary.generated_videos, key=lambda x: x.created_at, reverse=True)
+            return ClipGalleryResponseDTO(
+                images=images,
+                videos=videos,
+                selected_image_id=summary.selected_image_id,
+                selected_video_id=summary.selected_video_id,
+                total_images=summary.total_images,
+                total_videos=summary.total_videos,
+            )
+
+        limit = min(limit or config.GALLERY_PAGE_SIZE, config.GALLERY_MAX_PAGE_SIZE)
+        try:
+            images, next_image_cursor = await self._gallery.find_page(
+                clip_id, "image", limit=limit, cursor=image_cursor
+            )
+            videos, next_video_cursor = await self._gallery.find_page(
+                clip_id, "video", limit=limit, cursor=video_cursor
+            )
+        except ValueError as exc:
+            raise ValidationError(str(exc))
 
         return ClipGalleryResponseDTO(
-            images=images,
-            videos=videos,
-            selected_image_id=clip.get("selected_image_id"),
-            selected_video_id=clip.get("selected_video_id"),
+            images=[GeneratedContentDTO(**image) for image in images],
+            videos=[GeneratedContentDTO(**video) for video in videos],
+            selected_image_id=summary.selected_image_id,
+            selected_video_id=summary.selected_video_id,
+            total_images=summary.total_images,
+            total_videos=summary.total_videos,
+            next_image_cursor=next_image_cursor,
+            next_video_cursor=next_video_cursor,
         )
 
     # -------------------------------------------------------------------------
@@ -604,6 +678,7 @@ class ProjectService:
         updated = _cleanup_document(updated)
         if not updated:
             raise ProjectNotFoundError(project_id)
+        await self._revisions.bump(project_id)
         return ProjectResponseDTO(**updated)
 
     async def delete_project(self, project_id: str) -> None:
@@ -616,22 +691,29 @@ class ProjectService:
             clips = await self._clips.find_by_scene(scene["id"])
             for clip in clips:
                 await self._clips.delete(clip["id"])
+            self._timeline_indexes.invalidate(scene["id"])
             await self._scenes.delete(scene["id"])
 
         # Delete the project
         await self._projects.delete(project_id)
+        self._revisions.forget_project(project_id)
+        # Rendered exports sit under the publicly served uploads directory
+        self._exports.discard(project_id)
 
     async def delete_scene(self, scene_id: str) -> None:
         """Delete a scene and all its clips"""
         await self._ensure_scene_exists(scene_id)
+        project_id = await self._revisions.project_for_scene(scene_id)
 
         # Delete all clips in the scene
         clips = await self._clips.find_by_scene(scene_id)
         for clip in clips:
             await self._clips.delete(clip["id"])
+        self._timeline_indexes.invalidate(scene_id)
 
         # Delete the scene
         await self._scenes.delete(scene_id)
+        await self._revisions.bump(project_id)
 
     async def delete_clip(self, clip_id: str) -> None:
         """Delete a clip"""
@@ -640,6 +722,8 @@ class ProjectService:
             raise ClipNotFoundError(clip_id)
 
         await self._clips.delete(clip_id)
+        self._timeline_indexes.invalidate(clip.get("scene_id"))
+        await self._revisions.bump_for_clip_document(clip)
 
     async def get_project_with_scenes(self, project_id: str) -> Any:
         """Get a project with all its scenes"""
@@ -659,6 +743,11 @@ class ProjectService:
         if not project:
             raise ProjectNotFoundError(project_id)
 
+    async def _timeline_index(self, scene_id: str) -> TimelineIndex:
+        return await self._timeline_indexes.get(
+            scene_id, lambda: self._clips.list_timeline_spans(scene_id)
+        )
+
     async def _ensure_scene_exists(self, scene_id: str) -> None:
         scene = await self._scenes.find_by_id(scene_id)
         if not scene:
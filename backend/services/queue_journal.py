@@ -0,0 +1,161 @@
+"""Write-behind persistence journal for queue job state"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class QueueJournal:
+    """
+    Coalesces queue job mutations in memory and flushes them in batches.
+
+    ``record_upsert``/``record_delete`` only touch a dict, so callers holding
+    the queue lock never wait on MongoDB. A background task flushes the pending
+    mutations every ``flush_interval`` seconds (or as soon as ``batch_size``
+    jobs are dirty) with one unordered ``bulk_write`` per batch. Only the latest
+    state of each job is written.
+    """
+
+    def __init__(
+        self,
+        repository=None,
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+        name: str = "queue job",
+    ):
+        self.repository = repository
+        self.name = name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # job_id -> (document or None for delete, monotonic time first dirtied)
+        self._pending: Dict[str, Tuple[Optional[Dict[str, Any]], float]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        self._flush_count = 0
+        self._flushed_ops = 0
+        self._failed_flushes = 0
+        self._last_flush_lag = 0.0
+        self._max_flush_lag = 0.0
+        self._total_flush_lag = 0.0
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def record_upsert(self, job_id: str, document: Dict[str, Any]):
+        """Queue the latest state of a job for persistence"""
+        self._record(job_id, document)
+
+    def record_delete(self, job_id: str):
+        """Queue removal of a job document"""
+        self._record(job_id, None)
+
+    def _record(self, job_id: str, document: Optional[Dict[str, Any]]):
+        if not self.repository:
+            return
+
+        previous = self._pending.get(job_id)
+        dirty_since = previous[1] if previous else time.monotonic()
+        self._pending[job_id] = (document, dirty_since)
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task and not self._task.done():
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Write-behind journal for {self.name} started "
+            f"(flush_interval={self.flush_interval}s, batch_size={self.batch_size})"
+        )
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still pending"""
+        if self._task:
+            self._running = False
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        logger.info(f"Write-behind journal for {self.name} stopped")
+
+    async def _run(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending mutations; returns the number of operations written"""
+        async with self._flush_lock:
+            if not self._pending or not self.repository:
+                return 0
+
+            pending = self._pending
+            self._pending = {}
+            items = list(pending.items())
+            written = 0
+
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                operations = [
+                    DeleteOne({"id": job_id}) if document is None
+                    else UpdateOne({"id": job_id}, {"$set": document}, upsert=True)
+                    for job_id, (document, _) in batch
+                ]
+                try:
+                    await self.repository.bulk_write(operations)
+                except Exception as e:
+                    self._failed_flushes += 1
+                    logger.error(f"Failed to flush {len(items) - start} {self.name} mutation(s): {e}")
+                    self._requeue(items[start:])
+                    break
+
+                written += len(operations)
+                lag = time.monotonic() - min(dirty_since for _, (_, dirty_since) in batch)
+                self._last_flush_lag = lag
+                self._max_flush_lag = max(self._max_flush_lag, lag)
+                self._total_flush_lag += lag
+                self._flush_count += 1
+
+            self._flushed_ops += written
+            return written
+
+    def _requeue(self, items: List[Tuple[str, Tuple[Optional[Dict[str, Any]], float]]]):
+        """Put failed mutations back unless a newer one was recorded meanwhile"""
+        for job_id, (document, dirty_since) in items:
+            newer = self._pending.get(job_id)
+            if newer:
+                self._pending[job_id] = (newer[0], min(newer[1], dirty_since))
+            else:
+                self._pending[job_id] = (document, dirty_since)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Flush statistics; lag is time from first mutation to durable write"""
+        oldest = min((dirty_since for _, dirty_since in self._pending.values()), default=None)
+        return {
+            "pending": len(self._pending),
+            "oldest_pending_age": time.monotonic() - oldest if oldest is not None else 0.0,
+            "flushes": self._flush_count,
+            "flushed_operations": self._flushed_ops,
+            "failed_flushes": self._failed_flushes,
+            "last_flush_lag": self._last_flush_lag,
+            "max_flush_lag": self._max_flush_lag,
+            "average_flush_lag": self._total_flush_lag / self._flush_count if self._flush_count else 0.0,
+            "flush_interval": self.flush_interval,
+            "batch_size": self.batch_size,
+        }
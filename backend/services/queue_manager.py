@@ -1,10 +1,20 @@
 """Smart queue management for ComfyUI servers"""
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+import heapq
+import itertools
+import os
+import socket
+import uuid
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterator, Union, Deque, Iterable
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field, asdict
 import logging
 
+from config import config
+from services.duration_estimator import DurationEstimator
+from services.queue_journal import QueueJournal
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,19 +56,257 @@ class ServerLoad:
     last_heartbeat: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     total_completed: int = 0
     total_failed: int = 0
+    loaded_model: Optional[str] = None  # Checkpoint used by the last dispatched job
+    loaded_signature: Optional[str] = None  # Checkpoint + LoRA set of the last dispatched job
+    total_model_reloads: int = 0
+    model_reload_times: Deque[datetime] = field(default_factory=deque)
+
+    def record_model_reload(self, at: datetime):
+        self.total_model_reloads += 1
+        self.model_reload_times.append(at)
+        self.prune_model_reloads(at)
+
+    def prune_model_reloads(self, now: datetime):
+        cutoff = now - timedelta(hours=1)
+        while self.model_reload_times and self.model_reload_times[0] < cutoff:
+            self.model_reload_times.popleft()
+
+    def model_reloads_last_hour(self, now: Optional[datetime] = None) -> int:
+        self.prune_model_reloads(now or datetime.now(timezone.utc))
+        return len(self.model_reload_times)
+
+
+def model_signature(model: Optional[str], loras: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+    """Identity of the weights a job needs loaded: checkpoint plus sorted LoRA names"""
+    if not model:
+        return None
+    lora_names = sorted(lora.get("name", "") for lora in (loras or []) if isinstance(lora, dict))
+    return "|".join([model, *lora_names])
+
+
+class JobQueue:
+    """
+    Indexed priority queue of queued jobs.
+
+    Jobs are kept in binary heaps keyed on (-priority, created_at). Jobs that
+    are pinned to a server live in that server's heap, unpinned jobs live in a
+    shared heap, so dispatching for a server only has to look at two heap tops.
+    Unpinned jobs are also indexed in one heap per model signature, which lets a
+    server pick the oldest job for the weights it already has loaded.
+    A dict from job id to heap entry gives O(1) lookup; removals mark the entry
+    as a tombstone and the heaps drop tombstones lazily when they surface.
+    """
+
+    # Rebuild the heaps once tombstones outnumber live entries by this factor
+    _COMPACT_RATIO = 2
+    _COMPACT_MIN = 1024
+
+    # Entry layout: [-priority, created_at, seq, server_id, signature, estimated_seconds, job]
+    _SERVER = 3
+    _SIGNATURE = 4
+    _WORK = 5
+
+    def __init__(self):
+        self._heaps: Dict[Optional[str], List[list]] = {}
+        self._signature_heaps: Dict[str, List[list]] = {}
+        self._entries: Dict[str, list] = {}
+        self._pinned_counts: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self._tombstones = 0
+        self._queued_work = 0.0
+
+    @property
+    def queued_work_seconds(self) -> float:
+        """Sum of estimated durations of all queued jobs - O(1)"""
+        return max(0.0, self._queued_work)
+
+    def push(self, job: QueuedJob):
+        """Add a job, or re-index it if its priority or server changed - O(log n)"""
+        if job.id in self._entries:
+            self.discard(job.id)
+
+        signature = model_signature(job.model, job.loras) if job.server_id is None else None
+        work = job.estimated_duration or 0.0
+        entry = [-job.priority, job.created_at, next(self._counter), job.server_id, signature, work, job]
+        self._entries[job.id] = entry
+        self._queued_work += work
+        heapq.heappush(self._heaps.setdefault(job.server_id, []), entry)
+        if signature is not None:
+            heapq.heappush(self._signature_heaps.setdefault(signature, []), entry)
+        if job.server_id is not None:
+            self._pinned_counts[job.server_id] = self._pinned_counts.get(job.server_id, 0) + 1
+
+    def discard(self, job_id: str) -> Optional[QueuedJob]:
+        """Remove a job by id if present - O(1), the heap slots become tombstones"""
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return None
+
+        job = entry[-1]
+        entry[-1] = None
+        self._queued_work -= entry[self._WORK]
+        server_id = entry[self._SERVER]
+        if server_id is not None:
+            self._pinned_counts[server_id] -= 1
+            if not self._pinned_counts[server_id]:
+                del self._pinned_counts[server_id]
+
+        self._tombstones += 2 if entry[self._SIGNATURE] is not None else 1
+        self._maybe_compact()
+        return job
+
+    def remove(self, job: QueuedJob):
+        """Remove a job, raising ValueError if it is not queued (list semantics)"""
+        if self.discard(job.id) is None:
+            raise ValueError(f"Job {job.id} not in queue")
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        """Look up a queued job by id - O(1)"""
+        entry = self._entries.get(job_id)
+        return entry[-1] if entry else None
+
+    def _top(self, heaps: Dict[Any, List[list]], key: Any) -> Optional[list]:
+        heap = heaps.get(key)
+        if not heap:
+            return None
+        while heap and heap[0][-1] is None:
+            heapq.heappop(heap)
+            self._tombstones -= 1
+        if not heap:
+            del heaps[key]
+            return None
+        return heap[0]
+
+    def peek_for_server(
+        self,
+        server_id: str,
+        signature: Optional[str] = None,
+        max_defer: Optional[timedelta] = None,
+    ) -> Optional[QueuedJob]:
+        """
+        Best job that may run on a server: its pinned jobs or unpinned ones.
+
+        With a signature, an unpinned job needing the same weights is preferred
+        over the head of the queue when both have the same priority, unless the
+        head has already waited longer than max_defer.
+        """
+        candidates = [e for e in (self._top(self._heaps, None), self._top(self._heaps, server_id)) if e is not None]
+        if not candidates:
+            return None
+        best = min(candidates)
+
+        if signature is not None and best[self._SIGNATURE] != signature:
+            affine = self._top(self._signature_heaps, signature)
+            head_waited = datetime.now(timezone.utc) - best[1]
+            if affine is not None and affine[0] == best[0] and (max_defer is None or head_waited <= max_defer):
+                return affine[-1]
+
+        return best[-1]
+
+    def pop_for_server(
+        self,
+        server_id: str,
+        signature: Optional[str] = None,
+        max_defer: Optional[timedelta] = None,
+    ) -> Optional[QueuedJob]:
+        """Remove and return the best job a server may run - O(log n)"""
+        job = self.peek_for_server(server_id, signature, max_defer)
+        if job is not None:
+            self.discard(job.id)
+        return job
+
+    def count_for_server(self, server_id: str) -> int:
+        """Number of queued jobs pinned to a server - O(1)"""
+        return self._pinned_counts.get(server_id, 0)
+
+    def _maybe_compact(self):
+        live = len(self._entries)
+        if self._tombstones < self._COMPACT_MIN or self._tombstones < live * self._COMPACT_RATIO:
+            return
+
+        for heaps in (self._heaps, self._signature_heaps):
+            for key in list(heaps):
+                heap = [entry for entry in heaps[key] if entry[-1] is not None]
+                if heap:
+                    heapq.heapify(heap)
+                    heaps[key] = heap
+                else:
+                    del heaps[key]
+        self._tombstones = 0
+
+    def clear(self):
+        self._heaps.clear()
+        self._signature_heaps.clear()
+        self._entries.clear()
+        self._pinned_counts.clear()
+        self._tombstones = 0
+        self._queued_work = 0.0
+
+    def ordered(self) -> List[QueuedJob]:
+        """Snapshot of queued jobs in dispatch order - O(n log n), for inspection"""
+        return [entry[-1] for entry in sorted(self._entries.values())]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[QueuedJob]:
+        return iter(self.ordered())
+
+    def __getitem__(self, index: int) -> QueuedJob:
+        return self.ordered()[index]
+
+    def __contains__(self, item: Union[QueuedJob, str]) -> bool:
+        job_id = item if isinstance(item, str) else item.id
+        return job_id in self._entries
 
 
 class QueueManager:
     """Manages smart queue distribution across ComfyUI servers"""
 
-    def __init__(self, queue_repository=None):
-        self.queue: List[QueuedJob] = []
+    # How long the head of the queue may be passed over in favour of a job that
+    # reuses the weights a server already has loaded
+    affinity_max_defer = timedelta(seconds=120)
+
+    def __init__(
+        self,
+        queue_repository=None,
+        journal: Optional[QueueJournal] = None,
+        estimator: Optional[DurationEstimator] = None,
+    ):
+        self.queue = JobQueue()
+        self.estimator = estimator or DurationEstimator()
         self.server_loads: Dict[str, ServerLoad] = {}
+        self.server_models: Dict[str, set] = {}  # server_id -> model/LoRA names it hosts
         self.processing_jobs: Dict[str, QueuedJob] = {}
         self._processing_lock = asyncio.Lock()
         self._repository = queue_repository
+        self._journal = journal or QueueJournal(
+            queue_repository,
+            flush_interval=config.QUEUE_JOURNAL_FLUSH_INTERVAL,
+            batch_size=config.QUEUE_JOURNAL_BATCH_SIZE,
+        )
+        self._journal.repository = queue_repository
         self._initialized = False
 
+    def set_repository(self, queue_repository):
+        """Attach the persistence repository (done at application startup)"""
+        self._repository = queue_repository
+        self._journal.repository = queue_repository
+
+    def start(self):
+        """Start background persistence"""
+        self._journal.start()
+        self.estimator.start()
+
+    async def stop(self):
+        """Stop background persistence, flushing pending job state"""
+        await self._journal.stop()
+        await self.estimator.stop()
+
+    async def flush(self) -> int:
+        """Persist pending job state immediately"""
+        return await self._journal.flush()
+
     async def _load_from_db(self):
         """Load existing jobs from database"""
         if self._initialized or not self._repository:
@@ -71,48 +319,44 @@ class QueueManager:
                 if job.status == "processing":
                     self.processing_jobs[job.id] = job
                 else:
-                    self.queue.append(job)
+                    self.queue.push(job)
             
-            self.queue.sort(key=lambda j: (-j.priority, j.created_at))
             self._initialized = True
             logger.info(f"Loaded {len(self.queue)} queued and {len(self.processing_jobs)} processing jobs from database")
         except Exception as e:
             logger.error(f"Failed to load jobs from database: {e}")
 
-    async def _persist_job(self, job: QueuedJob):
-        """Persist job to database"""
+    def _job_document(self, job: QueuedJob) -> Dict[str, Any]:
+        """Full database document for a job"""
+        job_dict = self._job_to_dict(job)
+        job_dict["project_id"] = job.project_id
+        job_dict["clip_id"] = job.clip_id
+        job_dict["generation_type"] = job.generation_type
+        job_dict["prompt"] = job.prompt
+        job_dict["negative_prompt"] = job.negative_prompt
+        job_dict["model"] = job.model
+        job_dict["params"] = job.params
+        job_dict["loras"] = job.loras
+        job_dict["estimated_duration"] = job.estimated_duration
+        job_dict["max_retries"] = job.max_retries
+        return job_dict
+
+    def _persist_job(self, job: QueuedJob):
+        """Record job state in the write-behind journal (flushed in the background)"""
         if not self._repository:
             return
         
         try:
-            job_dict = self._job_to_dict(job)
-            job_dict["project_id"] = job.project_id
-            job_dict["clip_id"] = job.clip_id
-            job_dict["generation_type"] = job.generation_type
-            job_dict["prompt"] = job.prompt
-            job_dict["negative_prompt"] = job.negative_prompt
-            job_dict["model"] = job.model
-            job_dict["params"] = job.params
-            job_dict["loras"] = job.loras
-            job_dict["estimated_duration"] = job.estimated_duration
-            
-            existing = await self._repository.find_by_id(job.id)
-            if existing:
-                await self._repository.update_by_id(job.id, job_dict)
-            else:
-                await self._repository.create(job_dict)
+            self._journal.record_upsert(job.id, self._job_document(job))
         except Exception as e:
             logger.error(f"Failed to persist job {job.id}: {e}")
 
-    async def _delete_persisted_job(self, job_id: str):
-        """Delete job from database"""
+    def _delete_persisted_job(self, job_id: str):
+        """Record job deletion in the write-behind journal"""
         if not self._repository:
             return
-        
-        try:
-            await self._repository.delete_by_id(job_id)
-        except Exception as e:
-            logger.error(f"Failed to delete job {job_id} from database: {e}")
+
+        self._journal.record_delete(job_id)
 
     def _dict_to_job(self, data: Dict[str, Any]) -> QueuedJob:
         """Convert dictionary to QueuedJob"""
@@ -190,17 +434,12 @@ class QueueManager:
             max_retries=max_retries
         )
 
-        # Estimate job duration based on type
-        if generation_type == "video":
-            job.estimated_duration = 120.0  # 2 minutes for video
-        else:
-            job.estimated_duration = 30.0  # 30 seconds for image
+        # Learned estimate across servers until the job is dispatched
+        job.estimated_duration = self._estimate(job, None)
 
         async with self._processing_lock:
-            self.queue.append(job)
-            # Sort by priority (highest first), then by creation time
-            self.queue.sort(key=lambda j: (-j.priority, j.created_at))
-            await self._persist_job(job)
+            self.queue.push(job)
+            self._persist_job(job)
 
         logger.info(f"Added job {job_id} to queue (priority: {priority})")
         return job
@@ -228,9 +467,78 @@ class QueueManager:
 
         logger.info(f"Registered server {server_name} ({server_id}): online={is_online}")
 
+    async def update_server_health(self, server_id: str, server_name: str, is_online: bool):
+        """Record a health check result without touching the server's capacity settings"""
+        load = self.server_loads.get(server_id)
+        if load is None:
+            self.server_loads[server_id] = ServerLoad(
+                server_id=server_id,
+                server_name=server_name,
+                is_online=is_online
+            )
+            return
+
+        if load.is_online != is_online:
+            logger.info(f"Server {server_name} ({server_id}) is now {'online' if is_online else 'offline'}")
+        load.is_online = is_online
+        load.last_heartbeat = datetime.now(timezone.utc)
+
+    def set_server_models(self, server_id: str, model_names: Iterable[str]):
+        """Record which checkpoints and LoRAs a server hosts"""
+        self.server_models[server_id] = set(model_names)
+
+    async def refresh_server_models(self, active_models_service):
+        """Load hosted models for every backend from active_backend_models"""
+        try:
+            models = await active_models_service.get_active_models()
+        except Exception as e:
+            logger.error(f"Failed to load active backend models: {e}")
+            return
+
+        server_models: Dict[str, set] = {}
+        for model in models:
+            server_models.setdefault(model.backend_id, set()).add(model.model_name)
+        self.server_models = server_models
+        logger.info(f"Loaded hosted models for {len(server_models)} server(s)")
+
+    def hosts_models(
+        self,
+        server_id: str,
+        model: Optional[str],
+        loras: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[bool]:
+        """Whether a server hosts a checkpoint and LoRAs; None when its models are unknown"""
+        hosted = self.server_models.get(server_id)
+        if hosted is None:
+            return None
+        if not model:
+            return True
+        required = [model] + [lora.get("name") for lora in loras or [] if isinstance(lora, dict) and lora.get("name")]
+        return all(name in hosted for name in required)
+
+    def _can_serve(self, server_id: str, job: QueuedJob) -> bool:
+        """False only when the server is known not to host the job's weights"""
+        return self.hosts_models(server_id, job.model, job.loras) is not False
+
+    def _estimate(self, job: QueuedJob, server_id: Optional[str]) -> float:
+        """Learned duration estimate for a job, on a server or across all servers"""
+        return self.estimator.estimate(server_id, job.generation_type, job.model, job.params)
+
+    def _record_dispatch(self, server_id: str, job: QueuedJob):
+        """Track the weights a server has loaded and count checkpoint reloads"""
+        load = self.server_loads.get(server_id)
+        if not load or not job.model:
+            return
+
+        if load.loaded_model and load.loaded_model != job.model:
+            load.record_model_reload(datetime.now(timezone.utc))
+            logger.info(f"Server {server_id} switches checkpoint {load.loaded_model} -> {job.model}")
+        load.loaded_model = job.model
+        load.loaded_signature = model_signature(job.model, job.loras)
+
     def _get_best_server(self, job: QueuedJob) -> Optional[str]:
         """
-        Select the best server for a job based on load balancing
+        Select the best server for a job based on load balancing and model affinity
 
         Returns:
             Server ID or None if no server available
@@ -245,12 +553,16 @@ class QueueManager:
         available_servers = [
             (server_id, load)
             for server_id, load in self.server_loads.items()
-            if load.is_online and load.current_jobs < load.max_concurrent
+            if load.is_online and load.current_jobs < load.max_concurrent and self._can_serve(server_id, job)
         ]
 
         if not available_servers:
             return None
 
+        signature = model_signature(job.model, job.loras)
+        estimates = {server_id: self._estimate(job, server_id) for server_id, _ in available_servers}
+        slowest = max(estimates.values()) or 1.0
+
         # Score servers based on multiple factors
         def score_server(server_tuple) -> float:
             server_id, load = server_tuple
@@ -269,6 +581,17 @@ class QueueManager:
                 failure_rate = load.total_failed / (load.total_completed + load.total_failed)
                 score += failure_rate * 30
 
+            # Expected duration of this job on this server (0-30 points)
+            score += estimates[server_id] / slowest * 30
+
+            # Model affinity: reuse loaded weights, avoid checkpoint reloads
+            if signature and load.loaded_signature == signature:
+                score -= 40
+            elif job.model and load.loaded_model == job.model:
+                score -= 25
+            elif job.model and load.loaded_model:
+                score += 30
+
             return score
 
         # Sort by score (lowest first)
@@ -290,37 +613,33 @@ class QueueManager:
         await self._load_from_db()
         
         async with self._processing_lock:
-            # Find first job that can run on this server
-            for i, job in enumerate(self.queue):
-                if job.status != "queued":
-                    continue
-
-                # Check if this server is suitable
-                if job.server_id and job.server_id != server_id:
-                    # Job wants a specific different server
-                    continue
-
-                # Assign job to this server
-                job.server_id = server_id
-                job.status = "processing"
-                job.started_at = datetime.now(timezone.utc)
-
-                # Remove from queue and add to processing
-                self.queue.pop(i)
-                self.processing_jobs[job.id] = job
-
-                # Update server load
-                if server_id in self.server_loads:
-                    self.server_loads[server_id].current_jobs += 1
-                    self.server_loads[server_id].queue_length = len(
-                        [j for j in self.queue if j.server_id == server_id]
-                    )
-
-                await self._persist_job(job)
-                logger.info(f"Assigned job {job.id} to server {server_id}")
-                return job
-
-            return None
+            # Best job that is either unpinned or pinned to this server,
+            # preferring one that needs the weights the server already has loaded
+            load = self.server_loads.get(server_id)
+            job = self.queue.pop_for_server(
+                server_id,
+                signature=load.loaded_signature if load else None,
+                max_defer=self.affinity_max_defer,
+            )
+            if job is None:
+                return None
+
+            # Assign job to this server
+            job.server_id = server_id
+            job.status = "processing"
+            job.started_at = datetime.now(timezone.utc)
+            job.estimated_duration = self._estimate(job, server_id)
+            self.processing_jobs[job.id] = job
+            self._record_dispatch(server_id, job)
+
+            # Update server load
+            if server_id in self.server_loads:
+                self.server_loads[server_id].current_jobs += 1
+                self.server_loads[server_id].queue_length = self.queue.count_for_server(server_id)
+
+            self._persist_job(job)
+            logger.info(f"Assigned job {job.id} to server {server_id}")
+            return job
 
     async def assign_pending_jobs(self):
         """Assign jobs to available servers (call periodically)"""
@@ -333,8 +652,10 @@ class QueueManager:
 
                 best_server = self._get_best_server(job)
                 if best_server:
-                    job.server_id = best_server
-                    await self._persist_job(job)
+                    if best_server != job.server_id:
+                        job.server_id = best_server
+                        self.queue.push(job)
+                    self._persist_job(job)
                     logger.info(f"Pre-assigned job {job.id} to server {best_server}")
 
     async def complete_job(
@@ -378,6 +699,15 @@ class QueueManager:
                             load.average_job_time * 0.8 + duration * 0.2
                         )
 
+                if job.started_at:
+                    self.estimator.observe(
+                        job.server_id,
+                        job.generation_type,
+                        job.model,
+                        job.params,
+                        (job.completed_at - job.started_at).total_seconds(),
+                    )
+
                 logger.info(f"Job {job_id} completed successfully")
             else:
                 job.error = error
@@ -397,7 +727,8 @@ class QueueManager:
                     job.status = "queued"
                     job.server_id = None  # Try different server
                     job.started_at = None
-                    self.queue.insert(0, job)  # High priority for retries
+                    # Keeps its original created_at, so it goes ahead of newer jobs
+                    self.queue.push(job)
                 else:
                     logger.error(f"Job {job_id} failed after {job.retry_count} attempts")
                     job.status = "failed"
@@ -406,7 +737,7 @@ class QueueManager:
             if job.status != "queued":
                 del self.processing_jobs[job_id]
 
-            await self._persist_job(job)
+            self._persist_job(job)
 
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a job"""
@@ -416,17 +747,40 @@ class QueueManager:
             return self._job_to_dict(job)
 
         # Check queue
-        for job in self.queue:
-            if job.id == job_id:
-                return self._job_to_dict(job)
+        job = self.queue.get(job_id)
+        if job:
+            return self._job_to_dict(job)
 
         return None
 
+    def _remaining_work(self, now: datetime) -> Dict[str, float]:
+        """Estimated seconds left on processing jobs, per server"""
+        remaining: Dict[str, float] = {}
+        for job in self.processing_jobs.values():
+            if job.status != "processing" or not job.server_id:
+                continue
+            elapsed = (now - job.started_at).total_seconds() if job.started_at else 0.0
+            left = max(0.0, (job.estimated_duration or 0.0) - elapsed)
+            remaining[job.server_id] = remaining.get(job.server_id, 0.0) + left
+        return remaining
+
     def get_queue_status(self) -> Dict[str, Any]:
         """Get overall queue status"""
+        now = datetime.now(timezone.utc)
+        remaining = self._remaining_work(now)
+        queued_work = self.queue.queued_work_seconds
+        capacity = sum(load.max_concurrent for load in self.server_loads.values() if load.is_online)
         return {
             "queued_jobs": len(self.queue),
             "processing_jobs": len(self.processing_jobs),
+            "queued_work_seconds": queued_work,
+            # Time until everything queued now is done, spread over online slots
+            "estimated_drain_seconds": (
+                (queued_work + sum(remaining.values())) / capacity if capacity else None
+            ),
+            "model_reloads_last_hour": sum(
+                load.model_reloads_last_hour(now) for load in self.server_loads.values()
+            ),
             "servers": {
                 server_id: {
                     "name": load.server_name,
@@ -435,16 +789,21 @@ class QueueManager:
                     "max_concurrent": load.max_concurrent,
                     "queue_length": load.queue_length,
                     "average_job_time": load.average_job_time,
+                    "estimated_busy_seconds": remaining.get(server_id, 0.0),
                     "total_completed": load.total_completed,
-                    "total_failed": load.total_failed
+                    "total_failed": load.total_failed,
+                    "loaded_model": load.loaded_model,
+                    "model_reloads_last_hour": load.model_reloads_last_hour(now),
+                    "total_model_reloads": load.total_model_reloads
                 }
                 for server_id, load in self.server_loads.items()
-            }
+            },
+            "persistence": self._journal.get_metrics()
         }
 
     def get_all_jobs(self) -> List[QueuedJob]:
         """Get all jobs (queue + processing)"""
-        return self.queue + list(self.processing_jobs.values())
+        return self.queue.ordered() + list(self.processing_jobs.values())
 
     def get_jobs_by_status(self, status: str) -> List[QueuedJob]:
         """Get all jobs with specific status"""
@@ -467,16 +826,28 @@ class QueueManager:
 
         return jobs
 
+    # Async reads used by the API. In local mode they return this process's
+    # view; LeasedQueueManager answers them from the shared collection.
+
+    async def fetch_queue_status(self) -> Dict[str, Any]:
+        return self.get_queue_status()
+
+    async def fetch_all_jobs(self) -> List[QueuedJob]:
+        return self.get_all_jobs()
+
+    async def fetch_jobs_by_status(self, status: str) -> List[QueuedJob]:
+        return self.get_jobs_by_status(status)
+
+    async def fetch_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_job_status(job_id)
+
+    async def fetch_project_jobs(self, project_id: str) -> List[Dict[str, Any]]:
+        return self.get_project_jobs(project_id)
+
     async def retry_job(self, job_id: str):
         """Retry a failed or cancelled job"""
         async with self._processing_lock:
-            job = self.processing_jobs.get(job_id)
-            
-            if not job:
-                for queued_job in self.queue:
-                    if queued_job.id == job_id:
-                        job = queued_job
-                        break
+            job = self.processing_jobs.get(job_id) or self.queue.get(job_id)
             
             if not job:
                 raise ValueError(f"Job {job_id} not found")
@@ -494,23 +865,15 @@ class QueueManager:
             if job_id in self.processing_jobs:
                 del self.processing_jobs[job_id]
             
-            if job not in self.queue:
-                self.queue.insert(0, job)
-                self.queue.sort(key=lambda j: (-j.priority, j.created_at))
+            self.queue.push(job)
             
-            await self._persist_job(job)
+            self._persist_job(job)
             logger.info(f"Job {job_id} requeued for retry")
 
     async def cancel_job(self, job_id: str):
         """Cancel a pending or processing job"""
         async with self._processing_lock:
-            job = self.processing_jobs.get(job_id)
-            
-            if not job:
-                for queued_job in self.queue:
-                    if queued_job.id == job_id:
-                        job = queued_job
-                        break
+            job = self.processing_jobs.get(job_id) or self.queue.get(job_id)
             
             if not job:
                 raise ValueError(f"Job {job_id} not found")
@@ -529,10 +892,9 @@ class QueueManager:
                         0, self.server_loads[job.server_id].current_jobs - 1
                     )
             
-            if job in self.queue:
-                self.queue.remove(job)
+            self.queue.discard(job_id)
             
-            await self._persist_job(job)
+            self._persist_job(job)
             logger.info(f"Job {job_id} cancelled")
 
     async def delete_job(self, job_id: str):
@@ -547,16 +909,14 @@ class QueueManager:
                     )
                 
                 del self.processing_jobs[job_id]
-                await self._delete_persisted_job(job_id)
+                self._delete_persisted_job(job_id)
                 logger.info(f"Deleted job {job_id} from processing")
                 return
             
-            for i, job in enumerate(self.queue):
-                if job.id == job_id:
-                    self.queue.pop(i)
-                    await self._delete_persisted_job(job_id)
-                    logger.info(f"Deleted job {job_id} from queue")
-                    return
+            if self.queue.discard(job_id):
+                self._delete_persisted_job(job_id)
+                logger.info(f"Deleted job {job_id} from queue")
+                return
             
             raise ValueError(f"Job {job_id} not found")
 
@@ -568,8 +928,8 @@ class QueueManager:
             if status:
                 jobs_to_delete = [job for job in self.queue if job.status == status]
                 for job in jobs_to_delete:
-                    self.queue.remove(job)
-                    await self._delete_persisted_job(job.id)
+                    self.queue.discard(job.id)
+                    self._delete_persisted_job(job.id)
                     deleted_count += 1
                 
                 processing_jobs_to_delete = [
@@ -585,19 +945,19 @@ class QueueManager:
                         )
                     
                     del self.processing_jobs[job_id]
-                    await self._delete_persisted_job(job_id)
+                    self._delete_persisted_job(job_id)
                     deleted_count += 1
             else:
                 deleted_count = len(self.queue) + len(self.processing_jobs)
                 
                 for job in self.queue:
-                    await self._delete_persisted_job(job.id)
+                    self._delete_persisted_job(job.id)
                 self.queue.clear()
                 
                 for job_id, job in self.processing_jobs.items():
                     if job.server_id and job.server_id in self.server_loads:
                         self.server_loads[job.server_id].current_jobs = 0
-                    await self._delete_persisted_job(job_id)
+                    self._delete_persisted_job(job_id)
                 
                 self.processing_jobs.clear()
             
@@ -624,5 +984,243 @@ class QueueManager:
         }
 
 
+class LeasedQueueManager(QueueManager):
+    """
+    QueueManager for running several API workers against one shared queue.
+
+    The queue_jobs collection is the source of truth instead of the in-process
+    heap. Workers claim jobs atomically with find_one_and_update, which stamps
+    the job with the worker id and a lease expiry. A background loop renews the
+    leases of the jobs this worker is running and re-queues jobs whose lease
+    expired because their worker died. All writes are conditional on lease
+    ownership, so a job is never dispatched to two ComfyUI servers at once.
+    """
+
+    def __init__(
+        self,
+        queue_repository=None,
+        journal: Optional[QueueJournal] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 60.0,
+        heartbeat_interval: float = 15.0,
+    ):
+        super().__init__(queue_repository, journal)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self._lease_task: Optional[asyncio.Task] = None
+        self._leases_lost = 0
+        self._leases_reclaimed = 0
+
+    def start(self):
+        super().start()
+        if not self._lease_task or self._lease_task.done():
+            self._lease_task = asyncio.create_task(self._lease_loop())
+            logger.info(f"Lease dispatch started for worker {self.worker_id}")
+
+    async def stop(self):
+        if self._lease_task:
+            self._lease_task.cancel()
+            try:
+                await self._lease_task
+            except asyncio.CancelledError:
+                pass
+            self._lease_task = None
+        await super().stop()
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+
+    async def _load_from_db(self):
+        """Nothing to preload: jobs are claimed from the database on demand"""
+        self._initialized = True
+
+    def _persist_job(self, job: QueuedJob):
+        """Shared state is written explicitly with ownership checks, never write-behind"""
+
+    def _delete_persisted_job(self, job_id: str):
+        """Deletes go straight to the database"""
+
+    async def add_job(self, job_id: str, *args, **kwargs) -> QueuedJob:
+        job = await super().add_job(job_id, *args, **kwargs)
+        self.queue.discard(job.id)
+        if self._repository:
+            await self._repository.create(self._job_document(job))
+        return job
+
+    async def get_next_job(self, server_id: str) -> Optional[QueuedJob]:
+        """Atomically claim the best queued job for a server"""
+        if not self._repository:
+            return None
+
+        job_data = await self._repository.claim_next_job(
+            server_id=server_id,
+            worker_id=self.worker_id,
+            lease_expires_at=self._lease_expiry(),
+        )
+        if not job_data:
+            return None
+
+        job = self._dict_to_job(job_data)
+        async with self._processing_lock:
+            self.processing_jobs[job.id] = job
+            self._record_dispatch(server_id, job)
+            if server_id in self.server_loads:
+                self.server_loads[server_id].current_jobs += 1
+
+        logger.info(f"Worker {self.worker_id} claimed job {job.id} for server {server_id}")
+        return job
+
+    async def assign_pending_jobs(self):
+        """Pre-assignment is unnecessary: servers claim jobs when they have capacity"""
+
+    async def complete_job(
+        self,
+        job_id: str,
+        success: bool,
+        result_url: Optional[str] = None,
+        error: Optional[str] = None
+    ):
+        job = self.processing_jobs.get(job_id)
+        if not job:
+            logger.warning(f"Attempted to complete job {job_id} not leased by worker {self.worker_id}")
+            return
+
+        await super().complete_job(job_id, success, result_url, error)
+        # A retried job goes back to the shared queue, not this worker's state
+        self.queue.discard(job_id)
+        self.processing_jobs.pop(job_id, None)
+
+        if self._repository:
+            document = self._job_document(job)
+            document["worker_id"] = None
+            document["lease_expires_at"] = None
+            released = await self._repository.release_job(job_id, self.worker_id, document)
+            if not released:
+                self._leases_lost += 1
+                logger.warning(f"Lease on job {job_id} was lost before completion; result discarded")
+
+    async def retry_job(self, job_id: str):
+        if not self._repository or not await self._repository.requeue_job(job_id):
+            raise ValueError(f"Job {job_id} not found or not failed/cancelled")
+        logger.info(f"Job {job_id} requeued for retry")
+
+    async def cancel_job(self, job_id: str):
+        if job_id in self.processing_jobs:
+            await super().cancel_job(job_id)
+        if not self._repository or not await self._repository.cancel_job(job_id):
+            raise ValueError(f"Job {job_id} not found or not pending/processing")
+        logger.info(f"Job {job_id} cancelled")
+
+    async def delete_job(self, job_id: str):
+        if job_id in self.processing_jobs:
+            await super().delete_job(job_id)
+        if not self._repository or not await self._repository.delete_by_id(job_id):
+            raise ValueError(f"Job {job_id} not found")
+
+    async def clear_jobs(self, status: Optional[str] = None) -> int:
+        await super().clear_jobs(status)
+        if not self._repository:
+            return 0
+        return await self._repository.delete_many({"status": status} if status else {})
+
+    async def heartbeat(self):
+        """Renew leases of jobs this worker runs and reclaim expired leases"""
+        if not self._repository:
+            return
+
+        for job_id, job in list(self.processing_jobs.items()):
+            renewed = await self._repository.renew_lease(job_id, self.worker_id, self._lease_expiry())
+            if not renewed:
+                self._leases_lost += 1
+                logger.warning(f"Worker {self.worker_id} lost lease on job {job_id}")
+                async with self._processing_lock:
+                    self.processing_jobs.pop(job_id, None)
+                    if job.server_id and job.server_id in self.server_loads:
+                        load = self.server_loads[job.server_id]
+                        load.current_jobs = max(0, load.current_jobs - 1)
+
+        reclaimed = await self._repository.reclaim_expired_leases(datetime.now(timezone.utc))
+        if reclaimed:
+            self._leases_reclaimed += reclaimed
+            logger.warning(f"Reclaimed {reclaimed} job(s) with expired leases")
+
+    async def _lease_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed: {e}")
+
+    def get_queue_status(self) -> Dict[str, Any]:
+        status = super().get_queue_status()
+        status["dispatch"] = {
+            "mode": "lease",
+            "worker_id": self.worker_id,
+            "lease_seconds": self.lease_seconds,
+            "leases_held": len(self.processing_jobs),
+            "leases_lost": self._leases_lost,
+            "leases_reclaimed": self._leases_reclaimed,
+        }
+        return status
+
+    async def fetch_queue_status(self) -> Dict[str, Any]:
+        """Queue status with job counts and queued work taken from queue_jobs"""
+        status = self.get_queue_status()
+        if not self._repository:
+            return status
+
+        totals = await self._repository.status_totals()
+        queued = totals.get("queued", {})
+        processing = totals.get("processing", {})
+        queued_work = queued.get("estimated_seconds", 0.0)
+        # Full estimates of running jobs: workers do not share elapsed time
+        running_work = processing.get("estimated_seconds", 0.0)
+        capacity = sum(load.max_concurrent for load in self.server_loads.values() if load.is_online)
+
+        status["queued_jobs"] = queued.get("count", 0)
+        status["processing_jobs"] = processing.get("count", 0)
+        status["queued_work_seconds"] = queued_work
+        status["estimated_drain_seconds"] = (
+            (queued_work + running_work) / capacity if capacity else None
+        )
+        return status
+
+    async def fetch_all_jobs(self) -> List[QueuedJob]:
+        if not self._repository:
+            return []
+        return [self._dict_to_job(data) for data in await self._repository.find_pending_jobs()]
+
+    async def fetch_jobs_by_status(self, status: str) -> List[QueuedJob]:
+        if not self._repository:
+            return []
+        return [self._dict_to_job(data) for data in await self._repository.find_by_status(status)]
+
+    async def fetch_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not self._repository:
+            return None
+        job_data = await self._repository.find_by_id(job_id)
+        return self._job_to_dict(self._dict_to_job(job_data)) if job_data else None
+
+    async def fetch_project_jobs(self, project_id: str) -> List[Dict[str, Any]]:
+        if not self._repository:
+            return []
+        return [
+            self._job_to_dict(self._dict_to_job(data))
+            for data in await self._repository.find_active_by_project_id(project_id)
+        ]
+
+
+def create_queue_manager() -> QueueManager:
+    """Build the queue manager for the configured dispatch mode"""
+    if config.QUEUE_DISPATCH_MODE == "lease":
+        return LeasedQueueManager(
+            lease_seconds=config.QUEUE_LEASE_SECONDS,
+            heartbeat_interval=config.QUEUE_LEASE_HEARTBEAT_INTERVAL,
+        )
+    return QueueManager()
+
+
 # Global instance
-queue_manager = QueueManager()
+queue_manager = create_queue_manager()
@@ -0,0 +1,230 @@
+"""Cached ComfyUI backend health with a per-server circuit breaker"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import config
+from services.queue_manager import queue_manager
+
+logger = logging.getLogger(__name__)
+
+
+class HealthState(str, Enum):
+    ONLINE = "online"
+    DEGRADED = "degraded"  # Reachable but slower than the degraded latency threshold
+    OPEN = "open"  # Breaker open: treated as offline until a probe succeeds
+
+
+@dataclass
+class ServerHealth:
+    """Last known health of one server"""
+    server_id: str
+    state: HealthState
+    checked_at: float  # time.monotonic()
+    last_checked: datetime
+    latency_ms: Optional[float] = None
+    consecutive_failures: int = 0
+    retry_at: Optional[float] = None  # Breaker open until this time.monotonic()
+    last_error: Optional[str] = None
+
+    @property
+    def is_available(self) -> bool:
+        return self.state != HealthState.OPEN
+
+
+async def _probe_server(server_data: Dict[str, Any]) -> bool:
+    from dtos.comfyui_dtos import ComfyUIServerDTO
+    from services.comfyui_service import ComfyUIClient
+
+    return await ComfyUIClient(ComfyUIServerDTO(**server_data)).check_connection()
+
+
+class ServerHealthMonitor:
+    """
+    Background health checks for ComfyUI servers.
+
+    Every ``interval`` seconds each active server is probed (``/system_stats``
+    or the RunPod status endpoint) and its state cached. Request paths call
+    :meth:`is_available`, which answers from the cache while the entry is
+    younger than ``ttl``. A failed probe opens the server's breaker: requests
+    fail fast until the cooldown (doubling per consecutive failure, capped at
+    ``max_cooldown``) has passed, then one probe is let through to close it
+    again. Probe results are mirrored into QueueManager's
+    ``ServerLoad.is_online``/``last_heartbeat``.
+    """
+
+    def __init__(
+        self,
+        repository=None,
+        probe: Callable[[Dict[str, Any]], Awaitable[bool]] = _probe_server,
+        interval: float = 15.0,
+        ttl: float = 45.0,
+        cooldown: float = 10.0,
+        max_cooldown: float = 120.0,
+        degraded_latency: float = 2.0,
+    ):
+        self._repository = repository
+        self._probe = probe
+        self.interval = interval
+        self.ttl = ttl
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.degraded_latency = degraded_latency
+
+        self._health: Dict[str, ServerHealth] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    def set_repository(self, repository):
+        self._repository = repository
+
+    def get(self, server_id: str) -> Optional[ServerHealth]:
+        return self._health.get(server_id)
+
+    async def is_available(self, server_data: Dict[str, Any]) -> bool:
+        """Cached availability; probes only when the entry is missing or stale"""
+        server_id = server_data["id"]
+        health = self._health.get(server_id)
+        now = time.monotonic()
+
+        if health:
+            if health.state == HealthState.OPEN:
+                if now < health.retry_at:
+                    return False
+            elif now - health.checked_at < self.ttl:
+                return True
+
+        health = await self.check_server(server_data)
+        return health.is_available
+
+    async def check_server(self, server_data: Dict[str, Any]) -> ServerHealth:
+        """Probe a server now; concurrent callers share one probe"""
+        server_id = server_data["id"]
+        pending = self._inflight.get(server_id)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[server_id] = future
+        try:
+            health = await self._run_probe(server_data)
+            future.set_result(health)
+            return health
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[server_id]
+
+    async def _run_probe(self, server_data: Dict[str, Any]) -> ServerHealth:
+        server_id = server_data["id"]
+        error = None
+        started = time.monotonic()
+        try:
+            ok = await self._probe(server_data)
+        except Exception as e:
+            ok = False
+            error = str(e)
+        latency = time.monotonic() - started
+
+        previous = self._health.get(server_id)
+        failures = 0 if ok else (previous.consecutive_failures if previous else 0) + 1
+        now = time.monotonic()
+
+        if ok:
+            state = HealthState.DEGRADED if latency > self.degraded_latency else HealthState.ONLINE
+            retry_at = None
+        else:
+            state = HealthState.OPEN
+            retry_at = now + min(self.cooldown * 2 ** (failures - 1), self.max_cooldown)
+
+        health = ServerHealth(
+            server_id=server_id,
+            state=state,
+            checked_at=now,
+            last_checked=datetime.now(timezone.utc),
+            latency_ms=round(latency * 1000, 1) if ok else None,
+            consecutive_failures=failures,
+            retry_at=retry_at,
+            last_error=None if ok else error or "Connection check failed",
+        )
+        self._health[server_id] = health
+
+        if not previous or previous.state != state:
+            logger.info(f"Server {server_data.get('name', server_id)} health: {state.value}")
+        await queue_manager.update_server_health(
+            server_id, server_data.get("name", server_id), health.is_available
+        )
+        return health
+
+    async def check_all(self) -> List[ServerHealth]:
+        """Probe every active server concurrently"""
+        if not self._repository:
+            return []
+        try:
+            servers = await self._repository.find_many({"is_active": {"$ne": False}})
+        except Exception as e:
+            logger.error(f"Failed to load servers for health checks: {e}")
+            return []
+
+        known = {server["id"] for server in servers}
+        for server_id in list(self._health):
+            if server_id not in known:
+                del self._health[server_id]
+
+        return list(await asyncio.gather(*(self.check_server(server) for server in servers)))
+
+    def start(self):
+        """Start periodic health checks"""
+        if self._task and not self._task.done():
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Server health monitor started (interval={self.interval}s, ttl={self.ttl}s)")
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while self._running:
+            await self.check_all()
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            server_id: {
+                "state": health.state.value,
+                "last_checked": health.last_checked.isoformat(),
+                "age_seconds": round(now - health.checked_at, 1),
+                "latency_ms": health.latency_ms,
+                "consecutive_failures": health.consecutive_failures,
+                "last_error": health.last_error,
+            }
+            for server_id, health in self._health.items()
+        }
+
+
+server_health_monitor = ServerHealthMonitor(
+    interval=config.COMFYUI_HEALTH_INTERVAL,
+    ttl=config.COMFYUI_HEALTH_TTL,
+    cooldown=config.COMFYUI_BREAKER_COOLDOWN,
+    max_cooldown=config.COMFYUI_BREAKER_MAX_COOLDOWN,
+    degraded_latency=config.COMFYUI_DEGRADED_LATENCY,
+)
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timezone
@@ -78,12 +79,14 @@ class TestBatchGenerator:
     
     async def test_generate_batch_server_offline(self, batch_generator, mock_db, sample_server):
         offline_client = AsyncMock()
-        offline_client.check_connection = AsyncMock(return_value=False)
         
         mock_db.comfyui_servers.find_one = AsyncMock(return_value=sample_server)
         
         with patch('dtos.comfyui_dtos.ComfyUIServerDTO', return_value=MagicMock()), \
-             patch('services.comfyui_service.ComfyUIClient', return_value=offline_client):
+             patch('services.comfyui_service.ComfyUIClient', return_value=offline_client), \
+             patch('services.batch_generator.server_health_monitor') as mock_health:
+            
+            mock_health.is_available = AsyncMock(return_value=False)
             
             result = await batch_generator.generate_batch(
                 db=mock_db,
@@ -151,3 +154,297 @@ class TestBatchGenerator:
         assert count == 2
         assert len(batch_generator.active_batches) == 1
         assert "batch-2" in batch_generator.active_batches
+
+
+class TestBatchFanOut:
+
+    @pytest.fixture
+    def manager(self):
+        from services.queue_manager import QueueManager
+
+        manager = QueueManager()
+        with patch('services.batch_generator.queue_manager', manager):
+            yield manager
+
+    @pytest.fixture
+    def servers(self):
+        return [
+            {"id": f"server-{i}", "name": f"Server {i}", "url": f"http://comfy-{i}:8188", "server_type": "standard"}
+            for i in range(3)
+        ]
+
+    @pytest.fixture
+    def mock_db(self, servers):
+        db = MagicMock()
+        db.comfyui_servers.find_one = AsyncMock(return_value=servers[0])
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=servers[1:])
+        db.comfyui_servers.find = MagicMock(return_value=cursor)
+        return db
+
+    async def test_spreads_over_servers_hosting_model(self, manager, mock_db):
+        manager.set_server_models("server-1", ["sdxl.safetensors"])
+        manager.set_server_models("server-2", ["flux.safetensors"])
+        await manager.register_server("server-0", "Server 0", True, max_concurrent=2)
+        await manager.register_server("server-1", "Server 1", True, max_concurrent=2)
+
+        used = {}
+
+        async def fake_generate(db, clip_id, client, server, generation_type, params, batch_id):
+            used[clip_id] = server.id
+            await asyncio.sleep(0.01)
+            return {"clip_id": clip_id, "status": "success"}
+
+        generator = BatchGenerator()
+        clip_ids = [f"clip-{i}" for i in range(8)]
+        with patch('services.batch_generator.server_health_monitor') as mock_health, \
+             patch.object(generator, '_generate_single', side_effect=fake_generate):
+            mock_health.is_available = AsyncMock(return_value=True)
+
+            result = await generator.generate_batch(
+                db=mock_db,
+                clip_ids=clip_ids,
+                server_id="server-0",
+                generation_type="image",
+                params={"model": "sdxl.safetensors"}
+            )
+
+        assert result["servers"] == ["server-0", "server-1"]
+        assert set(used.values()) == {"server-0", "server-1"}
+        assert [r["clip_id"] for r in result["results"]] == clip_ids
+        assert result["completed"] == 8
+        assert sum(s["processed"] for s in result["server_stats"].values()) == 8
+
+    async def test_concurrency_bounded_by_max_concurrent(self, manager, mock_db):
+        await manager.register_server("server-0", "Server 0", True, max_concurrent=2)
+        in_flight = {"now": 0, "peak": 0}
+
+        async def fake_generate(db, clip_id, client, server, generation_type, params, batch_id):
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return {"clip_id": clip_id, "status": "success"}
+
+        generator = BatchGenerator()
+        with patch('services.batch_generator.server_health_monitor') as mock_health, \
+             patch.object(generator, '_generate_single', side_effect=fake_generate):
+            mock_health.is_available = AsyncMock(return_value=True)
+
+            # Two batches on the same server share its semaphore
+            await asyncio.gather(*(
+                generator.generate_batch(
+                    db=mock_db,
+                    clip_ids=[f"clip-{b}-{i}" for i in range(6)],
+                    server_id="server-0",
+                    generation_type="image",
+                    params={"model": "sdxl.safetensors"}
+                )
+                for b in range(2)
+            ))
+
+        assert in_flight["peak"] == 2
+
+    async def test_offline_requested_server_falls_back_to_others(self, manager, mock_db, servers):
+        manager.set_server_models("server-1", ["sdxl.safetensors"])
+
+        async def available(server):
+            return server["id"] != "server-0"
+
+        generator = BatchGenerator()
+        with patch('services.batch_generator.server_health_monitor') as mock_health, \
+             patch.object(generator, '_generate_single', new=AsyncMock(return_value={"status": "success"})):
+            mock_health.is_available = AsyncMock(side_effect=available)
+
+            result = await generator.generate_batch(
+                db=mock_db,
+                clip_ids=["clip-1"],
+                server_id="server-0",
+                generation_type="image",
+                params={"model": "sdxl.safetensors"}
+            )
+
+        assert result["servers"] == ["server-1"]
+        assert result["completed"] == 1
+
+
+class TestBatchExecutor:
+
+    def _lane(self, server_id, slots=1):
+        from services.batch_executor import ServerLane
+
+        return ServerLane(server_id=server_id, semaphore=asyncio.Semaphore(slots), slots=slots)
+
+    async def test_fast_server_steals_from_slow_one(self):
+        from services.batch_executor import BatchExecutor
+
+        fast, slow = self._lane("fast"), self._lane("slow")
+        executor = BatchExecutor([fast, slow])
+
+        async def handler(lane, item):
+            await asyncio.sleep(0.001 if lane is fast else 0.02)
+            return item * 2
+
+        results = await executor.run(list(range(20)), handler)
+
+        assert results == [i * 2 for i in range(20)]
+        assert fast.processed > slow.processed
+        assert fast.stolen > 0
+
+    async def test_work_splits_evenly_across_equal_servers(self):
+        from services.batch_executor import BatchExecutor
+
+        lanes = [self._lane(f"server-{i}") for i in range(4)]
+        executor = BatchExecutor(lanes)
+
+        async def handler(lane, item):
+            await asyncio.sleep(0.005)
+            return item
+
+        await executor.run(list(range(40)), handler)
+
+        # Four servers each process ~a quarter of the batch, so it finishes in ~1/4 the time
+        assert all(8 <= lane.processed <= 12 for lane in lanes)
+
+    async def test_handler_exceptions_are_returned(self):
+        from services.batch_executor import BatchExecutor
+
+        executor = BatchExecutor([self._lane("server-0")])
+
+        async def handler(lane, item):
+            if item == 1:
+                raise RuntimeError("boom")
+            return item
+
+        results = await executor.run([0, 1, 2], handler)
+
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], RuntimeError)
+
+
+class TestBatchProgress:
+
+    @pytest.fixture
+    def repository(self):
+        repo = AsyncMock()
+        repo.find_by_id = AsyncMock(return_value=None)
+        return repo
+
+    @pytest.fixture
+    def mock_db(self, sample_server):
+        db = MagicMock()
+        db.comfyui_servers.find_one = AsyncMock(return_value=sample_server)
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[])
+        db.comfyui_servers.find = MagicMock(return_value=cursor)
+        return db
+
+    async def test_progress_recorded_per_clip(self, repository, mock_db):
+        generator = BatchGenerator(repository)
+        seen_progress = []
+
+        async def fake_generate(db, clip_id, client, server, generation_type, params, batch_id):
+            batch = generator.active_batches[batch_id]
+            seen_progress.append(batch["completed"] + batch["failed"])
+            status = "failed" if clip_id == "clip-2" else "success"
+            return {"clip_id": clip_id, "status": status}
+
+        with patch('services.batch_generator.server_health_monitor') as mock_health, \
+             patch.object(generator, '_generate_single', side_effect=fake_generate):
+            mock_health.is_available = AsyncMock(return_value=True)
+
+            result = await generator.generate_batch(
+                db=mock_db,
+                clip_ids=["clip-1", "clip-2", "clip-3"],
+                server_id="server-001",
+                generation_type="image",
+                params={"model": "sdxl.safetensors"}
+            )
+
+        assert seen_progress == [0, 1, 2]
+        assert result["completed"] == 2 and result["failed"] == 1
+        assert [r["clip_id"] for r in result["results"]] == ["clip-1", "clip-2", "clip-3"]
+
+        increments = repository.increment_counters.await_args_list
+        assert len(increments) == 3
+        assert [call.kwargs["completed"] for call in increments] == [1, 0, 1]
+        assert [call.kwargs["failed"] for call in increments] == [0, 1, 0]
+        assert increments[1].kwargs["result"]["clip_id"] == "clip-2"
+
+    async def test_resume_regenerates_only_clips_without_result(self, repository, mock_db):
+        interrupted = {
+            "id": "batch-1",
+            "status": "processing",
+            "total": 3,
+            "completed": 1,
+            "failed": 0,
+            "results": [{"clip_id": "clip-1", "status": "success"}],
+            "clip_ids": ["clip-1", "clip-2", "clip-3"],
+            "server_id": "server-001",
+            "generation_type": "image",
+            "params": {"model": "sdxl.safetensors"},
+        }
+        repository.find_by_status = AsyncMock(return_value=[interrupted])
+        repository.claim_batch = AsyncMock(side_effect=lambda batch_id, owner, now, expiry: {
+            **interrupted, "owner": owner, "lease_expires_at": expiry
+        })
+        generator = BatchGenerator(repository, worker_id="worker-b")
+        generated = []
+
+        async def fake_generate(db, clip_id, client, server, generation_type, params, batch_id):
+            generated.append(clip_id)
+            return {"clip_id": clip_id, "status": "success"}
+
+        with patch('services.batch_generator.server_health_monitor') as mock_health, \
+             patch.object(generator, '_generate_single', side_effect=fake_generate):
+            mock_health.is_available = AsyncMock(return_value=True)
+
+            assert await generator.resume_batches(mock_db) == 1
+            await asyncio.gather(*generator._resume_tasks)
+
+        repository.find_by_status.assert_awaited_once_with("processing")
+        assert repository.claim_batch.call_args[0][:2] == ("batch-1", "worker-b")
+        assert sorted(generated) == ["clip-2", "clip-3"]
+        batch = generator.active_batches["batch-1"]
+        assert batch["status"] == "completed"
+        assert batch["completed"] == 3
+        assert [r["clip_id"] for r in batch["results"]] == ["clip-1", "clip-2", "clip-3"]
+
+    async def test_resume_fails_batches_without_request_fields(self, repository, mock_db):
+        legacy = {"id": "legacy", "status": "processing", "total": 2, "completed": 0, "failed": 0, "results": []}
+        repository.find_by_status = AsyncMock(return_value=[legacy])
+        repository.claim_batch = AsyncMock(return_value=dict(legacy))
+        generator = BatchGenerator(repository)
+
+        assert await generator.resume_batches(mock_db) == 0
+        assert generator.active_batches["legacy"]["status"] == "failed"
+
+    async def test_resume_skips_batches_claimed_elsewhere(self, repository, mock_db):
+        repository.find_by_status = AsyncMock(return_value=[
+            {"id": "batch-1", "status": "processing", "owner": "worker-a", "clip_ids": ["clip-1"],
+             "server_id": "server-001", "generation_type": "image", "params": {}, "results": []}
+        ])
+        # worker-a still holds a live lease, so the conditional claim matches nothing
+        repository.claim_batch = AsyncMock(return_value=None)
+        generator = BatchGenerator(repository, worker_id="worker-b")
+
+        assert await generator.resume_batches(mock_db) == 0
+        assert "batch-1" not in generator.active_batches
+        assert not generator._resume_tasks
+
+    async def test_new_batches_are_owned_by_this_worker(self, repository, mock_db):
+        created = []
+        repository.create = AsyncMock(side_effect=lambda batch: created.append(dict(batch)))
+        generator = BatchGenerator(repository, worker_id="worker-a")
+
+        with patch('services.batch_generator.server_health_monitor') as mock_health, \
+             patch.object(generator, '_generate_single', AsyncMock(return_value={"clip_id": "clip-1", "status": "success"})):
+            mock_health.is_available = AsyncMock(return_value=True)
+            result = await generator.generate_batch(
+                db=mock_db, clip_ids=["clip-1"], server_id="server-001", generation_type="image", params={}
+            )
+
+        assert created[0]["owner"] == "worker-a"
+        assert created[0]["lease_expires_at"] > datetime.now(timezone.utc)
+        assert result["status"] == "completed"
+        assert result["owner"] is None
@@ -0,0 +1,266 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from services.civitai_matcher import CivitaiMatcher, clean_model_name, score_distribution, trigrams
+
+
+def _model(name, *filenames):
+    return {"name": name, "modelVersions": [{"files": [{"name": f} for f in filenames]}]}
+
+
+CATALOG = [
+    _model("Juggernaut XL", "juggernautXL_v9Rundiffusionphoto2.safetensors"),
+    _model("RealVisXL V4.0 Lightning", "realvisxlV40_v40LightningBakedvae.safetensors"),
+    _model("DreamShaper XL", "dreamshaperXL_lightningDPMSDE.safetensors"),
+    _model("Pony Diffusion V6 XL", "ponyDiffusionV6XL_v6StartWithThisOne.safetensors"),
+    _model("Animagine XL 3.1", "animagineXLV31_v31.safetensors"),
+]
+
+
+class TestCivitaiMatcher:
+
+    @pytest.fixture
+    def matcher(self):
+        return CivitaiMatcher.from_models(CATALOG)
+
+    def test_clean_model_name(self):
+        assert clean_model_name("sd_juggernaut_v9-2.safetensors") == "juggernaut"
+        assert trigrams("xl") == {"xl"}
+        assert trigrams("") == set()
+
+    def test_exact_and_filename_matches(self, matcher):
+        assert matcher.best_match("Juggernaut XL").reason == "exact_name_match"
+
+        match = matcher.best_match("juggernautXL_v9Rundiffusionphoto2.safetensors")
+        assert match.key == 0
+        assert match.reason == "filename_exact_match"
+
+    def test_fuzzy_match_is_found_among_candidates(self, matcher):
+        match = matcher.best_match("dreamshaper_xl")
+
+        assert match.key == 2
+        assert match.score >= 0.7
+
+    def test_thresholds_follow_fallback_mode(self, matcher):
+        assert matcher.best_match("pony realistic style") is None
+        assert matcher.best_match("pony realistic style", fallback=True).reason == "contains_match"
+
+    def test_add_and_remove_update_the_index(self, matcher):
+        matcher.add("new", "Zavy Chroma XL", ["zavychromaxl_v80.safetensors"])
+        assert matcher.best_match("zavychromaxl_v80.safetensors").key == "new"
+
+        matcher.add("new", "Something Else")
+        assert matcher.best_match("zavychromaxl_v80.safetensors") is None
+
+        matcher.remove(0)
+        assert 0 not in matcher
+        assert matcher.best_match("Juggernaut XL") is None
+        assert len(matcher) == len(CATALOG)
+
+    def test_candidate_limit_keeps_best_overlap(self):
+        catalog = [_model(f"Generic Model {i}") for i in range(200)] + [_model("Copax Timeless XL")]
+        matcher = CivitaiMatcher.from_models(catalog, candidates=5)
+
+        assert matcher.best_match("copax_timeless_xl").key == 200
+
+    def test_match_many_matches_each_name_once(self, matcher, monkeypatch):
+        calls = []
+        best_match = matcher.best_match
+        monkeypatch.setattr(matcher, "best_match", lambda name, fallback=False: calls.append(name) or best_match(name, fallback))
+
+        results = matcher.match_many(["Juggernaut XL", "Juggernaut XL", "pony realistic style", "zzz"])
+
+        assert results["Juggernaut XL"][1] == "high_confidence"
+        assert results["pony realistic style"][1] == "low_confidence"
+        assert results["zzz"] == (None, "unmatched")
+        assert calls.count("Juggernaut XL") == 1
+
+    def test_score_distribution(self):
+        distribution = score_distribution([1.0, 0.9, 0.72, 0.4])
+
+        assert distribution["buckets"] == {"1.0": 1, "0.85-1.0": 1, "0.7-0.85": 1, "0.5-0.7": 0, "0.3-0.5": 1}
+        assert distribution["median"] == 0.81
+        assert score_distribution([])["count"] == 0
+
+
+class TestCivitaiMatcherRefresh:
+
+    @pytest.fixture
+    def docs(self):
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        return [
+            {"id": f"civitai_{i}", "name": model["name"], "updated_at": base + timedelta(seconds=i),
+             "civitai_info": {"modelVersions": model["modelVersions"]}}
+            for i, model in enumerate(CATALOG)
+        ]
+
+    @pytest.fixture
+    def db(self, docs):
+        db = MagicMock()
+
+        def find(query, projection=None):
+            since = query.get("updated_at", {}).get("$gte")
+
+            async def cursor():
+                for doc in list(docs):
+                    if since is None or doc["updated_at"] >= since:
+                        yield doc
+
+            return cursor()
+
+        db.database_models.find = MagicMock(side_effect=find)
+        db.database_models.count_documents = AsyncMock(side_effect=lambda query: len(docs))
+        return db
+
+    async def test_refresh_reads_only_new_documents(self, db, docs):
+        matcher = CivitaiMatcher(refresh_seconds=0)
+        await matcher.refresh(db)
+        assert len(matcher) == len(CATALOG)
+
+        docs.append({
+            "id": "civitai_new", "name": "Zavy Chroma XL",
+            "updated_at": docs[-1]["updated_at"] + timedelta(seconds=1),
+        })
+        await matcher.refresh(db)
+
+        assert len(matcher) == len(CATALOG) + 1
+        assert "$gte" in db.database_models.find.call_args[0][0]["updated_at"]
+        assert matcher.best_match("Zavy Chroma XL").key == "civitai_new"
+
+    async def test_refresh_rebuilds_after_deletes(self, db, docs):
+        matcher = CivitaiMatcher(refresh_seconds=0)
+        await matcher.refresh(db)
+
+        del docs[0]
+        await matcher.refresh(db)
+
+        assert len(matcher) == len(CATALOG) - 1
+        assert "civitai_0" not in matcher
+
+    async def test_refresh_is_spaced_out(self, db):
+        matcher = CivitaiMatcher(refresh_seconds=60)
+        await matcher.refresh(db)
+        await matcher.refresh(db)
+
+        db.database_models.count_documents.assert_awaited_once()
+
+
+class TestMatchCivitaiEndpoint:
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        import server
+        import services.civitai_matcher as civitai_matcher_module
+
+        matcher = CivitaiMatcher()
+        for i, model in enumerate(CATALOG):
+            matcher.add(f"civitai_{i}", model["name"], [f["name"] for f in model["modelVersions"][0]["files"]])
+        monkeypatch.setattr(matcher, "refresh", AsyncMock())
+        monkeypatch.setattr(civitai_matcher_module, "civitai_matcher", matcher)
+        monkeypatch.setattr(server, "active_models_service", MagicMock(sync_models_with_civitai=AsyncMock()))
+        return server
+
+    @pytest.fixture
+    def models(self):
+        return [
+            {"id": "m1", "name": "juggernautXL_v9Rundiffusionphoto2.safetensors", "server_source": "server-1"},
+            {"id": "m2", "name": "pony realistic style", "server_source": "server-1"},
+            {"id": "m3", "name": "zzz_unknown", "server_source": "server-1"},
+            {"id": "m4", "name": "Animagine XL 3.1", "server_source": "server-1",
+             "civitai_match_quality": "manual"},
+            {"id": "m5", "name": "DreamShaper XL", "server_source": "server-2"},
+        ]
+
+    @pytest.fixture
+    def db(self, models):
+        civitai_docs = [
+            {"id": f"civitai_{i}", "civitai_info": {"modelId": str(i), "name": model["name"]}}
+            for i, model in enumerate(CATALOG)
+        ]
+
+        def find(query, projection=None):
+            if "source" in query:
+                docs = [
+                    m for m in models
+                    if m["server_source"] == query.get("server_source", m["server_source"])
+                    and m["id"] in query.get("id", {}).get("$in", [m["id"]])
+                ]
+            else:
+                docs = [d for d in civitai_docs if d["id"] in query["id"]["$in"]]
+            return MagicMock(to_list=AsyncMock(return_value=docs))
+
+        db = MagicMock()
+        db.comfyui_servers.find_one = AsyncMock(side_effect=lambda query, projection=None: (
+            {"id": query["id"]} if query["id"] in ("server-1", "server-2") else None
+        ))
+        db.database_models.find = MagicMock(side_effect=find)
+        db.database_models.bulk_write = AsyncMock(side_effect=lambda ops, ordered: MagicMock(modified_count=len(ops)))
+        return db
+
+    async def test_match_server_models_in_one_bulk_write(self, server, db):
+        result = await server.match_models_civitai(server.CivitaiBatchMatchRequest(server_id="server-1"), db)
+
+        assert result["requested"] == 4
+        assert result["skipped_manual"] == 1
+        assert result["matched"] == result["modified"] == 2
+        assert result["match_quality"] == {"high_confidence": 1, "low_confidence": 1, "unmatched": 1}
+        assert result["reasons"] == {"filename_exact_match": 1, "contains_match": 1}
+        assert result["unmatched"] == ["zzz_unknown"]
+        assert result["scores"]["count"] == 2
+
+        db.database_models.bulk_write.assert_awaited_once()
+        operations = db.database_models.bulk_write.call_args[0][0]
+        assert [op._filter for op in operations] == [{"id": "m1"}, {"id": "m2"}]
+        assert operations[0]._doc["$set"]["civitai_info"]["modelId"] == "0"
+        links = server.active_models_service.sync_models_with_civitai.call_args[0][0]
+        assert [(link["model_id"], link["match_quality"]) for link in links] == [
+            ("m1", "high_confidence"), ("m2", "low_confidence")
+        ]
+
+    async def test_model_ids_narrow_the_server_and_overwrite_manual(self, server, db):
+        request = server.CivitaiBatchMatchRequest(
+            server_id="server-1", model_ids=["m4", "m5"], overwrite_manual=True
+        )
+
+        result = await server.match_models_civitai(request, db)
+
+        query = db.database_models.find.call_args_list[0][0][0]
+        assert query["server_source"] == "server-1"
+        assert query["id"] == {"$in": ["m4", "m5"]}
+        assert result["requested"] == result["matched"] == 1
+        assert result["skipped_manual"] == 0
+        assert result["reasons"] == {"exact_name_match": 1}
+
+    async def test_model_ids_without_server(self, server, db):
+        request = server.CivitaiBatchMatchRequest(model_ids=["m3", "m5"], include_low_confidence=False)
+
+        result = await server.match_models_civitai(request, db)
+
+        assert "server_source" not in db.database_models.find.call_args_list[0][0][0]
+        db.comfyui_servers.find_one.assert_not_called()
+        assert result["matched"] == 1
+        assert result["unmatched"] == ["zzz_unknown"]
+
+    async def test_nothing_matched_skips_the_writes(self, server, db):
+        result = await server.match_models_civitai(server.CivitaiBatchMatchRequest(model_ids=["m3"]), db)
+
+        assert result["matched"] == 0
+        assert result["scores"]["count"] == 0
+        db.database_models.bulk_write.assert_not_called()
+        server.active_models_service.sync_models_with_civitai.assert_not_called()
+
+    async def test_unknown_server_is_rejected(self, server, db):
+        from utils.errors import ServerNotFoundError
+
+        with pytest.raises(ServerNotFoundError):
+            await server.match_models_civitai(server.CivitaiBatchMatchRequest(server_id="missing"), db)
+        db.database_models.find.assert_not_called()
+
+    @pytest.mark.parametrize("payload", [{}, {"model_ids": []}])
+    async def test_requires_server_or_model_ids(self, server, db, payload):
+        from fastapi import HTTPException
+
+        with pytest.raises(HTTPException) as exc_info:
+            await server.match_models_civitai(server.CivitaiBatchMatchRequest(**payload), db)
+        assert exc_info.value.status_code == 400
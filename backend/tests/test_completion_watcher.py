@@ -0,0 +1,204 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from dtos.comfyui_dtos import ComfyUIServerDTO
+from services.comfyui_service import ComfyUIClient
+from services.completion_watcher import CompletionWatcher, completion_watchers
+from utils.http_pool import HttpSessionPool, http_pool
+
+
+class StubComfyUI:
+    """Local ComfyUI stand-in: /prompt, /history/<id> and the /ws event stream"""
+
+    def __init__(self, websocket_enabled=True, delay=0.05, fail=False):
+        self.websocket_enabled = websocket_enabled
+        self.delay = delay
+        self.fail = fail
+        self.sockets = {}
+        self.history = {}
+        self.ws_connections = 0
+        self.history_requests = 0
+        self._counter = 0
+        self._tasks = set()
+
+        self.app = web.Application()
+        self.app.router.add_get("/ws", self.websocket)
+        self.app.router.add_post("/prompt", self.prompt)
+        self.app.router.add_get("/history/{prompt_id}", self.get_history)
+
+    async def websocket(self, request):
+        if not self.websocket_enabled:
+            raise web.HTTPNotFound()
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.ws_connections += 1
+        self.sockets[request.query["clientId"]] = ws
+        async for _ in ws:
+            pass
+        return ws
+
+    async def prompt(self, request):
+        body = await request.json()
+        self._counter += 1
+        prompt_id = f"prompt-{self._counter}"
+        task = asyncio.create_task(self._execute(prompt_id, body.get("client_id")))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({"prompt_id": prompt_id, "number": self._counter})
+
+    async def get_history(self, request):
+        self.history_requests += 1
+        prompt_id = request.match_info["prompt_id"]
+        entry = self.history.get(prompt_id)
+        return web.json_response({prompt_id: entry} if entry else {})
+
+    async def _execute(self, prompt_id, client_id):
+        await asyncio.sleep(self.delay)
+        output = {"images": [{"filename": f"{prompt_id}.png", "type": "output"}]}
+        ws = self.sockets.get(client_id)
+
+        if self.fail:
+            self.history[prompt_id] = {"outputs": {}, "status": {"status_str": "error"}}
+            if ws is not None and not ws.closed:
+                await ws.send_json({"type": "execution_error", "data": {"prompt_id": prompt_id}})
+            return
+
+        self.history[prompt_id] = {"outputs": {"9": output}, "status": {"status_str": "success"}}
+        if ws is not None and not ws.closed:
+            await ws.send_json({"type": "executing", "data": {"node": "9", "prompt_id": prompt_id}})
+            await ws.send_json({"type": "executed", "data": {"node": "9", "output": output, "prompt_id": prompt_id}})
+            await ws.send_json({"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+
+    async def submit(self, base_url, session, client_id):
+        async with session.post(f"{base_url}/prompt", json={"prompt": {}, "client_id": client_id}) as response:
+            return (await response.json())["prompt_id"]
+
+
+async def _start(stub):
+    server = TestServer(stub.app)
+    await server.start_server()
+    return server, str(server.make_url("")).rstrip("/")
+
+
+class TestCompletionWatcher:
+
+    @pytest.fixture
+    async def pool(self):
+        pool = HttpSessionPool()
+        yield pool
+        await pool.close()
+
+    async def test_resolves_from_socket_events(self, pool):
+        stub = StubComfyUI()
+        server, base_url = await _start(stub)
+        watcher = CompletionWatcher(base_url, pool=pool)
+        try:
+            assert await watcher.ensure_connected()
+            prompt_id = await stub.submit(base_url, pool.get(base_url), watcher.client_id)
+
+            outputs = await watcher.wait_for(prompt_id, timeout=5)
+
+            assert outputs == {"9": {"images": [{"filename": f"{prompt_id}.png", "type": "output"}]}}
+            assert watcher.resolved_by_socket == 1
+            assert stub.history_requests == 0
+        finally:
+            await watcher.close()
+            await server.close()
+
+    async def test_multiplexes_prompts_over_one_socket(self, pool):
+        stub = StubComfyUI()
+        server, base_url = await _start(stub)
+        watcher = CompletionWatcher(base_url, pool=pool)
+        try:
+            await watcher.ensure_connected()
+            session = pool.get(base_url)
+            prompt_ids = [await stub.submit(base_url, session, watcher.client_id) for _ in range(5)]
+
+            results = await asyncio.gather(*(watcher.wait_for(pid, timeout=5) for pid in prompt_ids))
+
+            assert [r["9"]["images"][0]["filename"] for r in results] == [f"{pid}.png" for pid in prompt_ids]
+            assert stub.ws_connections == 1
+            assert watcher.get_metrics()["in_flight"] == 0
+        finally:
+            await watcher.close()
+            await server.close()
+
+    async def test_completion_before_wait_is_not_lost(self, pool):
+        stub = StubComfyUI(delay=0)
+        server, base_url = await _start(stub)
+        watcher = CompletionWatcher(base_url, pool=pool)
+        try:
+            await watcher.ensure_connected()
+            prompt_id = await stub.submit(base_url, pool.get(base_url), watcher.client_id)
+            await asyncio.sleep(0.1)
+
+            outputs = await watcher.wait_for(prompt_id, timeout=1)
+            assert "9" in outputs
+        finally:
+            await watcher.close()
+            await server.close()
+
+    async def test_execution_error_returns_none(self, pool):
+        stub = StubComfyUI(fail=True)
+        server, base_url = await _start(stub)
+        watcher = CompletionWatcher(base_url, pool=pool)
+        try:
+            await watcher.ensure_connected()
+            prompt_id = await stub.submit(base_url, pool.get(base_url), watcher.client_id)
+
+            assert await watcher.wait_for(prompt_id, timeout=5) is None
+        finally:
+            await watcher.close()
+            await server.close()
+
+    async def test_falls_back_to_polling_without_socket(self, pool):
+        stub = StubComfyUI(websocket_enabled=False, delay=0.2)
+        server, base_url = await _start(stub)
+        watcher = CompletionWatcher(base_url, pool=pool, connect_timeout=0.1, poll_interval=0.05)
+        try:
+            assert not await watcher.ensure_connected()
+            prompt_id = await stub.submit(base_url, pool.get(base_url), watcher.client_id)
+
+            outputs = await watcher.wait_for(prompt_id, timeout=5)
+
+            assert "9" in outputs
+            assert watcher.resolved_by_polling == 1
+            # Backoff keeps the request count well below fixed-interval polling
+            assert 1 <= stub.history_requests <= 5
+        finally:
+            await watcher.close()
+            await server.close()
+
+    async def test_times_out(self, pool):
+        stub = StubComfyUI(delay=10)
+        server, base_url = await _start(stub)
+        watcher = CompletionWatcher(base_url, pool=pool)
+        try:
+            await watcher.ensure_connected()
+            prompt_id = await stub.submit(base_url, pool.get(base_url), watcher.client_id)
+
+            assert await watcher.wait_for(prompt_id, timeout=0.1) is None
+            assert watcher.get_metrics()["in_flight"] == 0
+        finally:
+            for task in list(stub._tasks):
+                task.cancel()
+            await watcher.close()
+            await server.close()
+
+    async def test_comfyui_client_generate_image(self):
+        stub = StubComfyUI()
+        server, base_url = await _start(stub)
+        client = ComfyUIClient(
+            ComfyUIServerDTO(id="server-001", name="Stub", url=base_url, server_type="standard")
+        )
+        try:
+            url = await client.generate_image("a lighthouse", model="sdxl_base.safetensors")
+
+            assert url == f"{base_url}/view?filename=prompt-1.png"
+            assert stub.history_requests == 0
+        finally:
+            await completion_watchers.close()
+            await http_pool.close()
+            await server.close()
@@ -0,0 +1,63 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from pymongo.errors import BulkWriteError
+
+from repositories.database_model_repository import DatabaseModelRepository
+
+
+def _documents(*names):
+    return [{"id": f"id-{name}", "name": name, "type": "lora", "is_active": True} for name in names]
+
+
+class TestDatabaseModelRepository:
+
+    @pytest.fixture
+    def collection(self):
+        collection = MagicMock()
+        collection.bulk_write = AsyncMock(
+            return_value=MagicMock(bulk_api_result={"nUpserted": 2, "nMatched": 1})
+        )
+        return collection
+
+    async def test_upserts_all_models_in_one_unordered_write(self, collection):
+        repository = DatabaseModelRepository(collection)
+
+        counts = await repository.upsert_by_name_and_type(
+            _documents("a.safetensors", "b.safetensors", "c.safetensors", "a.safetensors"),
+            {"server_source": "server-1", "last_synced_at": "now"},
+        )
+
+        assert counts == {"inserted": 2, "matched": 1}
+        collection.bulk_write.assert_awaited_once()
+        operations = collection.bulk_write.call_args[0][0]
+        assert collection.bulk_write.call_args[1]["ordered"] is False
+        assert len(operations) == 3
+        first = operations[0]._doc
+        assert operations[0]._filter["name"] == "a.safetensors"
+        assert first["$set"] == {"server_source": "server-1", "last_synced_at": "now"}
+        assert first["$setOnInsert"] == {"id": "id-a.safetensors", "is_active": True}
+
+    async def test_concurrent_inserts_are_not_failures(self, collection):
+        collection.bulk_write = AsyncMock(side_effect=BulkWriteError({
+            "writeErrors": [{"code": 11000, "index": 0}], "nUpserted": 1, "nMatched": 0,
+        }))
+
+        counts = await DatabaseModelRepository(collection).upsert_by_name_and_type(
+            _documents("a", "b"), {"server_source": "server-1"}
+        )
+
+        assert counts["inserted"] == 1
+
+        collection.bulk_write = AsyncMock(side_effect=BulkWriteError({
+            "writeErrors": [{"code": 121, "index": 0}], "nUpserted": 0, "nMatched": 0,
+        }))
+        with pytest.raises(BulkWriteError):
+            await DatabaseModelRepository(collection).upsert_by_name_and_type(
+                _documents("a"), {"server_source": "server-1"}
+            )
+
+    async def test_nothing_to_sync_skips_the_write(self, collection):
+        counts = await DatabaseModelRepository(collection).upsert_by_name_and_type([], {})
+
+        assert counts == {"inserted": 0, "matched": 0}
+        collection.bulk_write.assert_not_called()
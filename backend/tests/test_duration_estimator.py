@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from services.duration_estimator import DurationEstimator
+from services.queue_manager import QueueManager
+
+
+class TestDurationEstimator:
+
+    @pytest.fixture
+    def estimator(self):
+        return DurationEstimator(alpha=0.5)
+
+    def test_features_bucket_resolution_and_frames(self):
+        features = DurationEstimator.features(
+            "video", "wan2.2_t2v.safetensors", {"width": 1024, "height": 1024, "steps": 20, "video_frames": 81}
+        )
+        assert features == ("video", "wan_2_2", 1.0, 20, 81)
+
+        image = DurationEstimator.features("image", "sdxl_base.safetensors", {"width": 512, "height": 512})
+        assert image == ("image", "sdxl", 0.25, 0, 0)
+
+    def test_defaults_when_unseen(self, estimator):
+        assert estimator.estimate("server-001", "video", "wan", {}) == 120.0
+        assert estimator.estimate("server-001", "image", "sdxl", {}) == 30.0
+
+    def test_ewma_per_server_with_global_fallback(self, estimator):
+        params = {"width": 1024, "height": 1024, "steps": 30}
+        estimator.observe("server-001", "image", "sdxl", params, 10.0)
+        estimator.observe("server-001", "image", "sdxl", params, 20.0)
+
+        assert estimator.estimate("server-001", "image", "sdxl", params) == 15.0
+        # Unknown server falls back to the cross-server estimate for the same features
+        assert estimator.estimate("server-002", "image", "sdxl", params) == 15.0
+        # Unseen step count falls back to the coarse model-type estimate
+        assert estimator.estimate("server-002", "image", "sdxl", {"steps": 8}) == 15.0
+
+    async def test_persists_and_reloads(self):
+        repository = AsyncMock()
+        estimator = DurationEstimator(repository)
+        estimator.observe("server-001", "image", "flux-dev", {"steps": 20}, 42.0)
+        await estimator.stop()
+
+        operations = repository.bulk_write.call_args[0][0]
+        documents = [operation._doc["$set"] for operation in operations]
+        assert len(documents) == 3
+
+        restored_repository = AsyncMock()
+        restored_repository.find_many.return_value = documents
+        restored = DurationEstimator(restored_repository)
+        await restored.load()
+
+        assert restored.estimate("server-001", "image", "flux-dev", {"steps": 20}) == 42.0
+
+    async def test_queue_manager_learns_from_completions(self):
+        estimator = DurationEstimator(alpha=1.0)
+        estimator.observe("server-001", "image", "sdxl", {}, 5.0)
+        manager = QueueManager(estimator=estimator)
+        await manager.register_server("server-001", "Server 1", True, max_concurrent=2)
+
+        job = await manager.add_job(
+            job_id="job-1", clip_id="clip-1", project_id="project-1",
+            generation_type="image", prompt="test", model="sdxl",
+        )
+        assert job.estimated_duration == 5.0
+
+        status = manager.get_queue_status()
+        assert status["queued_work_seconds"] == 5.0
+        assert status["estimated_drain_seconds"] == 2.5
+
+        await manager.get_next_job("server-001")
+        assert manager.get_queue_status()["queued_work_seconds"] == 0.0
+        await manager.complete_job("job-1", success=True)
+
+        assert manager.estimator.snapshot("server-001")
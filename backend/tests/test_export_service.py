@@ -1,8 +1,32 @@
+import asyncio
 import pytest
+import xml.etree.ElementTree as ET
+from io import StringIO
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime, timezone
 
-from services.export_service import ExportService
+from services.export_service import ExportCache, ExportService
+
+
+def _aggregate(rows):
+    """Mock for collection.aggregate returning an async cursor over rows"""
+    async def cursor():
+        for row in rows:
+            yield row
+
+    return MagicMock(side_effect=lambda *args, **kwargs: cursor())
+
+
+def _export_row(clip):
+    """A clip as the export aggregation returns it, selected video resolved"""
+    videos = {video["id"]: video for video in clip.get("generated_videos", [])}
+    return {
+        "id": clip["id"],
+        "name": clip["name"],
+        "timeline_position": clip["timeline_position"],
+        "length": clip["length"],
+        "selected_video": videos.get(clip.get("selected_video_id")),
+    }
 
 
 class TestExportService:
@@ -25,13 +49,7 @@ class TestExportService:
         }]
         
         db.projects.find_one = AsyncMock(return_value=sample_project)
-        db.scenes.find = MagicMock()
-        db.scenes.find.return_value.sort = MagicMock()
-        db.scenes.find.return_value.sort.return_value.to_list = AsyncMock(return_value=[sample_scene])
-        
-        db.clips.find = MagicMock()
-        db.clips.find.return_value.sort = MagicMock()
-        db.clips.find.return_value.sort.return_value.to_list = AsyncMock(return_value=[clip_with_video])
+        db.scenes.aggregate = _aggregate([{**sample_scene, "clips": [_export_row(clip_with_video)]}])
         
         return db
     
@@ -95,6 +113,32 @@ class TestExportService:
         
         with pytest.raises(ValueError, match="Project not found"):
             await service.export_json(db, "nonexistent")
+
+    async def test_export_json_includes_full_galleries(self, service, sample_project, sample_scene, sample_clip):
+        tracked = {**sample_clip, "total_images": 3, "generated_images": [{"id": "img-3"}], "total_videos": 0}
+        legacy = {**sample_clip, "id": "clip-legacy", "generated_images": [{"id": "old-1"}, {"id": "old-2"}]}
+        items = [
+            {"id": f"img-{i}", "clip_id": "clip-123", "content_type": "image"} for i in (1, 2, 3)
+        ]
+
+        async def cursor():
+            for item in items:
+                yield dict(item)
+
+        db = MagicMock()
+        db.projects.find_one = AsyncMock(return_value=sample_project)
+        db.scenes.aggregate = _aggregate([{**sample_scene, "clips": [tracked, legacy]}])
+        db.gallery_items.find.return_value.sort.return_value = cursor()
+
+        result = await service.export_json(db, "project-789")
+
+        query = db.gallery_items.find.call_args[0][0]
+        assert query == {"clip_id": {"$in": ["clip-123"]}}
+        exported, exported_legacy = result["scenes"][0]["clips"]
+        assert [item["id"] for item in exported["generated_images"]] == ["img-1", "img-2", "img-3"]
+        assert "clip_id" not in exported["generated_images"][0]
+        assert exported["generated_videos"] == []
+        assert [item["id"] for item in exported_legacy["generated_images"]] == ["old-1", "old-2"]
     
     def test_seconds_to_timecode(self, service):
         result = service._seconds_to_timecode(90.5, fps=30)
@@ -126,16 +170,171 @@ class TestExportService:
         ]
         
         db.projects.find_one = AsyncMock(return_value=sample_project)
-        db.scenes.find = MagicMock()
-        db.scenes.find.return_value.sort = MagicMock()
-        db.scenes.find.return_value.sort.return_value.to_list = AsyncMock(return_value=[sample_scene])
-        
-        db.clips.find = MagicMock()
-        db.clips.find.return_value.sort = MagicMock()
-        db.clips.find.return_value.sort.return_value.to_list = AsyncMock(return_value=clips)
+        db.scenes.aggregate = _aggregate([{**sample_scene, "clips": [_export_row(clip) for clip in clips]}])
         
         result = await service.export_final_cut_pro(db, "project-789")
         
         assert "Clip 0" in result
         assert "Clip 1" in result
         assert "Clip 2" in result
+
+    async def test_fcpxml_is_well_formed_with_assets_before_spine(self, service, sample_project):
+        db = MagicMock()
+        db.projects.find_one = AsyncMock(return_value={**sample_project, "name": "Rock & <Roll>"})
+        rows = [
+            {
+                "id": f"scene-{s}",
+                "clips": [
+                    {
+                        "id": f"clip-{s}-{c}",
+                        "name": f'Shot "{s}.{c}"',
+                        "timeline_position": c * 5.0,
+                        "length": 5.0,
+                        "selected_video": {"id": f"v-{s}-{c}", "url": f"/uploads/{s}-{c}.mp4"},
+                    }
+                    for c in range(50)
+                ],
+            }
+            for s in range(40)
+        ]
+        db.scenes.aggregate = _aggregate(rows)
+
+        out = StringIO()
+        written = await service.export_to(db, "project-789", "fcpxml", out)
+
+        root = ET.fromstring(out.getvalue().encode("utf-8"))
+        assets = root.findall("./resources/asset")
+        videos = root.findall(".//spine/video")
+        assert written == len(assets) == len(videos) == 2000
+        assert [video.get("ref") for video in videos] == [asset.get("id") for asset in assets]
+        assert videos[51].get("name") == 'Shot "1.1"'
+        assert root.find("./library/event").get("name") == "Rock & <Roll>"
+        db.scenes.aggregate.assert_called_once()
+
+    async def test_clips_without_selected_video_are_skipped(self, service, sample_project):
+        db = MagicMock()
+        db.projects.find_one = AsyncMock(return_value=sample_project)
+        db.scenes.aggregate = _aggregate([{
+            "id": "scene-1",
+            "clips": [
+                {"id": "a", "name": "Kept", "timeline_position": 0.0, "length": 2.0,
+                 "selected_video": {"id": "v", "url": "/a.mp4", "prompt": "p", "model_name": "m"}},
+                {"id": "b", "name": "Dropped", "timeline_position": 2.0, "length": 2.0, "selected_video": None},
+            ],
+        }])
+
+        edl = await service.export_premiere_edl(db, "project-789")
+        resolve = ET.fromstring((await service.export_davinci_resolve(db, "project-789")).encode("utf-8"))
+
+        assert "Kept" in edl and "Dropped" not in edl
+        assert [clip.get("name") for clip in resolve.iter("clip")] == ["Kept"]
+        assert resolve.find(".//clip/metadata/prompt").text == "p"
+
+    async def test_export_to_rejects_unknown_format(self, service):
+        with pytest.raises(ValueError, match="Unsupported export format"):
+            await service.export_to(MagicMock(), "project-789", "aaf", StringIO())
+
+
+class TestExportCache:
+
+    @pytest.fixture
+    def state(self, sample_project):
+        return {
+            "project": dict(sample_project, revision=0),
+            "rows": [{
+                "id": "clip-1",
+                "name": "Opening",
+                "timeline_position": 0.0,
+                "length": 5.0,
+                "selected_video": {"id": "video-1", "url": "http://test.com/a.mp4"},
+            }],
+        }
+
+    @pytest.fixture
+    def db(self, state):
+        db = MagicMock()
+
+        async def find_project(query, projection=None):
+            return dict(state["project"])
+
+        db.projects.find_one = AsyncMock(side_effect=find_project)
+        db.scenes.aggregate = MagicMock(side_effect=lambda *args, **kwargs: _aggregate(
+            [{"id": "scene-1", "clips": state["rows"]}]
+        )())
+        return db
+
+    @pytest.fixture
+    def revisions(self, state):
+        revisions = MagicMock()
+        revisions.current = AsyncMock(side_effect=lambda project_id: state["project"]["revision"])
+        return revisions
+
+    @pytest.fixture
+    def cache(self, tmp_path, db, revisions):
+        return ExportCache(str(tmp_path), db=db, revisions=revisions, settle_seconds=0.01)
+
+    async def test_repeat_export_is_served_from_disk(self, cache, db):
+        first = await cache.get(db, "project-789", "edl")
+        second = await cache.get(db, "project-789", "edl")
+
+        assert first == second
+        assert "Opening" in first.read_text()
+        # One streamed pass renders and hashes; the unchanged revision answers without touching the timeline
+        assert db.scenes.aggregate.call_count == 1
+
+    async def test_edit_renders_a_new_artifact_only_when_content_changes(self, cache, db, state):
+        first = await cache.get(db, "project-789", "fcpxml")
+
+        state["project"]["revision"] = 1
+        assert await cache.get(db, "project-789", "fcpxml") == first
+
+        state["project"]["revision"] = 2
+        state["rows"][0]["name"] = "Renamed"
+        second = await cache.get(db, "project-789", "fcpxml")
+
+        assert second != first
+        assert "Renamed" in second.read_text()
+        assert second.parent == first.parent
+        assert not list(first.parent.glob("*.tmp"))
+
+    async def test_json_export_is_cached_per_format(self, cache, db):
+        edl = await cache.get(db, "project-789", "edl")
+        document = await cache.get(db, "project-789", "json")
+
+        assert document.suffix == ".json" and edl.suffix == ".edl"
+        assert '"format": "storycanvas_v1"' in document.read_text()
+
+    async def test_edits_settle_before_background_render(self, cache, db, state):
+        await cache.get(db, "project-789", "resolve")
+        renders = db.scenes.aggregate.call_count
+
+        for revision in (1, 2, 3):
+            state["project"]["revision"] = revision
+            state["rows"][0]["name"] = f"Take {revision}"
+            cache.on_revision("project-789")
+        await asyncio.sleep(0.05)
+
+        # Three bumps coalesce into one render
+        assert db.scenes.aggregate.call_count == renders + 1
+        path = await cache.get(db, "project-789", "resolve")
+        assert "Take 3" in path.read_text()
+        assert db.scenes.aggregate.call_count == renders + 1
+
+    async def test_unknown_project_raises(self, cache, db):
+        db.projects.find_one = AsyncMock(return_value=None)
+
+        with pytest.raises(ValueError, match="Project not found"):
+            await cache.get(db, "missing", "edl")
+
+
+    async def test_failed_render_leaves_no_partial_file(self, cache, db, tmp_path, monkeypatch):
+        async def failing_write(project_data, clips, export_format, out):
+            async for clip in clips:
+                out.write(clip.name)
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(ExportService, "write", failing_write)
+
+        with pytest.raises(RuntimeError, match="disk full"):
+            await cache.get(db, "project-789", "fcpxml")
+        assert not any(path.is_file() for path in tmp_path.rglob("*"))
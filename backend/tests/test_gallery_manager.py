@@ -51,9 +51,14 @@ class TestGalleryManager:
         assert result["generated_images"] == []
         assert result["generated_videos"] == []
     
-    async def test_add_generated_content_image(self, gallery_manager, mock_db, sample_clip, sample_generated_content):
-        mock_db.clips.find_one = AsyncMock(return_value=sample_clip)
-        mock_db.clips.update_one = AsyncMock()
+    @staticmethod
+    def _mock_append(mock_db, before, modified=1):
+        mock_db.clips.find_one_and_update = AsyncMock(return_value=before)
+        mock_db.clips.update_one = AsyncMock(return_value=MagicMock(modified_count=modified))
+        mock_db.clips.find_one = AsyncMock()
+
+    async def test_add_generated_content_image(self, gallery_manager, mock_db, sample_generated_content):
+        self._mock_append(mock_db, {"selected_image_id": None, "total_images": 0})
         
         result = await gallery_manager.add_generated_content(
             db=mock_db,
@@ -65,9 +70,17 @@ class TestGalleryManager:
         assert result["message"] == "Image generated successfully"
         assert result["content"]["id"] == "content-123"
         assert result["total_images"] == 1
-        mock_db.clips.update_one.assert_called_once()
+        mock_db.clips.find_one.assert_not_called()
+
+        query, update = mock_db.clips.find_one_and_update.call_args[0]
+        assert query == {"id": "clip-123", "total_images": {"$exists": True}}
+        push = update["$push"]["generated_images"]
+        assert push["$each"][0]["id"] == "content-123"
+        assert push["$slice"] == -gallery_manager.summary_size
+        assert update["$inc"] == {"total_images": 1}
+        assert "generated_images" not in update["$set"]
     
-    async def test_add_generated_content_video(self, gallery_manager, mock_db, sample_clip):
+    async def test_add_generated_content_video(self, gallery_manager, mock_db):
         video_content = GeneratedContentDTO(
             id="video-123",
             content_type="video",
@@ -83,8 +96,7 @@ class TestGalleryManager:
             created_at=datetime.now(timezone.utc)
         )
         
-        mock_db.clips.find_one = AsyncMock(return_value=sample_clip)
-        mock_db.clips.update_one = AsyncMock()
+        self._mock_append(mock_db, {"selected_video_id": None, "total_videos": 0})
         
         result = await gallery_manager.add_generated_content(
             db=mock_db,
@@ -96,8 +108,12 @@ class TestGalleryManager:
         assert result["message"] == "Video generated successfully"
         assert result["content"]["id"] == "video-123"
         assert result["total_videos"] == 1
+        update = mock_db.clips.find_one_and_update.call_args[0][1]
+        assert update["$push"]["generated_videos"]["$each"][0]["id"] == "video-123"
+        assert update["$inc"] == {"total_videos": 1}
     
     async def test_add_generated_content_clip_not_found(self, gallery_manager, mock_db, sample_generated_content):
+        self._mock_append(mock_db, None)
         mock_db.clips.find_one = AsyncMock(return_value=None)
         
         with pytest.raises(ClipNotFoundError):
@@ -107,10 +123,10 @@ class TestGalleryManager:
                 new_content=sample_generated_content,
                 content_type="image"
             )
+        mock_db.clips.update_one.assert_not_called()
     
-    async def test_add_generated_content_auto_select_first(self, gallery_manager, mock_db, sample_clip, sample_generated_content):
-        mock_db.clips.find_one = AsyncMock(return_value=sample_clip)
-        mock_db.clips.update_one = AsyncMock()
+    async def test_add_generated_content_auto_select_first(self, gallery_manager, mock_db, sample_generated_content):
+        self._mock_append(mock_db, {"selected_image_id": None, "total_images": 0})
         
         result = await gallery_manager.add_generated_content(
             db=mock_db,
@@ -119,15 +135,31 @@ class TestGalleryManager:
             content_type="image"
         )
         
-        call_args = mock_db.clips.update_one.call_args
-        update_data = call_args[0][1]["$set"]
+        query, update = mock_db.clips.update_one.call_args[0]
+        assert query == {"id": "clip-123", "selected_image_id": None}
+        assert update["$set"]["selected_image_id"] == "content-123"
+        assert update["$set"]["generated_images.$[item].is_selected"] is True
+        assert mock_db.clips.update_one.call_args[1]["array_filters"] == [{"item.id": "content-123"}]
+        assert result["content"]["is_selected"] is True
+
+    async def test_add_generated_content_concurrent_first_loses_selection(self, gallery_manager, mock_db, sample_generated_content):
+        # Another generation selected itself between our push and the conditional update
+        self._mock_append(mock_db, {"selected_image_id": None, "total_images": 1}, modified=0)
+        
+        result = await gallery_manager.add_generated_content(
+            db=mock_db,
+            clip_id="clip-123",
+            new_content=sample_generated_content,
+            content_type="image"
+        )
         
-        assert update_data["selected_image_id"] == "content-123"
+        assert result["content"]["is_selected"] is False
+        assert result["total_images"] == 2
     
-    async def test_add_generated_content_invalid_type(self, gallery_manager, mock_db, sample_clip, sample_generated_content):
+    async def test_add_generated_content_invalid_type(self, gallery_manager, mock_db, sample_generated_content):
         sample_generated_content.content_type = "invalid"
         
-        mock_db.clips.find_one = AsyncMock(return_value=sample_clip)
+        self._mock_append(mock_db, {"total_images": 0})
         
         with pytest.raises(ValueError):
             await gallery_manager.add_generated_content(
@@ -136,28 +168,29 @@ class TestGalleryManager:
                 new_content=sample_generated_content,
                 content_type="invalid"
             )
+        mock_db.clips.find_one_and_update.assert_not_called()
+
+    async def test_add_generated_content_writes_gallery_item(self, mock_db, sample_generated_content):
+        repository = AsyncMock()
+        manager = GalleryManager(repository)
+        self._mock_append(mock_db, {"selected_image_id": "img-1", "total_images": 600})
+
+        result = await manager.add_generated_content(
+            db=mock_db,
+            clip_id="clip-123",
+            new_content=sample_generated_content,
+            content_type="image"
+        )
+
+        assert result["total_images"] == 601
+        mock_db.clips.update_one.assert_not_called()
+        created = repository.create.call_args[0][0]
+        assert created["clip_id"] == "clip-123"
+        assert created["is_selected"] is False
     
     async def test_select_content_image(self, gallery_manager, mock_db):
-        clip_with_images = {
-            "id": "clip-123",
-            "generated_images": [
-                {
-                    "id": "img-1",
-                    "content_type": "image",
-                    "url": "http://test.com/img1.png",
-                    "is_selected": True
-                },
-                {
-                    "id": "img-2",
-                    "content_type": "image",
-                    "url": "http://test.com/img2.png",
-                    "is_selected": False
-                }
-            ]
-        }
-        
-        mock_db.clips.find_one = AsyncMock(return_value=clip_with_images)
-        mock_db.clips.update_one = AsyncMock()
+        mock_db.clips.find_one = AsyncMock()
+        mock_db.clips.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
         
         result = await gallery_manager.select_content(
             db=mock_db,
@@ -168,28 +201,20 @@ class TestGalleryManager:
         
         assert result["message"] == "Selected image updated successfully"
         mock_db.clips.update_one.assert_called_once()
+        mock_db.clips.find_one.assert_not_called()
+
+        query, update = mock_db.clips.update_one.call_args[0]
+        assert query == {"id": "clip-123", "generated_images.id": "img-2"}
+        assert update["$set"]["generated_images.$[chosen].is_selected"] is True
+        assert update["$set"]["generated_images.$[other].is_selected"] is False
+        assert update["$set"]["selected_image_id"] == "img-2"
+        assert mock_db.clips.update_one.call_args[1]["array_filters"] == [
+            {"chosen.id": "img-2"},
+            {"other.id": {"$ne": "img-2"}, "other.is_selected": True}
+        ]
     
     async def test_select_content_video(self, gallery_manager, mock_db):
-        clip_with_videos = {
-            "id": "clip-123",
-            "generated_videos": [
-                {
-                    "id": "vid-1",
-                    "content_type": "video",
-                    "url": "http://test.com/vid1.mp4",
-                    "is_selected": False
-                },
-                {
-                    "id": "vid-2",
-                    "content_type": "video",
-                    "url": "http://test.com/vid2.mp4",
-                    "is_selected": False
-                }
-            ]
-        }
-        
-        mock_db.clips.find_one = AsyncMock(return_value=clip_with_videos)
-        mock_db.clips.update_one = AsyncMock()
+        mock_db.clips.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
         
         result = await gallery_manager.select_content(
             db=mock_db,
@@ -199,8 +224,12 @@ class TestGalleryManager:
         )
         
         assert result["message"] == "Selected video updated successfully"
+        update = mock_db.clips.update_one.call_args[0][1]
+        assert update["$set"]["selected_video_id"] == "vid-2"
+        assert "generated_videos" not in update["$set"]
     
     async def test_select_content_clip_not_found(self, gallery_manager, mock_db):
+        mock_db.clips.update_one = AsyncMock(return_value=MagicMock(matched_count=0))
         mock_db.clips.find_one = AsyncMock(return_value=None)
         
         with pytest.raises(ClipNotFoundError):
@@ -210,7 +239,133 @@ class TestGalleryManager:
                 content_id="content-123",
                 content_type="image"
             )
+
+    async def test_select_content_updates_gallery_items_in_one_bulk_write(self, mock_db):
+        repository = AsyncMock()
+        manager = GalleryManager(repository)
+        mock_db.clips.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+
+        await manager.select_content(
+            db=mock_db,
+            clip_id="clip-123",
+            content_id="img-2",
+            content_type="image"
+        )
+
+        repository.select_item.assert_awaited_once_with("clip-123", "image", "img-2")
+        repository.unmark_selected.assert_not_called()
+        repository.mark_as_selected.assert_not_called()
+        repository.find_by_id.assert_not_called()
     
+    async def test_add_generated_content_backfills_legacy_clip(self, mock_db, sample_generated_content):
+        repository = AsyncMock()
+        repository.count_by_clip_and_type = AsyncMock(return_value=40)
+        manager = GalleryManager(repository)
+        legacy_items = [{"id": f"img-{i}", "content_type": "image", "is_selected": i == 0} for i in range(40)]
+
+        mock_db.clips.find_one_and_update = AsyncMock(
+            side_effect=[None, {"selected_image_id": "img-0", "total_images": 40}]
+        )
+        mock_db.clips.find_one = AsyncMock(return_value={"generated_images": legacy_items})
+        mock_db.clips.update_one = AsyncMock()
+
+        result = await manager.add_generated_content(
+            db=mock_db,
+            clip_id="clip-123",
+            new_content=sample_generated_content,
+            content_type="image"
+        )
+
+        # Embedded history is copied to gallery_items before the trimmed append
+        operations = repository.bulk_write.call_args[0][0]
+        assert len(operations) == 40
+        query, update = mock_db.clips.update_one.call_args[0]
+        assert query == {"id": "clip-123", "total_images": {"$exists": False}}
+        assert update == {"$set": {"total_images": 40}}
+        assert mock_db.clips.find_one_and_update.await_count == 2
+        assert result["total_images"] == 41
+
+    async def test_select_content_restores_item_from_gallery_items(self, mock_db):
+        repository = AsyncMock()
+        repository.find_by_id = AsyncMock(return_value={
+            "_id": "mongo-id",
+            "id": "img-old",
+            "clip_id": "clip-123",
+            "content_type": "image",
+            "is_selected": False,
+            "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)
+        })
+        manager = GalleryManager(repository, summary_size=3)
+        recent = [{"id": f"img-{i}", "is_selected": i == 0} for i in range(3)]
+        mock_db.clips.update_one = AsyncMock(side_effect=[
+            MagicMock(matched_count=0), MagicMock(matched_count=1), MagicMock(matched_count=1)
+        ])
+        mock_db.clips.find_one = AsyncMock(return_value={"total_images": 50, "generated_images": recent})
+
+        await manager.select_content(
+            db=mock_db,
+            clip_id="clip-123",
+            content_id="img-old",
+            content_type="image"
+        )
+
+        repository.select_item.assert_awaited_once_with("clip-123", "image", "img-old")
+        unselect, push = [call.args[1] for call in mock_db.clips.update_one.call_args_list[1:]]
+        assert unselect["$set"]["generated_images.$[].is_selected"] is False
+        assert unselect["$set"]["selected_image_id"] == "img-old"
+        restored = push["$push"]["generated_images"]
+        assert restored["$each"][0]["id"] == "img-old"
+        assert restored["$each"][0]["is_selected"] is True
+        assert "clip_id" not in restored["$each"][0] and "_id" not in restored["$each"][0]
+        assert restored["$sort"] == {"created_at": 1}
+        assert "$slice" not in restored
+
+    def test_summarize_keeps_newest_and_selected(self):
+        manager = GalleryManager(summary_size=3)
+        items = [
+            {"id": f"img-{i}", "is_selected": i == 1, "created_at": datetime(2025, 1, 1 + i)}
+            for i in range(6)
+        ]
+
+        summary = manager.summarize(items)
+
+        assert [item["id"] for item in summary] == ["img-1", "img-3", "img-4", "img-5"]
+
+    def test_summarize_stays_chronological_when_selected_is_recent(self):
+        manager = GalleryManager(summary_size=3)
+        items = [
+            {"id": f"img-{i}", "is_selected": i == 4, "created_at": datetime(2025, 1, 1 + i)}
+            for i in reversed(range(6))
+        ]
+
+        summary = manager.summarize(items)
+
+        assert [item["id"] for item in summary] == ["img-3", "img-4", "img-5"]
+
+    async def test_add_generated_content_keeps_aged_out_selection(self, mock_db, sample_generated_content):
+        manager = GalleryManager(summary_size=3)
+        selected = {"id": "img-old", "is_selected": True, "created_at": datetime(2024, 1, 1)}
+        self._mock_append(mock_db, {
+            "selected_image_id": "img-old", "total_images": 10, "generated_images": [selected]
+        })
+
+        await manager.add_generated_content(
+            db=mock_db,
+            clip_id="clip-123",
+            new_content=sample_generated_content,
+            content_type="image"
+        )
+
+        push = mock_db.clips.find_one_and_update.call_args[0][1]["$push"]["generated_images"]
+        assert push["$sort"] == {"created_at": 1}
+        query, update = mock_db.clips.update_one.call_args[0]
+        assert query == {
+            "id": "clip-123",
+            "selected_image_id": "img-old",
+            "generated_images.id": {"$ne": "img-old"}
+        }
+        assert update["$push"]["generated_images"] == {"$each": [selected], "$sort": {"created_at": 1}}
+
     def test_create_generated_content(self, gallery_manager):
         content = gallery_manager.create_generated_content(
             content_type="image",
@@ -232,34 +387,6 @@ class TestGalleryManager:
         assert content.is_selected is False
     
     async def test_add_generated_content_multiple_images(self, gallery_manager, mock_db):
-        clip_with_images = {
-            "id": "clip-123",
-            "scene_id": "scene-456",
-            "name": "Test Clip",
-            "length": 5.0,
-            "timeline_position": 0.0,
-            "order": 1,
-            "generated_images": [
-                {
-                    "id": "img-1",
-                    "content_type": "image",
-                    "url": "http://test.com/img1.png",
-                    "prompt": "test",
-                    "negative_prompt": "",
-                    "server_id": "server-001",
-                    "server_name": "Server",
-                    "model_name": "model",
-                    "model_type": "sdxl",
-                    "generation_params": {},
-                    "is_selected": True,
-                    "created_at": datetime.now(timezone.utc)
-                }
-            ],
-            "selected_image_id": "img-1",
-            "generated_videos": [],
-            "selected_video_id": None
-        }
-        
         new_content = GeneratedContentDTO(
             id="img-2",
             content_type="image",
@@ -275,8 +402,7 @@ class TestGalleryManager:
             created_at=datetime.now(timezone.utc)
         )
         
-        mock_db.clips.find_one = AsyncMock(return_value=clip_with_images)
-        mock_db.clips.update_one = AsyncMock()
+        self._mock_append(mock_db, {"selected_image_id": "img-1", "total_images": 1})
         
         result = await gallery_manager.add_generated_content(
             db=mock_db,
@@ -286,7 +412,45 @@ class TestGalleryManager:
         )
         
         assert result["total_images"] == 2
+        assert result["content"]["is_selected"] is False
         
-        call_args = mock_db.clips.update_one.call_args
-        update_data = call_args[0][1]["$set"]
-        assert update_data["selected_image_id"] == "img-1"
+        # An existing selection is left alone
+        mock_db.clips.update_one.assert_not_called()
+        update = mock_db.clips.find_one_and_update.call_args[0][1]
+        assert "selected_image_id" not in update["$set"]
+
+
+class TestApplyPoolItem:
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        import server
+        from services.gallery_manager import gallery_manager
+
+        db = MagicMock()
+        db.generation_pool.find_one = AsyncMock(return_value={
+            "id": "pool-1",
+            "project_id": "project-1",
+            "name": "Pool image",
+            "content_type": "image",
+            "source_type": "clip_generation",
+            "media_url": "/uploads/pool/image.png",
+            "generation_params": {"prompt": "castle", "model": "sdxl_base.safetensors", "seed": 7},
+        })
+        monkeypatch.setattr(server, "db", db)
+        monkeypatch.setattr(gallery_manager, "add_generated_content", AsyncMock())
+        return server
+
+    async def test_apply_goes_through_gallery_manager(self, server):
+        from services.gallery_manager import gallery_manager
+
+        result = await server.apply_pool_item_to_clip("pool-1", "clip-123")
+
+        kwargs = gallery_manager.add_generated_content.call_args.kwargs
+        content = kwargs["new_content"]
+        assert (kwargs["clip_id"], kwargs["content_type"]) == ("clip-123", "image")
+        assert content.url == "/uploads/pool/image.png"
+        assert content.prompt == "castle"
+        assert content.generation_params["seed"] == 7
+        assert result["content_id"] == content.id
+        server.db.clips.update_one.assert_not_called()
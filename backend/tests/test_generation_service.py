@@ -108,10 +108,12 @@ class TestGenerationService:
         mock_clip_repository.find_by_id.return_value = sample_clip
         
         offline_client = AsyncMock()
-        offline_client.check_connection = AsyncMock(return_value=False)
         
         with patch('services.generation_service.db_manager') as mock_db_manager, \
-             patch('services.generation_service.ComfyUIClient', return_value=offline_client):
+             patch('services.generation_service.ComfyUIClient', return_value=offline_client), \
+             patch('services.generation_service.server_health_monitor') as mock_health:
+            
+            mock_health.is_available = AsyncMock(return_value=False)
             
             mock_db_manager.db = mock_db
             mock_db.comfyui_servers.find_one = AsyncMock(return_value=sample_server)
@@ -0,0 +1,85 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.http_pool import HttpSessionPool, _endpoint_label
+
+
+@pytest.fixture
+async def comfyui_stub():
+    """Minimal ComfyUI-like server: /prompt, /history/<id>, /system_stats"""
+    async def prompt(request):
+        return web.json_response({"prompt_id": "prompt-1"})
+
+    async def history(request):
+        return web.json_response({request.match_info["prompt_id"]: {"outputs": {}}})
+
+    async def system_stats(request):
+        return web.json_response({"system": {}})
+
+    app = web.Application()
+    app.router.add_post("/prompt", prompt)
+    app.router.add_get("/history/{prompt_id}", history)
+    app.router.add_get("/system_stats", system_stats)
+
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+class TestHttpSessionPool:
+
+    async def test_session_shared_per_origin(self):
+        pool = HttpSessionPool()
+        try:
+            first = pool.get("http://comfy-a:8188")
+            assert pool.get("http://COMFY-A:8188/prompt") is first
+            assert pool.get("http://comfy-b:8188") is not first
+        finally:
+            await pool.close()
+
+    async def test_closed_session_is_recreated(self):
+        pool = HttpSessionPool()
+        session = pool.get("http://comfy-a:8188")
+        await session.close()
+
+        replacement = pool.get("http://comfy-a:8188")
+        assert replacement is not session
+        assert not replacement.closed
+
+        await pool.close()
+        assert replacement.closed
+        assert pool.get_metrics()["open_sessions"] == 0
+
+    async def test_connections_kept_alive_and_metrics_recorded(self, comfyui_stub):
+        pool = HttpSessionPool(limit_per_host=2)
+        base_url = str(comfyui_stub.make_url("")).rstrip("/")
+
+        try:
+            async with pool.session(base_url) as session:
+                async with session.post(f"{base_url}/prompt", json={"prompt": {}}) as response:
+                    assert response.status == 200
+                for _ in range(3):
+                    async with session.get(f"{base_url}/history/prompt-1") as response:
+                        await response.json()
+
+            assert not pool.get(base_url).closed
+
+            metrics = pool.get_metrics()["origins"][base_url.lower()]
+            assert metrics["requests"] == 4
+            assert metrics["connections_created"] == 1
+            assert metrics["connections_reused"] == 3
+            assert metrics["generations_submitted"] == 1
+            assert metrics["requests_per_generation"] == 4
+            assert metrics["endpoints"]["POST /prompt"]["requests"] == 1
+            assert metrics["endpoints"]["GET /history"]["requests"] == 3
+            assert metrics["endpoints"]["POST /prompt"]["p95_ms"] >= 0
+        finally:
+            await pool.close()
+
+    def test_endpoint_labels(self):
+        assert _endpoint_label("GET", "http://host:8188/history/abc") == "GET /history"
+        assert _endpoint_label("POST", "https://api.runpod.ai/v2/endpoint/run") == "POST /run"
+        assert _endpoint_label("GET", "https://api.runpod.ai/v2/endpoint/stream/job") == "GET /stream"
+        assert _endpoint_label("GET", "http://host:8188") == "GET /"
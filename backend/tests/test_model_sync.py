@@ -0,0 +1,140 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from services.model_sync import ModelSyncScheduler
+
+
+def _object_info(checkpoints, loras=(), extra_nodes=0):
+    info = {
+        "CheckpointLoaderSimple": {"input": {"required": {"ckpt_name": [list(checkpoints)]}}},
+        "LoraLoader": {"input": {"required": {"lora_name": [list(loras)], "strength": ["FLOAT"]}}},
+    }
+    for i in range(extra_nodes):
+        info[f"CustomNode{i}"] = {"input": {"required": {"value": ["INT"]}}}
+    return json.dumps(info).encode()
+
+
+def _server(index):
+    return {"id": f"server-{index}", "name": f"Server {index}", "url": f"http://10.0.0.{index}:8188"}
+
+
+class TestModelSyncScheduler:
+
+    @pytest.fixture
+    def bodies(self):
+        return {"server-1": _object_info(["a.safetensors"], ["l1.safetensors"])}
+
+    @pytest.fixture
+    def fetch(self, bodies):
+        async def fetch(server_data, etag):
+            return 200, None, bodies[server_data["id"]]
+
+        return AsyncMock(side_effect=fetch)
+
+    @pytest.fixture
+    def apply(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def scheduler(self, fetch, apply):
+        repository = MagicMock()
+        repository.find_many = AsyncMock(return_value=[_server(1)])
+        return ModelSyncScheduler(repository=repository, apply=apply, fetch=fetch)
+
+    async def test_unchanged_object_info_skips_writes(self, scheduler, apply):
+        first = (await scheduler.sync_all())[0]
+        second = (await scheduler.sync_all())[0]
+
+        assert first.status == "changed"
+        assert first.added == {"checkpoints": ["a.safetensors"], "loras": ["l1.safetensors"]}
+        assert second.status == "unchanged"
+        apply.assert_awaited_once()
+
+    async def test_node_changes_without_model_changes_write_nothing(self, scheduler, apply, bodies):
+        await scheduler.sync_all()
+        bodies["server-1"] = _object_info(["a.safetensors"], ["l1.safetensors"], extra_nodes=3)
+
+        diff = (await scheduler.sync_all())[0]
+
+        assert diff.status == "unchanged"
+        apply.assert_awaited_once()
+
+    async def test_diff_reports_added_and_removed_models(self, scheduler, apply, bodies):
+        listener = MagicMock()
+        scheduler.add_listener(listener)
+        await scheduler.sync_all()
+        bodies["server-1"] = _object_info(["a.safetensors", "b.safetensors"])
+
+        diff = (await scheduler.sync_all())[0]
+
+        assert diff.status == "changed"
+        assert diff.added == {"checkpoints": ["b.safetensors"]}
+        assert diff.removed == {"loras": ["l1.safetensors"]}
+        assert apply.await_count == 2
+        assert apply.call_args[0][1]["checkpoints"] == ["a.safetensors", "b.safetensors"]
+        assert listener.call_count == 2
+        assert scheduler.snapshot()["server-1"]["removed"] == {"loras": ["l1.safetensors"]}
+
+    async def test_etag_is_sent_back_and_304_skips_parsing(self, apply):
+        seen = []
+
+        async def fetch(server_data, etag):
+            seen.append(etag)
+            if etag == '"v1"':
+                return 304, '"v1"', None
+            return 200, '"v1"', _object_info(["a.safetensors"])
+
+        repository = MagicMock()
+        repository.find_many = AsyncMock(return_value=[_server(1)])
+        scheduler = ModelSyncScheduler(repository=repository, apply=apply, fetch=fetch)
+
+        await scheduler.sync_all()
+        diff = (await scheduler.sync_all())[0]
+
+        assert seen == [None, '"v1"']
+        assert diff.status == "not_modified"
+        apply.assert_awaited_once()
+
+    async def test_servers_sync_concurrently_within_bound(self, apply):
+        active = 0
+        peak = 0
+
+        async def fetch(server_data, etag):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return 200, None, _object_info([f"{server_data['id']}.safetensors"])
+
+        repository = MagicMock()
+        repository.find_many = AsyncMock(return_value=[_server(i) for i in range(8)])
+        scheduler = ModelSyncScheduler(repository=repository, apply=apply, fetch=fetch, concurrency=3)
+
+        diffs = await scheduler.sync_all()
+
+        assert peak == 3
+        assert [diff.status for diff in diffs] == ["changed"] * 8
+
+    async def test_failed_apply_is_retried_next_round(self, scheduler, apply):
+        apply.side_effect = [RuntimeError("mongo down"), None]
+
+        first = (await scheduler.sync_all())[0]
+        second = (await scheduler.sync_all())[0]
+
+        assert first.status == "failed"
+        assert second.status == "changed"
+
+    async def test_runpod_servers_are_skipped(self, fetch):
+        repository = MagicMock()
+        repository.find_many = AsyncMock(return_value=[
+            {"id": "rp", "name": "RunPod", "url": "https://api.runpod.ai/v2/abc", "server_type": "runpod"}
+        ])
+        scheduler = ModelSyncScheduler(repository=repository, fetch=fetch)
+
+        diffs = await scheduler.sync_all()
+
+        assert diffs[0].status == "skipped"
+        fetch.assert_not_awaited()
@@ -0,0 +1,88 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from starlette.requests import Request
+
+from services.project_revisions import ProjectRevisions
+from utils.response_cache import etag_matches, make_etag
+
+
+def _request(path="/api/v1/projects/project-1", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers})
+
+
+class TestProjectRevisions:
+
+    @pytest.fixture
+    def db(self):
+        db = MagicMock()
+        state = {"revision": 0}
+
+        async def find_project(query, projection=None):
+            return {"revision": state["revision"]} if query["id"] == "project-1" else None
+
+        async def bump_project(query, update):
+            state["revision"] += update["$inc"]["revision"]
+
+        db.projects.find_one = AsyncMock(side_effect=find_project)
+        db.projects.update_one = AsyncMock(side_effect=bump_project)
+        db.scenes.find_one = AsyncMock(return_value={"project_id": "project-1"})
+        db.clips.find_one = AsyncMock(return_value={"scene_id": "scene-1"})
+        return db
+
+    @pytest.fixture
+    def revisions(self, db):
+        return ProjectRevisions(db)
+
+    async def test_cached_body_served_until_revision_bumps(self, revisions):
+        build = AsyncMock(return_value={"id": "project-1", "name": "Demo"})
+
+        first = await revisions.respond(_request(), "project-1", build)
+        second = await revisions.respond(_request(), "project-1", build)
+
+        assert build.await_count == 1
+        assert first.body == second.body
+        assert json.loads(first.body) == {"id": "project-1", "name": "Demo"}
+        assert first.headers["etag"] == second.headers["etag"]
+
+        await revisions.bump("project-1")
+        third = await revisions.respond(_request(), "project-1", build)
+
+        assert build.await_count == 2
+        assert third.headers["etag"] != first.headers["etag"]
+
+    async def test_if_none_match_answers_304_without_building(self, revisions):
+        build = AsyncMock(return_value={"id": "project-1"})
+        etag = (await revisions.respond(_request(), "project-1", build)).headers["etag"]
+
+        response = await revisions.respond(_request(if_none_match=f"W/{etag}"), "project-1", build)
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert build.await_count == 1
+
+    async def test_clip_writes_resolve_project_through_scene_once(self, revisions, db):
+        await revisions.bump_for_clip("clip-1")
+        await revisions.bump_for_clip("clip-1")
+        await revisions.bump_for_clip_document({"id": "clip-2", "scene_id": "scene-1"})
+
+        assert await revisions.current("project-1") == 3
+        db.clips.find_one.assert_awaited_once()
+        db.scenes.find_one.assert_awaited_once()
+
+    async def test_unknown_project_is_built_without_etag(self, revisions):
+        build = AsyncMock(return_value=[])
+
+        response = await revisions.respond(_request(), "missing", build)
+
+        assert "etag" not in response.headers
+        assert len(revisions.responses) == 0
+
+    def test_etag_matching(self):
+        etag = make_etag(4, ("project-1", "/timeline?"))
+
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(make_etag(5, ("project-1", "/timeline?")), etag)
+        assert not etag_matches(None, etag)
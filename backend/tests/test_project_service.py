@@ -5,15 +5,21 @@ from datetime import datetime, timezone
 from services.project_service import ProjectService
 from dtos.project_dtos import ProjectCreateDTO
 from dtos.scene_dtos import SceneCreateDTO, SceneUpdateDTO
-from dtos.clip_dtos import ClipCreateDTO, ClipUpdateDTO, ClipTimelineUpdateDTO
+from dtos.clip_dtos import ClipCreateDTO, ClipUpdateDTO, ClipTimelineUpdateDTO, ClipTimelineBulkUpdateDTO
 from utils.errors import ProjectNotFoundError, SceneNotFoundError, ClipNotFoundError, ValidationError
+from utils.timeline_index import TimelineIndexCache
 
 
 class TestProjectService:
     
     @pytest.fixture
     def service(self, mock_project_repository, mock_scene_repository, mock_clip_repository):
-        return ProjectService(mock_project_repository, mock_scene_repository, mock_clip_repository)
+        return ProjectService(
+            mock_project_repository,
+            mock_scene_repository,
+            mock_clip_repository,
+            timeline_indexes=TimelineIndexCache(),
+        )
     
     async def test_create_project(self, service, mock_project_repository):
         mock_project_repository.create.return_value = None
@@ -209,7 +215,7 @@ class TestProjectService:
     
     async def test_update_clip_timeline_position(self, service, mock_clip_repository, sample_clip):
         mock_clip_repository.find_by_id.return_value = sample_clip
-        mock_clip_repository.find_many.return_value = [sample_clip]
+        mock_clip_repository.list_timeline_spans.return_value = [sample_clip]
         
         updated_clip = sample_clip.copy()
         updated_clip["timeline_position"] = 5.0
@@ -230,13 +236,60 @@ class TestProjectService:
         clip2["length"] = 5.0
         
         mock_clip_repository.find_by_id.return_value = clip1
-        mock_clip_repository.find_many.return_value = [clip1, clip2]
+        mock_clip_repository.list_timeline_spans.return_value = [clip1, clip2]
         
         payload = ClipTimelineUpdateDTO(position=4.0)
         
-        with pytest.raises(ValidationError):
+        with pytest.raises(ValidationError) as exc_info:
             await service.update_clip_timeline_position("clip-123", payload)
-    
+        assert "Suggested position: 8.1" in exc_info.value.detail["error"]
+        mock_clip_repository.update_timeline_position.assert_not_called()
+
+    async def test_timeline_moves_reuse_cached_scene_index(self, service, mock_clip_repository, sample_clip):
+        clip2 = {**sample_clip, "id": "clip-456", "timeline_position": 20.0, "length": 5.0}
+        mock_clip_repository.find_by_id.return_value = sample_clip
+        mock_clip_repository.list_timeline_spans.return_value = [sample_clip, clip2]
+        mock_clip_repository.update_timeline_position.return_value = sample_clip
+
+        await service.update_clip_timeline_position("clip-123", ClipTimelineUpdateDTO(position=10.0))
+        result = await service.update_clip_timeline_position("clip-123", ClipTimelineUpdateDTO(position=12.0))
+
+        assert mock_clip_repository.list_timeline_spans.await_count == 1
+        assert result["timeline_summary"]["gaps"][0]["start"] == 12.0 + sample_clip["length"]
+
+        # The moved clip now sits at 12s, so a move of clip-456 onto it conflicts
+        mock_clip_repository.find_by_id.return_value = clip2
+        with pytest.raises(ValidationError):
+            await service.update_clip_timeline_position("clip-456", ClipTimelineUpdateDTO(position=13.0))
+
+    async def test_clip_write_invalidates_scene_index(self, service, mock_clip_repository, sample_clip):
+        mock_clip_repository.find_by_id.return_value = sample_clip
+        mock_clip_repository.list_timeline_spans.return_value = [sample_clip]
+        mock_clip_repository.update_timeline_position.return_value = sample_clip
+        mock_clip_repository.update_by_id.return_value = {**sample_clip, "length": 8.0}
+
+        await service.update_clip_timeline_position("clip-123", ClipTimelineUpdateDTO(position=1.0))
+        await service.update_clip("clip-123", ClipUpdateDTO(length=8.0))
+        await service.update_clip_timeline_position("clip-123", ClipTimelineUpdateDTO(position=2.0))
+
+        assert mock_clip_repository.list_timeline_spans.await_count == 2
+
+    async def test_stale_index_is_rebuilt_before_overlap_check(self, service, mock_clip_repository, sample_clip):
+        other = {**sample_clip, "id": "clip-456", "timeline_position": 20.0, "length": 5.0}
+        mock_clip_repository.list_timeline_spans.return_value = [other]
+        mock_clip_repository.find_by_id.return_value = other
+        mock_clip_repository.update_timeline_position.return_value = other
+        await service.update_clip_timeline_position("clip-456", ClipTimelineUpdateDTO(position=20.0))
+
+        # clip-123 was added behind the cache's back and clip-456 moved onto 4s
+        moved = {**other, "timeline_position": 4.0}
+        mock_clip_repository.list_timeline_spans.return_value = [sample_clip, moved]
+        mock_clip_repository.find_by_id.return_value = sample_clip
+
+        with pytest.raises(ValidationError):
+            await service.update_clip_timeline_position("clip-123", ClipTimelineUpdateDTO(position=4.0))
+        assert mock_clip_repository.list_timeline_spans.await_count == 2
+
     async def test_analyze_scene_timeline(self, service, mock_scene_repository, mock_clip_repository, sample_scene, sample_clip):
         mock_scene_repository.find_by_id.return_value = sample_scene
         
@@ -282,3 +335,178 @@ class TestProjectService:
         assert len(result.images) == 1
         assert result.images[0].id == "img-1"
         assert result.selected_image_id == "img-1"
+
+    async def test_get_clip_gallery_pages_from_gallery_items(
+        self, mock_project_repository, mock_scene_repository, mock_clip_repository, sample_clip
+    ):
+        gallery_repository = AsyncMock()
+        image = {
+            "id": "img-9",
+            "clip_id": "clip-123",
+            "content_type": "image",
+            "url": "http://test.com/img9.png",
+            "prompt": "test",
+            "server_id": "server-1",
+            "server_name": "Server 1",
+            "model_name": "model-1",
+            "created_at": datetime.now(timezone.utc)
+        }
+        gallery_repository.find_page = AsyncMock(side_effect=[([image], "next-page"), ([], None)])
+        service = ProjectService(
+            mock_project_repository, mock_scene_repository, mock_clip_repository, gallery_repository
+        )
+        mock_clip_repository.find_by_id.return_value = {**sample_clip, "total_images": 120, "selected_image_id": "img-1"}
+
+        result = await service.get_clip_gallery("clip-123", limit=1, image_cursor="cursor-1")
+
+        assert [item.id for item in result.images] == ["img-9"]
+        assert result.next_image_cursor == "next-page"
+        assert result.next_video_cursor is None
+        assert result.total_images == 120
+        assert result.selected_image_id == "img-1"
+        gallery_repository.find_page.assert_any_await("clip-123", "image", limit=1, cursor="cursor-1")
+
+    async def test_get_clip_gallery_invalid_cursor(
+        self, mock_project_repository, mock_scene_repository, mock_clip_repository, sample_clip
+    ):
+        gallery_repository = AsyncMock()
+        gallery_repository.find_page = AsyncMock(side_effect=ValueError("Invalid gallery cursor: x"))
+        service = ProjectService(
+            mock_project_repository, mock_scene_repository, mock_clip_repository, gallery_repository
+        )
+        mock_clip_repository.find_by_id.return_value = sample_clip
+
+        with pytest.raises(ValidationError):
+            await service.get_clip_gallery("clip-123", image_cursor="x")
+
+    @staticmethod
+    def _scene_clips(count, length=5.0):
+        return [
+            {"id": f"clip-{i}", "name": f"Shot {i}", "timeline_position": i * length, "length": length}
+            for i in range(count)
+        ]
+
+    async def test_bulk_ripple_shifts_later_clips_in_one_write(
+        self, service, mock_scene_repository, mock_clip_repository, sample_scene
+    ):
+        mock_scene_repository.find_by_id.return_value = sample_scene
+        mock_clip_repository.list_timeline_spans.return_value = self._scene_clips(300)
+        mock_clip_repository.bulk_update_timeline_positions.return_value = 200
+
+        payload = ClipTimelineBulkUpdateDTO(ripple={"after": 500.0, "delta": 2.5})
+        result = await service.bulk_update_timeline("scene-456", payload)
+
+        mock_clip_repository.bulk_update_timeline_positions.assert_awaited_once()
+        mock_clip_repository.update_timeline_position.assert_not_called()
+        scene_id, positions = mock_clip_repository.bulk_update_timeline_positions.call_args[0]
+        assert scene_id == "scene-456"
+        assert len(positions) == 200
+        assert positions["clip-100"] == 502.5
+        assert "clip-99" not in positions
+        assert result["updated"] == 200
+        assert result["timeline_summary"]["gaps"] == [{"start": 500.0, "end": 502.5, "duration": 2.5}]
+
+    async def test_bulk_moves_validate_final_layout_once(
+        self, service, mock_scene_repository, mock_clip_repository, sample_scene
+    ):
+        mock_scene_repository.find_by_id.return_value = sample_scene
+        mock_clip_repository.list_timeline_spans.return_value = self._scene_clips(3)
+
+        # Swapping two clips is only valid when judged as a whole
+        payload = ClipTimelineBulkUpdateDTO(moves=[
+            {"clip_id": "clip-0", "position": 5.0},
+            {"clip_id": "clip-1", "position": 0.0},
+        ])
+        result = await service.bulk_update_timeline("scene-456", payload)
+
+        assert result["positions"] == {"clip-0": 5.0, "clip-1": 0.0}
+
+        swapped = self._scene_clips(3)
+        swapped[0]["timeline_position"], swapped[1]["timeline_position"] = 5.0, 0.0
+        mock_clip_repository.list_timeline_spans.return_value = swapped
+        conflicting = ClipTimelineBulkUpdateDTO(moves=[{"clip_id": "clip-2", "position": 7.0}])
+        with pytest.raises(ValidationError) as exc_info:
+            await service.bulk_update_timeline("scene-456", conflicting)
+        overlaps = exc_info.value.detail["details"]["overlaps"]
+        assert {overlaps[0]["clip1_id"], overlaps[0]["clip2_id"]} == {"clip-0", "clip-2"}
+        assert mock_clip_repository.bulk_update_timeline_positions.await_count == 1
+
+    async def test_bulk_plans_from_fresh_spans(
+        self, service, mock_scene_repository, mock_clip_repository, sample_scene
+    ):
+        mock_scene_repository.find_by_id.return_value = sample_scene
+        mock_clip_repository.list_timeline_spans.return_value = self._scene_clips(3)
+        await service.bulk_update_timeline("scene-456", ClipTimelineBulkUpdateDTO(moves=[]))
+
+        # Another worker moved clip-2 and added clip-3 behind this process's cache
+        moved = self._scene_clips(4)
+        moved[2]["timeline_position"] = 30.0
+        mock_clip_repository.list_timeline_spans.return_value = moved
+
+        payload = ClipTimelineBulkUpdateDTO(
+            ripple={"after": 10.0, "delta": 1.0}, moves=[{"clip_id": "clip-3", "position": 40.0}]
+        )
+        result = await service.bulk_update_timeline("scene-456", payload)
+
+        assert result["positions"] == {"clip-2": 31.0, "clip-3": 40.0}
+        assert mock_clip_repository.list_timeline_spans.await_count == 2
+
+    async def test_bulk_rejects_unknown_clips_and_negative_positions(
+        self, service, mock_scene_repository, mock_clip_repository, sample_scene
+    ):
+        mock_scene_repository.find_by_id.return_value = sample_scene
+        mock_clip_repository.list_timeline_spans.return_value = self._scene_clips(3)
+
+        with pytest.raises(ValidationError):
+            await service.bulk_update_timeline(
+                "scene-456", ClipTimelineBulkUpdateDTO(moves=[{"clip_id": "other", "position": 1.0}])
+            )
+        with pytest.raises(ValidationError):
+            await service.bulk_update_timeline(
+                "scene-456", ClipTimelineBulkUpdateDTO(ripple={"after": 0.0, "delta": -1.0})
+            )
+        mock_clip_repository.bulk_update_timeline_positions.assert_not_called()
+
+    async def test_writes_bump_project_revision(
+        self, mock_project_repository, mock_scene_repository, mock_clip_repository, sample_scene
+    ):
+        revisions = AsyncMock()
+        revisions.forget_project = MagicMock()
+        service = ProjectService(
+            mock_project_repository,
+            mock_scene_repository,
+            mock_clip_repository,
+            timeline_indexes=TimelineIndexCache(),
+            revisions=revisions,
+        )
+        mock_scene_repository.find_by_id.return_value = sample_scene
+        mock_scene_repository.update_scene.return_value = sample_scene
+
+        await service.update_scene("scene-456", SceneUpdateDTO(name="Renamed"))
+        await service.create_clip(ClipCreateDTO(scene_id="scene-456", name="Shot", length=5.0))
+
+        assert revisions.bump.await_args_list[0].args == (sample_scene["project_id"],)
+        assert revisions.bump.await_args_list[1].args == (sample_scene["project_id"],)
+
+    async def test_delete_project_discards_rendered_exports(
+        self, mock_project_repository, mock_scene_repository, mock_clip_repository, sample_project, sample_scene
+    ):
+        exports = MagicMock()
+        revisions = MagicMock()
+        service = ProjectService(
+            mock_project_repository,
+            mock_scene_repository,
+            mock_clip_repository,
+            timeline_indexes=TimelineIndexCache(),
+            revisions=revisions,
+            exports=exports,
+        )
+        mock_project_repository.find_by_id.return_value = sample_project
+        mock_scene_repository.find_by_project = AsyncMock(return_value=[sample_scene])
+        mock_clip_repository.find_by_scene = AsyncMock(return_value=[])
+
+        await service.delete_project("project-789")
+
+        mock_project_repository.delete.assert_awaited_once_with("project-789")
+        revisions.forget_project.assert_called_once_with("project-789")
+        exports.discard.assert_called_once_with("project-789")
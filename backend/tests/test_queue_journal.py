@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from pymongo import DeleteOne, UpdateOne
+
+from services.queue_journal import QueueJournal
+from services.queue_manager import QueueManager
+
+
+class TestQueueJournal:
+
+    @pytest.fixture
+    def repository(self):
+        repo = AsyncMock()
+        repo.bulk_write = AsyncMock()
+        return repo
+
+    async def test_coalesces_mutations_per_job(self, repository):
+        journal = QueueJournal(repository, batch_size=100)
+
+        journal.record_upsert("job-1", {"id": "job-1", "status": "queued"})
+        journal.record_upsert("job-1", {"id": "job-1", "status": "processing"})
+        journal.record_upsert("job-2", {"id": "job-2", "status": "queued"})
+        journal.record_delete("job-2")
+
+        written = await journal.flush()
+
+        assert written == 2
+        repository.bulk_write.assert_awaited_once()
+        operations = repository.bulk_write.call_args[0][0]
+        assert operations == [
+            UpdateOne({"id": "job-1"}, {"$set": {"id": "job-1", "status": "processing"}}, upsert=True),
+            DeleteOne({"id": "job-2"}),
+        ]
+        assert journal.pending_count == 0
+
+    async def test_flush_splits_batches(self, repository):
+        journal = QueueJournal(repository, batch_size=2)
+        for i in range(5):
+            journal.record_upsert(f"job-{i}", {"id": f"job-{i}"})
+
+        await journal.flush()
+
+        assert repository.bulk_write.await_count == 3
+        assert journal.get_metrics()["flushed_operations"] == 5
+
+    async def test_failed_flush_requeues_without_clobbering_newer_state(self, repository):
+        journal = QueueJournal(repository)
+        journal.record_upsert("job-1", {"id": "job-1", "status": "queued"})
+
+        async def fail_and_mutate(operations):
+            journal.record_upsert("job-1", {"id": "job-1", "status": "completed"})
+            raise RuntimeError("mongo down")
+
+        repository.bulk_write.side_effect = fail_and_mutate
+        assert await journal.flush() == 0
+        assert journal.get_metrics()["failed_flushes"] == 1
+        assert journal.pending_count == 1
+
+        repository.bulk_write.side_effect = None
+        await journal.flush()
+        operations = repository.bulk_write.call_args[0][0]
+        assert operations[0]._doc["$set"]["status"] == "completed"
+
+    async def test_background_loop_flushes_and_stop_drains(self, repository):
+        journal = QueueJournal(repository, flush_interval=0.01)
+        journal.start()
+
+        journal.record_upsert("job-1", {"id": "job-1"})
+        await asyncio.sleep(0.05)
+        assert repository.bulk_write.await_count == 1
+
+        journal.record_upsert("job-2", {"id": "job-2"})
+        await journal.stop()
+        assert repository.bulk_write.await_count == 2
+        assert journal.pending_count == 0
+        assert journal.get_metrics()["max_flush_lag"] > 0
+
+    async def test_no_repository_records_nothing(self):
+        journal = QueueJournal()
+        journal.record_upsert("job-1", {"id": "job-1"})
+
+        assert journal.pending_count == 0
+        assert await journal.flush() == 0
+
+    async def test_queue_manager_does_not_touch_db_under_lock(self, repository):
+        manager = QueueManager(repository)
+        repository.find_pending_jobs = AsyncMock(return_value=[])
+
+        await manager.add_job(
+            job_id="job-1",
+            clip_id="clip-1",
+            project_id="project-1",
+            generation_type="image",
+            prompt="test",
+        )
+        await manager.register_server("server-001", "Test Server", True)
+        await manager.get_next_job("server-001")
+
+        repository.find_by_id.assert_not_called()
+        repository.create.assert_not_called()
+        repository.bulk_write.assert_not_called()
+
+        await manager.flush()
+        operations = repository.bulk_write.call_args[0][0]
+        assert len(operations) == 1
+        assert operations[0]._doc["$set"]["status"] == "processing"
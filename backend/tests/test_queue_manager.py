@@ -1,8 +1,15 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-from services.queue_manager import QueueManager, QueuedJob, ServerLoad
+from services.queue_manager import (
+    JobQueue,
+    LeasedQueueManager,
+    QueueManager,
+    QueuedJob,
+    ServerLoad,
+    model_signature,
+)
 
 
 class TestQueueManager:
@@ -343,3 +350,372 @@ class TestQueueManager:
         await queue_manager.assign_pending_jobs()
         
         assert queue_manager.queue[0].server_id == "server-001"
+
+
+class TestJobQueue:
+
+    def _job(self, job_id, priority=0, server_id=None, offset=0):
+        return QueuedJob(
+            id=job_id,
+            clip_id=f"clip-{job_id}",
+            project_id="project-1",
+            generation_type="image",
+            prompt="test",
+            negative_prompt="",
+            model="test",
+            params={},
+            priority=priority,
+            server_id=server_id,
+            created_at=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=offset)
+        )
+
+    def test_orders_by_priority_then_created_at(self):
+        queue = JobQueue()
+        queue.push(self._job("old-low", priority=0, offset=0))
+        queue.push(self._job("new-high", priority=5, offset=2))
+        queue.push(self._job("old-high", priority=5, offset=1))
+
+        assert [job.id for job in queue] == ["old-high", "new-high", "old-low"]
+        assert queue.pop_for_server("server-001").id == "old-high"
+        assert len(queue) == 2
+
+    def test_pop_respects_server_pinning(self):
+        queue = JobQueue()
+        queue.push(self._job("pinned", priority=10, server_id="server-002"))
+        queue.push(self._job("free", priority=0))
+
+        assert queue.count_for_server("server-002") == 1
+        assert queue.pop_for_server("server-001").id == "free"
+        assert queue.pop_for_server("server-001") is None
+        assert queue.pop_for_server("server-002").id == "pinned"
+        assert queue.count_for_server("server-002") == 0
+
+    def test_discard_and_reindex(self):
+        queue = JobQueue()
+        job = self._job("job-1")
+        queue.push(job)
+        queue.push(self._job("job-2", offset=1))
+
+        assert queue.get("job-1") is job
+        assert "job-1" in queue
+
+        job.priority = -1
+        queue.push(job)
+        assert len(queue) == 2
+        assert queue[0].id == "job-2"
+
+        assert queue.discard("job-1") is job
+        assert queue.get("job-1") is None
+        assert queue.discard("job-1") is None
+        with pytest.raises(ValueError):
+            queue.remove(job)
+
+    def test_tombstones_are_compacted(self):
+        queue = JobQueue()
+        jobs = [self._job(f"job-{i}", offset=i) for i in range(3000)]
+        for job in jobs:
+            queue.push(job)
+        for job in jobs[:2900]:
+            queue.discard(job.id)
+
+        assert len(queue) == 100
+        assert sum(len(heap) for heap in queue._heaps.values()) < 3000
+        assert queue.pop_for_server("server-001").id == "job-2900"
+
+
+class TestLeasedQueueManager:
+
+    @pytest.fixture
+    def repository(self):
+        repo = AsyncMock()
+        repo.claim_next_job = AsyncMock(return_value=None)
+        repo.release_job = AsyncMock(return_value=True)
+        repo.renew_lease = AsyncMock(return_value=True)
+        repo.reclaim_expired_leases = AsyncMock(return_value=0)
+        return repo
+
+    @pytest.fixture
+    def manager(self, repository):
+        return LeasedQueueManager(repository, worker_id="worker-a")
+
+    def _job_document(self, job_id="job-1", status="processing"):
+        return {
+            "id": job_id,
+            "clip_id": "clip-1",
+            "project_id": "project-1",
+            "generation_type": "image",
+            "prompt": "test",
+            "status": status,
+            "server_id": "server-001",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def test_add_job_writes_to_shared_collection(self, manager, repository):
+        await manager.add_job(
+            job_id="job-1",
+            clip_id="clip-1",
+            project_id="project-1",
+            generation_type="image",
+            prompt="test",
+        )
+
+        repository.create.assert_awaited_once()
+        assert repository.create.call_args[0][0]["status"] == "queued"
+        assert len(manager.queue) == 0
+
+    async def test_get_next_job_claims_with_lease(self, manager, repository):
+        await manager.register_server("server-001", "Test Server", True)
+        repository.claim_next_job.return_value = self._job_document()
+
+        job = await manager.get_next_job("server-001")
+
+        kwargs = repository.claim_next_job.call_args.kwargs
+        assert kwargs["server_id"] == "server-001"
+        assert kwargs["worker_id"] == "worker-a"
+        assert kwargs["lease_expires_at"] > datetime.now(timezone.utc)
+        assert job.id == "job-1"
+        assert "job-1" in manager.processing_jobs
+        assert manager.server_loads["server-001"].current_jobs == 1
+
+    async def test_get_next_job_none_when_nothing_claimable(self, manager):
+        assert await manager.get_next_job("server-001") is None
+
+    async def test_complete_job_releases_lease(self, manager, repository):
+        await manager.register_server("server-001", "Test Server", True)
+        repository.claim_next_job.return_value = self._job_document()
+        await manager.get_next_job("server-001")
+
+        await manager.complete_job("job-1", success=False, error="boom")
+
+        job_id, worker_id, document = repository.release_job.call_args[0]
+        assert (job_id, worker_id) == ("job-1", "worker-a")
+        assert document["status"] == "queued"
+        assert document["worker_id"] is None
+        assert "job-1" not in manager.processing_jobs
+        assert len(manager.queue) == 0
+
+    async def test_heartbeat_drops_lost_leases(self, manager, repository):
+        await manager.register_server("server-001", "Test Server", True)
+        repository.claim_next_job.return_value = self._job_document()
+        await manager.get_next_job("server-001")
+        repository.renew_lease.return_value = False
+        repository.reclaim_expired_leases.return_value = 2
+
+        await manager.heartbeat()
+
+        assert "job-1" not in manager.processing_jobs
+        assert manager.server_loads["server-001"].current_jobs == 0
+        dispatch = manager.get_queue_status()["dispatch"]
+        assert dispatch["leases_lost"] == 1
+        assert dispatch["leases_reclaimed"] == 2
+
+    async def test_cancel_unknown_job_raises(self, manager, repository):
+        repository.cancel_job = AsyncMock(return_value=False)
+
+        with pytest.raises(ValueError):
+            await manager.cancel_job("missing")
+
+
+class FakeQueueRepository:
+    """In-memory stand-in for the queue_jobs collection shared by workers"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    async def create(self, document):
+        self.jobs[document["id"]] = dict(document)
+        return document
+
+    async def find_by_id(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def find_by_status(self, status):
+        return [job for job in self.jobs.values() if job["status"] == status]
+
+    async def find_pending_jobs(self):
+        return [job for job in self.jobs.values() if job["status"] in ("queued", "processing")]
+
+    async def find_active_by_project_id(self, project_id):
+        return [job for job in await self.find_pending_jobs() if job["project_id"] == project_id]
+
+    async def status_totals(self):
+        totals = {}
+        for job in self.jobs.values():
+            entry = totals.setdefault(job["status"], {"count": 0, "estimated_seconds": 0.0})
+            entry["count"] += 1
+            entry["estimated_seconds"] += job.get("estimated_duration") or 0.0
+        return totals
+
+    async def claim_next_job(self, server_id, worker_id, lease_expires_at):
+        for job in self.jobs.values():
+            if job["status"] == "queued":
+                job.update(
+                    status="processing",
+                    server_id=server_id,
+                    worker_id=worker_id,
+                    lease_expires_at=lease_expires_at,
+                    started_at=datetime.now(timezone.utc).isoformat(),
+                )
+                return dict(job)
+        return None
+
+
+class TestLeasedQueueManagerSharedReads:
+
+    @pytest.fixture
+    def repository(self):
+        return FakeQueueRepository()
+
+    @pytest.fixture
+    def workers(self, repository):
+        return (
+            LeasedQueueManager(repository, worker_id="worker-a"),
+            LeasedQueueManager(repository, worker_id="worker-b"),
+        )
+
+    async def _add(self, manager, job_id, project_id="project-1"):
+        return await manager.add_job(
+            job_id=job_id,
+            clip_id=f"clip-{job_id}",
+            project_id=project_id,
+            generation_type="image",
+            prompt="test",
+        )
+
+    async def test_workers_report_the_same_queue(self, workers):
+        worker_a, worker_b = workers
+        for manager in workers:
+            await manager.register_server("server-001", "Test Server", True)
+        await self._add(worker_a, "job-1")
+        await self._add(worker_b, "job-2")
+        await self._add(worker_b, "job-3", project_id="project-2")
+        await worker_a.get_next_job("server-001")
+
+        status_a = await worker_a.fetch_queue_status()
+        status_b = await worker_b.fetch_queue_status()
+
+        for key in ("queued_jobs", "processing_jobs", "queued_work_seconds", "estimated_drain_seconds"):
+            assert status_a[key] == status_b[key]
+        assert status_a["queued_jobs"] == 2
+        assert status_a["processing_jobs"] == 1
+
+        jobs_a = sorted(job.id for job in await worker_a.fetch_all_jobs())
+        jobs_b = sorted(job.id for job in await worker_b.fetch_all_jobs())
+        assert jobs_a == jobs_b == ["job-1", "job-2", "job-3"]
+
+    async def test_job_reads_see_jobs_added_by_other_workers(self, workers):
+        worker_a, worker_b = workers
+        await self._add(worker_a, "job-1")
+        await self._add(worker_a, "job-2", project_id="project-2")
+
+        status = await worker_b.fetch_job_status("job-1")
+        assert status["status"] == "queued"
+        assert await worker_b.fetch_job_status("missing") is None
+        assert [job["id"] for job in await worker_b.fetch_project_jobs("project-2")] == ["job-2"]
+        assert len(await worker_b.fetch_jobs_by_status("queued")) == 2
+
+
+class TestModelAffinity:
+
+    @pytest.fixture
+    def queue_manager(self):
+        return QueueManager()
+
+    async def _add(self, manager, job_id, model, loras=None, priority=0):
+        return await manager.add_job(
+            job_id=job_id,
+            clip_id=f"clip-{job_id}",
+            project_id="project-1",
+            generation_type="image",
+            prompt="test",
+            model=model,
+            loras=loras,
+            priority=priority,
+        )
+
+    def test_model_signature(self):
+        assert model_signature(None) is None
+        assert model_signature("sdxl.safetensors") == "sdxl.safetensors"
+        assert model_signature("sdxl", [{"name": "b"}, {"name": "a"}]) == "sdxl|a|b"
+
+    async def test_get_next_job_groups_same_signature(self, queue_manager):
+        await queue_manager.register_server("server-001", "Server 1", True, max_concurrent=5)
+        await self._add(queue_manager, "sdxl-1", "sdxl")
+        await self._add(queue_manager, "flux-1", "flux")
+        await self._add(queue_manager, "sdxl-2", "sdxl")
+
+        dispatched = [(await queue_manager.get_next_job("server-001")).id for _ in range(3)]
+
+        assert dispatched == ["sdxl-1", "sdxl-2", "flux-1"]
+        assert queue_manager.server_loads["server-001"].total_model_reloads == 1
+
+    async def test_affinity_does_not_override_priority(self, queue_manager):
+        await queue_manager.register_server("server-001", "Server 1", True, max_concurrent=5)
+        await self._add(queue_manager, "sdxl-1", "sdxl")
+        await queue_manager.get_next_job("server-001")
+
+        await self._add(queue_manager, "flux-urgent", "flux", priority=10)
+        await self._add(queue_manager, "sdxl-2", "sdxl")
+
+        assert (await queue_manager.get_next_job("server-001")).id == "flux-urgent"
+
+    async def test_affinity_yields_to_long_waiting_head(self, queue_manager):
+        await queue_manager.register_server("server-001", "Server 1", True, max_concurrent=5)
+        await self._add(queue_manager, "sdxl-1", "sdxl")
+        await queue_manager.get_next_job("server-001")
+
+        stale = await self._add(queue_manager, "flux-1", "flux")
+        queue_manager.queue.discard(stale.id)
+        stale.created_at -= timedelta(minutes=10)
+        queue_manager.queue.push(stale)
+        await self._add(queue_manager, "sdxl-2", "sdxl")
+
+        assert (await queue_manager.get_next_job("server-001")).id == "flux-1"
+
+    async def test_best_server_prefers_loaded_model(self, queue_manager):
+        await queue_manager.register_server("server-001", "Server 1", True)
+        await queue_manager.register_server("server-002", "Server 2", True)
+        queue_manager.server_loads["server-001"].loaded_model = "flux"
+        queue_manager.server_loads["server-002"].loaded_model = "sdxl"
+        queue_manager.server_loads["server-002"].loaded_signature = "sdxl"
+
+        job = await self._add(queue_manager, "job-1", "sdxl")
+
+        assert queue_manager._get_best_server(job) == "server-002"
+
+    async def test_best_server_skips_servers_without_model(self, queue_manager):
+        await queue_manager.register_server("server-001", "Server 1", True)
+        await queue_manager.register_server("server-002", "Server 2", True)
+        queue_manager.set_server_models("server-001", ["flux"])
+        queue_manager.set_server_models("server-002", ["sdxl", "detail-lora"])
+
+        job = await self._add(queue_manager, "job-1", "sdxl", loras=[{"name": "detail-lora"}])
+        assert queue_manager._get_best_server(job) == "server-002"
+
+        job = await self._add(queue_manager, "job-2", "pony")
+        assert queue_manager._get_best_server(job) is None
+
+    async def test_refresh_server_models(self, queue_manager):
+        service = AsyncMock()
+        service.get_active_models.return_value = [
+            MagicMock(backend_id="server-001", model_name="sdxl"),
+            MagicMock(backend_id="server-001", model_name="lora-a"),
+            MagicMock(backend_id="server-002", model_name="flux"),
+        ]
+
+        await queue_manager.refresh_server_models(service)
+
+        assert queue_manager.server_models == {"server-001": {"sdxl", "lora-a"}, "server-002": {"flux"}}
+
+    async def test_queue_status_reports_reloads(self, queue_manager):
+        await queue_manager.register_server("server-001", "Server 1", True, max_concurrent=5)
+        await self._add(queue_manager, "sdxl-1", "sdxl")
+        await self._add(queue_manager, "flux-1", "flux", priority=-1)
+        await queue_manager.get_next_job("server-001")
+        await queue_manager.get_next_job("server-001")
+
+        status = queue_manager.get_queue_status()
+
+        assert status["model_reloads_last_hour"] == 1
+        assert status["servers"]["server-001"]["loaded_model"] == "flux"
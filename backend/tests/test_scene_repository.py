@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from repositories.scene_repository import SceneRepository, timeline_pipeline
+
+
+class TestSceneTimeline:
+
+    @pytest.fixture
+    def collection(self):
+        collection = MagicMock()
+        collection.count_documents = AsyncMock(return_value=3)
+        return collection
+
+    def _aggregate_returns(self, collection, scenes):
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=scenes)
+        collection.aggregate = MagicMock(return_value=cursor)
+
+    def test_pipeline_pages_scenes_and_drops_gallery_arrays(self):
+        pipeline = timeline_pipeline("project-1", offset=50, limit=25, clip_limit=10)
+
+        assert pipeline[0] == {"$match": {"project_id": "project-1"}}
+        assert {"$skip": 50} in pipeline
+        assert {"$limit": 25} in pipeline
+        lookup = pipeline[-1]["$lookup"]
+        assert lookup["from"] == "clips"
+        clip_stages = lookup["pipeline"]
+        assert {"$limit": 11} in clip_stages
+        projection = clip_stages[-1]["$project"]
+        assert projection["generated_images"] == 0
+        assert projection["generated_videos"] == 0
+
+    async def test_list_timeline_uses_one_aggregation(self, collection):
+        scenes = [
+            {"id": "scene-1", "clips": [{"id": f"clip-{i}"} for i in range(3)]},
+            {"id": "scene-2", "clips": [{"id": "clip-9"}]},
+        ]
+        self._aggregate_returns(collection, scenes)
+
+        result, total = await SceneRepository(collection).list_timeline(
+            "project-1", offset=0, limit=2, clip_limit=2
+        )
+
+        collection.aggregate.assert_called_once()
+        collection.find.assert_not_called()
+        assert total == 3
+        assert [clip["id"] for clip in result[0]["clips"]] == ["clip-0", "clip-1"]
+        assert result[0]["clips_truncated"] is True
+        assert result[1]["clips_truncated"] is False
+
+    async def test_iter_timeline_streams_every_scene_and_clip(self, collection):
+        scenes = [{"id": f"scene-{i}", "clips": [{"id": f"clip-{i}"}]} for i in range(3)]
+
+        async def cursor():
+            for scene in scenes:
+                yield scene
+
+        collection.aggregate = MagicMock(return_value=cursor())
+
+        streamed = [scene async for scene in SceneRepository(collection).iter_timeline("project-1")]
+
+        assert streamed == scenes
+        pipeline = collection.aggregate.call_args[0][0]
+        assert not any("$limit" in stage or "$skip" in stage for stage in pipeline)
+        assert not any("$limit" in stage for stage in pipeline[-1]["$lookup"]["pipeline"])
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.queue_manager import QueueManager
+from services.server_health import HealthState, ServerHealthMonitor
+
+
+SERVER = {"id": "server-001", "name": "Test Server", "url": "http://localhost:8188"}
+
+
+class TestServerHealthMonitor:
+
+    @pytest.fixture
+    def manager(self):
+        manager = QueueManager()
+        with patch("services.server_health.queue_manager", manager):
+            yield manager
+
+    async def test_cached_state_avoids_probing(self, manager):
+        probe = AsyncMock(return_value=True)
+        monitor = ServerHealthMonitor(probe=probe, ttl=60)
+
+        assert await monitor.is_available(SERVER)
+        assert await monitor.is_available(SERVER)
+        assert await monitor.is_available(SERVER)
+
+        assert probe.await_count == 1
+        assert monitor.get("server-001").state == HealthState.ONLINE
+
+    async def test_stale_entry_is_reprobed(self, manager):
+        probe = AsyncMock(return_value=True)
+        monitor = ServerHealthMonitor(probe=probe, ttl=0)
+
+        await monitor.is_available(SERVER)
+        await monitor.is_available(SERVER)
+
+        assert probe.await_count == 2
+
+    async def test_failure_opens_breaker_and_fails_fast(self, manager):
+        probe = AsyncMock(return_value=False)
+        monitor = ServerHealthMonitor(probe=probe, cooldown=60)
+
+        assert not await monitor.is_available(SERVER)
+        assert not await monitor.is_available(SERVER)
+
+        assert probe.await_count == 1
+        assert monitor.get("server-001").state == HealthState.OPEN
+
+    async def test_breaker_half_opens_after_cooldown(self, manager):
+        probe = AsyncMock(side_effect=[False, False, True])
+        monitor = ServerHealthMonitor(probe=probe, cooldown=0.01, max_cooldown=0.02)
+
+        assert not await monitor.is_available(SERVER)
+        await asyncio.sleep(0.02)
+        assert not await monitor.is_available(SERVER)
+        assert monitor.get("server-001").consecutive_failures == 2
+
+        await asyncio.sleep(0.03)
+        assert await monitor.is_available(SERVER)
+        assert monitor.get("server-001").state == HealthState.ONLINE
+        assert monitor.get("server-001").consecutive_failures == 0
+
+    async def test_slow_server_is_degraded_but_available(self, manager):
+        async def slow_probe(server):
+            await asyncio.sleep(0.02)
+            return True
+
+        monitor = ServerHealthMonitor(probe=slow_probe, degraded_latency=0.01)
+
+        assert await monitor.is_available(SERVER)
+        assert monitor.get("server-001").state == HealthState.DEGRADED
+
+    async def test_probe_exception_counts_as_failure(self, manager):
+        monitor = ServerHealthMonitor(probe=AsyncMock(side_effect=OSError("refused")))
+
+        assert not await monitor.is_available(SERVER)
+        assert monitor.get("server-001").last_error == "refused"
+
+    async def test_concurrent_callers_share_one_probe(self, manager):
+        async def probe(server):
+            await asyncio.sleep(0.01)
+            return True
+
+        probe_mock = AsyncMock(side_effect=probe)
+        monitor = ServerHealthMonitor(probe=probe_mock)
+
+        results = await asyncio.gather(*(monitor.is_available(SERVER) for _ in range(5)))
+
+        assert all(results)
+        assert probe_mock.await_count == 1
+
+    async def test_updates_queue_manager_server_load(self, manager):
+        await manager.register_server("server-001", "Test Server", True, max_concurrent=4)
+        before = manager.server_loads["server-001"].last_heartbeat
+        monitor = ServerHealthMonitor(probe=AsyncMock(return_value=False))
+
+        await monitor.check_server(SERVER)
+
+        load = manager.server_loads["server-001"]
+        assert load.is_online is False
+        assert load.max_concurrent == 4
+        assert load.last_heartbeat >= before
+
+    async def test_check_all_probes_active_servers(self, manager):
+        repository = AsyncMock()
+        repository.find_many = AsyncMock(return_value=[SERVER, {**SERVER, "id": "server-002"}])
+        probe = AsyncMock(return_value=True)
+        monitor = ServerHealthMonitor(repository, probe=probe)
+
+        results = await monitor.check_all()
+
+        assert len(results) == 2
+        repository.find_many.assert_awaited_once_with({"is_active": {"$ne": False}})
+        assert set(manager.server_loads) == {"server-001", "server-002"}
+        assert all(load.is_online for load in manager.server_loads.values())
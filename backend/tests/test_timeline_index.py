@@ -0,0 +1,139 @@
+import asyncio
+import random
+
+import pytest
+
+from utils.timeline_index import TimelineIndex, TimelineIndexCache, TimelineSpan
+from utils.timeline_validator import TimelineValidator
+
+
+def span(index, position, length):
+    return TimelineSpan(id=f"clip-{index}", name=f"Clip {index}", timeline_position=position, length=length)
+
+
+class TestTimelineIndex:
+
+    def test_overlapping_matches_linear_check(self):
+        rng = random.Random(3)
+        spans = [span(i, round(rng.uniform(0, 200), 1), rng.choice([0.5, 2.0, 5.0, 30.0])) for i in range(200)]
+        index = TimelineIndex(spans)
+
+        for _ in range(200):
+            start = round(rng.uniform(0, 220), 1)
+            length = rng.choice([0.0, 1.0, 4.0, 10.0])
+            expected = {
+                other.id for other in spans
+                if not TimelineValidator.check_overlap("probe", start, length, [other])[0]
+            }
+            assert {hit.id for hit in index.overlapping(start, start + length)} == expected
+
+    def test_move_keeps_queries_consistent(self):
+        index = TimelineIndex([span(0, 0.0, 5.0), span(1, 10.0, 5.0), span(2, 20.0, 30.0)])
+
+        index.move("clip-2", 40.0)
+        index.move("clip-0", 30.0)
+
+        assert index.find_overlap(0.0, 10.0) is None
+        assert index.find_overlap(32.0, 33.0).id == "clip-0"
+        assert index.find_overlap(60.0, 61.0).id == "clip-2"
+        assert index.get("clip-0").timeline_position == 30.0
+
+    def test_remove_shrinks_search_window(self):
+        index = TimelineIndex([span(0, 0.0, 100.0), span(1, 150.0, 2.0)])
+
+        index.remove("clip-0")
+
+        assert len(index) == 1
+        assert index.find_overlap(50.0, 60.0) is None
+        assert index.find_overlap(151.0, 151.5).id == "clip-1"
+
+    def test_next_available_position_skips_to_first_free_slot(self):
+        index = TimelineIndex([span(0, 0.0, 5.0), span(1, 5.1, 5.0), span(2, 20.0, 5.0)])
+
+        assert index.next_available_position(4.0, preferred_position=1.0) == 10.2
+        assert index.next_available_position(12.0, preferred_position=1.0) == 25.1
+        assert index.next_available_position(4.0, preferred_position=1.0, exclude="clip-0") == 1.0
+        assert index.next_available_position(2.0, preferred_position=15.0) == 15.0
+
+    def test_summary_tracks_changes(self):
+        index = TimelineIndex([span(0, 0.0, 5.0), span(1, 10.0, 5.0)])
+        assert index.summary()["gaps"] == [{"start": 5.0, "end": 10.0, "duration": 5.0}]
+
+        index.move("clip-1", 5.0)
+        index.add(span(2, 10.0, 2.5))
+
+        summary = index.summary()
+        assert summary["gaps"] == []
+        assert summary["total_clips"] == 3
+        assert summary["total_duration"] == 12.5
+        assert summary["timeline_end"] == 12.5
+
+    def test_incremental_summary_matches_full_recompute(self):
+        rng = random.Random(11)
+        spans = {i: span(i, rng.randrange(0, 400) / 2, rng.choice([0.5, 2.0, 5.0, 20.0])) for i in range(60)}
+        index = TimelineIndex(list(spans.values()))
+
+        for step in range(300):
+            action = rng.random()
+            if action < 0.6 and spans:
+                clip_index = rng.choice(list(spans))
+                index.move(f"clip-{clip_index}", rng.randrange(0, 400) / 2)
+            elif action < 0.8 and spans:
+                clip_index = rng.choice(list(spans))
+                index.remove(f"clip-{clip_index}")
+                del spans[clip_index]
+            else:
+                spans[100 + step] = span(100 + step, rng.randrange(0, 400) / 2, rng.choice([1.0, 3.0]))
+                index.add(spans[100 + step])
+
+            current = [index.get(f"clip-{i}") for i in spans]
+            assert index.summary() == TimelineValidator.get_timeline_summary(current)
+
+
+class TestTimelineIndexCache:
+
+    async def test_concurrent_misses_load_once(self):
+        cache = TimelineIndexCache()
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await asyncio.sleep(0.01)
+            return [{"id": "clip-1", "name": "Clip", "timeline_position": 0.0, "length": 5.0}]
+
+        indexes = await asyncio.gather(*(cache.get("scene-1", loader) for _ in range(5)))
+
+        assert loads == 1
+        assert all(index is indexes[0] for index in indexes)
+
+    async def test_invalidate_and_ttl(self):
+        cache = TimelineIndexCache(ttl=60)
+
+        async def loader():
+            return []
+
+        first = await cache.get("scene-1", loader)
+        assert await cache.get("scene-1", loader) is first
+
+        cache.invalidate("scene-1")
+        second = await cache.get("scene-1", loader)
+        assert second is not first
+
+        cache.ttl = 0
+        second.loaded_at -= 1
+        assert cache.peek("scene-1") is None
+
+    async def test_evicts_least_recently_used_scene(self):
+        cache = TimelineIndexCache(max_scenes=2)
+
+        async def loader():
+            return []
+
+        await cache.get("scene-1", loader)
+        await cache.get("scene-2", loader)
+        await cache.get("scene-1", loader)
+        await cache.get("scene-3", loader)
+
+        assert cache.peek("scene-2") is None
+        assert cache.peek("scene-1") is not None
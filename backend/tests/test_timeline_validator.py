@@ -0,0 +1,83 @@
+import random
+from types import SimpleNamespace
+
+from utils.timeline_validator import TimelineValidator
+
+
+def make_clip(index, position, length):
+    return SimpleNamespace(id=f"clip-{index}", name=f"Clip {index}", timeline_position=position, length=length)
+
+
+def pairwise_overlaps(clips):
+    """Reference O(n^2) detection the sweep replaces"""
+    overlaps = []
+    for i, clip1 in enumerate(clips):
+        for clip2 in clips[i + 1:]:
+            is_valid, error = TimelineValidator.check_overlap(
+                clip1.id, clip1.timeline_position, clip1.length, [clip2]
+            )
+            if not is_valid:
+                overlaps.append((clip1.id, clip2.id, error))
+    return overlaps
+
+
+class TestAnalyzeTimeline:
+
+    def test_empty_timeline(self):
+        analysis = TimelineValidator.analyze_timeline([])
+
+        assert analysis["overlaps"] == []
+        assert analysis["gaps"] == []
+        assert analysis["summary"]["total_clips"] == 0
+
+    def test_matches_pairwise_detection(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            clips = [
+                make_clip(i, round(rng.uniform(0, 60), 1), rng.choice([0.0, 0.5, 2.0, 5.0, 12.0]))
+                for i in range(40)
+            ]
+
+            analysis = TimelineValidator.analyze_timeline(clips)
+
+            found = [(o["clip1_id"], o["clip2_id"], o["error"]) for o in analysis["overlaps"]]
+            assert found == pairwise_overlaps(clips)
+
+    def test_touching_clips_do_not_overlap(self):
+        clips = [make_clip(0, 0.0, 5.0), make_clip(1, 5.0, 5.0), make_clip(2, 5.0, 0.0)]
+
+        analysis = TimelineValidator.analyze_timeline(clips)
+
+        assert analysis["overlaps"] == []
+        assert analysis["summary"]["gaps"] == []
+
+    def test_gaps_use_furthest_covering_clip(self):
+        clips = [
+            make_clip(0, 0.0, 20.0),
+            make_clip(1, 2.0, 3.0),    # Ends inside clip 0: no gap after it
+            make_clip(2, 25.0, 5.0),
+            make_clip(3, 30.05, 1.0),  # Below the reporting threshold
+        ]
+
+        analysis = TimelineValidator.analyze_timeline(clips)
+
+        assert len(analysis["gaps"]) == 1
+        gap = analysis["gaps"][0]
+        assert gap["after_clip_id"] == "clip-0"
+        assert gap["before_clip_id"] == "clip-2"
+        assert gap["gap_duration"] == 5.0
+        assert len(analysis["summary"]["gaps"]) == 2
+        assert analysis["summary"]["timeline_end"] == 31.05
+        assert analysis["summary"]["total_duration"] == 29.0
+
+    def test_summary_matches_analysis(self):
+        clips = [make_clip(0, 10.0, 5.0), make_clip(1, 0.0, 4.0)]
+
+        summary = TimelineValidator.get_timeline_summary(clips)
+
+        assert summary == {
+            "total_clips": 2,
+            "total_duration": 9.0,
+            "timeline_end": 15.0,
+            "gaps": [{"start": 4.0, "end": 10.0, "duration": 6.0}]
+        }
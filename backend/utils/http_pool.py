@@ -0,0 +1,179 @@
+"""Pooled aiohttp sessions for outbound calls to ComfyUI / RunPod backends"""
+import asyncio
+import logging
+import statistics
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+RUNPOD_API_BASE = "https://api.runpod.ai"
+
+# Endpoints that submit a generation; used to report requests per generation
+SUBMIT_ENDPOINTS = {"POST /prompt", "POST /run", "POST /runsync"}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _endpoint_label(method: str, url: Any) -> str:
+    """
+    Collapse a request URL to 'METHOD /segment' for metrics.
+
+    ComfyUI paths use their first segment (/prompt, /history/<id>); versioned
+    RunPod paths (/v2/<endpoint_id>/<action>/...) use the action.
+    """
+    segments = urlsplit(str(url)).path.strip("/").split("/")
+    segment = segments[0]
+    if len(segments) >= 3 and segment[:1] == "v" and segment[1:].isdigit():
+        segment = segments[2]
+    return f"{method} /{segment}"
+
+
+class HttpSessionPool:
+    """
+    Registry of long-lived aiohttp sessions, one per backend origin.
+
+    Each session owns a keep-alive TCPConnector with a per-host connection
+    limit and a DNS cache, so repeated status checks, prompt submissions and
+    history polls against the same ComfyUI/RunPod host reuse TCP (and TLS)
+    connections. Request latency and connection reuse are recorded per origin.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = 8,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        total_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        max_samples: int = 1000,
+    ):
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self._sessions: Dict[str, Tuple[aiohttp.ClientSession, asyncio.AbstractEventLoop]] = {}
+
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._request_counts: Dict[str, int] = defaultdict(int)
+        self._endpoint_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._connections_created: Dict[str, int] = defaultdict(int)
+        self._connections_reused: Dict[str, int] = defaultdict(int)
+        self._sessions_created = 0
+
+    def _trace_config(self, origin: str) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.start = time.perf_counter()
+
+        async def on_request_end(session, ctx, params):
+            self._request_counts[origin] += 1
+            label = _endpoint_label(params.method, params.url)
+            self._endpoint_counts[(origin, label)] += 1
+            self._latencies[(origin, label)].append(time.perf_counter() - ctx.start)
+
+        async def on_connection_create_end(session, ctx, params):
+            self._connections_created[origin] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._connections_reused[origin] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def get(self, url: str) -> aiohttp.ClientSession:
+        """Pooled session for the origin of ``url``, created on first use"""
+        origin = _origin(url)
+        loop = asyncio.get_running_loop()
+        cached = self._sessions.get(origin)
+        if cached:
+            session, session_loop = cached
+            if not session.closed and session_loop is loop:
+                return session
+
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            trace_configs=[self._trace_config(origin)],
+        )
+        self._sessions[origin] = (session, loop)
+        self._sessions_created += 1
+        logger.info(f"Opened pooled HTTP session for {origin}")
+        return session
+
+    @asynccontextmanager
+    async def session(self, url: str) -> AsyncIterator[aiohttp.ClientSession]:
+        """``async with`` form of get(); the session stays open for reuse"""
+        yield self.get(url)
+
+    async def close(self):
+        """Close every pooled session (application shutdown)"""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session, _ in sessions:
+            if not session.closed:
+                await session.close()
+        if sessions:
+            logger.info(f"Closed {len(sessions)} pooled HTTP session(s)")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-origin request counts, connection reuse and latency percentiles"""
+        origins: Dict[str, Dict[str, Any]] = {}
+        for origin in set(self._request_counts) | set(self._connections_created):
+            requests = self._request_counts[origin]
+            submits = sum(
+                count for (count_origin, label), count in self._endpoint_counts.items()
+                if count_origin == origin and label in SUBMIT_ENDPOINTS
+            )
+            origins[origin] = {
+                "requests": requests,
+                "generations_submitted": submits,
+                "requests_per_generation": round(requests / submits, 2) if submits else None,
+                "connections_created": self._connections_created[origin],
+                "connections_reused": self._connections_reused[origin],
+                "endpoints": {},
+            }
+
+        for (origin, label), samples in self._latencies.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            origins[origin]["endpoints"][label] = {
+                "requests": self._endpoint_counts[(origin, label)],
+                "p50_ms": round(statistics.median(ordered) * 1000, 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+            }
+
+        return {
+            "open_sessions": sum(1 for session, _ in self._sessions.values() if not session.closed),
+            "sessions_created": self._sessions_created,
+            "origins": origins,
+        }
+
+
+http_pool = HttpSessionPool(
+    limit_per_host=config.COMFYUI_HTTP_LIMIT_PER_HOST,
+    dns_cache_ttl=config.COMFYUI_HTTP_DNS_CACHE_TTL,
+    keepalive_timeout=config.COMFYUI_HTTP_KEEPALIVE_TIMEOUT,
+    total_timeout=config.COMFYUI_HTTP_TOTAL_TIMEOUT,
+    connect_timeout=config.COMFYUI_HTTP_CONNECT_TIMEOUT,
+)
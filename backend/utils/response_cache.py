@@ -0,0 +1,77 @@
+"""In-process LRU of serialized read responses, keyed by project revision"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+
+def make_etag(revision: int, key: Hashable) -> str:
+    """Strong validator for one representation of a project at a revision"""
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+    return f'"r{revision}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def serialize(data: Any) -> bytes:
+    """Encode a response body the way FastAPI's JSONResponse does"""
+    return json.dumps(
+        jsonable_encoder(data),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class ResponseCache:
+    """
+    Serialized response bodies keyed by (project_id, revision, key).
+
+    Entries for older revisions are never served again; they are dropped when
+    their project's revision is bumped or pushed out by the LRU bound.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, Hashable], bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, project_id: str, revision: int, key: Hashable) -> Optional[bytes]:
+        entry = (project_id, revision, key)
+        body = self._entries.get(entry)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(entry)
+        self.hits += 1
+        return body
+
+    def put(self, project_id: str, revision: int, key: Hashable, body: bytes):
+        entry = (project_id, revision, key)
+        self._entries[entry] = body
+        self._entries.move_to_end(entry)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, project_id: str):
+        """Drop every cached response of a project"""
+        for entry in [entry for entry in self._entries if entry[0] == project_id]:
+            del self._entries[entry]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,249 @@
+"""In-memory per-scene interval index for timeline placement queries"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import config
+from utils.timeline_validator import timeline_validator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TimelineSpan:
+    """The timeline footprint of one clip"""
+    id: str
+    name: str
+    timeline_position: float
+    length: float
+
+    @property
+    def end(self) -> float:
+        return self.timeline_position + self.length
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "TimelineSpan":
+        return cls(
+            id=document["id"],
+            name=document.get("name", ""),
+            timeline_position=document.get("timeline_position", 0.0),
+            length=document.get("length", 5.0),
+        )
+
+
+def _key(span: TimelineSpan) -> Tuple[float, float, str]:
+    return (span.timeline_position, span.end, span.id)
+
+
+class TimelineIndex:
+    """
+    Clips of one scene kept sorted by start time.
+
+    Overlap queries bisect the start-sorted array: a clip can only overlap
+    [start, end) if it starts before ``end`` and after ``start`` minus the
+    longest clip length, so only that window is scanned. Moves, inserts and
+    removals are a bisect plus a list insert/delete, and coverage/gaps are
+    only recomputed over the stretch of timeline the change affects.
+    """
+
+    def __init__(self, spans: Iterable[TimelineSpan] = ()):
+        self._spans: List[TimelineSpan] = sorted(spans, key=_key)
+        self._keys = [_key(span) for span in self._spans]
+        self._by_id = {span.id: span for span in self._spans}
+        self._max_length = max((span.length for span in self._spans), default=0.0)
+        self._total_duration = sum(span.length for span in self._spans)
+        # Parallel to _spans: furthest end up to and including each clip, and
+        # the gap (if any) between that coverage and the next clip's start
+        self._reach: List[Optional[float]] = [None] * len(self._spans)
+        self._gaps: List[Optional[Dict[str, float]]] = [None] * len(self._spans)
+        self._refresh_from(0)
+        self._summary: Optional[Dict[str, Any]] = None
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __contains__(self, clip_id: str) -> bool:
+        return clip_id in self._by_id
+
+    def get(self, clip_id: str) -> Optional[TimelineSpan]:
+        return self._by_id.get(clip_id)
+
+    def spans(self) -> List[TimelineSpan]:
+        """All clips in start order"""
+        return list(self._spans)
+
+    def starting_from(self, position: float) -> List[TimelineSpan]:
+        """Clips starting at or after position, in start order"""
+        return self._spans[bisect_left(self._keys, (position,)):]
+
+    def add(self, span: TimelineSpan):
+        if span.id in self._by_id:
+            self.remove(span.id)
+        index = bisect_left(self._keys, _key(span))
+        self._keys.insert(index, _key(span))
+        self._spans.insert(index, span)
+        self._reach.insert(index, None)
+        self._gaps.insert(index, None)
+        self._by_id[span.id] = span
+        self._max_length = max(self._max_length, span.length)
+        self._total_duration += span.length
+        self._refresh_from(index)
+        self._summary = None
+
+    def remove(self, clip_id: str) -> Optional[TimelineSpan]:
+        span = self._by_id.pop(clip_id, None)
+        if span is None:
+            return None
+        index = bisect_left(self._keys, _key(span))
+        del self._keys[index]
+        del self._spans[index]
+        del self._reach[index]
+        del self._gaps[index]
+        if span.length >= self._max_length:
+            self._max_length = max((other.length for other in self._spans), default=0.0)
+        self._total_duration -= span.length
+        self._refresh_from(index)
+        self._summary = None
+        return span
+
+    def _refresh_from(self, position: int):
+        """
+        Recompute coverage and gaps from ``position`` onwards, stopping as soon
+        as the coverage reaching a clip matches what was stored before the
+        change; everything after that point is unaffected.
+        """
+        reach = self._reach[position - 1] if position > 0 else None
+        stored = None
+        for i in range(position, len(self._spans)):
+            if i > position and reach == stored:
+                return
+            span = self._spans[i]
+            gap = None
+            if reach is not None and span.timeline_position > reach:
+                gap = {
+                    "start": reach,
+                    "end": span.timeline_position,
+                    "duration": span.timeline_position - reach
+                }
+            stored = self._reach[i]
+            self._gaps[i] = gap
+            reach = span.end if reach is None else max(reach, span.end)
+            self._reach[i] = reach
+
+    def move(self, clip_id: str, position: float) -> Optional[TimelineSpan]:
+        span = self.remove(clip_id)
+        if span is None:
+            return None
+        span.timeline_position = position
+        self.add(span)
+        return span
+
+    def overlapping(self, start: float, end: float, exclude: Optional[str] = None) -> List[TimelineSpan]:
+        """Clips overlapping [start, end), in start order"""
+        low = bisect_left(self._keys, (start - self._max_length,))
+        high = bisect_left(self._keys, (end,))
+        return [
+            span for span in self._spans[low:high]
+            if span.id != exclude and span.end > start and span.timeline_position < end
+        ]
+
+    def find_overlap(self, start: float, end: float, exclude: Optional[str] = None) -> Optional[TimelineSpan]:
+        hits = self.overlapping(start, end, exclude)
+        return hits[0] if hits else None
+
+    def next_available_position(
+        self,
+        length: float,
+        preferred_position: float = 0,
+        exclude: Optional[str] = None,
+        spacing: float = 0.1
+    ) -> float:
+        """First position at or after preferred_position where a clip of this length fits"""
+        position = preferred_position
+        while True:
+            hits = self.overlapping(position, position + length, exclude)
+            if not hits:
+                return round(position, 2)
+            position = max(span.end for span in hits) + spacing
+
+    def summary(self) -> Dict[str, Any]:
+        """Same result as TimelineValidator.get_timeline_summary, from the maintained state"""
+        if self._summary is None:
+            if not self._spans:
+                self._summary = timeline_validator.get_timeline_summary([])
+            else:
+                self._summary = {
+                    "total_clips": len(self._spans),
+                    "total_duration": round(self._total_duration, 2),
+                    "timeline_end": round(self._reach[-1], 2),
+                    "gaps": [gap for gap in self._gaps if gap]
+                }
+        return self._summary
+
+
+class TimelineIndexCache:
+    """
+    LRU of scene timeline indexes.
+
+    Writers in this process update or invalidate entries directly; the TTL
+    bounds staleness from writes made by other processes.
+    """
+
+    def __init__(self, max_scenes: int = 256, ttl: float = 60.0):
+        self.max_scenes = max_scenes
+        self.ttl = ttl
+        self._indexes: "OrderedDict[str, TimelineIndex]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(
+        self,
+        scene_id: str,
+        loader: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> TimelineIndex:
+        """Cached index for a scene, loading it with ``loader`` on a miss"""
+        index = self.peek(scene_id)
+        if index is not None:
+            return index
+
+        lock = self._locks.setdefault(scene_id, asyncio.Lock())
+        async with lock:
+            index = self.peek(scene_id)
+            if index is None:
+                documents = await loader()
+                index = TimelineIndex(TimelineSpan.from_document(doc) for doc in documents)
+                self._indexes[scene_id] = index
+                self._indexes.move_to_end(scene_id)
+                while len(self._indexes) > self.max_scenes:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    self._locks.pop(evicted, None)
+        return index
+
+    def peek(self, scene_id: str) -> Optional[TimelineIndex]:
+        index = self._indexes.get(scene_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.loaded_at > self.ttl:
+            del self._indexes[scene_id]
+            return None
+        self._indexes.move_to_end(scene_id)
+        return index
+
+    def invalidate(self, scene_id: Optional[str]):
+        """Drop a scene's index after its clips were written"""
+        if scene_id is not None:
+            self._indexes.pop(scene_id, None)
+
+    def clear(self):
+        self._indexes.clear()
+
+
+# Global instance
+timeline_index_cache = TimelineIndexCache(
+    max_scenes=config.TIMELINE_INDEX_MAX_SCENES,
+    ttl=config.TIMELINE_INDEX_TTL,
+)
@@ -1,4 +1,5 @@
 from typing import List, Tuple, Optional, Dict, Any
+import heapq
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,14 +40,26 @@ class TimelineValidator:
             # Check for overlap
             # Overlap occurs if: new_start < other_end AND new_end > other_start
             if new_position < other_end and new_end > other_start:
-                overlap_amount = min(new_end, other_end) - max(new_position, other_start)
-                return False, (
-                    f"Clip would overlap with '{other_clip.name}' by {overlap_amount:.2f} seconds. "
-                    f"Other clip occupies {other_start:.2f}s to {other_end:.2f}s"
+                return False, TimelineValidator._overlap_message(
+                    new_position, new_end, other_clip.name, other_start, other_end
                 )
 
         return True, None
 
+    @staticmethod
+    def _overlap_message(
+        start: float,
+        end: float,
+        other_name: str,
+        other_start: float,
+        other_end: float
+    ) -> str:
+        overlap_amount = min(end, other_end) - max(start, other_start)
+        return (
+            f"Clip would overlap with '{other_name}' by {overlap_amount:.2f} seconds. "
+            f"Other clip occupies {other_start:.2f}s to {other_end:.2f}s"
+        )
+
     @staticmethod
     def find_next_available_position(
         clip_length: float,
@@ -91,35 +104,116 @@ class TimelineValidator:
         Returns:
             Dictionary with timeline statistics
         """
+        return TimelineValidator.analyze_timeline(clips, detect_overlaps=False)["summary"]
+
+    @staticmethod
+    def analyze_timeline(
+        clips: List[Any],
+        gap_threshold: float = 0.1,
+        detect_overlaps: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Find every overlap and gap on a timeline in one sweep
+
+        Clips are sorted once by start; a min-heap holds the clips still
+        playing (keyed by end), so each new clip overlaps exactly the clips
+        left in the heap after expired ones are popped. Runs in
+        O(n log n + k) for n clips and k overlapping pairs.
+
+        Args:
+            clips: List of Clip objects (id, name, timeline_position, length)
+            gap_threshold: Only gaps longer than this are reported in "gaps"
+            detect_overlaps: Skip pairing when only the summary is needed
+
+        Returns:
+            {"summary": ..., "overlaps": [...], "gaps": [...]}; overlaps are
+            ordered by the clips' positions in the input list
+        """
         if not clips:
             return {
-                "total_clips": 0,
-                "total_duration": 0,
-                "timeline_end": 0,
+                "summary": {
+                    "total_clips": 0,
+                    "total_duration": 0,
+                    "timeline_end": 0,
+                    "gaps": []
+                },
+                "overlaps": [],
                 "gaps": []
             }
 
-        sorted_clips = sorted(clips, key=lambda c: c.timeline_position)
-        total_duration = sum(c.length for c in clips)
-        timeline_end = max(c.timeline_position + c.length for c in clips)
+        # Zero-length clips sort before longer clips starting at the same time,
+        # so they never "overlap" a clip that merely starts where they sit
+        order = sorted(
+            range(len(clips)),
+            key=lambda i: (clips[i].timeline_position, clips[i].timeline_position + clips[i].length)
+        )
 
-        # Find gaps
+        active: List[Tuple[float, int]] = []  # (end, index) of clips still playing
+        pairs: List[Tuple[int, int]] = []
+        summary_gaps = []
         gaps = []
-        for i in range(len(sorted_clips) - 1):
-            current_end = sorted_clips[i].timeline_position + sorted_clips[i].length
-            next_start = sorted_clips[i + 1].timeline_position
-
-            if next_start > current_end:
-                gaps.append({
-                    "start": current_end,
-                    "end": next_start,
-                    "duration": next_start - current_end
+        total_duration = 0.0
+        covered_until = None  # Furthest end seen so far, and the clip reaching it
+        covering = None
+
+        for index in order:
+            clip = clips[index]
+            start = clip.timeline_position
+            end = start + clip.length
+            total_duration += clip.length
+
+            if covered_until is not None and start > covered_until:
+                gap_duration = start - covered_until
+                summary_gaps.append({
+                    "start": covered_until,
+                    "end": start,
+                    "duration": gap_duration
                 })
+                if gap_duration > gap_threshold:
+                    gaps.append({
+                        "after_clip_id": covering.id,
+                        "after_clip_name": covering.name,
+                        "before_clip_id": clip.id,
+                        "before_clip_name": clip.name,
+                        "gap_start": covered_until,
+                        "gap_end": start,
+                        "gap_duration": gap_duration
+                    })
+
+            if detect_overlaps:
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+                pairs.extend((min(other, index), max(other, index)) for _, other in active)
+                heapq.heappush(active, (end, index))
+
+            if covered_until is None or end > covered_until:
+                covered_until = end
+                covering = clip
+
+        overlaps = []
+        for first, second in sorted(pairs):
+            clip1, clip2 = clips[first], clips[second]
+            clip1_start = clip1.timeline_position
+            clip2_start = clip2.timeline_position
+            overlaps.append({
+                "clip1_id": clip1.id,
+                "clip1_name": clip1.name,
+                "clip2_id": clip2.id,
+                "clip2_name": clip2.name,
+                "error": TimelineValidator._overlap_message(
+                    clip1_start, clip1_start + clip1.length,
+                    clip2.name, clip2_start, clip2_start + clip2.length
+                )
+            })
 
         return {
-            "total_clips": len(clips),
-            "total_duration": round(total_duration, 2),
-            "timeline_end": round(timeline_end, 2),
+            "summary": {
+                "total_clips": len(clips),
+                "total_duration": round(total_duration, 2),
+                "timeline_end": round(covered_until, 2),
+                "gaps": summary_gaps
+            },
+            "overlaps": overlaps,
             "gaps": gaps
         }
 